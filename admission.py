@@ -0,0 +1,331 @@
+import os
+import math
+import time
+import asyncio
+import logging
+import threading
+import contextvars
+from collections import deque
+
+import coordination
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Each upstream (the FastAPI model service, Gemini) gets a fixed number of
+# concurrent calls per worker process. Callers beyond that wait in a bounded
+# queue per priority lane; interactive waiters are always served before bulk
+# ones, and bulk calls may hold at most BULK_SHARE of the slots so a burst of
+# batch work cannot starve /analyze/single. A full queue is answered with
+# 429 and a wait longer than MAX_WAIT with 503, both with Retry-After.
+INTERACTIVE = 'interactive'
+BULK = 'bulk'
+LANES = (INTERACTIVE, BULK)
+
+UPSTREAM_LIMITS = {
+    'model': int(os.getenv('MODEL_MAX_CONCURRENCY', '16')),
+    'gemini': int(os.getenv('GEMINI_MAX_CONCURRENCY', '8')),
+}
+QUEUE_SIZE = int(os.getenv('ADMISSION_QUEUE_SIZE', '32'))  # Waiters per lane
+MAX_WAIT = float(os.getenv('ADMISSION_MAX_WAIT', '5'))  # seconds
+BULK_SHARE = float(os.getenv('ADMISSION_BULK_SHARE', '0.75'))
+HOLD_TIME_ALPHA = 0.2  # Weight of the latest call in the moving average used for Retry-After
+
+# Optional calls per minute across the whole cluster (0 disables), enforced
+# with a token bucket in the coordination backend that bursts up to 10
+# seconds' worth of calls. Calls over the rate are shed with 429.
+UPSTREAM_RATES = {
+    'model': float(os.getenv('MODEL_RATE_LIMIT', '0')),
+    'gemini': float(os.getenv('GEMINI_RATE_LIMIT', '0')),
+}
+
+class Overloaded(Exception):
+    """Raised when a call is shed instead of queued
+
+    Attributes:
+        status (int): 429 if the lane's queue was full, 503 if the wait timed out
+        retry_after (int): Suggested seconds before retrying
+    """
+
+    def __init__(self, upstream, lane, status, retry_after, reason=None):
+        reason = reason or ("queue is full" if status == 429 else "timed out waiting for a slot")
+        super().__init__(f"{upstream} is overloaded: {lane} {reason}")
+        self.upstream = upstream
+        self.lane = lane
+        self.status = status
+        self.retry_after = retry_after
+
+# Lane of the slot held by the enclosing with block, so code running under
+# it (the LLM router's hedges) can take extra slots in the same lane
+_current_lane = contextvars.ContextVar('admission_lane', default=None)
+
+def current_lane():
+    """Lane of the slot the current request holds, or None outside a with block"""
+    return _current_lane.get()
+
+class Ticket:
+    """A held slot; release it (or leave the with block) when the upstream call is done"""
+
+    def __init__(self, limiter, lane):
+        self.limiter = limiter
+        self.lane = lane
+        self.started = time.monotonic()
+        self.released = False
+        self._context_token = None
+
+    def release(self):
+        if not self.released:
+            self.released = True
+            self.limiter._release(self)
+
+    def __enter__(self):
+        self._context_token = _current_lane.set(self.lane)
+        return self
+
+    def __exit__(self, *exc):
+        if self._context_token is not None:
+            _current_lane.reset(self._context_token)
+            self._context_token = None
+        self.release()
+
+class _Waiter:
+    def __init__(self, lane, loop=None):
+        self.lane = lane
+        self.granted = False
+        self.queued_at = time.monotonic()
+        self.loop = loop
+        if loop is None:
+            self.event = threading.Event()
+        else:
+            self.future = loop.create_future()
+
+    def wake(self):
+        if self.loop is None:
+            self.event.set()
+        else:
+            self.loop.call_soon_threadsafe(self._resolve)
+
+    def _resolve(self):
+        if not self.future.done():
+            self.future.set_result(True)
+
+class Limiter:
+    """Concurrency limit with per-lane bounded wait queues for one upstream
+
+    Args:
+        name (str): Upstream name, used in errors and stats
+        limit (int): Concurrent calls allowed
+        queue_size (int): Waiters allowed per lane
+        max_wait (float): Seconds a waiter may queue before it is shed
+        bulk_share (float): Fraction of the slots bulk calls may hold
+    """
+
+    def __init__(self, name, limit, queue_size=QUEUE_SIZE, max_wait=MAX_WAIT, bulk_share=BULK_SHARE):
+        self.name = name
+        self.limit = max(int(limit), 1)
+        self.bulk_limit = max(int(self.limit * bulk_share), 1)
+        self.queue_size = queue_size
+        self.max_wait = max_wait
+        self._lock = threading.Lock()
+        self._waiters = {lane: deque() for lane in LANES}
+        self._active = {lane: 0 for lane in LANES}
+        self._hold_time = 1.0
+        self._stats = {lane: {"admitted": 0, "queued": 0, "shed_full": 0, "shed_timeout": 0, "shed_rate": 0,
+                              "abandoned": 0, "wait_seconds": 0.0}
+                       for lane in LANES}
+
+    def _has_slot(self, lane):
+        if sum(self._active.values()) >= self.limit:
+            return False
+        return lane == INTERACTIVE or self._active[BULK] < self.bulk_limit
+
+    def _admit(self, lane, waited=0.0):
+        self._active[lane] += 1
+        self._stats[lane]["admitted"] += 1
+        self._stats[lane]["wait_seconds"] += waited
+
+    def _retry_after(self):
+        waiting = sum(len(q) for q in self._waiters.values())
+        return max(1, math.ceil(self._hold_time * (waiting / self.limit + 1)))
+
+    def _enter(self, lane, loop=None):
+        """Take a slot or join the lane's queue; must hold the lock
+
+        Returns:
+            _Waiter: The queued waiter, or None if a slot was taken immediately
+        """
+        if lane not in self._waiters:
+            raise ValueError(f"Unknown lane: {lane}")
+        # Nobody may pass a waiter of the same or higher priority
+        ahead = self._waiters[INTERACTIVE] if lane == INTERACTIVE else (self._waiters[INTERACTIVE] or self._waiters[BULK])
+        if not ahead and self._has_slot(lane):
+            self._admit(lane)
+            return None
+        if len(self._waiters[lane]) >= self.queue_size:
+            self._stats[lane]["shed_full"] += 1
+            raise Overloaded(self.name, lane, 429, self._retry_after())
+        waiter = _Waiter(lane, loop)
+        self._waiters[lane].append(waiter)
+        self._stats[lane]["queued"] += 1
+        return waiter
+
+    def _abandon(self, waiter):
+        """Handle a waiter whose wait ended without a wake-up; must hold the lock
+
+        Returns:
+            bool: True if the slot was granted after all
+        """
+        if waiter.granted:
+            return True
+        self._waiters[waiter.lane].remove(waiter)
+        return False
+
+    def _dispatch(self):
+        """Hand free slots to waiters, interactive first; must hold the lock"""
+        now = time.monotonic()
+        for lane in LANES:
+            queue = self._waiters[lane]
+            while queue and self._has_slot(lane):
+                waiter = queue.popleft()
+                waiter.granted = True
+                self._admit(lane, now - waiter.queued_at)
+                waiter.wake()
+
+    def _release(self, ticket):
+        with self._lock:
+            self._active[ticket.lane] -= 1
+            held = time.monotonic() - ticket.started
+            self._hold_time += HOLD_TIME_ALPHA * (held - self._hold_time)
+            self._dispatch()
+
+    def acquire(self, lane=INTERACTIVE):
+        """Wait for a slot (blocking; cooperative under gevent)
+
+        Raises:
+            Overloaded: If the lane's queue is full or the wait times out
+        """
+        with self._lock:
+            waiter = self._enter(lane)
+        if waiter is not None and not waiter.event.wait(self.max_wait):
+            with self._lock:
+                if not self._abandon(waiter):
+                    self._stats[lane]["shed_timeout"] += 1
+                    raise Overloaded(self.name, lane, 503, self._retry_after())
+        return Ticket(self, lane)
+
+    def try_acquire(self, lane=INTERACTIVE):
+        """Take a free slot without waiting or queueing
+
+        Returns:
+            Ticket: The slot, or None if the lane has no free slot or waiters
+        """
+        with self._lock:
+            ahead = self._waiters[INTERACTIVE] if lane == INTERACTIVE else (self._waiters[INTERACTIVE] or self._waiters[BULK])
+            if ahead or not self._has_slot(lane):
+                return None
+            self._admit(lane)
+        return Ticket(self, lane)
+
+    def occupy(self, lane=INTERACTIVE):
+        """Count a call that is already running, whether or not a slot is free
+
+        For an upstream call whose caller stopped waiting for it (a timed-out
+        or losing request); until it ends, new callers are held back.
+        """
+        with self._lock:
+            self._active[lane] += 1
+            self._stats[lane]["abandoned"] += 1
+        return Ticket(self, lane)
+
+    async def acquire_async(self, lane=INTERACTIVE):
+        """Wait for a slot on the event loop
+
+        Raises:
+            Overloaded: If the lane's queue is full or the wait times out
+        """
+        with self._lock:
+            waiter = self._enter(lane, asyncio.get_running_loop())
+        if waiter is not None:
+            try:
+                await asyncio.wait_for(asyncio.shield(waiter.future), self.max_wait)
+            except asyncio.TimeoutError:
+                with self._lock:
+                    if not self._abandon(waiter):
+                        self._stats[lane]["shed_timeout"] += 1
+                        raise Overloaded(self.name, lane, 503, self._retry_after())
+            except asyncio.CancelledError:
+                with self._lock:
+                    if self._abandon(waiter):
+                        # Granted just as the caller went away; pass the slot on
+                        self._active[lane] -= 1
+                        self._dispatch()
+                raise
+        return Ticket(self, lane)
+
+    def get_stats(self):
+        with self._lock:
+            lanes = {}
+            for lane in LANES:
+                stats = dict(self._stats[lane])
+                wait_seconds = stats.pop("wait_seconds")
+                stats["active"] = self._active[lane]
+                stats["queue_depth"] = len(self._waiters[lane])
+                stats["mean_wait_ms"] = wait_seconds / stats["admitted"] * 1000 if stats["admitted"] else 0.0
+                lanes[lane] = stats
+            return {
+                "limit": self.limit,
+                "bulk_limit": self.bulk_limit,
+                "queue_size": self.queue_size,
+                "max_wait_s": self.max_wait,
+                "rate_limit_per_min": UPSTREAM_RATES.get(self.name, 0),
+                "mean_hold_s": round(self._hold_time, 3),
+                "lanes": lanes,
+            }
+
+# -------------------------------
+# Per-process limiters
+# -------------------------------
+limiters = {name: Limiter(name, limit) for name, limit in UPSTREAM_LIMITS.items()}
+
+def _check_rate(upstream, lane):
+    """Take a token from the upstream's cluster-wide bucket, if it has a rate limit"""
+    per_minute = UPSTREAM_RATES.get(upstream, 0)
+    if per_minute <= 0:
+        return
+    if not coordination.get_backend().take(f"rate:{upstream}", per_minute / 60, max(per_minute / 6, 1)):
+        limiter = limiters[upstream]
+        with limiter._lock:
+            limiter._stats[lane]["shed_rate"] += 1
+        raise Overloaded(upstream, lane, 429, max(1, math.ceil(60 / per_minute)),
+                         reason=f"rate limit of {per_minute:g}/min reached")
+
+def acquire(upstream, lane=INTERACTIVE):
+    """Hold a slot for one call to upstream ('model' or 'gemini'); use as a context manager"""
+    _check_rate(upstream, lane)
+    return limiters[upstream].acquire(lane)
+
+def try_acquire(upstream, lane=INTERACTIVE):
+    """Take a slot for an optional extra call, such as a hedge, only if one is free now
+
+    Returns:
+        Ticket: The slot, or None if it would have to wait or is over the rate limit
+    """
+    try:
+        _check_rate(upstream, lane)
+    except Overloaded:
+        return None
+    return limiters[upstream].try_acquire(lane)
+
+def occupy(upstream, lane=INTERACTIVE):
+    """Count a call its caller abandoned against upstream's limit until the call ends"""
+    return limiters[upstream].occupy(lane)
+
+async def acquire_async(upstream, lane=INTERACTIVE):
+    # The cluster-wide bucket may live in redis; take the token off the event loop
+    if UPSTREAM_RATES.get(upstream, 0) > 0:
+        await asyncio.get_running_loop().run_in_executor(None, _check_rate, upstream, lane)
+    return await limiters[upstream].acquire_async(lane)
+
+def get_stats():
+    """Concurrency, queue depth and shed counts per upstream and lane"""
+    return {name: limiter.get_stats() for name, limiter in limiters.items()}
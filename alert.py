@@ -1,6 +1,8 @@
 from slack_sdk import WebClient
 from slack_sdk.errors import SlackApiError
 import yagmail
+import asyncio
+import tracing
 
 # -------------------------------
 # Slack setup
@@ -19,8 +21,8 @@ EMAIL_PASS = "cdej wqzx feah uiav"
 # -------------------------------
 # Send Slack Alert (blocks)
 # -------------------------------
-def send_slack_alert(text, sentiment, score, urgency, recommendation):
-    blocks = [
+def build_slack_blocks(text, sentiment, score, urgency, recommendation):
+    return [
         {"type": "section",
          "text": {"type": "mrkdwn",
                   "text": "*🚨 Customer Sentiment Alert!*"}},
@@ -34,8 +36,12 @@ def send_slack_alert(text, sentiment, score, urgency, recommendation):
          ]}
     ]
 
+def send_slack_alert(text, sentiment, score, urgency, recommendation):
+    blocks = build_slack_blocks(text, sentiment, score, urgency, recommendation)
+
     try:
-        slack_client.chat_postMessage(channel=SLACK_CHANNEL, blocks=blocks)
+        with tracing.span('slack_post'):
+            slack_client.chat_postMessage(channel=SLACK_CHANNEL, blocks=blocks)
         print("✅ Slack alert sent!")
     except SlackApiError as e:
         print(f"❌ Slack Error: {e.response['error']}")
@@ -54,7 +60,8 @@ def send_email_alert(subject, text, sentiment, score, urgency, recommendation, r
         <p><strong>Urgency:</strong> {urgency}</p>
         <p><strong>Recommended Response:</strong> {recommendation}</p>
         """
-        yag.send(to=recipient, subject=subject, contents=email_body)
+        with tracing.span('smtp_send'):
+            yag.send(to=recipient, subject=subject, contents=email_body)
         print("✅ Email alert sent!")
     except Exception as e:
         print(f"❌ Email Error: {e}")
@@ -64,4 +71,29 @@ def send_email_alert(subject, text, sentiment, score, urgency, recommendation, r
 # -------------------------------
 def send_alert(text, sentiment, score, urgency, recommendation, recipient=EMAIL_USER):
     send_slack_alert(text, sentiment, score, urgency, recommendation)
-    send_email_alert("Customer Sentiment Alert", text, sentiment, score, urgency, recommendation, recipient)
\ No newline at end of file
+    send_email_alert("Customer Sentiment Alert", text, sentiment, score, urgency, recommendation, recipient)
+
+# -------------------------------
+# Async variants (used by async_app)
+# -------------------------------
+async def send_slack_alert_async(client, text, sentiment, score, urgency, recommendation):
+    """Post the Slack alert with an AsyncWebClient sharing the app's connection pool"""
+    blocks = build_slack_blocks(text, sentiment, score, urgency, recommendation)
+
+    try:
+        with tracing.span('slack_post'):
+            await client.chat_postMessage(channel=SLACK_CHANNEL, blocks=blocks)
+        print("✅ Slack alert sent!")
+    except SlackApiError as e:
+        print(f"❌ Slack Error: {e.response['error']}")
+
+async def send_alert_async(client, text, sentiment, score, urgency, recommendation, recipient=EMAIL_USER):
+    """Send Slack and email alerts concurrently; SMTP runs in the default executor"""
+    loop = asyncio.get_running_loop()
+    await asyncio.gather(
+        send_slack_alert_async(client, text, sentiment, score, urgency, recommendation),
+        loop.run_in_executor(
+            None, send_email_alert,
+            "Customer Sentiment Alert", text, sentiment, score, urgency, recommendation, recipient
+        ),
+    )
@@ -0,0 +1,364 @@
+import os
+import json
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import coordination
+from term_tracker import window_seconds
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Declarative alert rules evaluated on every stored feedback entry, so alerts
+# no longer depend on a browser calling /send-alert. Each rule keeps O(1)
+# state per event: sliding windows are rings of WINDOW_BUCKETS counters.
+# Rules come from ALERT_RULES_FILE (a JSON list) or DEFAULT_RULES. Entries
+# arrive as store-change events (see coordination.STORE_CHANNEL) and are
+# evaluated only by the elected leader, so rule state and alerts are not
+# duplicated per worker. Matching rules call alert.send_alert in the background.
+ENABLED = os.getenv('ALERT_RULES_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+RULES_FILE = os.getenv('ALERT_RULES_FILE', 'alert_rules.json')
+DEFAULT_COOLDOWN = float(os.getenv('ALERT_RULE_COOLDOWN', '300'))  # seconds between alerts of one rule
+WINDOW_BUCKETS = 60
+MAX_ALERT_TEXT = 500
+
+DEFAULT_RULES = [
+    {"name": "very-negative", "type": "event", "match": {"sentiment": "negative", "min_score": 0.95},
+     "cooldown": 60, "urgency": "High", "recommendation": "Immediate response recommended."},
+    {"name": "negative-ratio", "type": "ratio", "match": {"sentiment": "negative"},
+     "window": "15m", "above": 0.6, "min_events": 20, "urgency": "High",
+     "recommendation": "Review recent negative feedback for a common cause."},
+    {"name": "negative-spike", "type": "spike", "match": {"sentiment": "negative"},
+     "window": "5m", "baseline": "1h", "factor": 3, "min_events": 10, "urgency": "High",
+     "recommendation": "Check for an outage or a bad release."},
+]
+
+# -------------------------------
+# Building blocks
+# -------------------------------
+class Match:
+    """Entry filter: sentiment, source and score bounds, all optional"""
+
+    def __init__(self, spec=None):
+        spec = spec or {}
+        unknown = set(spec) - {"sentiment", "source", "min_score", "max_score"}
+        if unknown:
+            raise ValueError(f"Unknown match fields: {', '.join(sorted(unknown))}")
+        self.sentiment = str(spec["sentiment"]).lower() if spec.get("sentiment") else None
+        self.source = spec.get("source")
+        self.min_score = spec.get("min_score")
+        self.max_score = spec.get("max_score")
+        self.spec = spec
+
+    def __call__(self, entry):
+        if self.sentiment is not None and str(entry.get("sentiment", "")).lower() != self.sentiment:
+            return False
+        if self.source is not None and entry.get("source") != self.source:
+            return False
+        if self.min_score is not None or self.max_score is not None:
+            score = entry.get("score")
+            if score is None:
+                return False
+            if self.min_score is not None and score < self.min_score:
+                return False
+            if self.max_score is not None and score > self.max_score:
+                return False
+        return True
+
+class SlidingWindow:
+    """Event and match counts over the last `seconds`, at 1/WINDOW_BUCKETS resolution
+
+    Expired buckets are subtracted from running totals as time moves on,
+    so adding an event or reading the totals is O(1) amortized.
+    """
+
+    def __init__(self, seconds, buckets=WINDOW_BUCKETS):
+        self.seconds = seconds
+        self.width = seconds / buckets
+        self.size = buckets
+        self.events = [0] * buckets
+        self.hits = [0] * buckets
+        self.total = 0
+        self.matched = 0
+        self.current = None  # Absolute index of the newest bucket
+
+    def advance(self, now):
+        index = int(now // self.width)
+        if self.current is None:
+            self.current = index
+        elif index > self.current:
+            for i in range(self.current + 1, min(index, self.current + self.size) + 1):
+                slot = i % self.size
+                self.total -= self.events[slot]
+                self.matched -= self.hits[slot]
+                self.events[slot] = self.hits[slot] = 0
+            self.current = index
+        # Late events are counted in the newest bucket
+
+    def add(self, now, matched):
+        self.advance(now)
+        slot = self.current % self.size
+        self.events[slot] += 1
+        self.total += 1
+        if matched:
+            self.hits[slot] += 1
+            self.matched += 1
+
+# -------------------------------
+# Rules
+# -------------------------------
+class Rule:
+    """Base rule: name, match filter, cooldown and how to word the alert"""
+
+    def __init__(self, spec):
+        self.name = str(spec["name"])
+        self.match = Match(spec.get("match"))
+        self.cooldown = float(spec.get("cooldown", DEFAULT_COOLDOWN))
+        self.urgency = str(spec.get("urgency", "High")).capitalize()
+        self.recommendation = str(spec.get("recommendation", "Please review this feedback"))
+        self.sentiment = self.match.sentiment or "negative"
+        self.spec = spec
+        self.last_fired = None
+        self.fired = 0
+        self.suppressed = 0
+
+    def evaluate(self, entry, matched, now):
+        """Update state for one entry; return (alert text, score) if the condition holds"""
+        raise NotImplementedError
+
+    def observe(self, entry, now):
+        """Evaluate one entry, applying the cooldown
+
+        Returns:
+            dict: Keyword arguments for alert.send_alert, or None
+        """
+        result = self.evaluate(entry, self.match(entry), now)
+        if result is None:
+            return None
+        if self.last_fired is not None and now - self.last_fired < self.cooldown:
+            self.suppressed += 1
+            return None
+        self.last_fired = now
+        self.fired += 1
+        text, score = result
+        return {
+            "text": f"[{self.name}] {text}"[:MAX_ALERT_TEXT],
+            "sentiment": self.sentiment,
+            "score": float(score),
+            "urgency": self.urgency,
+            "recommendation": self.recommendation,
+        }
+
+    def state(self):
+        return {
+            "name": self.name,
+            "type": self.spec.get("type"),
+            "fired": self.fired,
+            "suppressed": self.suppressed,
+            "last_fired": self.last_fired,
+        }
+
+class EventRule(Rule):
+    """Fires for each matching entry, e.g. negative with score >= 0.95"""
+
+    def evaluate(self, entry, matched, now):
+        if matched:
+            return str(entry.get("text", "")), entry.get("score") or 0.0
+        return None
+
+class RatioRule(Rule):
+    """Fires when matching entries exceed a share of all entries in a sliding window"""
+
+    def __init__(self, spec):
+        super().__init__(spec)
+        self.window = SlidingWindow(window_seconds(spec.get("window", "15m")))
+        self.above = float(spec["above"])
+        self.min_events = int(spec.get("min_events", 1))
+
+    def evaluate(self, entry, matched, now):
+        self.window.add(now, matched)
+        total, hits = self.window.total, self.window.matched
+        if matched and total >= self.min_events and hits / total > self.above:
+            return (f"{hits / total:.0%} of feedback in the last {self.spec.get('window', '15m')} "
+                    f"is {self.sentiment} ({hits} of {total} entries), above {self.above:.0%}"), hits / total
+        return None
+
+    def state(self):
+        state = super().state()
+        state.update(events=self.window.total, matched=self.window.matched,
+                     ratio=self.window.matched / self.window.total if self.window.total else 0.0)
+        return state
+
+class SpikeRule(Rule):
+    """Fires when the rate of matching entries in a short window is factor x the baseline rate
+
+    The baseline is the rate over the rest of the longer baseline window,
+    and is only trusted once a full baseline window has been observed.
+    """
+
+    def __init__(self, spec):
+        super().__init__(spec)
+        self.recent = SlidingWindow(window_seconds(spec.get("window", "5m")))
+        self.baseline = SlidingWindow(window_seconds(spec.get("baseline", "1h")))
+        if self.baseline.seconds <= self.recent.seconds:
+            raise ValueError(f"Rule {self.name}: baseline must be longer than window")
+        self.factor = float(spec.get("factor", 3))
+        self.min_events = int(spec.get("min_events", 1))
+        self.started = None
+
+    def _rates(self):
+        recent = self.recent.matched / self.recent.seconds
+        earlier = self.baseline.matched - self.recent.matched
+        return recent, max(earlier, 0) / (self.baseline.seconds - self.recent.seconds)
+
+    def evaluate(self, entry, matched, now):
+        if self.started is None:
+            self.started = now
+        self.recent.add(now, matched)
+        self.baseline.add(now, matched)
+        if not matched or self.recent.matched < self.min_events or now - self.started < self.baseline.seconds:
+            return None
+        recent_rate, baseline_rate = self._rates()
+        if recent_rate > self.factor * baseline_rate:
+            ratio = recent_rate / baseline_rate if baseline_rate else float('inf')
+            return (f"{self.recent.matched} {self.sentiment} entries in the last {self.spec.get('window', '5m')}, "
+                    f"{ratio:.1f}x the {self.spec.get('baseline', '1h')} baseline rate"), min(ratio, 1e6)
+        return None
+
+    def state(self):
+        state = super().state()
+        recent_rate, baseline_rate = self._rates()
+        state.update(recent=self.recent.matched, recent_per_min=recent_rate * 60, baseline_per_min=baseline_rate * 60)
+        return state
+
+RULE_TYPES = {"event": EventRule, "ratio": RatioRule, "spike": SpikeRule}
+
+def build_rule(spec):
+    rule_type = spec.get("type")
+    if rule_type not in RULE_TYPES:
+        raise ValueError(f"Rule {spec.get('name')}: unknown type '{rule_type}'; expected one of: {', '.join(RULE_TYPES)}")
+    return RULE_TYPES[rule_type](spec)
+
+# -------------------------------
+# Engine
+# -------------------------------
+class RuleEngine:
+    """Evaluates every rule on each observed entry and hands alerts to notify
+
+    Args:
+        rules (list): Rule specs (dicts) or Rule objects
+        notify (callable, optional): Called with send_alert keyword arguments;
+            defaults to sending through alert.send_alert in the background
+    """
+
+    def __init__(self, rules, notify=None):
+        self.rules = [rule if isinstance(rule, Rule) else build_rule(rule)
+                      for rule in rules if not isinstance(rule, dict) or rule.get("enabled", True)]
+        self.notify = notify or dispatch
+        self._lock = threading.Lock()
+        self.events = 0
+        self.fired = 0
+
+    def observe(self, entries, now=None):
+        """Evaluate the rules on newly stored entries
+
+        Returns:
+            list: The alerts that fired
+        """
+        now = time.time() if now is None else now
+        alerts = []
+        with self._lock:
+            for entry in entries:
+                for rule in self.rules:
+                    fired = rule.observe(entry, now)
+                    if fired is not None:
+                        alerts.append(fired)
+            self.events += len(entries)
+            self.fired += len(alerts)
+        for fired in alerts:
+            logger.info(f"Alert rule fired: {fired['text'][:200]}")
+            self.notify(fired)
+        return alerts
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                "enabled": ENABLED,
+                "events": self.events,
+                "fired": self.fired,
+                "rules": [rule.state() for rule in self.rules],
+            }
+
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='alert-rules')
+
+def _send(kwargs):
+    try:
+        import alert  # Deferred so the store does not import the Slack/SMTP clients
+        alert.send_alert(**kwargs)
+    except Exception as e:
+        logger.error(f"Failed to send rule alert: {str(e)}", exc_info=True)
+
+def dispatch(kwargs):
+    """Send an alert without blocking the ingesting request"""
+    _executor.submit(_send, kwargs)
+
+def load_rules(path=RULES_FILE):
+    """Rule specs from the rules file, or DEFAULT_RULES if it does not exist"""
+    try:
+        with open(path) as f:
+            rules = json.load(f)
+    except FileNotFoundError:
+        return DEFAULT_RULES
+    if not isinstance(rules, list):
+        raise ValueError(f"{path} must contain a JSON list of rules")
+    return rules
+
+# -------------------------------
+# Per-process engine
+# -------------------------------
+_engine = None
+_engine_lock = threading.Lock()
+
+def get_engine():
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                try:
+                    _engine = RuleEngine(load_rules())
+                except (ValueError, KeyError, TypeError) as e:
+                    logger.error(f"Invalid alert rules, using the defaults: {str(e)}")
+                    _engine = RuleEngine(DEFAULT_RULES)
+                logger.info(f"Alert rule engine ready with {len(_engine.rules)} rules")
+    return _engine
+
+def observe(entries):
+    """Feed newly stored entries to the rule engine (no-op when disabled)"""
+    if not ENABLED or not entries:
+        return []
+    try:
+        return get_engine().observe(entries)
+    except Exception as e:
+        logger.error(f"Alert rule evaluation failed: {str(e)}", exc_info=True)
+        return []
+
+def _on_store_change(message):
+    entries = message.get("entries")
+    if entries and coordination.election('alert-rules').is_leader():
+        observe(entries)
+
+_subscription = None
+
+def start():
+    """Evaluate the rules on store-change events from every process, on the elected leader"""
+    global _subscription
+    if ENABLED and _subscription is None:
+        _subscription = coordination.subscribe(coordination.STORE_CHANNEL, _on_store_change)
+
+def get_stats():
+    """Per-rule state and fire counts (meaningful on the leader)"""
+    stats = get_engine().get_stats()
+    stats["leader"] = coordination.is_leading('alert-rules')
+    return stats
@@ -0,0 +1,146 @@
+import os
+import json
+import logging
+from datetime import datetime
+
+from feedback_manager import find_exact_duplicate, get_top_terms
+import term_tracker
+import rolling_summary
+import coordination
+import tracing
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Helpers shared by app.py and async_app.py. Importing this module starts no
+# background work, unlike app.py (alert rules, suggestion precomputation),
+# so async workers do not start a second copy of those tasks.
+
+# API Configuration
+FASTAPI_URL = "http://localhost:8000"  # FastAPI service URL
+TIMEOUT = 10  # seconds
+HEALTH_CACHE_TTL = float(os.getenv('HEALTH_CACHE_TTL', '5'))  # seconds a health result is shared; 0 probes every time
+
+# Health of the FastAPI service, shared by every worker through the coordination backend
+def cached_health():
+    """Last health result seen by any worker within HEALTH_CACHE_TTL, or None"""
+    if HEALTH_CACHE_TTL <= 0:
+        return None
+    return coordination.get_backend().get_value(f"health:{FASTAPI_URL}")
+
+def store_health(healthy):
+    if HEALTH_CACHE_TTL > 0:
+        coordination.get_backend().set_value(f"health:{FASTAPI_URL}", healthy, HEALTH_CACHE_TTL)
+    return healthy
+
+# Format API response
+@tracing.traced('format')
+def format_sentiment_response(text, result):
+    """Format the sentiment analysis response"""
+    sentiment = str(result.get('sentiment', 'neutral')).lower()
+    score = float(result.get('score', 0.5))
+
+    # Ensure score is between 0 and 1
+    score = max(0, min(1, score))
+
+    formatted = {
+        'text': text,
+        'sentiment': sentiment,
+        'score': score,
+        'timestamp': datetime.utcnow().isoformat()
+    }
+    # Fast-path labels are stored with their classifier and kept out of its training data
+    if result.get('classifier'):
+        formatted['classifier'] = result['classifier']
+    return formatted
+
+# Reuse results of previously analyzed texts. Only an exact match (ignoring
+# case, whitespace and punctuation) is reused: a near-duplicate may differ by
+# a negation, as "not good" does from "good", and have the opposite sentiment.
+def reuse_exact_duplicate(text):
+    """Return the stored sentiment result of the same text, if any"""
+    duplicate = find_exact_duplicate(text)
+    if duplicate and duplicate.get('score') is not None:
+        return {'sentiment': duplicate['sentiment'], 'score': duplicate['score'],
+                'classifier': duplicate.get('classifier')}
+    return None
+
+def format_sse(data, event=None):
+    """Encode a payload as a single Server-Sent Event"""
+    message = f"data: {json.dumps(data)}\n\n"
+    if event:
+        message = f"event: {event}\n{message}"
+    return message
+
+# -------------------------------
+# Gemini alert options
+# -------------------------------
+def alert_top_terms(spec):
+    """Resolve the 'top_terms' option of an alert request
+
+    Args:
+        spec: None, true, or an object with optional window, sentiment
+            (default negative) and limit (per term kind, default 20)
+
+    Returns:
+        list: Top unigrams then bigrams from the term tracker, or None if not requested
+    """
+    if spec is None or spec is False:
+        return None
+    if spec is True:
+        spec = {}
+    if not isinstance(spec, dict):
+        raise ValueError("'top_terms' must be true or an object")
+    default_window = '24h' if '24h' in term_tracker.WINDOWS else term_tracker.ALL
+    window = spec.get('window', default_window)
+    sentiment = spec.get('sentiment', 'negative')
+    limit = spec.get('limit', 20)
+    if not isinstance(limit, int) or not 1 <= limit <= term_tracker.MAX_LIMIT:
+        raise ValueError(f"'top_terms.limit' must be an integer from 1 to {term_tracker.MAX_LIMIT}")
+    return [term for kind in term_tracker.KINDS for term in get_top_terms(window, sentiment, kind, limit)]
+
+def alert_summary_context(spec, texts, scores, top_terms):
+    """Resolve the 'summary' option of an alert request against the rolling summaries
+
+    Args:
+        spec: None or true for the default stream, a stream name, or false to
+            send every text as before
+        texts: Texts of the request
+        scores: Their scores
+        top_terms: The resolved 'top_terms' option; term alerts are not summarized
+
+    Returns:
+        dict: rolling_summary.prepare() context, or None if not used
+    """
+    if spec is None or spec is True:
+        spec = rolling_summary.DEFAULT_STREAM
+    if spec is False:
+        return None
+    if not isinstance(spec, str) or not spec.strip():
+        raise ValueError("'summary' must be true, false or a stream name")
+    if top_terms is not None or not texts:
+        return None
+    return rolling_summary.prepare(spec.strip(), texts, scores)
+
+def alert_notification(data, scores):
+    """Sentiment, score, urgency and recommendation sent with a Gemini alert
+
+    Taken from the request's optional fields of the same names, as for
+    /send-alert. The sentiment defaults to the 'top_terms' sentiment, or
+    negative; the score to the lowest score sent.
+
+    Raises:
+        ValueError: If 'score' is not a number
+    """
+    top_terms = data.get("top_terms")
+    default_sentiment = top_terms.get("sentiment", "negative") if isinstance(top_terms, dict) else "negative"
+    try:
+        score = float(data["score"]) if data.get("score") is not None else float(min(scores, default=0.0))
+    except (TypeError, ValueError):
+        raise ValueError("'score' and 'scores' must be numbers")
+    return {
+        'sentiment': str(data.get('sentiment') or default_sentiment).lower(),
+        'score': score,
+        'urgency': str(data.get('urgency', 'Medium')).capitalize(),
+        'recommendation': str(data.get('recommendation', 'Please review this feedback')),
+    }
@@ -1,65 +1,133 @@
-from flask import Flask, request, jsonify, render_template
-import requests
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, request, jsonify, render_template, Response, stream_with_context
 from flask_cors import CORS
 import requests
 import logging
 from datetime import datetime
-from gemini_helper import generate_alert
+from gemini_helper import generate_alert, generate_alert_stream
 from gemini_helper_batch import generate_suggestions, format_suggestions_html
-import dash
-from dashboard import create_dashboard
-from feedback_manager import add_feedback, add_batch_feedback, get_all_feedback
+from feedback_manager import (add_feedback, add_batch_feedback, get_all_feedback, stream_all_feedback,
+                              get_feedback_range, get_feedback_since, get_store_version, get_feedback_snapshot,
+                              get_score_stats, search_feedback, get_top_terms, FEEDBACK_FILE)
+from api_common import (FASTAPI_URL, TIMEOUT, cached_health, store_health, format_sentiment_response,
+                        reuse_exact_duplicate, format_sse, alert_top_terms, alert_summary_context,
+                        alert_notification)
+import serialization
+import feedback_archive
+import search_index
+import term_tracker
+import feedback_snapshot
+from dedup_index import NearDuplicateIndex
 from alert import send_alert
+from static_assets import AssetCatalog, STATIC_URL_PATH
+from lazy_dashboard import LazyDashboard
+import fast_classifier
+import batch_planner
+import admission
+import alert_rules
+import suggestion_precompute
+import rolling_summary
+import coordination
+import llm_router
+import tracing
+import os
+import gzip
 import json
+import time
+import zlib
+import threading
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = Flask(__name__, static_folder='.', static_url_path='')
+# Static files come from public/ only, through the precompressed asset catalog
+app = Flask(__name__, static_folder=None)
 CORS(app)  # Enable CORS for all routes
-# Attach Dash to the existing Flask app
-dash_app = create_dashboard(app)  # Attach Dash to the existing Flask app
+tracing.init_app(app)  # Server-Timing spans and on-demand profiling
+# Dash (with pandas and plotly) is only imported once /dashboard/ is requested
+app.wsgi_app = LazyDashboard(app.wsgi_app)
+
+
+# API Configuration (FASTAPI_URL and TIMEOUT live in api_common)
+ALERT_DEDUP_WINDOW = 600  # seconds during which near-duplicate alerts are suppressed
+GZIP_MIN_SIZE = 1024  # bytes; smaller JSON responses are sent uncompressed
+
+# Near-duplicates of recently sent alerts; rebuilt without the expired ones
+recent_alerts = NearDuplicateIndex()
+_recent_alerts_sent = []  # Payloads indexed in recent_alerts, by position
+_recent_alerts_lock = threading.Lock()
+
+# Public assets, hashed and compressed once per worker
+assets = AssetCatalog()
+
+# Server-side alert rules, evaluated on the elected leader (see alert_rules.py)
+alert_rules.start()
+
+# Speculative AI suggestions for new negative feedback (see suggestion_precompute.py)
+suggestion_precompute.start()
+
+def _expire_recent_alerts(now):
+    live = [p for p in _recent_alerts_sent if now - p['sent_at'] < ALERT_DEDUP_WINDOW]
+    if len(live) < len(_recent_alerts_sent):
+        recent_alerts.clear()
+        for position, payload in enumerate(live):
+            recent_alerts.add(position, payload['text'], payload)
+        _recent_alerts_sent[:] = live
 
+def find_recent_alert(text, now):
+    """Return a near-duplicate alert sent within ALERT_DEDUP_WINDOW, or None"""
+    with _recent_alerts_lock:
+        _expire_recent_alerts(now)
+        match = recent_alerts.query(text)
+    return match[2] if match else None
 
-# API Configuration
-FASTAPI_URL = "http://localhost:8000"  # FastAPI service URL
-TIMEOUT = 10  # seconds
+def remember_alert(text, now):
+    """Record a sent alert so near-duplicates are suppressed for ALERT_DEDUP_WINDOW"""
+    with _recent_alerts_lock:
+        _expire_recent_alerts(now)
+        payload = {'text': text, 'sent_at': now}
+        recent_alerts.add(len(_recent_alerts_sent), text, payload)
+        _recent_alerts_sent.append(payload)
 
 # Health check for the FastAPI service
+@tracing.traced('fastapi_health')
 def check_fastapi_health():
+    cached = cached_health()
+    if cached is not None:
+        return cached
     try:
         response = requests.get(f"{FASTAPI_URL}/health", timeout=TIMEOUT)
-        return response.status_code == 200
+        return store_health(response.status_code == 200)
     except requests.exceptions.RequestException as e:
         logger.error(f"FastAPI health check failed: {str(e)}")
-        return False
+        return store_health(False)
 
-# Format API response
-def format_sentiment_response(text, result):
-    """Format the sentiment analysis response"""
-    sentiment = str(result.get('sentiment', 'neutral')).lower()
-    score = float(result.get('score', 0.5))
-    
-    # Ensure score is between 0 and 1
-    score = max(0, min(1, score))
-    
-    return {
-        'text': text,
-        'sentiment': sentiment,
-        'score': score,
-        'timestamp': datetime.utcnow().isoformat()
-    }
+def overloaded_response(error):
+    """429/503 with Retry-After for an upstream call shed by admission control"""
+    logger.warning(str(error))
+    response = jsonify({"error": str(error), "retry_after": error.retry_after})
+    response.status_code = error.status
+    response.headers['Retry-After'] = str(error.retry_after)
+    return response
+
+def serve_asset(name):
+    response = assets.response(name)
+    if response is None:
+        return jsonify({'error': 'Not found'}), 404
+    return response
 
 @app.route('/')
 def index():
-    return app.send_static_file('index.html')
+    return serve_asset('index.html')
 
-# Serve static files from the current directory
-@app.route('/<path:path>')
+@app.route(f'{STATIC_URL_PATH}/<path:path>')
 def serve_static(path):
-    return app.send_static_file(path)
+    return serve_asset(path)
+
+# Top-level pages such as /dashboard.html; nothing outside public/ is reachable
+@app.route('/<path:path>')
+def serve_page(path):
+    return serve_asset(path)
 
 @app.route('/analyze/single', methods=['POST'])
 def analyze_single():
@@ -72,23 +140,43 @@ def analyze_single():
         
         logger.info(f"Analyzing text: {text[:100]}...")
         
-        # Check if FastAPI service is running
-        if not check_fastapi_health():
-            error_msg = "Sentiment analysis service is not available"
-            logger.error(error_msg)
-            return jsonify({"error": error_msg}), 503
-        
-        # Call FastAPI predict endpoint
-        response = requests.post(
-            f"{FASTAPI_URL}/predict",
-            json={"text": text},
-            headers={"Content-Type": "application/json"},
-            timeout=TIMEOUT
-        )
-        response.raise_for_status()
+        # Reuse the stored result of the same text before scoring again
+        result = reuse_exact_duplicate(text)
+        if result is not None:
+            logger.info("Reusing the stored result of the same text")
+        else:
+            # Try the in-process fast path first; only low-confidence items go remote
+            fast_results = fast_classifier.classify([text])
+            fast_result = fast_results[0] if fast_results else None
+            
+            if fast_result and fast_result['confident']:
+                logger.info("Answered by fast-path classifier")
+                result = fast_result
+            elif not check_fastapi_health():
+                # Check if FastAPI service is running
+                if fast_result is None:
+                    error_msg = "Sentiment analysis service is not available"
+                    logger.error(error_msg)
+                    return jsonify({"error": error_msg}), 503
+                logger.warning("Sentiment analysis service is not available, using fast-path result")
+                fast_classifier.record(fallback=1)
+                result = fast_result
+            else:
+                # Call FastAPI predict endpoint; interactive calls run ahead of batch work
+                with admission.acquire('model', admission.INTERACTIVE), tracing.span('fastapi_predict'):
+                    response = requests.post(
+                        f"{FASTAPI_URL}/predict",
+                        json={"text": text},
+                        headers={"Content-Type": "application/json"},
+                        timeout=TIMEOUT
+                    )
+                    response.raise_for_status()
+                    result = response.json()
+                if fast_result:
+                    agrees = str(result.get('sentiment', '')).lower() == fast_result['sentiment']
+                    fast_classifier.record(remote=1, agreements=int(agrees))
         
         # Format the response
-        result = response.json()
         formatted_result = format_sentiment_response(text, result)
         
         # Store the analyzed feedback
@@ -107,7 +195,8 @@ def analyze_single():
                 text=feedback['text'],
                 sentiment=feedback['sentiment'],
                 score=feedback['score'],
-                source=feedback['source']
+                source=feedback['source'],
+                classifier=formatted_result.get('classifier')
             )
             
             if result is None:
@@ -123,6 +212,8 @@ def analyze_single():
         logger.info(f"Analysis complete. Sentiment: {formatted_result['sentiment']}, Score: {formatted_result['score']}")
         return jsonify(formatted_result)
         
+    except admission.Overloaded as e:
+        return overloaded_response(e)
     except requests.exceptions.Timeout:
         error_msg = "Request to sentiment analysis service timed out"
         logger.error(error_msg)
@@ -136,6 +227,30 @@ def analyze_single():
         logger.error(error_msg)
         return jsonify({"error": error_msg}), 500
 
+def predict_batch(texts):
+    """Score texts with the model service, one /predict_batch call per length bucket
+
+    Returns:
+        list: One result per text in input order (None where the service returned none)
+    """
+    results = [None] * len(texts)
+    for indices in batch_planner.sub_batches(texts):
+        sub_batch = [texts[i] for i in indices]
+        with admission.acquire('model', admission.BULK), tracing.span('fastapi_predict_batch'):
+            response = requests.post(
+                f"{FASTAPI_URL}/predict_batch",
+                json={"texts": sub_batch},
+                headers={"Content-Type": "application/json"},
+                timeout=TIMEOUT * 2  # Allow more time for batch processing
+            )
+            response.raise_for_status()
+            remote_results = response.json()
+        batch_planner.record_sub_batch(sub_batch)
+        if isinstance(remote_results, list):
+            for i, result in zip(indices, remote_results):
+                results[i] = result
+    return results
+
 @app.route('/analyze/batch', methods=['POST'])
 def analyze_batch():
     try:
@@ -147,34 +262,58 @@ def analyze_batch():
         
         logger.info(f"Analyzing batch of {len(texts)} texts")
         
-        # Check if FastAPI service is running
-        if not check_fastapi_health():
-            error_msg = "Sentiment analysis service is not available"
-            logger.error(error_msg)
-            return jsonify({"error": error_msg}), 503
-        
-        # Call FastAPI batch predict endpoint
-        response = requests.post(
-            f"{FASTAPI_URL}/predict_batch",
-            json={"texts": texts},
-            headers={"Content-Type": "application/json"},
-            timeout=TIMEOUT * 2  # Allow more time for batch processing
-        )
-        response.raise_for_status()
-        
-        # Process and format the results
-        results = response.json()
-        formatted_results = []
-        
-        if isinstance(results, list):
-            for i, result in enumerate(results):
-                text = texts[i] if i < len(texts) else ""
-                formatted_result = format_sentiment_response(text, result)
-                formatted_results.append(formatted_result)
+        # Score each distinct text once; results are mapped back to every copy at the end
+        unique, positions = batch_planner.dedupe(texts)
+        batch_planner.record(batches=1, items=len(texts), unique=len(unique))
+        
+        # Reuse stored results of the same texts, then score the rest on the fast path
+        results = [reuse_exact_duplicate(text) for text in unique]
+        unresolved = [i for i, r in enumerate(results) if r is None]
+        fast_results = [None] * len(unique)
+        for i, fast_result in zip(unresolved, fast_classifier.classify([unique[i] for i in unresolved]) or []):
+            fast_results[i] = fast_result
+            if fast_result['confident']:
+                results[i] = fast_result
+        pending = [i for i, r in enumerate(results) if r is None]
+        logger.info(f"Deduplicated {len(texts)} texts to {len(unique)}, reused {len(unique) - len(unresolved)} "
+                    f"and fast path answered {len(unresolved) - len(pending)}")
+        
+        if pending:
+            # Check if FastAPI service is running
+            if not check_fastapi_health():
+                if any(fast_results[i] is None for i in pending):
+                    error_msg = "Sentiment analysis service is not available"
+                    logger.error(error_msg)
+                    return jsonify({"error": error_msg}), 503
+                logger.warning("Sentiment analysis service is not available, using fast-path results")
+                fast_classifier.record(fallback=len(pending))
+                for i in pending:
+                    results[i] = fast_results[i]
+            else:
+                # Send the low-confidence texts only, in length-bucketed sub-batches
+                remote_results = predict_batch([unique[i] for i in pending])
+                compared = agreements = 0
+                for i, result in zip(pending, remote_results):
+                    results[i] = result
+                    if result is not None and fast_results[i]:
+                        compared += 1
+                        agreements += str(result.get('sentiment', '')).lower() == fast_results[i]['sentiment']
+                if compared:
+                    fast_classifier.record(remote=compared, agreements=agreements)
+        
+        # Format the results in the original order
+        results = batch_planner.expand(results, positions)
+        formatted_results = [
+            format_sentiment_response(texts[i], result)
+            for i, result in enumerate(results)
+            if result is not None
+        ]
         
         logger.info(f"Batch analysis complete. Processed {len(formatted_results)} results")
         return jsonify(formatted_results)
         
+    except admission.Overloaded as e:
+        return overloaded_response(e)
     except requests.exceptions.Timeout:
         error_msg = "Batch analysis request timed out"
         logger.error(error_msg)
@@ -188,6 +327,48 @@ def analyze_batch():
         logger.error(error_msg)
         return jsonify({"error": error_msg}), 500
 
+@app.route('/api/classifier/stats', methods=['GET'])
+def classifier_stats():
+    """Fast-path hit rate, latency and agreement with the remote model"""
+    return jsonify(fast_classifier.get_stats())
+
+@app.route('/api/batch/stats', methods=['GET'])
+def batch_stats():
+    """Duplicates removed, sub-batch sizes and padding overhead of /analyze/batch"""
+    return jsonify(batch_planner.get_stats())
+
+@app.route('/api/admission/stats', methods=['GET'])
+def admission_stats():
+    """Active calls, queue depth and shed counts per upstream and priority lane"""
+    return jsonify(admission.get_stats())
+
+@app.route('/api/coordination/stats', methods=['GET'])
+def coordination_stats():
+    """Coordination backend, elections this worker leads and cluster-wide counters"""
+    stats = coordination.get_stats()
+    stats["feedback_entries_written"] = coordination.get_backend().counter('feedback.entries_written')
+    return jsonify(stats)
+
+@app.route('/api/alerts/rules', methods=['GET'])
+def alert_rules_stats():
+    """Server-side alert rules with their window state and fire counts (this worker)"""
+    return jsonify(alert_rules.get_stats())
+
+@app.route('/api/suggestions/stats', methods=['GET'])
+def suggestion_stats():
+    """Background suggestion precomputation and lookup counts (this worker)"""
+    return jsonify(suggestion_precompute.get_stats())
+
+@app.route('/api/alerts/summaries/stats', methods=['GET'])
+def alert_summary_stats():
+    """How much alert input the rolling summaries covered, and fold counts (this worker)"""
+    return jsonify(rolling_summary.get_stats())
+
+@app.route('/api/llm/stats', methods=['GET'])
+def llm_stats():
+    """Gemini latency percentiles, histograms and hedge counts per model tier"""
+    return jsonify(llm_router.get_router().get_stats())
+
 @app.route('/send-alert', methods=['POST'])
 def send_alert_endpoint():
     try:
@@ -213,6 +394,15 @@ def send_alert_endpoint():
             'timestamp': datetime.utcnow().isoformat()
         }
         
+        # Suppress near-duplicates of alerts sent within the dedup window
+        now = time.time()
+        if find_recent_alert(alert_data['text'], now) is not None:
+            logger.info("Suppressing near-duplicate of a recently sent alert")
+            return jsonify({
+                "status": "Duplicate alert suppressed",
+                "data": alert_data
+            })
+        
         # Log the alert
         logger.info(f"Sending alert: {alert_data}")
         
@@ -227,6 +417,8 @@ def send_alert_endpoint():
                 recipient=None  # Using default recipient from alert.py
             )
             
+            remember_alert(alert_data['text'], now)
+            
             logger.info("Alert sent successfully")
             return jsonify({
                 "status": "Alert sent successfully",
@@ -244,6 +436,71 @@ def send_alert_endpoint():
         return jsonify({"error": error_msg}), 400
 
 
+# Server-Sent Events helpers
+def wants_event_stream():
+    """Return True when the client opted into a streamed (SSE) response"""
+    stream_arg = request.args.get('stream', '').strip().lower()
+    if stream_arg in ('1', 'true', 'yes'):
+        return True
+    return 'text/event-stream' in request.headers.get('Accept', '')
+
+def stream_gemini_alert(texts, scores, top_terms=None, summary=None, notification=None):
+    """Relay Gemini alert chunks to the client as Server-Sent Events"""
+    notification = notification or alert_notification({}, scores)
+    if summary:
+        chunks = generate_alert_stream(summary["texts"], summary["scores"], summaries=summary["summaries"])
+    else:
+        chunks = generate_alert_stream(texts, scores, top_terms)
+    # Held until the response is closed, so the slot covers the whole stream
+    ticket = admission.acquire('gemini', admission.INTERACTIVE)
+    
+    def generate():
+        parts = []
+        try:
+            for chunk in chunks:
+                parts.append(chunk)
+                yield format_sse({"text": chunk}, event="chunk")
+            
+            alert_message = "".join(parts).strip()
+            logger.info(f"Streamed alert of {len(alert_message)} characters")
+            
+            # Try to send the alert (but don't fail if this part fails)
+            try:
+                send_alert(alert_message, **notification)
+                logger.info("Successfully sent alert to notification system")
+            except Exception as alert_error:
+                logger.error(f"Warning: Failed to send alert to notification system: {str(alert_error)}", 
+                            exc_info=True)
+            
+            done = {
+                "status": "success",
+                "alert": alert_message,
+                "texts_processed": len(texts)
+            }
+            if summary:
+                rolling_summary.fold(summary)
+                done["summary"] = rolling_summary.describe(summary)
+            yield format_sse(done, event="done")
+            
+        except Exception as e:
+            logger.error(f"Error streaming alert: {str(e)}", exc_info=True)
+            yield format_sse({
+                "status": "error",
+                "error": f"Failed to generate alert: {str(e)}",
+                "type": type(e).__name__
+            }, event="error")
+    
+    response = Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'  # Disable proxy buffering so chunks flush immediately
+        }
+    )
+    response.call_on_close(ticket.release)
+    return response
+
 # Generate alert using Gemini
 @app.route('/api/alerts/gemini', methods=['POST'])
 def gemini_alert():
@@ -277,14 +534,43 @@ def gemini_alert():
                 "error": error_msg,
                 "type": "InvalidJSON"
             }), 400
+        if not isinstance(data, dict):
+            error_msg = "Request body must be a JSON object"
+            logger.error(error_msg)
+            return jsonify({
+                "status": "error",
+                "error": error_msg,
+                "type": "InvalidJSON"
+            }), 400
+        
+        # Top terms from the tracker may stand in for raw texts
+        try:
+            top_terms = alert_top_terms(data.get("top_terms"))
+        except ValueError as e:
+            return jsonify({
+                "status": "error",
+                "error": str(e),
+                "type": "InvalidInput"
+            }), 400
         
         # Validate required fields
         texts = data.get("texts")
         scores = data.get("scores")
+        terms_only = top_terms is not None and not texts and not scores
+        if terms_only:
+            texts, scores = [], []
+            if not top_terms:
+                error_msg = "No terms are tracked for that window and sentiment; send 'texts' to analyze instead"
+                logger.error(error_msg)
+                return jsonify({
+                    "status": "error",
+                    "error": error_msg,
+                    "type": "InvalidInput"
+                }), 400
         
         logger.info(f"Received {len(texts) if isinstance(texts, list) else 0} texts and {len(scores) if isinstance(scores, list) else 0} scores")
         
-        if not texts or not isinstance(texts, list):
+        if not terms_only and (not texts or not isinstance(texts, list)):
             error_msg = "'texts' must be a non-empty list of strings"
             logger.error(error_msg)
             return jsonify({
@@ -293,7 +579,7 @@ def gemini_alert():
                 "type": "InvalidInput"
             }), 400
             
-        if not scores or not isinstance(scores, list):
+        if not terms_only and (not scores or not isinstance(scores, list)):
             error_msg = "'scores' must be a non-empty list of numbers"
             logger.error(error_msg)
             return jsonify({
@@ -311,11 +597,32 @@ def gemini_alert():
                 "type": "InvalidInput"
             }), 400
         
+        # Texts already folded into the rolling summaries are sent as those summaries
+        try:
+            summary = alert_summary_context(data.get("summary"), texts, scores, top_terms)
+            notification = alert_notification(data, scores)
+        except ValueError as e:
+            return jsonify({
+                "status": "error",
+                "error": str(e),
+                "type": "InvalidInput"
+            }), 400
+        
         logger.info("Input validation passed. Generating alert...")
         
         # Generate the alert
         try:
-            alert_message = generate_alert(texts, scores)
+            # Stream chunks as Server-Sent Events when requested; JSON stays the default
+            if wants_event_stream():
+                logger.info("Streaming alert as Server-Sent Events")
+                return stream_gemini_alert(texts, scores, top_terms, summary, notification)
+            
+            with admission.acquire('gemini', admission.INTERACTIVE):
+                if summary:
+                    logger.info(f"Alerting from {len(summary['summaries'])} window summaries and {len(summary['texts'])} new texts")
+                    alert_message = generate_alert(summary["texts"], summary["scores"], summaries=summary["summaries"])
+                else:
+                    alert_message = generate_alert(texts, scores, top_terms)
             logger.info("Successfully generated alert message")
             
             # Log a preview of the alert
@@ -324,19 +631,27 @@ def gemini_alert():
             
             # Try to send the alert (but don't fail if this part fails)
             try:
-                send_alert(alert_message)
+                send_alert(alert_message, **notification)
                 logger.info("Successfully sent alert to notification system")
             except Exception as alert_error:
                 logger.error(f"Warning: Failed to send alert to notification system: {str(alert_error)}", 
                             exc_info=True)
             
+            # Fold the new texts into the current window's summary for the next alert
+            if summary:
+                rolling_summary.fold(summary)
+            
             # Return success response
             return jsonify({
                 "status": "success",
                 "alert": alert_message,
-                "texts_processed": len(texts)
+                "texts_processed": len(texts),
+                "top_terms": top_terms,
+                "summary": rolling_summary.describe(summary) if summary else None
             })
             
+        except admission.Overloaded as e:
+            return overloaded_response(e)
         except Exception as gen_error:
             error_type = type(gen_error).__name__
             error_details = str(gen_error)
@@ -382,17 +697,27 @@ def get_ai_suggestions():
         if not complaints or not isinstance(complaints, list):
             return jsonify({"error": "Invalid input: expected a list of complaints"}), 400
             
-        # Generate suggestions for each complaint
-        suggestions = generate_suggestions(complaints)
+        # Serve precomputed suggestions and generate only the misses;
+        # bulk work yields to interactive calls
+        stored = suggestion_precompute.lookup(complaints)
+        misses = [c for c, s in zip(complaints, stored) if s is None]
+        generated = []
+        if misses:
+            with admission.acquire('gemini', admission.BULK):
+                generated = generate_suggestions(misses)
+        suggestions = suggestion_precompute.merge(stored, generated)
         
         # Format the response as HTML
         html_response = format_suggestions_html(suggestions)
         
         return jsonify({
             'html': html_response,
-            'count': len(suggestions)
+            'count': len(suggestions),
+            'precomputed': len(suggestions) - len(misses)
         })
         
+    except admission.Overloaded as e:
+        return overloaded_response(e)
     except Exception as e:
         logger.error(f"Error generating AI suggestions: {str(e)}", exc_info=True)
         return jsonify({
@@ -400,12 +725,6 @@ def get_ai_suggestions():
             'details': str(e)
         }), 500
 
-
-        # Optional: redirect or note that dashboard is at /dashboard/
-        @app.route('/dashboard/')
-        def dashboard_redirect():
-            return dash_app.index()
-
 # Feedback API Endpoints
 @app.route('/api/feedback', methods=['POST'])
 def submit_feedback():
@@ -434,11 +753,201 @@ def submit_batch_feedback():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def parse_time_range():
+    """Read optional 'start'/'end' ISO 8601 query args
+
+    Returns:
+        tuple: (start, end) naive UTC datetimes, None where not given
+
+    Raises:
+        ValueError: If a given value is not a valid timestamp
+    """
+    bounds = []
+    for name in ('start', 'end'):
+        value = request.args.get(name)
+        parsed = feedback_archive.parse_timestamp(value)
+        if value and parsed is None:
+            raise ValueError("'start' and 'end' must be ISO 8601 timestamps")
+        bounds.append(parsed)
+    return tuple(bounds)
+
+def parse_since():
+    """Read the optional 'since' query arg
+
+    Returns:
+        tuple: (cursor, timestamp); an integer is a sequence cursor, anything
+               else must be an ISO 8601 timestamp. Both are None when absent.
+
+    Raises:
+        ValueError: If the value is neither
+    """
+    value = request.args.get('since', '').strip()
+    if not value:
+        return None, None
+    if value.isdigit():
+        return int(value), None
+    parsed = feedback_archive.parse_timestamp(value)
+    if parsed is None:
+        raise ValueError("'since' must be a sequence number or an ISO 8601 timestamp")
+    return None, parsed
+
+def gzip_chunks(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # 31: gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+def json_response(body, etag, size=None, headers=None):
+    """JSON response with an ETag, gzip-compressed above GZIP_MIN_SIZE when accepted
+
+    Args:
+        body (bytes or iterator): Encoded JSON, or byte chunks of it
+        etag (str): Tag of the uncompressed representation
+        size (int, optional): Length of a chunked body, if known
+        headers (dict, optional): Extra response headers
+    """
+    size = len(body) if isinstance(body, bytes) else size
+    compress = size is not None and size >= GZIP_MIN_SIZE and request.accept_encodings['gzip']
+    if compress:
+        body = gzip.compress(body, 6) if isinstance(body, bytes) else gzip_chunks(body)
+        etag = f"{etag}-gzip"
+
+    response = Response(body, mimetype='application/json', headers=headers or {})
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.headers['Cache-Control'] = 'no-cache'
+    if compress:
+        response.headers['Content-Encoding'] = 'gzip'
+    response.set_etag(etag)
+    return response
+
 @app.route('/api/feedback', methods=['GET'])
 def get_feedback():
     try:
+        try:
+            start, end = parse_time_range()
+            cursor, since = parse_since()
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        # Store-version ETag: unchanged data costs a 304 and no read of the store
+        etag = get_store_version()
+        if request.query_string:
+            etag = f"{etag}-{zlib.crc32(request.query_string):x}"
+        if request.if_none_match.contains(etag) or request.if_none_match.contains(f"{etag}-gzip"):
+            response = Response(status=304, headers={'Vary': 'Accept-Encoding', 'Cache-Control': 'no-cache'})
+            response.set_etag(etag)
+            return response
+        
+        # Delta sync: only entries appended after the client's cursor
+        if cursor is not None:
+            entries, version, reset = get_feedback_since(cursor)
+            return json_response(serialization.dumps(entries), etag, headers={
+                'X-Feedback-Version': str(version),
+                'X-Feedback-Reset': 'true' if reset else 'false'
+            })
+        
+        # A time range reaches into the archive, opening only the partitions it touches
+        start = max(start, since) if start and since else (start or since)
+        if start or end:
+            return json_response(serialization.dumps(get_feedback_range(start, end)), etag)
+        
+        # Unfiltered reads stream the stored bytes of the hot window without decoding them
+        chunks = stream_all_feedback()
+        if chunks is not None:
+            return json_response(chunks, etag, size=os.path.getsize(FEEDBACK_FILE))
+        
         feedback = get_all_feedback()
-        return jsonify(feedback)
+        return json_response(serialization.dumps(feedback), etag)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/feedback/export', methods=['GET'])
+def export_feedback():
+    """Bulk columnar export (Parquet or Arrow IPC) of the hot window or a time range"""
+    try:
+        fmt = request.args.get('format', 'parquet').strip().lower()
+        if fmt not in feedback_snapshot.EXPORT_FORMATS:
+            return jsonify({'error': f"Unsupported format '{fmt}', expected one of: "
+                                     f"{', '.join(feedback_snapshot.EXPORT_FORMATS)}"}), 400
+        if not feedback_snapshot.available():
+            return jsonify({'error': 'Columnar export requires pyarrow to be installed'}), 501
+        try:
+            start, end = parse_time_range()
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        if start or end:
+            table = feedback_snapshot.to_table(get_feedback_range(start, end))
+        else:
+            table = feedback_snapshot.read_table(get_feedback_snapshot())
+        
+        mimetype, extension = feedback_snapshot.EXPORT_FORMATS[fmt]
+        return Response(feedback_snapshot.export(table, fmt), mimetype=mimetype, headers={
+            'Content-Disposition': f'attachment; filename=feedback.{extension}'
+        })
+    except Exception as e:
+        logger.error(f"Error exporting feedback: {str(e)}", exc_info=True)
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/feedback/stats', methods=['GET'])
+def get_feedback_stats():
+    """Score quantiles and distribution from streaming sketches, without rescanning history"""
+    try:
+        source = request.args.get('source') or None
+        sentiment = request.args.get('sentiment') or None
+        return jsonify(get_score_stats().report(source, sentiment))
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/feedback/search', methods=['GET'])
+def search_feedback_endpoint():
+    """Ranked full-text search over the hot window: ?q=...&sentiment=...&limit=...&offset=..."""
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({'error': "Missing 'q' query parameter"}), 400
+    try:
+        limit = int(request.args.get('limit', 20))
+        offset = int(request.args.get('offset', 0))
+    except ValueError:
+        return jsonify({'error': "'limit' and 'offset' must be integers"}), 400
+    if not 1 <= limit <= search_index.MAX_LIMIT or offset < 0:
+        return jsonify({'error': f"'limit' must be 1-{search_index.MAX_LIMIT} and 'offset' non-negative"}), 400
+    try:
+        total, results = search_feedback(query, request.args.get('sentiment') or None, limit, offset)
+        return jsonify({
+            'query': query,
+            'total': total,
+            'limit': limit,
+            'offset': offset,
+            'results': results
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/feedback/top-terms', methods=['GET'])
+def get_feedback_top_terms():
+    """Most frequent terms: ?window=24h&sentiment=negative&kind=unigram|bigram&limit=20"""
+    window = request.args.get('window', term_tracker.ALL)
+    sentiment = request.args.get('sentiment') or None
+    kind = request.args.get('kind', 'unigram')
+    try:
+        limit = int(request.args.get('limit', 20))
+    except ValueError:
+        return jsonify({'error': "'limit' must be an integer"}), 400
+    if not 1 <= limit <= term_tracker.MAX_LIMIT:
+        return jsonify({'error': f"'limit' must be 1-{term_tracker.MAX_LIMIT}"}), 400
+    try:
+        terms = get_top_terms(window, sentiment, kind, limit)
+        return jsonify({
+            'window': window,
+            'sentiment': sentiment,
+            'kind': kind,
+            'terms': terms
+        })
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
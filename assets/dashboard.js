@@ -0,0 +1,69 @@
+// Client-side rendering for the dashboard. The server only sends compact
+// payloads built in dashboard.py, by update_aggregate:
+//   {"version": "...", "total": 42, "counts": {"Positive": 30, "Negative": 12}}
+// and by update_top_terms:
+//   {"version": "...", "window": "24h", "terms": [{"term": "late", "count": 9}]}
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    dashboard: {
+        renderAggregate: function (aggregate) {
+            if (!aggregate) {
+                var skip = window.dash_clientside.no_update;
+                return [skip, skip, skip, skip];
+            }
+            var colors = {Positive: "#28a745", Negative: "#dc3545", Neutral: "#6c757d"};
+            var counts = aggregate.counts || {};
+            var labels = Object.keys(counts);
+            var layout = {title: {text: "Sentiment Distribution"}, legend: {tracegroupgap: 0}};
+            var trace;
+            if (aggregate.error) {
+                layout.title.text = "Error Loading Data";
+                trace = {type: "pie", labels: ["Error"], values: [1]};
+            } else if (!labels.length) {
+                trace = {type: "pie", labels: ["No Data"], values: [1]};
+            } else {
+                trace = {
+                    type: "pie",
+                    labels: labels,
+                    values: labels.map(function (label) { return counts[label]; }),
+                    marker: {colors: labels.map(function (label) { return colors[label] || "#adb5bd"; })},
+                    textposition: "inside",
+                    textinfo: "percent+label"
+                };
+            }
+            return [
+                aggregate.total || 0,
+                counts.Positive || 0,
+                counts.Negative || 0,
+                {data: [trace], layout: layout}
+            ];
+        },
+
+        renderTopTerms: function (payload) {
+            if (!payload) {
+                return window.dash_clientside.no_update;
+            }
+            var terms = (payload.terms || []).slice().reverse();  // Most frequent at the top
+            var layout = {
+                title: {text: "Top Negative Terms (" + payload.window + ")"},
+                paper_bgcolor: "#f8f9fa",
+                xaxis: {title: {text: "Mentions"}},
+                yaxis: {automargin: true}
+            };
+            if (payload.error) {
+                layout.title.text = "Error Loading Terms";
+            } else if (!terms.length) {
+                layout.title.text = "Top Negative Terms (no data)";
+            }
+            return {
+                data: [{
+                    type: "bar",
+                    orientation: "h",
+                    x: terms.map(function (t) { return t.count; }),
+                    y: terms.map(function (t) { return t.term; }),
+                    marker: {color: "#dc3545"}
+                }],
+                layout: layout
+            };
+        }
+    }
+});
@@ -0,0 +1,475 @@
+import os
+import json
+import asyncio
+import logging
+import contextvars
+
+import aiohttp
+from aiohttp import web
+from slack_sdk.web.async_client import AsyncWebClient
+
+import api_common  # Shares FASTAPI_URL, TIMEOUT and the response helpers with app.py
+import alert
+import fast_classifier
+import batch_planner
+import admission
+import suggestion_precompute
+import rolling_summary
+import tracing
+from feedback_manager import add_feedback
+from gemini_helper import generate_alert_async, generate_alert_stream_async
+from gemini_helper_batch import generate_suggestions_async, format_suggestions_html
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Upstream-bound endpoints served natively on asyncio. Run with:
+#   gunicorn async_app:app --worker-class aiohttp.GunicornWebWorker
+# and route /analyze/*, /api/alerts/gemini and /get_ai_suggestions here.
+
+HTTP_POOL_SIZE = int(os.getenv('ASYNC_HTTP_POOL_SIZE', '100'))  # Shared connections per worker
+
+# ----------------------
+# Shared clients
+# ----------------------
+async def on_startup(application):
+    """Create the connection pool shared by every request in this worker"""
+    session = aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=HTTP_POOL_SIZE),
+        timeout=aiohttp.ClientTimeout(total=api_common.TIMEOUT * 2)
+    )
+    application['http'] = session
+    application['slack'] = AsyncWebClient(
+        token=alert.slack_client.token,
+        base_url=alert.slack_client.base_url,
+        session=session
+    )
+
+async def on_cleanup(application):
+    await application['http'].close()
+
+async def run_blocking(func, *args):
+    """Run a call that does file or coordination backend I/O in the default executor
+
+    The store, indexes and a redis:// backend are only reachable through
+    blocking calls; running them on the event loop would stall every
+    request in the worker.
+    """
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()  # Keep the request's trace in the worker thread
+    return await loop.run_in_executor(None, lambda: context.run(func, *args))
+
+@tracing.traced('fastapi_health')
+async def check_fastapi_health(session):
+    cached = await run_blocking(api_common.cached_health)
+    if cached is not None:
+        return cached
+    try:
+        async with session.get(f"{api_common.FASTAPI_URL}/health",
+                               timeout=aiohttp.ClientTimeout(total=api_common.TIMEOUT)) as response:
+            healthy = response.status == 200
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        logger.error(f"FastAPI health check failed: {str(e)}")
+        healthy = False
+    return await run_blocking(api_common.store_health, healthy)
+
+async def post_json(session, path, payload, timeout):
+    with tracing.span(f"fastapi_{path.strip('/')}"):
+        async with session.post(f"{api_common.FASTAPI_URL}{path}", json=payload,
+                                timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+            response.raise_for_status()
+            return await response.json()
+
+async def post_sub_batch(session, texts):
+    with await admission.acquire_async('model', admission.BULK):
+        return await post_json(session, "/predict_batch", {"texts": texts}, api_common.TIMEOUT * 2)
+
+async def predict_batch(session, texts):
+    """Send length-bucketed sub-batches to /predict_batch concurrently and merge them in input order"""
+    sub_batches = batch_planner.sub_batches(texts)
+    responses = await asyncio.gather(*(
+        post_sub_batch(session, [texts[i] for i in indices]) for indices in sub_batches
+    ))
+    results = [None] * len(texts)
+    for indices, remote_results in zip(sub_batches, responses):
+        batch_planner.record_sub_batch([texts[i] for i in indices])
+        if isinstance(remote_results, list):
+            for i, result in zip(indices, remote_results):
+                results[i] = result
+    return results
+
+async def store_feedback(text, sentiment, score, source, classifier=None):
+    """Write feedback off the event loop; the store does blocking file I/O"""
+    try:
+        result = await run_blocking(lambda: add_feedback(
+            text=text, sentiment=sentiment, score=score, source=source, classifier=classifier
+        ))
+        if result is None:
+            logger.error(f"Failed to save feedback for text: {text[:50]}...")
+    except Exception as e:
+        logger.error(f"Error saving feedback: {str(e)}", exc_info=True)
+
+def overloaded_response(error):
+    """429/503 with Retry-After for an upstream call shed by admission control"""
+    logger.warning(str(error))
+    return web.json_response({"error": str(error), "retry_after": error.retry_after},
+                             status=error.status, headers={'Retry-After': str(error.retry_after)})
+
+async def read_json(request):
+    """The request body as a JSON object, or None if it is not one"""
+    try:
+        data = await request.json()
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return None
+    return data if isinstance(data, dict) else None
+
+# ----------------------
+# Analysis
+# ----------------------
+async def analyze_single(request):
+    try:
+        data = await read_json(request) or {}
+        text = str(data.get('text', '')).strip()
+
+        if not text:
+            return web.json_response({"error": "No text provided"}, status=400)
+
+        session = request.app['http']
+
+        # Same cascade as the sync app: stored result, fast path, then the remote model
+        result = await run_blocking(api_common.reuse_exact_duplicate, text)
+        if result is None:
+            fast_results = fast_classifier.classify([text])
+            fast_result = fast_results[0] if fast_results else None
+
+            if fast_result and fast_result['confident']:
+                result = fast_result
+            elif not await check_fastapi_health(session):
+                if fast_result is None:
+                    error_msg = "Sentiment analysis service is not available"
+                    logger.error(error_msg)
+                    return web.json_response({"error": error_msg}, status=503)
+                fast_classifier.record(fallback=1)
+                result = fast_result
+            else:
+                with await admission.acquire_async('model', admission.INTERACTIVE):
+                    result = await post_json(session, "/predict", {"text": text}, api_common.TIMEOUT)
+                if fast_result:
+                    agrees = str(result.get('sentiment', '')).lower() == fast_result['sentiment']
+                    fast_classifier.record(remote=1, agreements=int(agrees))
+
+        formatted_result = api_common.format_sentiment_response(text, result)
+        await store_feedback(text, formatted_result['sentiment'].capitalize(),
+                             formatted_result['score'], 'single_analysis', formatted_result.get('classifier'))
+        return web.json_response(formatted_result)
+
+    except admission.Overloaded as e:
+        return overloaded_response(e)
+    except asyncio.TimeoutError:
+        error_msg = "Request to sentiment analysis service timed out"
+        logger.error(error_msg)
+        return web.json_response({"error": error_msg}, status=504)
+    except aiohttp.ClientError as e:
+        error_msg = f"Failed to connect to sentiment analysis service: {str(e)}"
+        logger.error(error_msg)
+        return web.json_response({"error": error_msg}, status=502)
+    except Exception as e:
+        error_msg = f"An unexpected error occurred: {str(e)}"
+        logger.error(error_msg, exc_info=True)
+        return web.json_response({"error": error_msg}, status=500)
+
+async def analyze_batch(request):
+    try:
+        data = await read_json(request) or {}
+        texts = data.get('texts', [])
+
+        if not texts or not isinstance(texts, list):
+            return web.json_response({"error": "Invalid input: expected a list of texts"}, status=400)
+
+        session = request.app['http']
+
+        unique, positions = batch_planner.dedupe(texts)
+        batch_planner.record(batches=1, items=len(texts), unique=len(unique))
+
+        results = await run_blocking(lambda: [api_common.reuse_exact_duplicate(text) for text in unique])
+        unresolved = [i for i, r in enumerate(results) if r is None]
+        fast_results = [None] * len(unique)
+        for i, fast_result in zip(unresolved, fast_classifier.classify([unique[i] for i in unresolved]) or []):
+            fast_results[i] = fast_result
+            if fast_result['confident']:
+                results[i] = fast_result
+        pending = [i for i, r in enumerate(results) if r is None]
+
+        if pending:
+            if not await check_fastapi_health(session):
+                if any(fast_results[i] is None for i in pending):
+                    error_msg = "Sentiment analysis service is not available"
+                    logger.error(error_msg)
+                    return web.json_response({"error": error_msg}, status=503)
+                fast_classifier.record(fallback=len(pending))
+                for i in pending:
+                    results[i] = fast_results[i]
+            else:
+                remote_results = await predict_batch(session, [unique[i] for i in pending])
+                compared = agreements = 0
+                for i, result in zip(pending, remote_results):
+                    results[i] = result
+                    if result is not None and fast_results[i]:
+                        compared += 1
+                        agreements += str(result.get('sentiment', '')).lower() == fast_results[i]['sentiment']
+                if compared:
+                    fast_classifier.record(remote=compared, agreements=agreements)
+
+        results = batch_planner.expand(results, positions)
+        return web.json_response([
+            api_common.format_sentiment_response(texts[i], result)
+            for i, result in enumerate(results)
+            if result is not None
+        ])
+
+    except admission.Overloaded as e:
+        return overloaded_response(e)
+    except asyncio.TimeoutError:
+        error_msg = "Batch analysis request timed out"
+        logger.error(error_msg)
+        return web.json_response({"error": error_msg}, status=504)
+    except aiohttp.ClientError as e:
+        error_msg = f"Failed to connect to sentiment analysis service: {str(e)}"
+        logger.error(error_msg)
+        return web.json_response({"error": error_msg}, status=502)
+    except Exception as e:
+        error_msg = f"An unexpected error occurred: {str(e)}"
+        logger.error(error_msg, exc_info=True)
+        return web.json_response({"error": error_msg}, status=500)
+
+# ----------------------
+# Gemini
+# ----------------------
+def _wants_event_stream(request):
+    stream_arg = request.query.get('stream', '').strip().lower()
+    return stream_arg in ('1', 'true', 'yes') or 'text/event-stream' in request.headers.get('Accept', '')
+
+# Notification tasks still in flight (kept referenced until they finish)
+background_tasks = set()
+
+def _send_gemini_alert(request, alert_message, notification):
+    """Send the alert in the background so the response does not wait on Slack/SMTP
+
+    Args:
+        notification (dict): api_common.alert_notification() for the request
+    """
+    async def send():
+        try:
+            await alert.send_alert_async(
+                request.app['slack'], alert_message, notification['sentiment'], notification['score'],
+                notification['urgency'], notification['recommendation']
+            )
+        except Exception as alert_error:
+            logger.error(f"Warning: Failed to send alert to notification system: {str(alert_error)}",
+                         exc_info=True)
+
+    task = asyncio.create_task(send())
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+
+async def _stream_gemini_alert(request, texts, scores, notification, top_terms=None, summary=None):
+    if summary:
+        chunks = await generate_alert_stream_async(summary["texts"], summary["scores"], summaries=summary["summaries"])
+    else:
+        chunks = await generate_alert_stream_async(texts, scores, top_terms)
+    response = web.StreamResponse(headers={
+        'Content-Type': 'text/event-stream',
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+    await response.prepare(request)
+
+    parts = []
+    try:
+        async for chunk in chunks:
+            parts.append(chunk)
+            await response.write(api_common.format_sse({"text": chunk}, event="chunk").encode('utf-8'))
+        alert_message = "".join(parts).strip()
+        _send_gemini_alert(request, alert_message, notification)
+        done = {
+            "status": "success",
+            "alert": alert_message,
+            "texts_processed": len(texts)
+        }
+        if summary:
+            rolling_summary.fold(summary)
+            done["summary"] = rolling_summary.describe(summary)
+        await response.write(api_common.format_sse(done, event="done").encode('utf-8'))
+    except Exception as e:
+        logger.error(f"Error streaming alert: {str(e)}", exc_info=True)
+        await response.write(api_common.format_sse({
+            "status": "error",
+            "error": f"Failed to generate alert: {str(e)}",
+            "type": type(e).__name__
+        }, event="error").encode('utf-8'))
+
+    await response.write_eof()
+    return response
+
+async def gemini_alert(request):
+    data = await read_json(request)
+    if data is None:
+        return web.json_response({
+            "status": "error",
+            "error": "Request must be a JSON object",
+            "type": "InvalidJSON"
+        }, status=400)
+
+    try:
+        top_terms = await run_blocking(api_common.alert_top_terms, data.get("top_terms"))
+    except ValueError as e:
+        return web.json_response({"status": "error", "error": str(e), "type": "InvalidInput"}, status=400)
+
+    texts = data.get("texts")
+    scores = data.get("scores")
+    if top_terms is not None and not texts and not scores:
+        texts, scores = [], []  # Alert from the top terms alone
+        if not top_terms:
+            return web.json_response({
+                "status": "error",
+                "error": "No terms are tracked for that window and sentiment; send 'texts' to analyze instead",
+                "type": "InvalidInput"
+            }, status=400)
+    elif not texts or not isinstance(texts, list) or not scores or not isinstance(scores, list) \
+            or len(texts) != len(scores):
+        return web.json_response({
+            "status": "error",
+            "error": "'texts' and 'scores' must be non-empty lists of the same length",
+            "type": "InvalidInput"
+        }, status=400)
+
+    try:
+        summary = await run_blocking(api_common.alert_summary_context, data.get("summary"), texts, scores, top_terms)
+        notification = api_common.alert_notification(data, scores)
+    except ValueError as e:
+        return web.json_response({"status": "error", "error": str(e), "type": "InvalidInput"}, status=400)
+
+    try:
+        with await admission.acquire_async('gemini', admission.INTERACTIVE):
+            if _wants_event_stream(request):
+                return await _stream_gemini_alert(request, texts, scores, notification, top_terms, summary)
+            if summary:
+                alert_message = await generate_alert_async(summary["texts"], summary["scores"], summaries=summary["summaries"])
+            else:
+                alert_message = await generate_alert_async(texts, scores, top_terms)
+        _send_gemini_alert(request, alert_message, notification)
+        if summary:
+            rolling_summary.fold(summary)
+        return web.json_response({
+            "status": "success",
+            "alert": alert_message,
+            "texts_processed": len(texts),
+            "top_terms": top_terms,
+            "summary": rolling_summary.describe(summary) if summary else None
+        })
+    except admission.Overloaded as e:
+        return overloaded_response(e)
+    except Exception as gen_error:
+        logger.error(f"Error generating alert: {str(gen_error)}", exc_info=True)
+        return web.json_response({
+            "status": "error",
+            "error": f"Failed to generate alert: {str(gen_error)}",
+            "type": type(gen_error).__name__,
+            "details": str(gen_error)
+        }, status=500)
+
+async def get_ai_suggestions(request):
+    try:
+        data = await read_json(request) or {}
+        complaints = data.get('complaints', [])
+
+        if not complaints or not isinstance(complaints, list):
+            return web.json_response({"error": "Invalid input: expected a list of complaints"}, status=400)
+
+        # Precomputed suggestions are served as stored; the misses are
+        # generated concurrently instead of one after another
+        stored = await run_blocking(suggestion_precompute.lookup, complaints)
+        misses = [c for c, s in zip(complaints, stored) if s is None]
+        generated = []
+        if misses:
+            with await admission.acquire_async('gemini', admission.BULK):
+                generated = await generate_suggestions_async(misses)
+        suggestions = suggestion_precompute.merge(stored, generated)
+        return web.json_response({
+            'html': format_suggestions_html(suggestions),
+            'count': len(suggestions),
+            'precomputed': len(suggestions) - len(misses)
+        })
+
+    except admission.Overloaded as e:
+        return overloaded_response(e)
+    except Exception as e:
+        logger.error(f"Error generating AI suggestions: {str(e)}", exc_info=True)
+        return web.json_response({
+            'error': 'Failed to generate suggestions',
+            'details': str(e)
+        }, status=500)
+
+async def admission_stats(request):
+    """Queue depth and shed counts of this process, as /api/admission/stats in the Flask app"""
+    return web.json_response(admission.get_stats())
+
+async def suggestion_stats(request):
+    """Suggestion precomputation counts of this process, as /api/suggestions/stats in the Flask app"""
+    return web.json_response(suggestion_precompute.get_stats())
+
+async def alert_summary_stats(request):
+    """Rolling summary coverage of this process, as /api/alerts/summaries/stats in the Flask app"""
+    return web.json_response(rolling_summary.get_stats())
+
+# ----------------------
+# Tracing
+# ----------------------
+@web.middleware
+async def trace_middleware(request, handler):
+    """Server-Timing spans and on-demand profiling, as in the Flask app"""
+    trace, token = tracing.start_trace(f"{request.method} {request.path}")
+    profiler = None
+    if tracing.profiling_requested(request.headers.get(tracing.PROFILE_HEADER, '')):
+        profiler = tracing.RequestProfiler(request.path)
+        profiler.start()
+    try:
+        response = await handler(request)
+        if profiler is not None:
+            report = profiler.stop()
+            profiler = None
+            if not response.prepared:
+                response.headers['X-Profile-Report'] = os.path.basename(report)
+        # Streamed responses have already sent their headers
+        if not response.prepared:
+            response.headers['Server-Timing'] = trace.server_timing()
+        tracing.export_trace(trace, response.status)
+        return response
+    finally:
+        if profiler is not None:
+            profiler.stop()
+        tracing.end_trace(token)
+
+# ----------------------
+# App Factory
+# ----------------------
+def create_app():
+    application = web.Application(middlewares=[trace_middleware])
+    application.on_startup.append(on_startup)
+    application.on_cleanup.append(on_cleanup)
+    application.add_routes([
+        web.post('/analyze/single', analyze_single),
+        web.post('/analyze/batch', analyze_batch),
+        web.post('/api/alerts/gemini', gemini_alert),
+        web.post('/get_ai_suggestions', get_ai_suggestions),
+        web.get('/api/admission/stats', admission_stats),
+        web.get('/api/suggestions/stats', suggestion_stats),
+        web.get('/api/alerts/summaries/stats', alert_summary_stats),
+    ])
+    return application
+
+app = create_app()
+
+if __name__ == '__main__':
+    web.run_app(app, port=5002)
@@ -0,0 +1,122 @@
+import os
+import logging
+import threading
+import unicodedata
+
+from feedback_aggregator import estimate_tokens
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Texts bound for /predict_batch are normalized and deduplicated, then sorted
+# by length and split into sub-batches at the bucket bounds (in estimated
+# tokens), so short reviews are not padded to the length of the longest one.
+ENABLED = os.getenv('BATCH_PLANNER_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+LENGTH_BUCKETS = tuple(int(b) for b in os.getenv('BATCH_LENGTH_BUCKETS', '64,256,1024').split(',') if b.strip())
+MAX_BATCH_ITEMS = int(os.getenv('BATCH_MAX_ITEMS', '64'))
+MAX_BATCH_TOKENS = int(os.getenv('BATCH_MAX_TOKENS', '16384'))  # Padded size: items x longest item
+
+def normalize(text):
+    """Canonical form used for deduplication and sent to the model service
+
+    Unicode is NFC-normalized and runs of whitespace are collapsed; case and
+    punctuation are kept because they carry sentiment.
+    """
+    return " ".join(unicodedata.normalize('NFC', str(text)).split())
+
+def dedupe(texts):
+    """Collapse texts with the same normalized form
+
+    Returns:
+        tuple: (unique normalized texts, index into them for each input text)
+    """
+    if not ENABLED:
+        return [str(text) for text in texts], list(range(len(texts)))
+    unique, seen, positions = [], {}, []
+    for text in texts:
+        key = normalize(text)
+        if key not in seen:
+            seen[key] = len(unique)
+            unique.append(key)
+        positions.append(seen[key])
+    return unique, positions
+
+def expand(results, positions):
+    """Map per-unique results back to the original order"""
+    return [results[i] for i in positions]
+
+def _bucket(tokens):
+    for i, bound in enumerate(LENGTH_BUCKETS):
+        if tokens <= bound:
+            return i
+    return len(LENGTH_BUCKETS)
+
+def sub_batches(texts):
+    """Group texts into length-bucketed sub-batches
+
+    Returns:
+        list: Lists of indices into texts, one per request to the model service
+    """
+    if not texts:
+        return []
+    if not ENABLED:
+        return [list(range(len(texts)))]
+
+    lengths = [estimate_tokens(text) for text in texts]
+    order = sorted(range(len(texts)), key=lambda i: lengths[i])
+    batches, current, bucket = [], [], None
+    for i in order:
+        # Sorted ascending, so the item being added is the longest so far
+        if current and (_bucket(lengths[i]) != bucket
+                        or len(current) >= MAX_BATCH_ITEMS
+                        or (len(current) + 1) * lengths[i] > MAX_BATCH_TOKENS):
+            batches.append(current)
+            current = []
+        if not current:
+            bucket = _bucket(lengths[i])
+        current.append(i)
+    batches.append(current)
+    return batches
+
+# -------------------------------
+# Counters
+# -------------------------------
+_stats_lock = threading.Lock()
+_stats = {
+    "batches": 0,            # /analyze/batch requests planned
+    "items": 0,              # Texts received
+    "unique": 0,             # Texts left after deduplication
+    "sub_batches": 0,        # Requests sent to /predict_batch
+    "remote_items": 0,       # Texts sent to /predict_batch
+    "tokens_sent": 0,        # Estimated tokens sent to /predict_batch
+    "padded_tokens": 0,      # Estimated tokens after padding each sub-batch to its longest text
+}
+
+def record(batches=0, items=0, unique=0, sub_batches=0, remote_items=0, tokens_sent=0, padded_tokens=0):
+    """Update planner counters"""
+    with _stats_lock:
+        _stats["batches"] += batches
+        _stats["items"] += items
+        _stats["unique"] += unique
+        _stats["sub_batches"] += sub_batches
+        _stats["remote_items"] += remote_items
+        _stats["tokens_sent"] += tokens_sent
+        _stats["padded_tokens"] += padded_tokens
+
+def record_sub_batch(texts):
+    """Count one request sent to the model service"""
+    lengths = [estimate_tokens(text) for text in texts]
+    record(sub_batches=1, remote_items=len(texts), tokens_sent=sum(lengths),
+           padded_tokens=max(lengths, default=0) * len(lengths))
+
+def get_stats():
+    """Return dedup rate, sub-batch sizes and padding overhead"""
+    with _stats_lock:
+        stats = dict(_stats)
+    stats["enabled"] = ENABLED
+    stats["length_buckets"] = list(LENGTH_BUCKETS)
+    stats["duplicates"] = stats["items"] - stats["unique"]
+    stats["dedup_rate"] = stats["duplicates"] / stats["items"] if stats["items"] else 0.0
+    stats["items_per_sub_batch"] = stats["remote_items"] / stats["sub_batches"] if stats["sub_batches"] else 0.0
+    stats["padding_overhead"] = (stats["padded_tokens"] / stats["tokens_sent"] - 1) if stats["tokens_sent"] else 0.0
+    return stats
@@ -0,0 +1,77 @@
+"""Alert rule engine evaluation throughput
+
+Replays a synthetic feedback stream arriving at --rate events per second
+(simulated clock: a quiet hour, then a burst of negative feedback) through
+the rule engine with the default rules plus --extra-rules copies of them,
+and reports evaluation throughput and which rules fired. Alerts are counted
+instead of being sent. Exits non-zero if throughput is below --rate.
+
+    python -m benchmarks.alert_rules_bench --events 200000 --rate 10000
+"""
+import sys
+import copy
+import time
+import random
+import argparse
+import collections
+
+import alert_rules
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=200000)
+    parser.add_argument("--rate", type=float, default=10000, help="Simulated arrival rate and throughput target (events/s)")
+    parser.add_argument("--extra-rules", type=int, default=0, help="Extra copies of the default rules")
+    parser.add_argument("--batch", type=int, default=1, help="Entries per observe() call, as add_batch_feedback sends them")
+    parser.add_argument("--seed", type=int, default=5)
+    return parser.parse_args(argv)
+
+def make_stream(args):
+    """(timestamp, entry) pairs; the last 10% are a burst of mostly negative feedback"""
+    rng = random.Random(args.seed)
+    burst_from = int(args.events * 0.9)
+    stream = []
+    for i in range(args.events):
+        negative_share = 0.8 if i >= burst_from else 0.2
+        sentiment = "Negative" if rng.random() < negative_share else rng.choice(("Positive", "Neutral"))
+        stream.append((i / args.rate, {
+            "text": f"feedback {i}",
+            "sentiment": sentiment,
+            "source": "analysis",
+            "score": round(rng.random(), 3),
+        }))
+    return stream
+
+def main(argv=None):
+    args = parse_args(argv)
+    rules = copy.deepcopy(alert_rules.DEFAULT_RULES)
+    for n in range(args.extra_rules):
+        for spec in alert_rules.DEFAULT_RULES:
+            rules.append(dict(copy.deepcopy(spec), name=f"{spec['name']}-{n}"))
+    # Spike rules need a full baseline window of history; start the clock an hour early
+    offset = 3600.0
+    fired = collections.Counter()
+    engine = alert_rules.RuleEngine(rules, notify=lambda kwargs: fired.update([kwargs["text"].split("]")[0][1:]]))
+    stream = make_stream(args)
+
+    engine.observe([{"text": "warm-up", "sentiment": "Neutral"}], now=0.0)
+    started = time.perf_counter()
+    for i in range(0, len(stream), args.batch):
+        chunk = stream[i:i + args.batch]
+        engine.observe([entry for _, entry in chunk], now=offset + chunk[-1][0])
+    elapsed = time.perf_counter() - started
+
+    throughput = len(stream) / elapsed
+    print(f"{len(stream)} events x {len(engine.rules)} rules in {elapsed:.2f} s: "
+          f"{throughput:,.0f} events/s ({throughput * len(engine.rules):,.0f} rule evaluations/s), "
+          f"{elapsed / len(stream) * 1e6:.1f} us per event")
+    print(f"Simulated stream: {len(stream) / args.rate:.0f} s at {args.rate:,.0f} events/s, "
+          f"negative burst in the last 10%")
+    print("Alerts fired:", dict(fired) or "none")
+    if throughput < args.rate:
+        print(f"FAIL: below the {args.rate:,.0f} events/s target")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,109 @@
+"""/analyze/batch with and without deduplication and length-bucketed sub-batching
+
+Sends skewed batches (Zipf-repeated lines, mostly short reviews with a tail
+of very long ones) to app.py in-process, against the model service stub
+charging per padded token, and reports latency, tokens sent upstream and
+padding per mode.
+
+    python -m benchmarks.batch_planner_bench --batches 20 --batch-size 200
+"""
+import os
+import sys
+import shutil
+import random
+import argparse
+import statistics
+import tempfile
+import time
+
+from benchmarks import stubs
+
+_WORDS = (
+    "screen battery keyboard charger delivery refund support price camera speaker "
+    "update app login order package warranty cable display sound quality slow fast "
+    "broken great terrible amazing late damaged cheap expensive noisy bright dim"
+).split()
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batches", type=int, default=20, help="Batches per mode")
+    parser.add_argument("--batch-size", type=int, default=200, help="Texts per batch")
+    parser.add_argument("--distinct", type=int, default=400, help="Distinct texts to draw from")
+    parser.add_argument("--zipf", type=float, default=1.1, help="Skew of the repeat distribution")
+    parser.add_argument("--token-latency", type=float, default=2e-6, help="Model service seconds per padded token")
+    parser.add_argument("--seed", type=int, default=11)
+    return parser.parse_args(argv)
+
+def make_corpus(args):
+    """Distinct texts, mostly 5-60 words with ~3% of 1,000-5,000 words"""
+    rng = random.Random(args.seed)
+    corpus = []
+    for i in range(args.distinct):
+        words = rng.randint(1000, 5000) if rng.random() < 0.03 else int(rng.lognormvariate(3, 0.6)) + 5
+        corpus.append(f"review {i}: " + " ".join(rng.choice(_WORDS) for _ in range(words)))
+    return corpus
+
+def make_batches(args, corpus):
+    rng = random.Random(args.seed + 1)
+    weights = [1 / (rank + 1) ** args.zipf for rank in range(len(corpus))]
+    batches = []
+    for _ in range(args.batches):
+        batch = rng.choices(corpus, weights=weights, k=args.batch_size)
+        # Some repeats arrive with different spacing, as pasted text does
+        batches.append([f"  {t}\n" if rng.random() < 0.1 else t for t in batch])
+    return batches
+
+def run_mode(app_module, batch_planner, batches, enabled):
+    batch_planner.ENABLED = enabled
+    before = batch_planner.get_stats()
+    client = app_module.app.test_client()
+    latencies = []
+    for batch in batches:
+        started = time.perf_counter()
+        response = client.post("/analyze/batch", json={"texts": batch})
+        latencies.append(time.perf_counter() - started)
+        assert response.status_code == 200 and len(response.get_json()) == len(batch), response.status_code
+    after = batch_planner.get_stats()
+    delta = {key: after[key] - before[key] for key in ("items", "unique", "sub_batches", "remote_items",
+                                                      "tokens_sent", "padded_tokens")}
+    return {
+        "p50_ms": statistics.median(latencies) * 1000,
+        "max_ms": max(latencies) * 1000,
+        "remote_items": delta["remote_items"],
+        "sub_batches": delta["sub_batches"],
+        "tokens_sent": delta["tokens_sent"],
+        "padded_tokens": delta["padded_tokens"],
+    }
+
+def main(argv=None):
+    args = parse_args(argv)
+    workdir = tempfile.mkdtemp(prefix="aiagent-batch-")
+    model_service = stubs.start_model_service(latency=0.005, token_latency=args.token_latency)
+    os.environ.setdefault("GOOGLE_API_KEY", "benchmark-key")
+    os.environ["FAST_CLASSIFIER_ENABLED"] = "false"
+    cwd = os.getcwd()
+    os.chdir(workdir)  # Empty feedback store, so near-duplicate reuse does not answer anything
+    try:
+        import app as app_module
+        import batch_planner
+        app_module.FASTAPI_URL = f"http://127.0.0.1:{model_service.server_address[1]}"
+
+        batches = make_batches(args, make_corpus(args))
+        results = {mode: run_mode(app_module, batch_planner, batches, enabled)
+                   for mode, enabled in (("as-is", False), ("planned", True))}
+    finally:
+        os.chdir(cwd)
+        model_service.shutdown()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"{args.batches} batches of {args.batch_size} texts from {args.distinct} distinct, "
+          f"zipf {args.zipf}\n")
+    print(f"{'mode':<9}{'p50 ms':>9}{'max ms':>9}{'texts sent':>12}{'requests':>10}"
+          f"{'tokens sent':>13}{'padded tokens':>15}")
+    for mode, r in results.items():
+        print(f"{mode:<9}{r['p50_ms']:>9.0f}{r['max_ms']:>9.0f}{r['remote_items']:>12}{r['sub_batches']:>10}"
+              f"{r['tokens_sent']:>13}{r['padded_tokens']:>15}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
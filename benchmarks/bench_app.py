@@ -0,0 +1,40 @@
+"""app.py wired to local stubs, for use as a gunicorn entry point
+
+    gunicorn --chdir <workdir> --pythonpath <repo> benchmarks.bench_app:app
+
+Configured through environment variables set by benchmarks/run.py:
+BENCH_MODEL_URL, BENCH_SLACK_URL, BENCH_SMTP_PORT and BENCH_GEMINI_LATENCY.
+"""
+import os
+import functools
+
+os.environ.setdefault("GOOGLE_API_KEY", "benchmark-key")
+
+import yagmail
+from slack_sdk import WebClient
+
+import app as app_module
+import api_common
+import alert
+import llm_router
+from benchmarks.stubs import FakeGenerativeModel
+
+# Sentiment model service (app.py holds its own binding of the name)
+api_common.FASTAPI_URL = app_module.FASTAPI_URL = os.environ["BENCH_MODEL_URL"]
+
+# Gemini
+fake_model = FakeGenerativeModel(latency=float(os.getenv("BENCH_GEMINI_LATENCY", "1.0")))
+llm_router.router = llm_router.Router(model_factory=lambda name: fake_model)
+
+# Slack and SMTP
+alert.slack_client = WebClient(token="xoxb-benchmark", base_url=os.environ["BENCH_SLACK_URL"])
+alert.yagmail.SMTP = functools.partial(
+    yagmail.SMTP,
+    host="127.0.0.1",
+    port=int(os.environ["BENCH_SMTP_PORT"]),
+    smtp_ssl=False,
+    smtp_starttls=False,
+    smtp_skip_login=True,
+)
+
+app = app_module.app
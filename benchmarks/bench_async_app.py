@@ -0,0 +1,8 @@
+"""async_app.py wired to local stubs, for use as a gunicorn entry point
+
+    gunicorn --worker-class aiohttp.GunicornWebWorker benchmarks.bench_async_app:app
+
+Uses the same environment variables and patches as bench_app.
+"""
+from benchmarks import bench_app  # noqa: F401  (applies the stub patches)
+from async_app import app
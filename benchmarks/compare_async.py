@@ -0,0 +1,46 @@
+"""Compare concurrency per worker: app.py under gevent vs async_app.py
+
+Runs the upstream-bound scenarios against a single worker of each server
+at the same concurrency and prints throughput and latency side by side.
+
+    python -m benchmarks.compare_async --concurrency 200 --requests 1000
+"""
+import sys
+import shutil
+
+from benchmarks import run
+
+def main(argv=None):
+    args = run.parse_args(argv)
+    if "--workers" not in (argv or sys.argv[1:]):
+        args.workers = 1
+    endpoints = [e for e in args.endpoints.split(",") if e in run.ASYNC_SCENARIOS]
+
+    servers, env = run.start_stubs(args)
+    results = {}
+    try:
+        for server in ("gevent", "async"):
+            process, base_url, workdir = run.start_app(args, env, server)
+            try:
+                results[server] = {
+                    name: run.run_scenario(base_url, name, args.concurrency, args.requests)
+                    for name in endpoints
+                }
+            finally:
+                process.terminate()
+                process.wait(timeout=30)
+                shutil.rmtree(workdir, ignore_errors=True)
+    finally:
+        for stub in servers:
+            stub.shutdown()
+
+    print(f"{args.workers} worker(s), concurrency {args.concurrency}, {args.requests} requests per endpoint\n")
+    print(f"{'endpoint':<16}{'gevent rps':>12}{'async rps':>12}{'gevent p95':>12}{'async p95':>12}{'errors g/a':>12}")
+    for name in endpoints:
+        g, a = results["gevent"][name], results["async"][name]
+        print(f"{name:<16}{g['throughput_rps']:>12}{a['throughput_rps']:>12}"
+              f"{g['p95_ms']:>12}{a['p95_ms']:>12}{str(g['errors']) + '/' + str(a['errors']):>12}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,98 @@
+"""Cold-start benchmark for an API worker: import time and RSS of app.py
+
+Each run imports app.py in a fresh interpreter (as a gunicorn worker
+would) with the dashboard mounted eagerly and lazily, then requests
+/dashboard/ once to show where the deferred cost lands.
+
+    python -m benchmarks.import_bench --runs 5
+"""
+import os
+import sys
+import json
+import shutil
+import argparse
+import statistics
+import subprocess
+import tempfile
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ("dash", "pandas", "plotly", "pyarrow")
+
+PROBE = r"""
+import sys, time, json, resource
+
+def rss_mb():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+started = time.perf_counter()
+import app
+import_ms = (time.perf_counter() - started) * 1000
+import_rss = rss_mb()
+heavy = [m for m in HEAVY if m in sys.modules]
+
+client = app.app.test_client()
+started = time.perf_counter()
+status = client.get("/dashboard/").status_code
+dashboard_ms = (time.perf_counter() - started) * 1000
+
+print(json.dumps({
+    "import_ms": import_ms,
+    "rss_mb": import_rss,
+    "heavy_modules": heavy,
+    "first_dashboard_ms": dashboard_ms,
+    "dashboard_status": status,
+    "rss_after_dashboard_mb": rss_mb(),
+}))
+""".replace("HEAVY", repr(HEAVY_MODULES))
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per mode")
+    parser.add_argument("--modes", default="eager,lazy", help="DASHBOARD_MOUNT values to compare")
+    return parser.parse_args(argv)
+
+def probe(mode, workdir):
+    env = dict(os.environ, DASHBOARD_MOUNT=mode, PYTHONPATH=REPO_DIR)
+    env.setdefault("GOOGLE_API_KEY", "benchmark-key")
+    env.setdefault("FAST_CLASSIFIER_ENABLED", "false")
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE], cwd=workdir, env=env,
+        capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def main(argv=None):
+    args = parse_args(argv)
+    workdir = tempfile.mkdtemp(prefix="aiagent-import-")
+    shutil.copy(os.path.join(REPO_DIR, "feedback_data.json"), workdir)
+    try:
+        results = {}
+        for mode in args.modes.split(","):
+            probe(mode, workdir)  # Warm the bytecode and OS file caches
+            runs = [probe(mode, workdir) for _ in range(args.runs)]
+            results[mode] = {
+                "import_ms": statistics.median(r["import_ms"] for r in runs),
+                "rss_mb": statistics.median(r["rss_mb"] for r in runs),
+                "first_dashboard_ms": statistics.median(r["first_dashboard_ms"] for r in runs),
+                "rss_after_dashboard_mb": statistics.median(r["rss_after_dashboard_mb"] for r in runs),
+                "heavy_modules": runs[-1]["heavy_modules"],
+            }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"Median of {args.runs} fresh interpreters per mode\n")
+    print(f"{'mode':<8}{'import ms':>12}{'RSS MB':>10}{'1st /dashboard/ ms':>21}{'RSS after MB':>15}  heavy modules at import")
+    for mode, r in results.items():
+        print(f"{mode:<8}{r['import_ms']:>12.0f}{r['rss_mb']:>10.1f}{r['first_dashboard_ms']:>21.0f}"
+              f"{r['rss_after_dashboard_mb']:>15.1f}  {', '.join(r['heavy_modules']) or '-'}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,83 @@
+"""Tail latency of Gemini calls through llm_router, with and without hedging
+
+Drives the router against a FakeGenerativeModel whose latency follows an
+injected distribution (mostly fast, with occasional stalls by default) and
+reports p50/p95/p99, the hedge rate and how often the hedge won. Each call
+holds an interactive Gemini admission slot, as /api/alerts/gemini does, so
+a hedge is only sent when a slot is free (GEMINI_MAX_CONCURRENCY) and
+fewer than --max-hedges are running; the others are counted as skipped.
+
+    python -m benchmarks.llm_router_bench --calls 400 --concurrency 4
+"""
+import sys
+import argparse
+import asyncio
+import statistics
+import time
+
+import admission
+import llm_router
+from benchmarks.stubs import FakeGenerativeModel, tail_latency, lognormal_latency
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=400, help="Calls per mode")
+    parser.add_argument("--concurrency", type=int, default=4, help="Calls in flight")
+    parser.add_argument("--max-hedges", type=int, default=llm_router.MAX_HEDGES, help="Hedges running at once")
+    parser.add_argument("--distribution", choices=("tail", "lognormal"), default="tail")
+    parser.add_argument("--fast", type=float, default=0.05, help="Typical latency in seconds")
+    parser.add_argument("--slow", type=float, default=1.0, help="Stall latency for --distribution tail")
+    parser.add_argument("--slow-fraction", type=float, default=0.06, help="Share of stalled calls")
+    parser.add_argument("--seed", type=int, default=7)
+    return parser.parse_args(argv)
+
+def make_distribution(args):
+    if args.distribution == "lognormal":
+        return lognormal_latency(median=args.fast, sigma=0.8, seed=args.seed)
+    return tail_latency(fast=args.fast, slow=args.slow, slow_fraction=args.slow_fraction, seed=args.seed)
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+async def run_mode(args, hedge):
+    model = FakeGenerativeModel(latency=make_distribution(args))
+    router = llm_router.Router(tiers=[("fake", None)], model_factory=lambda name: model, hedge=hedge,
+                               max_hedges=args.max_hedges)
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies = []
+
+    async def one():
+        async with semaphore:
+            started = time.perf_counter()
+            with await admission.acquire_async('gemini', admission.INTERACTIVE):
+                await router.generate_async("Summarize the negative feedback.", "alert")
+            latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(one() for _ in range(args.calls)))
+    # Skip the warm-up calls made before the router had a p95 to hedge on
+    measured = latencies[llm_router.MIN_SAMPLES:]
+    stats = router.get_stats()["models"]["fake"]
+    return {
+        "p50": statistics.median(measured),
+        "p95": percentile(measured, 0.95),
+        "p99": percentile(measured, 0.99),
+        "hedges": stats["hedges"],
+        "hedge_wins": stats["hedge_wins"],
+        "skipped": stats["hedges_skipped"],
+        "calls": stats["calls"],
+    }
+
+def main(argv=None):
+    args = parse_args(argv)
+    results = {mode: asyncio.run(run_mode(args, hedge)) for mode, hedge in (("single", False), ("hedged", True))}
+
+    print(f"{args.calls} calls, concurrency {args.concurrency}, {args.distribution} latency\n")
+    print(f"{'mode':<8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'hedges':>9}{'won':>7}{'skipped':>9}{'model calls':>13}")
+    for mode, r in results.items():
+        print(f"{mode:<8}{r['p50'] * 1000:>10.0f}{r['p95'] * 1000:>10.0f}{r['p99'] * 1000:>10.0f}"
+              f"{r['hedges']:>9}{r['hedge_wins']:>7}{r['skipped']:>9}{r['calls']:>13}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
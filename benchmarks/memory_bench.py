@@ -0,0 +1,204 @@
+"""Per-worker memory of app.py under gunicorn, with and without --preload
+
+Generates a hot window of --rows entries, serves benchmarks.bench_app with
+--workers gevent workers in each mode, drives the read endpoints (feedback
+list, search, top terms and the dashboard callbacks, with and without
+collapsed near-duplicates) until every worker has served them, then reads
+each process's /proc/<pid>/smaps_rollup. PSS charges shared pages proportionally, so the
+sum over the master and workers is what the deployment really costs;
+Private is what each worker holds alone. With --writes, feedback is then
+submitted and the endpoints driven again, to show what a store refresh
+costs each worker.
+
+    python -m benchmarks.memory_bench --rows 100000 --workers 4
+"""
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import tempfile
+import subprocess
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+import serialization
+from benchmarks import run
+
+REPO_DIR = run.REPO_DIR
+MODES = {"fork": [], "preload": ["--preload"]}
+SMAPS_FIELDS = ("Rss", "Pss", "Private_Clean", "Private_Dirty")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--modes", default="fork,preload", help=f"Comma-separated: {', '.join(MODES)}")
+    parser.add_argument("--rounds", type=int, default=40, help="Requests per endpoint per worker")
+    parser.add_argument("--writes", type=int, default=0, help="Feedback entries to submit before a second measurement")
+    parser.add_argument("--seed", type=int, default=7)
+    return parser.parse_args(argv)
+
+def make_store(path, rows, seed):
+    """Entries spread over the last day, so all of them stay in the hot window"""
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    feedback = []
+    for i in range(rows):
+        sentiment = rng.choice(("Positive", "Negative", "Neutral"))
+        feedback.append({
+            "text": f"{' '.join(rng.sample(run._WORDS, 12))} order {i}",
+            "sentiment": sentiment,
+            "source": "analysis",
+            "timestamp": (now - timedelta(days=(rows - i) / rows)).isoformat(),
+            "score": round(rng.random(), 3),
+        })
+    serialization.write_store(path, {"feedback": feedback})
+
+def _dash(outputs, inputs, state, changed):
+    return {
+        "output": outputs[0] if len(outputs) == 1 else ".." + "...".join(outputs) + "..",
+        "outputs": [{"id": o.split(".")[0], "property": o.split(".")[1]} for o in outputs]
+        if len(outputs) > 1 else {"id": outputs[0].split(".")[0], "property": outputs[0].split(".")[1]},
+        "inputs": [{"id": i, "property": p, "value": v} for i, p, v in inputs],
+        "changedPropIds": [changed],
+        "state": [{"id": i, "property": p, "value": v} for i, p, v in state],
+    }
+
+# (method, path, JSON body)
+READS = [
+    ("GET", "/api/feedback", None),
+    ("GET", "/api/feedback/search?q=battery+refund", None),
+    ("GET", "/api/feedback/top-terms?window=24h&sentiment=negative", None),
+    ("POST", "/dashboard/_dash-update-component", _dash(
+        ["sentiment-aggregate.data"],
+        [("interval-component", "n_intervals", 1)],
+        [("sentiment-aggregate", "data", None)],
+        "interval-component.n_intervals")),
+    ("POST", "/dashboard/_dash-update-component", _dash(
+        ["feedback-table.data", "table-version.data"],
+        [("interval-component", "n_intervals", 1), ("collapse-duplicates", "value", []), ("search-input", "value", None)],
+        [("table-version", "data", None)],
+        "interval-component.n_intervals")),
+    ("POST", "/dashboard/_dash-update-component", _dash(
+        ["feedback-table.data", "table-version.data"],
+        [("interval-component", "n_intervals", 1), ("collapse-duplicates", "value", ["collapse"]), ("search-input", "value", None)],
+        [("table-version", "data", None)],
+        "collapse-duplicates.value")),
+]
+
+def drive(base_url, requests_per_endpoint, concurrency):
+    """Send every read endpoint requests_per_endpoint times; returns failed requests"""
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=concurrency, pool_maxsize=concurrency)
+    session.mount("http://", adapter)
+
+    def call(item):
+        method, path, body = item
+        try:
+            return session.request(method, base_url + path, json=body, timeout=300).status_code >= 400
+        except requests.exceptions.RequestException:
+            return True
+
+    work = [item for item in READS for _ in range(requests_per_endpoint)]
+    random.shuffle(work)
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return sum(pool.map(call, work))
+
+def smaps(pid):
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            name, _, rest = line.partition(":")
+            if name in SMAPS_FIELDS:
+                values[name] = int(rest.split()[0]) / 1024
+    return {"rss": values["Rss"], "pss": values["Pss"], "private": values["Private_Clean"] + values["Private_Dirty"]}
+
+def workers_of(pid):
+    with open(f"/proc/{pid}/task/{pid}/children") as f:
+        return [int(child) for child in f.read().split()]
+
+def measure(master):
+    return {"master": smaps(master.pid), "workers": [smaps(pid) for pid in workers_of(master.pid)]}
+
+def start(mode, workdir, args, env):
+    port = run._free_port()
+    command = [
+        sys.executable, "-m", "gunicorn",
+        "--config", os.path.join(REPO_DIR, "gunicorn.conf.py"),
+        "--chdir", workdir,
+        "--pythonpath", REPO_DIR,
+        "--bind", f"127.0.0.1:{port}",
+        "--workers", str(args.workers),
+        "--worker-class", "gevent",
+        "--timeout", "300",
+        "--log-level", "warning",
+        *MODES[mode],
+        "benchmarks.bench_app:app",
+    ]
+    process = subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        run._wait_for(base_url + "/", timeout=600)
+    except RuntimeError:
+        process.kill()
+        raise
+    return process, base_url
+
+def report(mode, phase, snapshot, failed):
+    workers = snapshot["workers"]
+    mean = {key: sum(w[key] for w in workers) / len(workers) for key in ("rss", "pss", "private")}
+    total = snapshot["master"]["pss"] + sum(w["pss"] for w in workers)
+    print(f"{mode:<9}{phase:<8}{mean['rss']:>14.0f}{mean['pss']:>14.0f}{mean['private']:>18.0f}"
+          f"{snapshot['master']['rss']:>14.0f}{total:>14.0f}{failed:>8}")
+    return {"phase": phase, "worker_mean": mean, "master": snapshot["master"], "total_pss": total, "failed": failed}
+
+def main(argv=None):
+    args = parse_args(argv)
+    servers, env = run.start_stubs(argparse.Namespace(model_latency=0.0, slack_latency=0.0, smtp_latency=0.0, gemini_latency=0.0))
+    env = dict(os.environ, **env)
+    env.setdefault("FAST_CLASSIFIER_ENABLED", "false")
+    env["ALERT_RULES_ENABLED"] = "false"
+    env["SUGGESTION_PRECOMPUTE_ENABLED"] = "false"
+    template = tempfile.mkdtemp(prefix="aiagent-memory-")
+    print(f"Generating {args.rows} entries...")
+    make_store(os.path.join(template, "feedback_data.json"), args.rows, args.seed)
+
+    print(f"\n{args.workers} gevent workers, {args.rows} entries in the hot window, sizes in MB\n")
+    print(f"{'mode':<9}{'phase':<8}{'worker RSS':>14}{'worker PSS':>14}{'worker private':>18}"
+          f"{'master RSS':>14}{'total PSS':>14}{'failed':>8}")
+    results = {}
+    try:
+        for mode in args.modes.split(","):
+            workdir = tempfile.mkdtemp(prefix=f"aiagent-memory-{mode}-")
+            shutil.copy(os.path.join(template, "feedback_data.json"), workdir)
+            process, base_url = start(mode, workdir, args, env)
+            try:
+                results[mode] = []
+                failed = drive(base_url, args.rounds * args.workers, args.workers * 4)
+                time.sleep(1)
+                results[mode].append(report(mode, "reads", measure(process), failed))
+                if args.writes:
+                    for i in range(args.writes):
+                        requests.post(base_url + "/api/feedback", json={"text": run._text(), "sentiment": "Negative"}, timeout=300)
+                    failed = drive(base_url, args.rounds * args.workers, args.workers * 4)
+                    time.sleep(1)
+                    results[mode].append(report(mode, "writes", measure(process), failed))
+            finally:
+                process.terminate()
+                process.wait(timeout=60)
+                shutil.rmtree(workdir, ignore_errors=True)
+    finally:
+        shutil.rmtree(template, ignore_errors=True)
+        for server in servers:
+            server.shutdown()
+    print()
+    print(json.dumps(results))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,73 @@
+"""Gemini alert prompt cost with and without rolling summaries
+
+Simulates a caller that asks for an alert after every --new texts arrive and
+sends every text seen so far, as the batch page does. For
+each alert, reports the prompt size, the time to build it and the texts
+clustered into it: once sending everything, and once through
+rolling_summary, where only the texts no window summary covers are sent and
+then folded in. The fake Gemini model replies with a summary of
+ALERT_SUMMARY_WORDS words, so summary sizes are realistic.
+
+    python -m benchmarks.rolling_summary_bench --alerts 40 --new 50
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+
+import llm_router
+from benchmarks import run
+from benchmarks.stubs import FakeGenerativeModel
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--alerts", type=int, default=40)
+    parser.add_argument("--new", type=int, default=50, help="New texts before each alert")
+    parser.add_argument("--seed", type=int, default=11)
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    os.environ.setdefault("GOOGLE_API_KEY", "bench")
+    import rolling_summary
+    reply = " ".join(["issue"] * rolling_summary.MAX_WORDS)
+    llm_router.router = llm_router.Router(tiers=[("fake", None)], model_factory=lambda name: FakeGenerativeModel(0.0, reply=reply))
+    import gemini_helper
+
+    rng = random.Random(args.seed)
+    texts, scores = [], []
+    rows = []
+    print(f"{'alert':>6}{'sent':>8}{'full chars':>12}{'full ms':>10}"
+          f"{'new texts':>11}{'rolling chars':>15}{'rolling ms':>12}")
+    for n in range(1, args.alerts + 1):
+        for _ in range(args.new):
+            texts.append(f"{' '.join(rng.sample(run._WORDS, 10))} ticket {len(texts)}")
+            scores.append(round(rng.random(), 3))
+
+        started = time.perf_counter()
+        full = gemini_helper.build_alert_prompt(texts, scores)
+        full_ms = (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        context = rolling_summary.prepare(rolling_summary.DEFAULT_STREAM, texts, scores)
+        rolling = gemini_helper.build_alert_prompt(context["texts"], context["scores"], summaries=context["summaries"])
+        rolling_ms = (time.perf_counter() - started) * 1000
+        # Fold synchronously so the next alert sees the updated summary
+        rolling_summary._fold(context["stream"], context["window"], context["texts"], context["scores"])
+
+        row = {
+            "alert": n, "sent": len(texts),
+            "full_chars": len(full), "full_ms": full_ms,
+            "new_texts": len(context["texts"]), "rolling_chars": len(rolling), "rolling_ms": rolling_ms,
+        }
+        rows.append(row)
+        print(f"{n:>6}{row['sent']:>8}{row['full_chars']:>12}{full_ms:>10.1f}"
+              f"{row['new_texts']:>11}{row['rolling_chars']:>15}{rolling_ms:>12.1f}")
+    print()
+    print(json.dumps({"rows": rows, "summary": rolling_summary.get_stats()}))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
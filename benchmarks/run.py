@@ -0,0 +1,303 @@
+"""End-to-end load and latency benchmark for app.py
+
+Starts local stubs for every upstream, serves app.py under gunicorn with
+gevent workers, drives each endpoint at a fixed concurrency and reports
+throughput and p50/p95/p99 latency.
+
+    python -m benchmarks.run                    # run and compare with baseline.json
+    python -m benchmarks.run --update-baseline  # record a new baseline
+    python -m benchmarks.run --endpoints analyze_single,feedback_list
+    python -m benchmarks.run --server async --endpoints analyze_single,gemini_alert
+
+Exits with status 1 if any endpoint regresses beyond --tolerance. The
+comparison is skipped when the run's load or stub settings differ from the
+ones the baseline was recorded with. Baseline numbers also depend on the
+machine they were measured on, so record a new baseline (on the machine
+that will run the comparison) rather than comparing across machines.
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import random
+import shutil
+import socket
+import platform
+import argparse
+import tempfile
+import subprocess
+import statistics
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from benchmarks import stubs
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_FILE = os.path.join(REPO_DIR, "benchmarks", "baseline.json")
+# Settings that change the measured numbers; a baseline only compares with
+# runs that match it on all of them
+COMPARED_CONFIG = ("server", "concurrency", "requests", "workers",
+                   "model_latency", "gemini_latency", "slack_latency", "smtp_latency")
+
+# server -> (gunicorn entry point, worker class)
+SERVERS = {
+    "gevent": ("benchmarks.bench_app:app", "gevent"),
+    "async": ("benchmarks.bench_async_app:app", "aiohttp.GunicornWebWorker"),
+}
+# Endpoints served by async_app
+ASYNC_SCENARIOS = ("analyze_single", "analyze_batch", "gemini_alert", "ai_suggestions")
+
+# -------------------------------
+# Scenarios
+# -------------------------------
+_WORDS = (
+    "screen battery keyboard charger delivery refund support price camera speaker "
+    "update app login order package warranty cable display sound quality slow fast "
+    "broken great terrible amazing late damaged cheap expensive noisy bright dim "
+    "crashes freezes works fails loves hates returns replaces waits cancels"
+).split()
+
+def _text():
+    """Distinct random text, so near-duplicate reuse does not skew results"""
+    words = random.sample(_WORDS, 10)
+    return f"{' '.join(words)} {uuid.uuid4().hex}"
+
+def _dash_update():
+    """One interval tick of the sentiment-aggregate callback from a tab that has no data yet"""
+    return {
+        "output": "sentiment-aggregate.data",
+        "outputs": {"id": "sentiment-aggregate", "property": "data"},
+        "inputs": [{"id": "interval-component", "property": "n_intervals", "value": 1}],
+        "changedPropIds": ["interval-component.n_intervals"],
+        "state": [{"id": "sentiment-aggregate", "property": "data", "value": None}],
+    }
+
+# name -> (method, path, payload factory)
+SCENARIOS = {
+    "feedback_list": ("GET", "/api/feedback", None),
+    "feedback_submit": ("POST", "/api/feedback", lambda: {"text": _text(), "sentiment": "Negative"}),
+    "analyze_single": ("POST", "/analyze/single", lambda: {"text": _text()}),
+    "analyze_batch": ("POST", "/analyze/batch", lambda: {"texts": [_text() for _ in range(10)]}),
+    "send_alert": ("POST", "/send-alert", lambda: {"text": _text(), "sentiment": "negative", "score": 0.9}),
+    "gemini_alert": ("POST", "/api/alerts/gemini", lambda: {"texts": [_text() for _ in range(5)], "scores": [0.1] * 5}),
+    "ai_suggestions": ("POST", "/get_ai_suggestions", lambda: {"complaints": [_text() for _ in range(3)]}),
+    "dashboard_update": ("POST", "/dashboard/_dash-update-component", _dash_update),
+}
+
+# -------------------------------
+# Helpers
+# -------------------------------
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(int(round(pct / 100.0 * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return sorted_values[index]
+
+def _wait_for(url, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            requests.get(url, timeout=1)
+            return
+        except requests.exceptions.RequestException:
+            time.sleep(0.2)
+    raise RuntimeError(f"Server at {url} did not start within {timeout}s")
+
+def start_app(args, env_overrides, server="gevent"):
+    """Start gunicorn in a scratch directory so the real feedback store is untouched"""
+    entry, worker_class = SERVERS[server]
+    workdir = tempfile.mkdtemp(prefix="aiagent-bench-")
+    shutil.copy(os.path.join(REPO_DIR, "feedback_data.json"), workdir)
+    port = _free_port()
+    env = dict(os.environ, **env_overrides)
+    env.setdefault("FAST_CLASSIFIER_ENABLED", "false")
+    command = [
+        sys.executable, "-m", "gunicorn",
+        "--chdir", workdir,
+        "--pythonpath", REPO_DIR,
+        "--bind", f"127.0.0.1:{port}",
+        "--workers", str(args.workers),
+        "--worker-class", worker_class,
+        "--worker-connections", "1000",
+        "--timeout", "120",
+        "--log-level", "warning",
+        entry,
+    ]
+    process = subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        _wait_for(base_url + "/")
+    except RuntimeError:
+        process.kill()
+        raise
+    return process, base_url, workdir
+
+def run_scenario(base_url, name, concurrency, requests_per_scenario):
+    """Fire requests at a fixed concurrency and summarize latencies"""
+    method, path, payload = SCENARIOS[name]
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=concurrency, pool_maxsize=concurrency)
+    session.mount("http://", adapter)
+
+    def call(_):
+        start = time.perf_counter()
+        try:
+            response = session.request(method, base_url + path, json=payload() if payload else None, timeout=120)
+            ok = response.status_code < 400
+        except requests.exceptions.RequestException:
+            ok = False
+        return time.perf_counter() - start, ok
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(call, range(requests_per_scenario)))
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(r[0] for r in results)
+    errors = sum(1 for r in results if not r[1])
+    return {
+        "requests": len(results),
+        "errors": errors,
+        "throughput_rps": round(len(results) / elapsed, 2),
+        "mean_ms": round(statistics.mean(latencies) * 1000, 2),
+        "p50_ms": round(_percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(_percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(_percentile(latencies, 99) * 1000, 2),
+    }
+
+def machine_info():
+    """Where the numbers were measured; recorded with the baseline"""
+    return {
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpus": os.cpu_count(),
+        "python": platform.python_version(),
+    }
+
+def config_mismatches(config, baseline):
+    """Return the compared settings on which a run differs from the baseline"""
+    defaults = vars(parse_args([]))  # Baselines predating a setting used its default
+    recorded = baseline.get("config", {})
+    return [
+        f"{key}={config.get(key)} (baseline {recorded.get(key, defaults[key])})"
+        for key in COMPARED_CONFIG
+        if config.get(key) != recorded.get(key, defaults[key])
+    ]
+
+def compare(results, baseline, tolerance):
+    """Return a list of regressions against the baseline"""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get("results", {}).get(name)
+        if not base:
+            continue
+        if result["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {result['p95_ms']}ms vs baseline {base['p95_ms']}ms")
+        if result["throughput_rps"] < base["throughput_rps"] * (1 - tolerance):
+            regressions.append(f"{name}: throughput {result['throughput_rps']} rps vs baseline {base['throughput_rps']} rps")
+        if result["errors"] > base.get("errors", 0):
+            regressions.append(f"{name}: {result['errors']} errors vs baseline {base.get('errors', 0)}")
+    return regressions
+
+def print_table(results):
+    print(f"{'endpoint':<18}{'rps':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}")
+    for name, r in results.items():
+        print(f"{name:<18}{r['throughput_rps']:>9}{r['p50_ms']:>10}{r['p95_ms']:>10}{r['p99_ms']:>10}{r['errors']:>8}")
+
+# -------------------------------
+# Main
+# -------------------------------
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Load and latency benchmark for app.py")
+    parser.add_argument("--endpoints", default=",".join(SCENARIOS), help="Comma-separated scenario names")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=200, help="Requests per scenario")
+    parser.add_argument("--workers", type=int, default=4, help="Gunicorn workers")
+    parser.add_argument("--server", choices=sorted(SERVERS), default="gevent",
+                        help="Benchmark app.py under gevent or async_app.py under aiohttp")
+    parser.add_argument("--model-latency", type=float, default=0.05, help="Model service latency (s)")
+    parser.add_argument("--gemini-latency", type=float, default=1.0, help="Fake Gemini latency (s)")
+    parser.add_argument("--slack-latency", type=float, default=0.1, help="Slack stub latency (s)")
+    parser.add_argument("--smtp-latency", type=float, default=0.1, help="SMTP stub latency (s)")
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative regression")
+    parser.add_argument("--output", help="Write results JSON to this file")
+    return parser.parse_args(argv)
+
+def start_stubs(args):
+    """Start all upstream stubs and return (servers, env for the app)"""
+    model = stubs.start_model_service(args.model_latency)
+    slack = stubs.start_slack(args.slack_latency)
+    smtp = stubs.start_smtp(args.smtp_latency)
+    env = {
+        "BENCH_MODEL_URL": f"http://127.0.0.1:{model.server_address[1]}",
+        "BENCH_SLACK_URL": f"http://127.0.0.1:{slack.server_address[1]}/api/",
+        "BENCH_SMTP_PORT": str(smtp.server_address[1]),
+        "BENCH_GEMINI_LATENCY": str(args.gemini_latency),
+    }
+    return [model, slack, smtp], env
+
+def main(argv=None):
+    args = parse_args(argv)
+    servers, env = start_stubs(args)
+    if args.server == "async" and args.endpoints == ",".join(SCENARIOS):
+        args.endpoints = ",".join(ASYNC_SCENARIOS)
+    process, base_url, workdir = start_app(args, env, args.server)
+
+    results = {}
+    try:
+        for name in args.endpoints.split(","):
+            results[name] = run_scenario(base_url, name, args.concurrency, args.requests)
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+        shutil.rmtree(workdir, ignore_errors=True)
+        for server in servers:
+            server.shutdown()
+
+    report = {
+        "config": {k: v for k, v in vars(args).items() if k not in ("baseline", "update_baseline", "output")},
+        "machine": machine_info(),
+        "results": results,
+    }
+    print_table(results)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        mismatches = config_mismatches(report["config"], baseline)
+        if mismatches:
+            print(f"\nNot compared with {args.baseline}: it was recorded with different settings: "
+                  f"{', '.join(mismatches)}. Re-run with the baseline's settings, or record a new baseline.")
+            return 0
+        if baseline.get("machine") and baseline["machine"] != report["machine"]:
+            print(f"\nNote: the baseline was measured on a different machine ({baseline['machine']}); "
+                  f"differences may come from the hardware rather than the code.")
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print("\nRegressions:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print("\nNo regressions against baseline")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
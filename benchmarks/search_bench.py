@@ -0,0 +1,92 @@
+"""Full-text search latency over a synthetic feedback store
+
+Builds the search index over --rows synthetic entries (Zipf-distributed
+vocabulary plus a few product words in every entry), then times queries
+from rare terms to terms in most entries, phrase queries and a sentiment
+filter. Also reports the build, save and load cost of the index file.
+
+    python -m benchmarks.search_bench --rows 1000000
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import itertools
+import statistics
+import tempfile
+
+import search_index
+
+PRODUCT_WORDS = (
+    "screen battery keyboard charger delivery refund support price camera speaker "
+    "slow broken great terrible late"
+).split()
+QUERIES = [
+    "w5000",                 # rare
+    "w500 slow",             # rare AND common
+    "battery",               # ~13% of entries
+    "battery refund",
+    '"battery refund"',      # phrase
+    "w1 w2",                 # two very common terms
+    "w0",                    # in most entries
+]
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--vocabulary", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per query")
+    parser.add_argument("--seed", type=int, default=3)
+    return parser.parse_args(argv)
+
+def make_feedback(args):
+    rng = random.Random(args.seed)
+    vocabulary = [f"w{i}" for i in range(args.vocabulary)]
+    cumulative = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(vocabulary))))
+    feedback = []
+    for _ in range(args.rows):
+        words = rng.choices(vocabulary, cum_weights=cumulative, k=rng.randint(5, 40)) + rng.sample(PRODUCT_WORDS, 2)
+        feedback.append({"text": " ".join(words), "sentiment": rng.choice(("Positive", "Negative"))})
+    return feedback
+
+def timed(func, repeat):
+    runs = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        runs.append((time.perf_counter() - started) * 1000)
+    return statistics.median(runs), result
+
+def main(argv=None):
+    args = parse_args(argv)
+    print(f"Generating {args.rows} entries...")
+    feedback = make_feedback(args)
+
+    started = time.perf_counter()
+    index = search_index.SearchIndex().sync(feedback)
+    print(f"Indexed in {time.perf_counter() - started:.1f} s\n")
+
+    print(f"{'query':<22}{'matches':>10}{'top 20 ms':>11}{'@1000 ms':>12}")
+    for query in QUERIES + ["w10 (Negative)"]:
+        text, sentiment = (query.split(" (")[0], "Negative") if "(" in query else (query, None)
+        ms, (total, _) = timed(lambda: index.search(text, sentiment, limit=20), args.repeat)
+        page_ms, _ = timed(lambda: index.search(text, sentiment, limit=20, offset=1000), args.repeat)
+        print(f"{query:<22}{total:>10}{ms:>11.1f}{page_ms:>12.1f}")
+
+    path = os.path.join(tempfile.mkdtemp(prefix="aiagent-search-"), "feedback_search.idx")
+    try:
+        started = time.perf_counter()
+        search_index.save_index(index, path, force=True)
+        save_s = time.perf_counter() - started
+        started = time.perf_counter()
+        search_index.load_index(path)
+        load_s = time.perf_counter() - started
+        print(f"\nIndex file: {os.path.getsize(path) / 1e6:.0f} MB, save {save_s:.1f} s, load {load_s:.1f} s")
+    finally:
+        os.remove(path)
+        os.rmdir(os.path.dirname(path))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,87 @@
+"""Encode/decode benchmark for the feedback store serialization
+
+Compares the original pretty-printed stdlib encoding with the compact
+encoding used by serialization.py (stdlib and orjson backends), plus the
+pass-through read used by GET /api/feedback.
+
+    python -m benchmarks.serialization_bench --rows 10000,100000,1000000
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+
+import serialization
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def make_rows(n):
+    return {"feedback": [
+        {
+            "text": f"Feedback number {i}: the screen quality is horrible and support never answered",
+            "sentiment": "Negative" if i % 3 else "Positive",
+            "source": "single_analysis",
+            "timestamp": "2025-10-04T16:31:00.000000",
+            "score": 0.5 + (i % 50) / 100,
+        }
+        for i in range(n)
+    ]}
+
+def timed(fn, repeat=3):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def bench(n, repeat):
+    data = make_rows(n)
+    codecs = {
+        "json indent=2 (old)": (
+            lambda d: json.dumps(d, indent=2).encode("utf-8"),
+            json.loads,
+        ),
+        "json compact": (
+            lambda d: json.dumps(d, separators=(",", ":"), ensure_ascii=False).encode("utf-8"),
+            json.loads,
+        ),
+    }
+    if orjson is not None:
+        codecs["orjson"] = (orjson.dumps, orjson.loads)
+
+    rows = []
+    for name, (encode, decode) in codecs.items():
+        encode_time, raw = timed(lambda: encode(data), repeat)
+        decode_time, _ = timed(lambda: decode(raw), repeat)
+        rows.append((name, len(raw), encode_time, decode_time))
+
+    # Pass-through: stream the stored list bytes without decoding
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "feedback_data.json")
+        serialization.write_store(path, data)
+        stream_time, _ = timed(lambda: b"".join(serialization.iter_feedback_bytes(path)), repeat)
+        rows.append(("pass-through read", os.path.getsize(path), 0.0, stream_time))
+
+    print(f"\n{n:,} rows (backend: {serialization.BACKEND})")
+    print(f"{'codec':<22}{'bytes':>14}{'encode ms':>12}{'decode ms':>12}")
+    for name, size, encode_time, decode_time in rows:
+        print(f"{name:<22}{size:>14,}{encode_time * 1000:>12.1f}{decode_time * 1000:>12.1f}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", default="10000,100000,1000000")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+    for n in args.rows.split(","):
+        bench(int(n), args.repeat)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
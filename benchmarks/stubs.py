@@ -0,0 +1,213 @@
+"""Local stand-ins for the upstream services used by app.py
+
+- Sentiment model service (/health, /predict, /predict_batch)
+- Slack Web API (/api/chat.postMessage)
+- SMTP server
+- Fake Gemini model (in-process, see FakeGenerativeModel)
+
+Each stub takes a latency in seconds that is added to every request.
+"""
+import json
+import math
+import time
+import asyncio
+import random
+import socketserver
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# -------------------------------
+# HTTP stubs
+# -------------------------------
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    latency = 0.0
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, payload, status=200):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length", 0))
+        raw = self.rfile.read(length) if length else b""
+        try:
+            return json.loads(raw or b"{}")
+        except ValueError:
+            return {}
+
+def _prediction(text):
+    """Deterministic fake prediction so runs are reproducible"""
+    rng = random.Random(str(text))
+    return {
+        "sentiment": "negative" if rng.random() < 0.5 else "positive",
+        "score": round(0.5 + rng.random() / 2, 4),
+    }
+
+class ModelServiceHandler(_StubHandler):
+    """Stand-in for the FastAPI sentiment model service
+
+    /predict_batch additionally costs token_latency per padded token (items
+    x longest item, at ~4 characters per token), like a batched transformer.
+    """
+    token_latency = 0.0
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._reply({"status": "ok"})
+        else:
+            self._reply({"error": "not found"}, 404)
+
+    def do_POST(self):
+        data = self._read_json()
+        if self.path == "/predict":
+            time.sleep(self.latency)
+            self._reply(_prediction(data.get("text", "")))
+        elif self.path == "/predict_batch":
+            texts = data.get("texts", [])
+            padded_tokens = len(texts) * max((len(str(t)) // 4 + 1 for t in texts), default=0)
+            time.sleep(self.latency + self.token_latency * padded_tokens)
+            self._reply([_prediction(t) for t in texts])
+        else:
+            self._reply({"error": "not found"}, 404)
+
+class SlackHandler(_StubHandler):
+    """Stand-in for the Slack Web API"""
+
+    def do_POST(self):
+        self._read_json()
+        time.sleep(self.latency)
+        self._reply({"ok": True, "channel": "C0000000", "ts": str(time.time())})
+
+def _serve_http(handler, latency, port=0, **attrs):
+    handler_class = type(handler.__name__, (handler,), dict(attrs, latency=latency))
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler_class)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def start_model_service(latency=0.05, port=0, token_latency=0.0):
+    """Start the model service stub and return the server"""
+    return _serve_http(ModelServiceHandler, latency, port, token_latency=token_latency)
+
+def start_slack(latency=0.1, port=0):
+    """Start the Slack stub and return the server"""
+    return _serve_http(SlackHandler, latency, port)
+
+# -------------------------------
+# SMTP stub
+# -------------------------------
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    latency = 0.0
+
+    def _send(self, line):
+        self.wfile.write(line.encode("ascii") + b"\r\n")
+
+    def handle(self):
+        self._send("220 localhost stub SMTP")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode("utf-8", "replace").strip().upper()
+            if command.startswith(("EHLO", "HELO")):
+                self._send("250 localhost")
+            elif command == "DATA":
+                self._send("354 End data with <CR><LF>.<CR><LF>")
+                while self.rfile.readline().rstrip(b"\r\n") != b".":
+                    pass
+                time.sleep(self.latency)
+                self._send("250 OK")
+            elif command.startswith("QUIT"):
+                self._send("221 Bye")
+                return
+            else:
+                self._send("250 OK")
+
+class _ThreadingTCPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+def start_smtp(latency=0.1, port=0):
+    """Start the SMTP stub and return the server"""
+    handler_class = type("SMTPHandler", (_SMTPHandler,), {"latency": latency})
+    server = _ThreadingTCPServer(("127.0.0.1", port), handler_class)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+# -------------------------------
+# Fake Gemini model
+# -------------------------------
+class _FakeResponse:
+    def __init__(self, text):
+        self.text = text
+        self.candidates = []
+
+def lognormal_latency(median=1.0, sigma=0.5, seed=None):
+    """Latency distribution with a long right tail, for FakeGenerativeModel"""
+    rng = random.Random(seed)
+    return lambda: rng.lognormvariate(math.log(median), sigma)
+
+def tail_latency(fast=0.5, slow=5.0, slow_fraction=0.05, seed=None):
+    """Mostly fast calls with an occasional stall (slow_fraction of them)"""
+    rng = random.Random(seed)
+    return lambda: slow if rng.random() < slow_fraction else fast * rng.uniform(0.8, 1.2)
+
+class FakeGenerativeModel:
+    """Drop-in for genai.GenerativeModel with a configurable latency
+
+    latency is seconds per call, or a callable returning one (see
+    lognormal_latency and tail_latency) to model a latency distribution.
+    The latency is split across chunks when stream=True, with the first
+    chunk arriving after first_token_fraction of it. generate_content_async
+    sleeps on the event loop instead of blocking.
+    """
+
+    def __init__(self, latency=1.0, chunks=8, first_token_fraction=0.2, reply="Stub alert: review recent negative feedback."):
+        self.latency = latency
+        self.chunks = chunks
+        self.first_token_fraction = first_token_fraction
+        self.reply = reply
+
+    def sample_latency(self):
+        return self.latency() if callable(self.latency) else self.latency
+
+    def generate_content(self, prompt, stream=False, **kwargs):
+        if not stream:
+            time.sleep(self.sample_latency())
+            return _FakeResponse(self.reply)
+        return self._stream()
+
+    def _stream(self):
+        latency = self.sample_latency()
+        for i, part in enumerate(self._parts()):
+            time.sleep(self._chunk_delay(i, latency))
+            yield _FakeResponse(part)
+
+    async def generate_content_async(self, prompt, stream=False, **kwargs):
+        if not stream:
+            await asyncio.sleep(self.sample_latency())
+            return _FakeResponse(self.reply)
+        return self._stream_async()
+
+    async def _stream_async(self):
+        latency = self.sample_latency()
+        for i, part in enumerate(self._parts()):
+            await asyncio.sleep(self._chunk_delay(i, latency))
+            yield _FakeResponse(part)
+
+    def _parts(self):
+        words = self.reply.split(" ")
+        step = max(len(words) // self.chunks, 1)
+        return [" ".join(words[i:i + step]) + " " for i in range(0, len(words), step)]
+
+    def _chunk_delay(self, index, latency):
+        if index == 0:
+            return latency * self.first_token_fraction
+        return latency * (1 - self.first_token_fraction) / max(len(self._parts()) - 1, 1)
@@ -0,0 +1,519 @@
+import os
+import json
+import time
+import uuid
+import logging
+import threading
+
+try:
+    import redis  # Optional: shared backend for multi-instance deployments
+except ImportError:
+    redis = None
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# State that must be shared between worker processes and hosts goes through
+# one backend: locks, leader elections, counters, short-lived values, token
+# buckets and pub/sub. COORDINATION_URL selects it: memory:// (the default)
+# keeps everything in this process, which is enough for a single worker and
+# for tests; redis://host:port/db shares it through any Redis-compatible
+# server. Keys and channels are prefixed with COORDINATION_PREFIX. With more
+# than one gunicorn worker, memory:// gives each worker its own locks and
+# leaders, so gunicorn.conf.py warns unless a shared backend is configured.
+#
+# Waiting for a lock blocks the calling thread. gunicorn's gevent worker
+# monkey-patches the standard library, so there that is one greenlet; on an
+# asyncio event loop (async_app.py), take locks in an executor thread.
+COORDINATION_URL = os.getenv('COORDINATION_URL', 'memory://')
+KEY_PREFIX = os.getenv('COORDINATION_PREFIX', 'aiagent:')
+LEADER_TTL = float(os.getenv('COORDINATION_LEADER_TTL', '15'))  # seconds a leader lease lasts
+LOCK_POLL_MAX = 0.1  # Longest sleep between attempts to take a busy lock
+
+STORE_CHANNEL = 'feedback.store'  # Store-change events published by feedback_manager
+
+class LockTimeout(Exception):
+    """Raised when a lock used as a context manager could not be taken in time"""
+
+class Lock:
+    """Lease lock held by a random token; expires after ttl if its holder dies
+
+    Args:
+        backend (Backend): Where the lock lives
+        name (str): Lock name
+        ttl (float): Lease length in seconds; extend() renews it
+        timeout (float, optional): Seconds the with statement waits (None: forever)
+    """
+
+    def __init__(self, backend, name, ttl=30, timeout=None):
+        self.backend = backend
+        self.name = name
+        self.ttl = ttl
+        self.timeout = timeout
+        self.token = uuid.uuid4().hex
+        self.held = False
+
+    def acquire(self, blocking=True, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        delay = 0.005
+        while True:
+            if self.backend._try_lock(self.name, self.token, self.ttl):
+                self.held = True
+                return True
+            if not blocking or (deadline is not None and time.monotonic() >= deadline):
+                return False
+            if deadline is not None:
+                delay = min(delay, max(deadline - time.monotonic(), 0))
+            self.backend._wait(self.name, delay)
+            delay = min(delay * 2, LOCK_POLL_MAX)
+
+    def extend(self):
+        """Renew the lease; False if it was lost"""
+        self.held = self.backend._extend(self.name, self.token, self.ttl)
+        return self.held
+
+    def release(self):
+        if self.held:
+            self.held = False
+            self.backend._unlock(self.name, self.token)
+
+    def __enter__(self):
+        if not self.acquire(timeout=self.timeout):
+            raise LockTimeout(f"Timed out waiting for lock '{self.name}'")
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+class Election:
+    """Lease-based leader election for singleton background work
+
+    is_leader() takes the lease when it is free and renews it every ttl/3,
+    so a leader that dies or stops asking is replaced within ttl. Work done
+    under is_leader() runs at most once at a time across the cluster.
+    """
+
+    def __init__(self, backend, name, ttl=LEADER_TTL):
+        self.name = name
+        self.lock = Lock(backend, f"leader:{name}", ttl)
+        self._next_check = 0.0
+        self._mutex = threading.Lock()
+
+    def is_leader(self):
+        with self._mutex:
+            now = time.monotonic()
+            if now >= self._next_check:
+                if self.lock.held:
+                    self.lock.extend()
+                if not self.lock.held:
+                    self.lock.acquire(blocking=False)
+                self._next_check = now + self.lock.ttl / 3
+            return self.lock.held
+
+    def resign(self):
+        with self._mutex:
+            self.lock.release()
+            self._next_check = 0.0
+
+class Subscription:
+    def __init__(self, close):
+        self._close = close
+
+    def close(self):
+        self._close()
+
+# -------------------------------
+# Backends
+# -------------------------------
+class Backend:
+    """Coordination primitives; subclasses implement the underscored hooks"""
+
+    name = 'base'
+
+    def lock(self, name, ttl=30, timeout=None):
+        return Lock(self, name, ttl, timeout)
+
+    def election(self, name, ttl=LEADER_TTL):
+        return Election(self, name, ttl)
+
+    def _try_lock(self, name, token, ttl):
+        raise NotImplementedError
+
+    def _extend(self, name, token, ttl):
+        raise NotImplementedError
+
+    def _unlock(self, name, token):
+        raise NotImplementedError
+
+    def _wait(self, name, timeout):
+        """Pause before the next attempt on a busy lock; may return early once it is released"""
+        time.sleep(timeout)
+
+    def incr(self, name, amount=1, ttl=None):
+        """Add to a counter and return the new value; ttl starts when the counter is created"""
+        raise NotImplementedError
+
+    def counter(self, name):
+        raise NotImplementedError
+
+    def set_value(self, name, value, ttl=None):
+        """Store a JSON-serializable value, optionally expiring after ttl seconds"""
+        raise NotImplementedError
+
+    def get_value(self, name, default=None):
+        raise NotImplementedError
+
+    def take(self, name, rate, capacity, tokens=1):
+        """Take tokens from a bucket refilled at rate per second up to capacity
+
+        Returns:
+            bool: True if the tokens were available
+        """
+        raise NotImplementedError
+
+    def publish(self, channel, message):
+        """Send a JSON-serializable message to every subscriber of channel"""
+        raise NotImplementedError
+
+    def subscribe(self, channel, callback):
+        """Call callback(message) for each message published on channel
+
+        Returns:
+            Subscription: close() stops delivery
+        """
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+class MemoryBackend(Backend):
+    """Process-local backend for a single worker and tests
+
+    Messages are delivered synchronously in the publishing thread, after a
+    JSON round trip so payloads behave as they would over Redis.
+    """
+
+    name = 'memory'
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._released = threading.Condition(self._lock)  # Wakes lock waiters
+        self._locks = {}        # name -> (token, expires)
+        self._values = {}       # name -> (value, expires or None)
+        self._buckets = {}      # name -> [tokens, updated]
+        self._subscribers = {}  # channel -> [callback]
+
+    def _live(self, name, now):
+        entry = self._values.get(name)
+        if entry is not None and entry[1] is not None and entry[1] <= now:
+            del self._values[name]
+            return None
+        return entry
+
+    def _try_lock(self, name, token, ttl):
+        now = time.monotonic()
+        with self._lock:
+            holder = self._locks.get(name)
+            if holder is not None and holder[1] > now and holder[0] != token:
+                return False
+            self._locks[name] = (token, now + ttl)
+            return True
+
+    def _extend(self, name, token, ttl):
+        now = time.monotonic()
+        with self._lock:
+            holder = self._locks.get(name)
+            if holder is None or holder[0] != token or holder[1] <= now:
+                return False
+            self._locks[name] = (token, now + ttl)
+            return True
+
+    def _unlock(self, name, token):
+        with self._lock:
+            holder = self._locks.get(name)
+            if holder is not None and holder[0] == token:
+                del self._locks[name]
+                self._released.notify_all()
+
+    def _wait(self, name, timeout):
+        with self._released:
+            holder = self._locks.get(name)
+            remaining = holder[1] - time.monotonic() if holder else 0
+            if remaining > 0:
+                self._released.wait(min(timeout, remaining))
+
+    def incr(self, name, amount=1, ttl=None):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._live(name, now)
+            if entry is None:
+                entry = (0, now + ttl if ttl else None)
+            value = entry[0] + amount
+            self._values[name] = (value, entry[1])
+            return value
+
+    def counter(self, name):
+        with self._lock:
+            entry = self._live(name, time.monotonic())
+            return int(entry[0]) if entry else 0
+
+    def set_value(self, name, value, ttl=None):
+        value = json.loads(json.dumps(value))
+        with self._lock:
+            self._values[name] = (value, time.monotonic() + ttl if ttl else None)
+
+    def get_value(self, name, default=None):
+        with self._lock:
+            entry = self._live(name, time.monotonic())
+            return entry[0] if entry else default
+
+    def take(self, name, rate, capacity, tokens=1):
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.setdefault(name, [capacity, now])
+            bucket[0] = min(capacity, bucket[0] + (now - bucket[1]) * rate)
+            bucket[1] = now
+            if bucket[0] >= tokens:
+                bucket[0] -= tokens
+                return True
+            return False
+
+    def publish(self, channel, message):
+        payload = json.dumps(message)
+        with self._lock:
+            callbacks = list(self._subscribers.get(channel, ()))
+        for callback in callbacks:
+            try:
+                callback(json.loads(payload))
+            except Exception as e:
+                logger.error(f"Subscriber to {channel} failed: {str(e)}", exc_info=True)
+
+    def subscribe(self, channel, callback):
+        with self._lock:
+            self._subscribers.setdefault(channel, []).append(callback)
+
+        def close():
+            with self._lock:
+                if callback in self._subscribers.get(channel, ()):
+                    self._subscribers[channel].remove(callback)
+        return Subscription(close)
+
+# Compare-and-delete / compare-and-expire on the lock token, and an atomic
+# token bucket timed by the server clock
+_UNLOCK_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('del', KEYS[1]) end
+return 0
+"""
+_EXTEND_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('pexpire', KEYS[1], ARGV[2]) end
+return 0
+"""
+_INCR_SCRIPT = """
+local value = redis.call('incrby', KEYS[1], ARGV[1])
+if tonumber(ARGV[2]) > 0 and redis.call('pttl', KEYS[1]) < 0 then redis.call('pexpire', KEYS[1], ARGV[2]) end
+return value
+"""
+_TAKE_SCRIPT = """
+local rate, capacity, requested = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3])
+local clock = redis.call('time')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('hmget', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(state[1]) or capacity
+local updated = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(now - updated, 0) * rate)
+local allowed = 0
+if tokens >= requested then
+    tokens = tokens - requested
+    allowed = 1
+end
+redis.call('hset', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+redis.call('pexpire', KEYS[1], math.ceil(capacity / rate * 1000) + 1000)
+return allowed
+"""
+
+class RedisBackend(Backend):
+    """Backend shared through a Redis-compatible server (requires the redis package)
+
+    Subscriptions are served by one listener thread per subscription.
+    """
+
+    name = 'redis'
+
+    def __init__(self, url, prefix=KEY_PREFIX):
+        if redis is None:
+            raise RuntimeError("COORDINATION_URL points at Redis but the 'redis' package is not installed")
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+        self._unlock_script = self.client.register_script(_UNLOCK_SCRIPT)
+        self._extend_script = self.client.register_script(_EXTEND_SCRIPT)
+        self._incr_script = self.client.register_script(_INCR_SCRIPT)
+        self._take_script = self.client.register_script(_TAKE_SCRIPT)
+        self._listeners = []
+
+    def _key(self, name):
+        return f"{self.prefix}{name}"
+
+    def _try_lock(self, name, token, ttl):
+        return bool(self.client.set(self._key(f"lock:{name}"), token, nx=True, px=int(ttl * 1000)))
+
+    def _extend(self, name, token, ttl):
+        return bool(self._extend_script(keys=[self._key(f"lock:{name}")], args=[token, int(ttl * 1000)]))
+
+    def _unlock(self, name, token):
+        self._unlock_script(keys=[self._key(f"lock:{name}")], args=[token])
+
+    def incr(self, name, amount=1, ttl=None):
+        return int(self._incr_script(keys=[self._key(f"count:{name}")], args=[int(amount), int((ttl or 0) * 1000)]))
+
+    def counter(self, name):
+        return int(self.client.get(self._key(f"count:{name}")) or 0)
+
+    def set_value(self, name, value, ttl=None):
+        self.client.set(self._key(f"value:{name}"), json.dumps(value), px=int(ttl * 1000) if ttl else None)
+
+    def get_value(self, name, default=None):
+        raw = self.client.get(self._key(f"value:{name}"))
+        return default if raw is None else json.loads(raw)
+
+    def take(self, name, rate, capacity, tokens=1):
+        return bool(self._take_script(keys=[self._key(f"bucket:{name}")], args=[rate, capacity, tokens]))
+
+    def publish(self, channel, message):
+        self.client.publish(self._key(f"channel:{channel}"), json.dumps(message))
+
+    def subscribe(self, channel, callback):
+        def handler(raw):
+            try:
+                callback(json.loads(raw["data"]))
+            except Exception as e:
+                logger.error(f"Subscriber to {channel} failed: {str(e)}", exc_info=True)
+
+        pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(**{self._key(f"channel:{channel}"): handler})
+        listener = pubsub.run_in_thread(sleep_time=1.0, daemon=True)
+        self._listeners.append(listener)
+
+        def close():
+            listener.stop()
+            pubsub.close()
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+        return Subscription(close)
+
+    def close(self):
+        for listener in list(self._listeners):
+            listener.stop()
+        self._listeners = []
+        self.client.close()
+
+def is_shared(url=COORDINATION_URL):
+    """True if url names a backend shared between processes"""
+    scheme = url.split('://', 1)[0].lower() if '://' in url else url.lower()
+    return scheme not in ('', 'memory')
+
+def create_backend(url=COORDINATION_URL):
+    """Backend for a memory:// or redis:// (rediss://, unix://) URL"""
+    scheme = url.split('://', 1)[0].lower() if '://' in url else url.lower()
+    if scheme in ('', 'memory'):
+        return MemoryBackend()
+    if scheme in ('redis', 'rediss', 'unix'):
+        return RedisBackend(url)
+    raise ValueError(f"Unsupported COORDINATION_URL scheme: {scheme}")
+
+# -------------------------------
+# Per-process backend
+# -------------------------------
+_backend = None
+_backend_lock = threading.Lock()
+_elections = {}
+_subscriptions = []  # [channel, callback, Subscription on the current backend or None]
+
+def _attach(backend):
+    """Subscribe the recorded callbacks on a new backend (caller holds _backend_lock)"""
+    for entry in _subscriptions:
+        entry[2] = backend.subscribe(entry[0], entry[1])
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                backend = create_backend()
+                _attach(backend)
+                _backend = backend
+                logger.info(f"Coordination backend: {_backend.name}")
+    return _backend
+
+def set_backend(backend):
+    """Swap the backend (e.g. a fresh MemoryBackend in tests and benchmarks)"""
+    global _backend
+    with _backend_lock:
+        _backend = backend
+        _elections.clear()
+        _attach(backend)
+
+def subscribe(channel, callback):
+    """Call callback(message) for each message on channel, whichever backend is current
+
+    Unlike Backend.subscribe, the subscription is carried over to a backend
+    installed by set_backend() and to the fresh backend of a forked worker.
+    Nothing connects until the backend is first used, so subscribing at
+    import time in a gunicorn --preload master opens no connection there.
+    """
+    entry = [channel, callback, None]
+    with _backend_lock:
+        _subscriptions.append(entry)
+        if _backend is not None:
+            entry[2] = _backend.subscribe(channel, callback)
+
+    def close():
+        with _backend_lock:
+            if entry in _subscriptions:
+                _subscriptions.remove(entry)
+            if entry[2] is not None:
+                entry[2].close()
+                entry[2] = None
+    return Subscription(close)
+
+def _after_fork():
+    """A forked worker gets its own backend on first use
+
+    The parent's connections, leader leases and subscriber threads are not
+    the child's to use; its recorded subscriptions are attached again to the
+    new backend.
+    """
+    global _backend, _backend_lock
+    _backend = None
+    _backend_lock = threading.Lock()
+    _elections.clear()
+    for entry in _subscriptions:
+        entry[2] = None
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork)
+
+def election(name):
+    """The shared Election for a singleton task in this process"""
+    backend = get_backend()
+    with _backend_lock:
+        if name not in _elections:
+            _elections[name] = backend.election(name)
+        return _elections[name]
+
+def is_leading(name):
+    """Whether this process currently leads an election, for stats
+
+    Read-only: unlike Election.is_leader() it never takes or renews the
+    lease, so a process that does not run the task cannot win it by polling.
+    """
+    with _backend_lock:
+        election = _elections.get(name)
+    return election is not None and election.lock.held
+
+def get_stats():
+    backend = get_backend()
+    return {
+        "backend": backend.name,
+        "leader_of": sorted(name for name, e in _elections.items() if e.lock.held),
+        "elections": sorted(_elections),
+    }
@@ -1,43 +1,44 @@
 import dash
-from dash import html, dcc, dash_table, Input, Output, State, ctx
+from dash import html, dcc, dash_table, Input, Output, State, ClientsideFunction, ctx
+from dash.exceptions import PreventUpdate
 
 import plotly.express as px
 import pandas as pd
 import numpy as np
 import io
 import base64
-import json
-import os
+from flask import Flask
+import tracing
+from feedback_manager import get_all_feedback, get_dedup_index, get_feedback_snapshot, search_positions, get_term_tracker, get_store_version
+import feedback_snapshot
+import term_tracker
 
 # ----------------------
 # Data Loading
 # ----------------------
 def load_feedback_data():
-    """Load feedback data from JSON file"""
+    """Load the hot window of feedback; older entries are in the archive"""
     try:
-        if os.path.exists('feedback_data.json'):
-            with open('feedback_data.json', 'r') as f:
-                data = json.load(f)
-                # Ensure we're returning a list of feedback items
-                if isinstance(data, dict) and 'feedback' in data:
-                    return data['feedback']
-                elif isinstance(data, list):
-                    return data
-                return []
-        return []
-    except json.JSONDecodeError:
-        print("Error: feedback_data.json contains invalid JSON. Resetting to empty list.")
-        with open('feedback_data.json', 'w') as f:
-            json.dump({"feedback": []}, f)
-        return []
+        return get_all_feedback()
     except Exception as e:
         print(f"Error loading feedback data: {e}")
         return []
 
 # Convert feedback data to DataFrame
-def get_feedback_df():
-    """Convert feedback data to pandas DataFrame"""
-    feedback = load_feedback_data()
+def get_feedback_df(feedback=None):
+    """Convert feedback data to pandas DataFrame
+
+    Without an explicit list the memory-mapped columnar snapshot is used,
+    which already has typed timestamps, and the JSON path is the fallback.
+    """
+    if feedback is None:
+        try:
+            path = get_feedback_snapshot()
+            if path is not None:
+                return feedback_snapshot.load_dataframe(path)
+        except Exception as e:
+            print(f"Error reading feedback snapshot, falling back to JSON: {e}")
+        feedback = load_feedback_data()
     
     if not feedback:
         return pd.DataFrame(columns=["text", "sentiment", "source", "timestamp"])
@@ -60,9 +61,6 @@ def get_feedback_df():
         print(f"Error creating DataFrame: {e}")
         return pd.DataFrame(columns=["text", "sentiment", "source", "timestamp"])
 
-# Load initial data
-data = get_feedback_df()
-
 # ----------------------
 # Dash App Factory
 # ----------------------
@@ -74,21 +72,8 @@ def create_dashboard(server):
         suppress_callback_exceptions=True,
     )
 
-    # ----------------------
-    # Helper functions
-    # ----------------------
-    def create_pie(df):
-        if df.empty:
-            return px.pie(names=["No Data"], values=[1], title="Sentiment Distribution")
-        return px.pie(
-            df,
-            names="sentiment",
-            color="sentiment",
-            color_discrete_map={"Positive":"#28a745","Negative":"#dc3545","Neutral":"#6c757d"},
-            title="Sentiment Distribution"
-        ).update_traces(textposition='inside', textinfo='percent+label')
-
-    fig_pie = create_pie(data)
+    # Sentiment aggregate shared by every connected tab: (store version, payload)
+    aggregate_cache = {}
 
     # Trend chart data
     trend_df = pd.DataFrame({
@@ -122,6 +107,12 @@ def create_dashboard(server):
             interval=5*1000,  # 5 seconds
             n_intervals=0
         ),
+        # Compact sentiment counts; KPI cards and the pie chart are rendered from it in the browser
+        dcc.Store(id="sentiment-aggregate"),
+        # Store version the table was last built from
+        dcc.Store(id="table-version"),
+        # Top negative terms as [{term, count}]; the bar chart is rendered from it in the browser
+        dcc.Store(id="top-terms"),
         
         # Header
         html.Div([
@@ -148,13 +139,46 @@ def create_dashboard(server):
         # Charts
         html.Div([
             html.Div([dcc.Graph(id="pie-chart")], className="chart-container"),
+            html.Div([
+                html.Div([
+                    dcc.Dropdown(
+                        id="top-terms-window",
+                        options=[{"label": w, "value": w} for w in term_tracker.WINDOWS + (term_tracker.ALL,)],
+                        value=term_tracker.WINDOWS[0] if term_tracker.WINDOWS else term_tracker.ALL,
+                        clearable=False,
+                        style={"width": "120px", "display": "inline-block"}
+                    ),
+                    dcc.RadioItems(
+                        id="top-terms-kind",
+                        options=[{"label": " Words", "value": "unigram"}, {"label": " Phrases", "value": "bigram"}],
+                        value="unigram",
+                        inline=True,
+                        style={"display": "inline-block", "marginLeft": "10px"}
+                    ),
+                ]),
+                dcc.Graph(id="top-terms-chart")
+            ], className="chart-container"),
         ], className="charts-row"),
         
         # Action Buttons
         html.Div([
             html.Div([
                 html.Button("Select All", id="select-all-btn", n_clicks=0, className="btn btn-primary mx-2"),
-                html.Button("Deselect All", id="deselect-all-btn", n_clicks=0, className="btn btn-secondary mx-2")
+                html.Button("Deselect All", id="deselect-all-btn", n_clicks=0, className="btn btn-secondary mx-2"),
+                dcc.Input(
+                    id="search-input",
+                    type="search",
+                    placeholder="Search feedback (words or \"a phrase\")",
+                    debounce=True,
+                    style={"width": "320px", "marginLeft": "10px"}
+                ),
+                dcc.Checklist(
+                    id="collapse-duplicates",
+                    options=[{"label": " Collapse near-duplicates", "value": "collapse"}],
+                    value=[],
+                    inline=True,
+                    style={"display": "inline-block", "marginLeft": "10px"}
+                )
             ], style={"textAlign": "center", "marginBottom": "20px"})
         ]),
         
@@ -165,7 +189,8 @@ def create_dashboard(server):
                 columns=[
                     {"name": "Feedback", "id": "Feedback"},
                     {"name": "Sentiment", "id": "Sentiment"},
-                    {"name": "Date", "id": "Date"}
+                    {"name": "Date", "id": "Date"},
+                    {"name": "Count", "id": "Count"}
                 ],
                 data=[],
                 page_size=10,
@@ -199,61 +224,85 @@ def create_dashboard(server):
         ], className="table-section"),
     ], className="dashboard-container")
     
-    # 2️⃣ Update table & KPI cards from feedback data
+    # 1️⃣ Sentiment counts for the KPI cards and pie chart
     @app_dash.callback(
-        Output("feedback-table", "data"),
+        Output("sentiment-aggregate", "data"),
+        Input('interval-component', 'n_intervals'),
+        State("sentiment-aggregate", "data")
+    )
+    def update_aggregate(n_intervals, current):
+        """Counts per sentiment, only sent when the store changed
+
+        The payload is a few dozen bytes; the figure itself is built by
+        dashboard.renderAggregate in assets/dashboard.js.
+        """
+        version = get_store_version()
+        if current and current.get("version") == version:
+            raise PreventUpdate
+        cached = aggregate_cache.get("latest")
+        if cached is None or cached[0] != version:
+            try:
+                df = get_feedback_df()
+                counts = df['sentiment'].astype(str).str.capitalize().value_counts() if not df.empty else pd.Series(dtype=int)
+                aggregate = {
+                    "version": version,
+                    "total": int(len(df)),
+                    "counts": {sentiment: int(count) for sentiment, count in counts.items()},
+                }
+            except Exception as e:
+                print(f"Error in update_aggregate: {str(e)}")
+                return {"version": None, "total": 0, "counts": {}, "error": True}
+            cached = aggregate_cache["latest"] = (version, aggregate)
+        return cached[1]
+
+    app_dash.clientside_callback(
+        ClientsideFunction(namespace="dashboard", function_name="renderAggregate"),
         Output("total-feedback", "children"),
         Output("positive-feedback", "children"),
         Output("negative-feedback", "children"),
         Output("pie-chart", "figure"),
-        Input('interval-component', 'n_intervals')
+        Input("sentiment-aggregate", "data")
+    )
+
+    # 2️⃣ Update table from feedback data
+    @app_dash.callback(
+        Output("feedback-table", "data"),
+        Output("table-version", "data"),
+        Input('interval-component', 'n_intervals'),
+        Input('collapse-duplicates', 'value'),
+        Input('search-input', 'value'),
+        State("table-version", "data")
     )
-    def update_table(n_intervals):
+    def update_table(n_intervals, collapse_value, search_query, table_version):
+        # A tick with nothing new stored leaves the table as it is
+        version = get_store_version()
+        if ctx.triggered_id == 'interval-component' and table_version == version:
+            raise PreventUpdate
         try:
-            print("\n--- Updating dashboard data ---")
-            
-            # Get data from feedback file
-            print("Loading feedback data...")
+            print("\n--- Updating dashboard table ---")
             df = get_feedback_df()
             print(f"Loaded {len(df)} feedback entries")
             
-            if not df.empty:
-                print("Sample data:", df[['text', 'sentiment']].head().to_dict('records'))
-            
-            # Calculate metrics
-            total = len(df)
-            positive = len(df[df['sentiment'].str.lower() == 'positive']) if not df.empty else 0
-            negative = len(df[df['sentiment'].str.lower() == 'negative']) if not df.empty else 0
-            
-            print(f"Metrics - Total: {total}, Positive: {positive}, Negative: {negative}")
-            
-            # Create pie chart data
-            if not df.empty and 'sentiment' in df.columns:
-                print("Creating pie chart...")
-                sentiment_counts = df['sentiment'].value_counts()
-                print("Sentiment counts:", sentiment_counts.to_dict())
-                
-                fig = px.pie(
-                    values=sentiment_counts.values,
-                    names=sentiment_counts.index,
-                    title='Sentiment Distribution',
-                    color=sentiment_counts.index,
-                    color_discrete_map={
-                        'Positive': '#28a745',
-                        'Negative': '#dc3545',
-                        'Neutral': '#6c757d'
-                    }
-                )
-                fig.update_traces(textposition='inside', textinfo='percent+label')
-            else:
-                print("No data or sentiment column not found, using empty pie chart")
-                fig = px.pie(names=["No Data"], values=[1], title="Sentiment Distribution")
-            
             # Prepare table data
             if not df.empty:
                 print("Preparing table data...")
                 if 'timestamp' in df.columns:
                     df['timestamp'] = pd.to_datetime(df['timestamp'])
+                
+                # Collapse near-duplicate clusters into their latest entry
+                if collapse_value and 'collapse' in collapse_value:
+                    index = get_dedup_index().sync(load_feedback_data())
+                    df['cluster'] = [index.cluster_of(i) for i in range(len(df))]
+                    df['Count'] = df.groupby('cluster')['text'].transform('size')
+                    df = df.drop_duplicates('cluster', keep='last').drop(columns=['cluster'])
+                else:
+                    df['Count'] = 1
+                
+                # Keep only search matches, most relevant first, using the server-side index
+                if search_query and search_query.strip():
+                    rows = search_positions(search_query)
+                    df = df.loc[[row for row in rows if row in df.index]]
+                
                 table_data = df.rename(columns={
                     'text': 'Feedback',
                     'sentiment': 'Sentiment',
@@ -265,13 +314,49 @@ def create_dashboard(server):
                 table_data = []
             
             print("--- Update complete ---\n")
-            return table_data, total, positive, negative, fig
+            return table_data, version
             
         except Exception as e:
             print(f"Error in update_table: {str(e)}")
             import traceback
             traceback.print_exc()
-            return [], 0, 0, 0, px.pie(names=["Error"], values=[1], title="Error Loading Data")
+            return [], None
+
+    # Top complaint terms from the streaming term tracker
+    @app_dash.callback(
+        Output("top-terms", "data"),
+        Input('interval-component', 'n_intervals'),
+        Input('top-terms-window', 'value'),
+        Input('top-terms-kind', 'value'),
+        State("top-terms", "data")
+    )
+    def update_top_terms(n_intervals, window, kind, current):
+        """Top negative terms, only sent when the tracker or the window moved
+
+        The bar chart is built by dashboard.renderTopTerms in assets/dashboard.js.
+        """
+        try:
+            tracker = get_term_tracker()
+            version = f"{window}-{kind}-{tracker.window_version(window)}"
+            if current and current.get("version") == version:
+                raise PreventUpdate
+            terms = tracker.top(window, 'negative', kind, limit=15)
+        except PreventUpdate:
+            raise
+        except Exception as e:
+            print(f"Error in update_top_terms: {str(e)}")
+            return {"version": None, "window": window, "terms": [], "error": True}
+        return {
+            "version": version,
+            "window": window,
+            "terms": [{"term": t["term"], "count": t["count"]} for t in terms],
+        }
+
+    app_dash.clientside_callback(
+        ClientsideFunction(namespace="dashboard", function_name="renderTopTerms"),
+        Output("top-terms-chart", "figure"),
+        Input("top-terms", "data")
+    )
 
     # 3️⃣ Select / Deselect all rows
     @app_dash.callback(
@@ -288,3 +373,14 @@ def create_dashboard(server):
         return []
 
     return app_dash
+
+def create_server():
+    """Standalone Flask server hosting only the dashboard
+
+    app.py mounts this lazily under /dashboard/; it can also run as its own
+    process sharing the feedback store: gunicorn "dashboard:create_server()"
+    """
+    server = Flask(__name__)
+    tracing.init_app(server)
+    create_dashboard(server)
+    return server
@@ -0,0 +1,128 @@
+import os
+import logging
+import threading
+
+from minhash import normalize_text, signature, similarity, band_keys
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+DUPLICATE_THRESHOLD = float(os.getenv("NEAR_DUPLICATE_THRESHOLD", "0.7"))
+
+class NearDuplicateIndex:
+    """Incremental MinHash/LSH index for near-duplicate text lookup
+
+    Only the first member of each cluster is placed in the LSH buckets;
+    later near-duplicates just record their cluster, so bucket sizes stay
+    small even when one complaint is repeated thousands of times. Lookups
+    return the payload of the newest member of the matching cluster.
+    Texts that normalize to "" (punctuation only) are counted but never
+    indexed or matched.
+    """
+
+    def __init__(self, threshold=DUPLICATE_THRESHOLD, bands=8):
+        self.threshold = threshold
+        self.bands = bands
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        """Drop all indexed entries"""
+        with self._lock:
+            self._buckets = {}      # LSH band key -> list of leader keys
+            self._signatures = {}   # leader key -> MinHash signature
+            self._latest = {}       # leader key -> payload of the newest member
+            self._clusters = {}     # key -> leader key
+            self._exact = {}        # normalized text -> key of its first entry
+            self._exact_latest = {} # normalized text -> payload of its newest entry
+            self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def _lookup(self, normalized, sig, threshold):
+        key = self._exact.get(normalized)
+        if key is not None:
+            return self._clusters[key], 1.0
+
+        best_key, best_sim = None, threshold
+        seen = set()
+        for band in band_keys(sig, self.bands):
+            for candidate in self._buckets.get(band, ()):
+                if candidate in seen:
+                    continue
+                seen.add(candidate)
+                sim = similarity(self._signatures[candidate], sig)
+                if sim >= best_sim:
+                    best_key, best_sim = candidate, sim
+        return (best_key, best_sim) if best_key is not None else None
+
+    def add(self, key, text, payload=None):
+        """Index a text and return the key of its cluster leader"""
+        normalized = normalize_text(text)
+        if not normalized:
+            with self._lock:
+                self._clusters[key] = key
+                self._count += 1
+            return key
+        sig = signature(normalized, normalized=True)
+        with self._lock:
+            match = self._lookup(normalized, sig, self.threshold)
+            if match:
+                leader = match[0]
+            else:
+                leader = key
+                self._signatures[key] = sig
+                for band in band_keys(sig, self.bands):
+                    self._buckets.setdefault(band, []).append(key)
+            self._clusters[key] = leader
+            self._latest[leader] = payload
+            self._exact.setdefault(normalized, key)
+            self._exact_latest[normalized] = payload
+            self._count += 1
+            return leader
+
+    def query(self, text, threshold=None):
+        """Find the closest indexed near-duplicate of a text
+
+        Returns:
+            tuple: (cluster leader key, similarity, newest payload), or None
+        """
+        normalized = normalize_text(text)
+        if not normalized:
+            return None
+        sig = signature(normalized, normalized=True)
+        with self._lock:
+            match = self._lookup(normalized, sig, self.threshold if threshold is None else threshold)
+            if match is None:
+                return None
+            return match[0], match[1], self._latest.get(match[0])
+
+    def exact(self, text):
+        """Payload of the newest indexed entry with the same normalized text, or None
+
+        Unlike query(), a near-duplicate never matches, so "not good" does
+        not find "good".
+        """
+        normalized = normalize_text(text)
+        if not normalized:
+            return None
+        with self._lock:
+            return self._exact_latest.get(normalized)
+
+    def cluster_of(self, key):
+        """Return the cluster leader key for an indexed entry"""
+        return self._clusters.get(key, key)
+
+    def sync(self, items, text_field="text"):
+        """Index any entries of a position-keyed list not yet seen
+
+        Used to catch up with entries appended by other processes; a list
+        shorter than the index means the store was reset, so it is rebuilt.
+        """
+        if len(items) < self._count:
+            self.clear()
+        for position in range(self._count, len(items)):
+            item = items[position]
+            self.add(position, item.get(text_field, ""), item)
+        return self
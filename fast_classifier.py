@@ -0,0 +1,247 @@
+import os
+import re
+import sys
+import json
+import time
+import zlib
+import logging
+import threading
+import numpy as np
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# -------------------------------
+# Classifier settings
+# -------------------------------
+MODEL_FILE = os.getenv("FAST_CLASSIFIER_MODEL", "fast_classifier_model.npz")
+ENABLED = os.getenv("FAST_CLASSIFIER_ENABLED", "true").lower() in ("1", "true", "yes")
+CONFIDENCE_THRESHOLD = float(os.getenv("FAST_CLASSIFIER_CONFIDENCE", "0.9"))
+HOLDOUT_FRACTION = float(os.getenv("FAST_CLASSIFIER_HOLDOUT", "0.2"))  # Share of labels kept out of training for the report
+CLASSIFIER_NAME = "fast"  # Stored as the 'classifier' of entries this model labeled
+NUM_FEATURES = 1 << 18  # Hashed feature space
+LABELS = ("negative", "positive")
+
+_TOKEN = re.compile(r"[a-z0-9']+")
+
+# -------------------------------
+# Features
+# -------------------------------
+def _features(text):
+    """Hash unigrams and bigrams of a text into feature indices"""
+    tokens = _TOKEN.findall(str(text).lower())
+    grams = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+    return [zlib.crc32(g.encode("utf-8")) % NUM_FEATURES for g in grams]
+
+def _featurize(texts):
+    """Build flat (row, column) index arrays for a batch of texts"""
+    rows, cols = [], []
+    for i, text in enumerate(texts):
+        indices = _features(text)
+        rows.extend([i] * len(indices))
+        cols.extend(indices)
+    return np.asarray(rows, dtype=np.int64), np.asarray(cols, dtype=np.int64)
+
+def _scale(rows, n):
+    """Per-row 1/len normalization so long texts don't saturate the sigmoid"""
+    lengths = np.bincount(rows, minlength=n).astype(np.float64)
+    return 1.0 / np.maximum(lengths, 1.0)
+
+# -------------------------------
+# Model
+# -------------------------------
+class FastClassifier:
+    """Hashed-feature logistic regression scored with NumPy"""
+
+    def __init__(self, weights=None, bias=0.0):
+        self.weights = np.zeros(NUM_FEATURES) if weights is None else weights
+        self.bias = float(bias)
+
+    def predict_proba(self, texts):
+        """Return P(positive) for each text in one vectorized pass"""
+        n = len(texts)
+        if n == 0:
+            return np.zeros(0)
+        rows, cols = _featurize(texts)
+        logits = np.bincount(rows, weights=self.weights[cols], minlength=n) * _scale(rows, n) + self.bias
+        return 1.0 / (1.0 + np.exp(-logits))
+
+    def classify(self, texts):
+        """Classify a batch of texts
+
+        Returns:
+            list: Dicts with 'sentiment', 'score' (confidence), 'confident'
+                and 'classifier'
+        """
+        proba = self.predict_proba(texts)
+        confidence = np.maximum(proba, 1.0 - proba)
+        return [
+            {
+                "sentiment": LABELS[int(p >= 0.5)],
+                "score": float(c),
+                "confident": bool(c >= CONFIDENCE_THRESHOLD),
+                "classifier": CLASSIFIER_NAME,
+            }
+            for p, c in zip(proba, confidence)
+        ]
+
+    def fit(self, texts, labels, epochs=200, learning_rate=5.0, l2=1e-4):
+        """Train with full-batch gradient descent on 0/1 labels"""
+        n = len(texts)
+        y = np.asarray(labels, dtype=np.float64)
+        rows, cols = _featurize(texts)
+        scale = _scale(rows, n)[rows]
+        for _ in range(epochs):
+            logits = np.bincount(rows, weights=self.weights[cols] * scale, minlength=n) + self.bias
+            error = 1.0 / (1.0 + np.exp(-logits)) - y
+            grad = np.zeros(NUM_FEATURES)
+            np.add.at(grad, cols, error[rows] * scale)
+            self.weights -= learning_rate * (grad / n + l2 * self.weights)
+            self.bias -= learning_rate * error.mean()
+        return self
+
+    def save(self, path=MODEL_FILE):
+        np.savez_compressed(path, weights=self.weights, bias=np.array([self.bias]))
+
+    @classmethod
+    def load(cls, path=MODEL_FILE):
+        with np.load(path) as data:
+            return cls(weights=data["weights"], bias=float(data["bias"][0]))
+
+# -------------------------------
+# Cascade statistics
+# -------------------------------
+_stats_lock = threading.Lock()
+_stats = {
+    "items": 0,          # Items scored by the fast path
+    "fast_hits": 0,      # Items answered without the remote model
+    "remote": 0,         # Low-confidence items sent to the remote model
+    "fallback": 0,       # Items answered by the fast path because the remote model was down
+    "agreements": 0,     # Remote answers that matched the fast-path label
+    "fast_seconds": 0.0, # Total time spent in the fast path
+}
+
+def record(items=0, fast_hits=0, remote=0, fallback=0, agreements=0, fast_seconds=0.0):
+    """Update cascade counters"""
+    with _stats_lock:
+        _stats["items"] += items
+        _stats["fast_hits"] += fast_hits
+        _stats["remote"] += remote
+        _stats["fallback"] += fallback
+        _stats["agreements"] += agreements
+        _stats["fast_seconds"] += fast_seconds
+
+def get_stats():
+    """Return cascade hit rate, fast-path latency and remote agreement"""
+    with _stats_lock:
+        stats = dict(_stats)
+    items = stats["items"]
+    stats["enabled"] = classifier is not None
+    stats["confidence_threshold"] = CONFIDENCE_THRESHOLD
+    stats["hit_rate"] = stats["fast_hits"] / items if items else 0.0
+    stats["remote_agreement"] = stats["agreements"] / stats["remote"] if stats["remote"] else None
+    stats["fast_us_per_item"] = stats["fast_seconds"] / items * 1e6 if items else 0.0
+    return stats
+
+# -------------------------------
+# Module-level classifier
+# -------------------------------
+classifier = None
+if ENABLED and os.path.exists(MODEL_FILE):
+    try:
+        classifier = FastClassifier.load(MODEL_FILE)
+        logger.info(f"Loaded fast-path classifier from {MODEL_FILE}")
+    except Exception as e:
+        logger.error(f"Failed to load fast-path classifier: {str(e)}")
+
+def classify(texts):
+    """Score texts on the fast path, or return None if the classifier is disabled"""
+    if classifier is None:
+        return None
+    start = time.perf_counter()
+    results = classifier.classify(texts)
+    hits = sum(1 for r in results if r["confident"])
+    record(items=len(texts), fast_hits=hits, fast_seconds=time.perf_counter() - start)
+    return results
+
+# -------------------------------
+# Offline training and evaluation
+# -------------------------------
+def load_labeled_feedback(path="feedback_data.json"):
+    """Load (texts, labels) from stored Positive/Negative feedback
+
+    Entries labeled by this classifier are skipped, so it is never trained
+    on its own output.
+    """
+    with open(path, "r") as f:
+        data = json.load(f)
+    feedback = data.get("feedback", []) if isinstance(data, dict) else data
+    texts, labels = [], []
+    skipped = 0
+    for item in feedback:
+        sentiment = str(item.get("sentiment", "")).lower()
+        if sentiment in LABELS and item.get("text"):
+            if item.get("classifier") == CLASSIFIER_NAME:
+                skipped += 1
+                continue
+            texts.append(item["text"])
+            labels.append(LABELS.index(sentiment))
+    if skipped:
+        logger.info(f"Skipped {skipped} entries labeled by the fast-path classifier")
+    return texts, labels
+
+def split_holdout(texts, labels, fraction=HOLDOUT_FRACTION, seed=0):
+    """Shuffle and split labeled texts into (train, holdout) pairs of (texts, labels)"""
+    order = np.random.RandomState(seed).permutation(len(texts))
+    cut = len(texts) - int(round(len(texts) * fraction))
+    train, holdout = order[:cut], order[cut:]
+    return (([texts[i] for i in train], [labels[i] for i in train]),
+            ([texts[i] for i in holdout], [labels[i] for i in holdout]))
+
+def evaluate(model, texts, labels, thresholds=(0.5, 0.6, 0.7, 0.8, 0.9, 0.95)):
+    """Report coverage, accuracy and fast-path latency per confidence threshold"""
+    start = time.perf_counter()
+    proba = model.predict_proba(texts)
+    elapsed = time.perf_counter() - start
+    predicted = (proba >= 0.5).astype(int)
+    confidence = np.maximum(proba, 1.0 - proba)
+    correct = predicted == np.asarray(labels)
+
+    report = []
+    for threshold in thresholds:
+        covered = confidence >= threshold
+        report.append({
+            "threshold": threshold,
+            "coverage": float(covered.mean()) if len(texts) else 0.0,
+            "accuracy": float(correct[covered].mean()) if covered.any() else None,
+        })
+    return {
+        "items": len(texts),
+        "accuracy": float(correct.mean()) if len(texts) else None,
+        "us_per_item": elapsed / max(len(texts), 1) * 1e6,
+        "thresholds": report,
+    }
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    command = sys.argv[1] if len(sys.argv) > 1 else "train"
+    data_file = sys.argv[2] if len(sys.argv) > 2 else "feedback_data.json"
+    texts, labels = load_labeled_feedback(data_file)
+
+    if command == "train":
+        # Report on held-out labels; accuracy on the training set itself
+        # would make every confidence threshold look safer than it is
+        (train_texts, train_labels), (test_texts, test_labels) = split_holdout(texts, labels)
+        model = FastClassifier().fit(train_texts, train_labels)
+        model.save(MODEL_FILE)
+        print(f"Trained on {len(train_texts)} items, saved to {MODEL_FILE}; "
+              f"report on {len(test_texts)} held-out items")
+        print(json.dumps(evaluate(model, test_texts, test_labels), indent=2))
+    elif command == "evaluate":
+        # The same split as train, so the saved model is only scored on labels
+        # it did not see (as long as the feedback file has not changed since)
+        _, (test_texts, test_labels) = split_holdout(texts, labels)
+        print(f"Report on {len(test_texts)} held-out items")
+        print(json.dumps(evaluate(FastClassifier.load(MODEL_FILE), test_texts, test_labels), indent=2))
+    else:
+        print("Usage: python fast_classifier.py [train|evaluate] [feedback_file]")
@@ -0,0 +1,149 @@
+import os
+import logging
+
+from minhash import normalize_text, signature, similarity, band_keys
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# -------------------------------
+# Aggregation settings
+# -------------------------------
+ALERT_PROMPT_TOKEN_BUDGET = int(os.getenv("ALERT_PROMPT_TOKEN_BUDGET", "1500"))
+SIMILARITY_THRESHOLD = 0.5   # Estimated Jaccard needed to merge two texts
+MAX_TEXT_CHARS = 200         # Per-example truncation, as in the original prompt
+MAX_EXAMPLES_PER_CLUSTER = 3
+
+def estimate_tokens(text):
+    """Rough token estimate (~4 characters per token)"""
+    return len(text) // 4 + 1
+
+def _truncate(text):
+    return text if len(text) <= MAX_TEXT_CHARS else text[:MAX_TEXT_CHARS] + "..."
+
+# -------------------------------
+# Clustering
+# -------------------------------
+def cluster_feedback(texts, scores, threshold=SIMILARITY_THRESHOLD):
+    """Dedupe texts and group near-duplicates with MinHash/LSH
+
+    Args:
+        texts (list): Feedback texts
+        scores (list): Sentiment scores matching the texts
+        threshold (float): Minimum estimated Jaccard similarity to merge
+
+    Returns:
+        list: Cluster dicts with 'examples' (most frequent first), 'count',
+              'mean_score' and 'min_score', largest clusters first
+    """
+    # Exact dedupe on normalized text; punctuation-only texts keep their raw
+    # text as key, so they do not all merge into one "" entry
+    uniques = {}
+    for text, score in zip(texts, scores):
+        key = normalize_text(text) or str(text)
+        entry = uniques.get(key)
+        if entry is None:
+            uniques[key] = {"text": text, "count": 1, "score_sum": float(score), "min_score": float(score)}
+        else:
+            entry["count"] += 1
+            entry["score_sum"] += float(score)
+            entry["min_score"] = min(entry["min_score"], float(score))
+
+    keys = list(uniques)
+    signatures = [signature(key, normalized=True) for key in keys]
+
+    # Union near-duplicates that share an LSH bucket with the bucket's first member
+    parent = list(range(len(keys)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    buckets = {}
+    for i, sig in enumerate(signatures):
+        for band in band_keys(sig):
+            first = buckets.setdefault(band, i)
+            if first != i and find(first) != find(i) and similarity(signatures[first], sig) >= threshold:
+                parent[find(i)] = find(first)
+
+    groups = {}
+    for i, key in enumerate(keys):
+        groups.setdefault(find(i), []).append(uniques[key])
+
+    clusters = []
+    for members in groups.values():
+        members.sort(key=lambda m: m["count"], reverse=True)
+        count = sum(m["count"] for m in members)
+        clusters.append({
+            "examples": [m["text"] for m in members],
+            "count": count,
+            "mean_score": sum(m["score_sum"] for m in members) / count,
+            "min_score": min(m["min_score"] for m in members),
+        })
+
+    clusters.sort(key=lambda c: (-c["count"], c["min_score"]))
+    logger.debug(f"Clustered {len(texts)} texts into {len(uniques)} unique and {len(clusters)} clusters")
+    return clusters
+
+# -------------------------------
+# Prompt input
+# -------------------------------
+def build_prompt_input(texts, scores, token_budget=None):
+    """Build a bounded prompt section summarizing the feedback
+
+    Every cluster gets one representative line (largest clusters first) until
+    the budget runs out; leftover budget adds extra examples to the top
+    clusters. Clusters that do not fit are summarized in a closing line, so
+    the prompt size stays bounded regardless of batch size.
+
+    Args:
+        texts (list): Feedback texts
+        scores (list): Sentiment scores matching the texts
+        token_budget (int, optional): Token budget (default: ALERT_PROMPT_TOKEN_BUDGET)
+
+    Returns:
+        str: Formatted feedback section for the prompt
+    """
+    budget = ALERT_PROMPT_TOKEN_BUDGET if token_budget is None else token_budget
+    clusters = cluster_feedback(texts, scores)
+
+    lines = []
+    used = 0
+    included = 0
+    for cluster in clusters:
+        line = (
+            f"[{cluster['count']} similar] Avg Score: {cluster['mean_score']:.2f}, "
+            f"Min Score: {cluster['min_score']:.2f}\nText: {_truncate(cluster['examples'][0])}\n"
+        )
+        cost = estimate_tokens(line)
+        if used + cost > budget and lines:
+            break
+        lines.append([line])
+        used += cost
+        included += 1
+
+    # Spend any remaining budget on extra examples for the largest clusters
+    for cluster, block in zip(clusters, lines):
+        for example in cluster["examples"][1:MAX_EXAMPLES_PER_CLUSTER]:
+            extra = f"Also: {_truncate(example)}\n"
+            cost = estimate_tokens(extra)
+            if used + cost > budget:
+                break
+            block.append(extra)
+            used += cost
+
+    sections = ["".join(block) for block in lines]
+    if included < len(clusters):
+        remaining = clusters[included:]
+        sections.append(
+            f"... plus {len(remaining)} smaller groups covering "
+            f"{sum(c['count'] for c in remaining)} more texts\n"
+        )
+
+    logger.info(
+        f"Aggregated {len(texts)} texts into {len(clusters)} clusters "
+        f"({included} shown, ~{used} tokens of {budget})"
+    )
+    return "\n".join(sections)
@@ -0,0 +1,267 @@
+import os
+import sys
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+
+import serialization
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Feedback older than the hot window is moved out of feedback_data.json into
+# monthly gzip partitions under ARCHIVE_DIR. Past the retention period a
+# partition is dropped and only its per source/sentiment rollup is kept.
+ARCHIVE_DIR = os.getenv('FEEDBACK_ARCHIVE_DIR', 'feedback_archive')
+HOT_WINDOW_DAYS = int(os.getenv('FEEDBACK_HOT_WINDOW_DAYS', '30'))
+RETENTION_DAYS = int(os.getenv('FEEDBACK_RETENTION_DAYS', '0'))  # 0 keeps partitions forever
+ARCHIVE_SLACK = timedelta(hours=24)  # Let the window overrun a little so archival runs in batches
+MANIFEST_FILE = 'manifest.json'
+
+# -------------------------------
+# Timestamps and partitions
+# -------------------------------
+def utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+def parse_timestamp(value):
+    """Parse a stored ISO timestamp into a naive UTC datetime
+
+    Returns:
+        datetime: The parsed time, or None if value is missing or malformed
+    """
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+def partition_key(timestamp):
+    return timestamp.strftime('%Y-%m')
+
+def partition_bounds(key):
+    """Return the [start, end) datetimes covered by a monthly partition"""
+    start = datetime.strptime(key, '%Y-%m')
+    end = (start + timedelta(days=32)).replace(day=1)
+    return start, end
+
+def partition_path(key):
+    return os.path.join(ARCHIVE_DIR, f'feedback-{key}.json.gz')
+
+def hot_cutoff(now=None):
+    return (now or utcnow()) - timedelta(days=HOT_WINDOW_DAYS)
+
+# -------------------------------
+# Manifest
+# -------------------------------
+_lock = threading.RLock()
+_manifest = None
+_manifest_mtime = None
+
+def _manifest_path():
+    return os.path.join(ARCHIVE_DIR, MANIFEST_FILE)
+
+def _empty_manifest():
+    # archived: entries ever moved out of the hot file, so position-keyed
+    # consumers (score sketches, near-duplicate index) can tell the hot list
+    # was shifted
+    return {"archived": 0, "partitions": {}, "rollups": {}}
+
+def load_manifest():
+    """Return the archive manifest, reloading only when the file changed"""
+    global _manifest, _manifest_mtime
+    with _lock:
+        try:
+            mtime = os.path.getmtime(_manifest_path())
+        except OSError:
+            return _empty_manifest()
+        if _manifest is None or mtime != _manifest_mtime:
+            try:
+                _manifest = serialization.read_store(_manifest_path())
+                _manifest_mtime = mtime
+            except serialization.DecodeError as e:
+                logger.error(f"Ignoring unreadable archive manifest: {str(e)}")
+                return _empty_manifest()
+        return _manifest
+
+def _write_manifest(manifest):
+    global _manifest, _manifest_mtime
+    serialization.write_store(_manifest_path(), manifest)
+    _manifest, _manifest_mtime = manifest, os.path.getmtime(_manifest_path())
+
+def archived_count():
+    """Number of entries moved out of the hot store so far"""
+    return load_manifest()["archived"]
+
+def archive_version():
+    """Changes whenever the archive does (0 before anything is archived)"""
+    try:
+        return os.stat(_manifest_path()).st_mtime_ns
+    except OSError:
+        return 0
+
+# -------------------------------
+# Tiering
+# -------------------------------
+def needs_archival(feedback, now=None):
+    """True once the oldest hot entry is past the window by more than the slack
+
+    The store is append-ordered, so only the head of the list is checked.
+    """
+    cutoff = hot_cutoff(now) - ARCHIVE_SLACK
+    for entry in feedback:
+        timestamp = parse_timestamp(entry.get("timestamp"))
+        if timestamp is not None:
+            return timestamp < cutoff
+    return False
+
+def split_hot(feedback, now=None):
+    """Split entries into (hot, cold) around the hot window cutoff
+
+    Entries without a readable timestamp stay hot.
+    """
+    cutoff = hot_cutoff(now)
+    hot, cold = [], []
+    for entry in feedback:
+        timestamp = parse_timestamp(entry.get("timestamp"))
+        (cold if timestamp is not None and timestamp < cutoff else hot).append(entry)
+    return hot, cold
+
+def read_partition(key):
+    path = partition_path(key)
+    if not os.path.exists(path):
+        return []
+    return serialization.read_compressed(path)
+
+def archive_entries(entries):
+    """Append entries to their monthly partitions and record them in the manifest
+
+    Partitions are rewritten before the manifest, and callers rewrite the hot
+    store last, so an interrupted run can duplicate entries but never lose them.
+    """
+    if not entries:
+        return 0
+
+    by_partition = {}
+    for entry in entries:
+        by_partition.setdefault(partition_key(parse_timestamp(entry["timestamp"])), []).append(entry)
+
+    with _lock:
+        os.makedirs(ARCHIVE_DIR, exist_ok=True)
+        manifest = dict(load_manifest())
+        partitions = dict(manifest["partitions"])
+        for key, new_entries in sorted(by_partition.items()):
+            stored = read_partition(key) + new_entries
+            serialization.write_compressed(partition_path(key), stored)
+            timestamps = [parse_timestamp(e["timestamp"]) for e in stored]
+            partitions[key] = {
+                "count": len(stored),
+                "first": min(timestamps).isoformat(),
+                "last": max(timestamps).isoformat(),
+            }
+        manifest["partitions"] = partitions
+        manifest["archived"] = manifest["archived"] + len(entries)
+        _write_manifest(manifest)
+
+    logger.info(f"Archived {len(entries)} feedback entries into {len(by_partition)} partition(s)")
+    return len(entries)
+
+def _rollup(entries):
+    groups = {}
+    for entry in entries:
+        key = (str(entry.get("source", "unknown")), str(entry.get("sentiment", "Neutral")).capitalize())
+        group = groups.setdefault(key, {"source": key[0], "sentiment": key[1], "count": 0, "scored": 0, "score_total": 0.0})
+        group["count"] += 1
+        if entry.get("score") is not None:
+            group["scored"] += 1
+            group["score_total"] += float(entry["score"])
+    return [groups[key] for key in sorted(groups)]
+
+def apply_retention(now=None):
+    """Replace partitions older than the retention period with their rollups
+
+    Returns:
+        int: Number of raw entries dropped
+    """
+    if RETENTION_DAYS <= 0:
+        return 0
+
+    cutoff = (now or utcnow()) - timedelta(days=RETENTION_DAYS)
+    dropped = 0
+    with _lock:
+        manifest = dict(load_manifest())
+        partitions = dict(manifest["partitions"])
+        rollups = dict(manifest["rollups"])
+        for key in sorted(partitions):
+            if partition_bounds(key)[1] > cutoff:
+                continue
+            entries = read_partition(key)
+            rollups[key] = _rollup(entries)
+            dropped += len(entries)
+            del partitions[key]
+            try:
+                os.remove(partition_path(key))
+            except FileNotFoundError:
+                pass
+        if dropped:
+            manifest["partitions"], manifest["rollups"] = partitions, rollups
+            _write_manifest(manifest)
+            logger.info(f"Rolled up {dropped} archived feedback entries past the retention period")
+    return dropped
+
+# -------------------------------
+# Queries
+# -------------------------------
+def partitions_in_range(start=None, end=None):
+    """Keys of the archived partitions holding entries in [start, end)"""
+    keys = []
+    for key, info in sorted(load_manifest()["partitions"].items()):
+        if start is not None and parse_timestamp(info["last"]) < start:
+            continue
+        if end is not None and parse_timestamp(info["first"]) >= end:
+            continue
+        keys.append(key)
+    return keys
+
+def in_range(entry, start=None, end=None):
+    if start is None and end is None:
+        return True
+    timestamp = parse_timestamp(entry.get("timestamp"))
+    if timestamp is None:
+        return False
+    return (start is None or timestamp >= start) and (end is None or timestamp < end)
+
+def load_range(start=None, end=None):
+    """Return archived entries in [start, end), opening only the partitions it touches"""
+    entries = []
+    for key in partitions_in_range(start, end):
+        entries.extend(e for e in read_partition(key) if in_range(e, start, end))
+    return entries
+
+# -------------------------------
+# Command line
+# -------------------------------
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    command = sys.argv[1] if len(sys.argv) > 1 else "status"
+
+    if command == "archive":
+        # Move everything past the hot window out now instead of waiting for the next write
+        from feedback_manager import compact_store
+        compact_store()
+    elif command != "status":
+        print("Usage: python feedback_archive.py [status|archive]")
+        sys.exit(1)
+
+    manifest = load_manifest()
+    print(f"Hot window: {HOT_WINDOW_DAYS} days, retention: {RETENTION_DAYS or 'forever'}")
+    print(f"Archived entries: {manifest['archived']}")
+    for key, info in sorted(manifest["partitions"].items()):
+        size = os.path.getsize(partition_path(key)) if os.path.exists(partition_path(key)) else 0
+        print(f"  {key}: {info['count']} entries, {size} bytes")
+    for key in sorted(manifest["rollups"]):
+        print(f"  {key}: rolled up")
@@ -1,13 +1,58 @@
-import json
 import os
 import logging
+import threading
 from datetime import datetime
+from dedup_index import NearDuplicateIndex
+import serialization
+import score_sketch
+import feedback_archive
+import feedback_snapshot
+import search_index
+import term_tracker
+import coordination
+import tracing
 
 # Configure logging
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
 FEEDBACK_FILE = 'feedback_data.json'
+STORE_LOCK_TTL = 30  # seconds; read-modify-write of the store must finish within the lease
+STORE_LOCK_TIMEOUT = float(os.getenv('FEEDBACK_STORE_LOCK_TIMEOUT', '30'))
+# Seconds after a write before the search index, term tracker and columnar
+# snapshot are saved. Their files cost O(store) to write, so they are saved
+# in the background, outside the store lock, once per burst of writes.
+PERSIST_DELAY = float(os.getenv('FEEDBACK_PERSIST_DELAY', '1.0'))
+
+# Near-duplicate index over stored feedback, keyed by position in the file
+_dedup_index = None
+_dedup_offset = 0  # Archived count the index positions are relative to
+_dedup_lock = threading.Lock()
+
+# Full-text index over the hot window, keyed by sequence number
+_search_index = None
+_search_lock = threading.Lock()
+
+# Heavy-hitter terms per sentiment and time window
+_term_tracker = None
+_term_lock = threading.Lock()
+
+# Parsed hot window, reused until the file changes. When the file only grew,
+# just the appended entries are parsed and the ones already held are kept,
+# so workers forked from a preloaded master (see preload.py) go on sharing
+# them copy-on-write after a write.
+_hot_cache = None
+_hot_cache_key = None
+_hot_cache_tail = None  # serialization.list_tail() of the parsed file
+_hot_lock = threading.Lock()
+
+def _read_store():
+    with tracing.span('store_read'):
+        return serialization.read_store(FEEDBACK_FILE)
+
+def _write_store(data):
+    with tracing.span('store_write'):
+        serialization.write_store(FEEDBACK_FILE, data)
 
 def init_feedback_file():
     """Initialize feedback file if it doesn't exist"""
@@ -15,27 +60,25 @@ def init_feedback_file():
     if not os.path.exists(FEEDBACK_FILE):
         logger.info(f"Feedback file not found, creating new one at: {os.path.abspath(FEEDBACK_FILE)}")
         try:
-            with open(FEEDBACK_FILE, 'w') as f:
-                json.dump({"feedback": []}, f, indent=2)
+            serialization.write_store(FEEDBACK_FILE, {"feedback": []})
             logger.info("Successfully created new feedback file")
         except Exception as e:
             logger.error(f"Failed to create feedback file: {str(e)}")
             raise
-    # Ensure file has correct structure
+    # Files written by this module are already in the compact layout
+    if serialization.is_compact_store(FEEDBACK_FILE):
+        return
+    # Ensure file has correct structure, converting older pretty-printed files
     try:
-        with open(FEEDBACK_FILE, 'r+') as f:
-            data = json.load(f)
-            if 'feedback' not in data:
-                data = {"feedback": data if isinstance(data, list) else []}
-                f.seek(0)
-                json.dump(data, f, indent=2)
-                f.truncate()
-    except (json.JSONDecodeError, FileNotFoundError):
+        data = serialization.read_store(FEEDBACK_FILE)
+        if not isinstance(data, dict) or 'feedback' not in data:
+            data = {"feedback": data if isinstance(data, list) else []}
+        serialization.write_store(FEEDBACK_FILE, data)
+    except (serialization.DecodeError, FileNotFoundError):
         # If file is corrupted, reset it
-        with open(FEEDBACK_FILE, 'w') as f:
-            json.dump({"feedback": []}, f, indent=2)
+        serialization.write_store(FEEDBACK_FILE, {"feedback": []})
 
-def add_feedback(text, sentiment, source="analysis", score=None):
+def add_feedback(text, sentiment, source="analysis", score=None, classifier=None):
     """Add a single feedback entry
     
     Args:
@@ -43,6 +86,8 @@ def add_feedback(text, sentiment, source="analysis", score=None):
         sentiment (str): The sentiment (Positive/Negative/Neutral)
         source (str): Source of the feedback (default: 'analysis')
         score (float, optional): Sentiment score between 0 and 1
+        classifier (str, optional): What produced the sentiment, e.g. 'fast'
+            for the fast-path classifier (kept out of its training data)
     """
     try:
         print(f"Adding feedback: {text[:50]}... - {sentiment} (Score: {score})")
@@ -55,40 +100,38 @@ def add_feedback(text, sentiment, source="analysis", score=None):
             "timestamp": datetime.utcnow().isoformat()
         }
         
-        # Add score if provided
+        # Add score and classifier if provided
         if score is not None:
             feedback["score"] = float(score)
+        if classifier:
+            feedback["classifier"] = str(classifier)
         
-        # Read existing data
-        if os.path.exists(FEEDBACK_FILE):
-            with open(FEEDBACK_FILE, 'r') as f:
+        with _store_lock():
+            # Read existing data
+            if os.path.exists(FEEDBACK_FILE):
                 try:
-                    data = json.load(f)
-                except json.JSONDecodeError:
+                    data = _read_store()
+                except serialization.DecodeError:
                     print("Error: Invalid JSON in feedback file. Resetting...")
                     data = {"feedback": []}
-        else:
-            data = {"feedback": []}
+            else:
+                data = {"feedback": []}
+        
+            # Ensure feedback list exists
+            if 'feedback' not in data:
+                data['feedback'] = []
         
-        # Ensure feedback list exists
-        if 'feedback' not in data:
-            data['feedback'] = []
+            # Add new feedback, moving anything past the hot window to the archive
+            data['feedback'].append(feedback)
+            data['feedback'] = _tier_feedback(data['feedback'])
         
-        # Add new feedback
-        data['feedback'].append(feedback)
+            # Atomic write back to file
+            _write_store(data)
         
-        # Write back to file
-        temp_file = FEEDBACK_FILE + '.tmp'
-        with open(temp_file, 'w') as f:
-            json.dump(data, f, indent=2)
+            offset = feedback_archive.archived_count()
+            _on_feedback_written(data['feedback'], offset)
         
-        # Atomic write
-        if os.name == 'nt':  # Windows
-            if os.path.exists(FEEDBACK_FILE):
-                os.remove(FEEDBACK_FILE)
-            os.rename(temp_file, FEEDBACK_FILE)
-        else:  # Unix/Linux
-            os.replace(temp_file, FEEDBACK_FILE)
+        _publish_change([feedback], offset + len(data['feedback']))
         
         print(f"Successfully added feedback. Total entries: {len(data['feedback'])}")
         return feedback
@@ -103,42 +146,440 @@ def add_batch_feedback(batch_data, source="batch_analysis"):
     """Add multiple feedback entries from batch analysis"""
     init_feedback_file()
     
-    with open(FEEDBACK_FILE, 'r+') as f:
-        data = json.load(f)
+    added = []
+    for item in batch_data:
+        feedback = {
+            "text": item.get("text", ""),
+            "sentiment": item.get("sentiment", ""),
+            "source": source,
+            "timestamp": datetime.now().isoformat()
+        }
+        if item.get("score") is not None:
+            feedback["score"] = float(item["score"])
+        if item.get("classifier"):
+            feedback["classifier"] = str(item["classifier"])
+        added.append(feedback)
+    
+    with _store_lock():
+        data = _read_store()
+        data["feedback"].extend(added)
+        data["feedback"] = _tier_feedback(data["feedback"])
         
-        for item in batch_data:
-            feedback = {
-                "text": item.get("text", ""),
-                "sentiment": item.get("sentiment", ""),
-                "source": source,
-                "timestamp": datetime.now().isoformat()
-            }
-            data["feedback"].append(feedback)
+        _write_store(data)
         
-        f.seek(0)
-        json.dump(data, f, indent=2)
-        f.truncate()
-    
+        offset = feedback_archive.archived_count()
+        _on_feedback_written(data["feedback"], offset)
+    _publish_change(added, offset + len(data["feedback"]))
     return len(batch_data)
 
 def get_all_feedback():
-    """Retrieve all feedback entries"""
+    """Retrieve all feedback entries in the hot window
+
+    Older entries live in the archive; use get_feedback with a time range
+    to include them.
+    """
+    global _hot_cache, _hot_cache_key, _hot_cache_tail
     init_feedback_file()  # Ensure file exists and is properly formatted
     
     try:
-        with open(FEEDBACK_FILE, 'r') as f:
-            data = json.load(f)
-            feedback = data.get("feedback", [])
-            # Ensure each entry has required fields
-            for item in feedback:
-                if 'text' not in item:
-                    item['text'] = ''
-                if 'sentiment' not in item:
-                    item['sentiment'] = 'Neutral'
-                if 'source' not in item:
-                    item['source'] = 'unknown'
-                if 'timestamp' not in item:
-                    item['timestamp'] = datetime.now().isoformat()
-            return feedback
-    except (json.JSONDecodeError, FileNotFoundError):
+        stat = os.stat(FEEDBACK_FILE)
+        key = (stat.st_mtime_ns, stat.st_size)
+        with _hot_lock:
+            if _hot_cache is not None and _hot_cache_key == key:
+                return list(_hot_cache)
+            cached, tail = _hot_cache, _hot_cache_tail
+        with tracing.span('store_read'):
+            with open(FEEDBACK_FILE, 'rb') as f:
+                raw = f.read()
+        appended = serialization.appended_entries(raw, tail) if cached is not None else None
+        if appended is not None:
+            new_entries, tail = appended
+            feedback = cached + new_entries
+        else:
+            new_entries = feedback = serialization.loads(raw).get("feedback", [])
+            tail = serialization.list_tail(raw)
+        # Ensure each entry has required fields
+        for item in new_entries:
+            if 'text' not in item:
+                item['text'] = ''
+            if 'sentiment' not in item:
+                item['sentiment'] = 'Neutral'
+            if 'source' not in item:
+                item['source'] = 'unknown'
+            if 'timestamp' not in item:
+                item['timestamp'] = datetime.now().isoformat()
+        with _hot_lock:
+            _hot_cache, _hot_cache_key, _hot_cache_tail = feedback, key, tail
+        return list(feedback)
+    except (serialization.DecodeError, FileNotFoundError):
         return []
+
+def get_feedback_range(start=None, end=None):
+    """Retrieve feedback with timestamps in [start, end)
+
+    Only the archived partitions the range touches are opened; with no
+    start the whole archive is read.
+
+    Args:
+        start (datetime, optional): Inclusive lower bound (naive UTC)
+        end (datetime, optional): Exclusive upper bound (naive UTC)
+    """
+    archived = feedback_archive.load_range(start, end)
+    hot = [e for e in get_all_feedback() if feedback_archive.in_range(e, start, end)]
+    return archived + hot
+
+def get_hot_window():
+    """Return the hot list and the archived count its positions start after
+
+    Both are read under the store lock: archival moves entries to the archive
+    before it rewrites the hot store, so separate reads could pair a shifted
+    list with a stale count (or the reverse) and misplace every position.
+
+    Returns:
+        tuple: (hot entries, archived count)
+    """
+    with _store_lock():
+        return get_all_feedback(), feedback_archive.archived_count()
+
+def get_store_version():
+    """Cheap tag that changes on every write to the hot store or the archive
+
+    Derived from file metadata only, so it can back an ETag without
+    reading the store.
+    """
+    init_feedback_file()
+    stat = os.stat(FEEDBACK_FILE)
+    return f"{stat.st_mtime_ns:x}-{stat.st_size:x}-{feedback_archive.archive_version():x}"
+
+def get_feedback_since(cursor):
+    """Retrieve entries appended after a sequence cursor
+
+    Sequence numbers count every entry ever stored, archived ones included,
+    so a cursor stays valid when older entries move to the archive.
+
+    Args:
+        cursor (int): The version returned by the previous call (0 for everything)
+
+    Returns:
+        tuple: (entries, version, reset). version is the cursor for the next
+               call. reset is True when the cursor predates the hot window or
+               is ahead of the store, in which case entries is the whole hot
+               window and the client should replace what it has.
+    """
+    feedback, offset = get_hot_window()
+    version = offset + len(feedback)
+    if cursor < offset or cursor > version:
+        return feedback, version, True
+    return feedback[cursor - offset:], version, False
+
+def stream_all_feedback():
+    """Stream the stored feedback list as raw JSON bytes without parsing
+
+    Entries written by this module always carry every required field, so
+    the stored bytes can go straight to the client.
+
+    Returns:
+        iterator: Byte chunks of the JSON list, or None if the store is not
+                  in the compact layout (use get_all_feedback instead)
+    """
+    init_feedback_file()
+    return serialization.iter_feedback_bytes(FEEDBACK_FILE)
+
+
+def get_feedback_snapshot():
+    """Return the path of the columnar snapshot of the hot window
+
+    The snapshot is refreshed first if it was built from an older version
+    of the store: writes refresh it in the background, so a read right
+    after a write, or one in a process that does not serve the snapshot,
+    catches up here.
+
+    Returns:
+        str: Snapshot path, or None when pyarrow is not installed
+    """
+    if not feedback_snapshot.available():
+        return None
+    init_feedback_file()
+    path = feedback_snapshot.SNAPSHOT_FILE
+    # Read the version before the list, so the snapshot never claims a newer
+    # version than its rows; at worst the next read refreshes it again
+    version = get_store_version()
+    if feedback_snapshot.store_version(path) != version:
+        feedback_snapshot.sync_snapshot(*get_hot_window(), path, version)
+    return path
+
+def _tier_feedback(feedback, force=False):
+    """Archive entries past the hot window and return the list to keep hot
+
+    Archival failures are logged and everything stays hot, so a write is
+    never lost to a problem with the archive.
+    """
+    if not force and not feedback_archive.needs_archival(feedback):
+        return feedback
+    try:
+        hot, cold = feedback_archive.split_hot(feedback)
+        feedback_archive.archive_entries(cold)
+        feedback_archive.apply_retention()
+        return hot
+    except Exception as e:
+        logger.error(f"Failed to archive old feedback: {str(e)}")
+        return feedback
+
+def compact_store():
+    """Archive everything past the hot window now and rewrite the hot store"""
+    init_feedback_file()
+    with _store_lock():
+        data = _read_store()
+        data["feedback"] = _tier_feedback(data.get("feedback", []), force=True)
+        _write_store(data)
+        offset = feedback_archive.archived_count()
+        _on_feedback_written(data["feedback"], offset)
+    _publish_change([], offset + len(data["feedback"]))
+    return len(data["feedback"])
+
+def _store_lock():
+    """Cluster-wide lock serializing read-modify-write cycles of the store file"""
+    return coordination.get_backend().lock('feedback-store', ttl=STORE_LOCK_TTL, timeout=STORE_LOCK_TIMEOUT)
+
+def _publish_change(added, position):
+    """Announce new entries on the store channel, for consumers in every process
+
+    Messages carry the entries appended and the sequence number after them.
+    position must be read under the store lock of the write: archival by
+    another process could shift it as soon as the lock is released.
+    """
+    try:
+        backend = coordination.get_backend()
+        backend.incr('feedback.entries_written', len(added))
+        backend.publish(coordination.STORE_CHANNEL, {
+            "position": position,
+            "entries": added,
+        })
+    except Exception as e:
+        logger.error(f"Failed to publish store change: {str(e)}")
+
+@tracing.traced('store_index')
+def _on_feedback_written(feedback, offset):
+    """Keep the near-duplicate and search indexes, term tracker and score sketches in step with the stored list
+
+    Runs under the store lock, so only the in-memory syncs (which cost
+    O(new entries)) and the fixed-size score sketch file happen here; saving
+    the rest is left to _schedule_persist.
+
+    Args:
+        feedback (list): The hot list just written
+        offset (int): Entries archived so far, read under the same lock
+    """
+    if _dedup_index is not None:
+        try:
+            _sync_dedup_index(feedback, offset)
+        except Exception as e:
+            logger.error(f"Failed to update near-duplicate index: {str(e)}")
+    if _search_index is not None:
+        try:
+            _search_index.sync(feedback, offset)
+        except Exception as e:
+            logger.error(f"Failed to update search index: {str(e)}")
+    if _term_tracker is not None:
+        try:
+            _term_tracker.sync(feedback, offset)
+        except Exception as e:
+            logger.error(f"Failed to update term tracker: {str(e)}")
+    try:
+        if score_sketch.update_stats(feedback, offset=offset) is None:
+            _build_score_stats(feedback, offset)
+    except Exception as e:
+        logger.error(f"Failed to update score sketches: {str(e)}")
+    _schedule_persist()
+
+# -------------------------------
+# Background persistence
+# -------------------------------
+_persist_timer = None
+_persist_lock = threading.Lock()
+
+def _schedule_persist():
+    """Save derived files PERSIST_DELAY seconds from now, unless already scheduled"""
+    global _persist_timer
+    with _persist_lock:
+        if _persist_timer is not None:
+            return
+        _persist_timer = threading.Timer(PERSIST_DELAY, _persist)
+        _persist_timer.daemon = True
+        _persist_timer.start()
+
+def _persist():
+    """Save the search index and term tracker, and refresh the snapshot
+
+    Runs outside the store lock; each file is written to a temp file and
+    renamed into place, so readers never see a partial one.
+    """
+    global _persist_timer
+    with _persist_lock:
+        _persist_timer = None
+    if _search_index is not None:
+        try:
+            search_index.save_index(_search_index)
+        except Exception as e:
+            logger.error(f"Failed to save search index: {str(e)}")
+    if _term_tracker is not None:
+        try:
+            term_tracker.save_tracker(_term_tracker)
+        except Exception as e:
+            logger.error(f"Failed to save term tracker: {str(e)}")
+    # Only processes serving the dashboard or exports keep the snapshot fresh
+    # after writes; elsewhere get_feedback_snapshot catches up on the next read
+    if feedback_snapshot.loaded():
+        try:
+            get_feedback_snapshot()
+        except Exception as e:
+            logger.error(f"Failed to update feedback snapshot: {str(e)}")
+
+def _after_fork():
+    # A timer pending in the preloaded master does not run in the child
+    global _persist_timer, _persist_lock
+    _persist_timer = None
+    _persist_lock = threading.Lock()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork)
+
+def _sync_dedup_index(feedback, offset):
+    """Sync the index, rebuilding it when archival has shifted the hot list"""
+    global _dedup_offset
+    with _dedup_lock:
+        if offset != _dedup_offset:
+            _dedup_index.clear()
+            _dedup_offset = offset
+    _dedup_index.sync(feedback)
+
+def get_dedup_index():
+    """Return the near-duplicate index, building it from the store on first use"""
+    global _dedup_index, _dedup_offset
+    if _dedup_index is None:
+        with _dedup_lock:
+            if _dedup_index is None:
+                feedback, _dedup_offset = get_hot_window()
+                index = NearDuplicateIndex()
+                index.sync(feedback)
+                logger.info(f"Built near-duplicate index over {len(index)} feedback entries")
+                _dedup_index = index
+    else:
+        # Catch up with entries written, or archived, by other processes
+        _sync_dedup_index(*get_hot_window())
+    return _dedup_index
+
+def find_near_duplicate(text, threshold=None):
+    """Return the stored feedback entry closest to text, or None
+
+    Args:
+        text (str): Text to look up
+        threshold (float, optional): Minimum estimated Jaccard similarity
+    """
+    match = get_dedup_index().query(text, threshold)
+    return match[2] if match else None
+
+def find_exact_duplicate(text):
+    """Return the newest stored entry whose normalized text equals text's, or None
+
+    Case, whitespace and punctuation are ignored; unlike find_near_duplicate,
+    a text that differs by a word such as "not" never matches.
+    """
+    return get_dedup_index().exact(text)
+
+def get_search_index():
+    """Return the full-text index, loading the saved copy (or building it) on first use"""
+    global _search_index
+    if _search_index is None:
+        with _search_lock:
+            if _search_index is None:
+                index = search_index.load_index() or search_index.SearchIndex()
+                index.sync(*get_hot_window())
+                search_index.save_index(index)
+                logger.info(f"Search index ready over {len(index)} feedback entries")
+                _search_index = index
+    else:
+        # Catch up with entries written by other processes
+        _search_index.sync(*get_hot_window())
+    return _search_index
+
+def search_feedback(query, sentiment=None, limit=20, offset=0):
+    """Full-text search over the hot window
+
+    Args:
+        query (str): Words and "quoted phrases", all of which must match
+        sentiment (str, optional): Only entries with this sentiment
+        limit (int): Page size, or None for every match
+        offset (int): Matches to skip
+
+    Returns:
+        tuple: (total matches, entries ranked by relevance). Each entry
+               carries its sequence number ('seq') and BM25 'score'.
+    """
+    index = get_search_index()
+    feedback, base = get_hot_window()
+    total, hits = index.search(query, sentiment, limit, offset)
+    results = []
+    for seq, score in hits:
+        if 0 <= seq - base < len(feedback):
+            results.append(dict(feedback[seq - base], seq=seq, score=round(score, 4)))
+    return total, results
+
+def search_positions(query, sentiment=None):
+    """Hot-list positions of every match, most relevant first
+
+    For callers that already hold the hot list (the dashboard's DataFrame):
+    positions are mapped with the archived count read together with the
+    list, so archival afterwards cannot shift them onto other entries.
+    """
+    index = get_search_index()
+    feedback, base = get_hot_window()
+    _, hits = index.search(query, sentiment, None, 0)
+    return [seq - base for seq, _ in hits if 0 <= seq - base < len(feedback)]
+
+def get_term_tracker():
+    """Return the heavy-hitter term tracker, loading the saved copy (or building it) on first use"""
+    global _term_tracker
+    if _term_tracker is None:
+        with _term_lock:
+            if _term_tracker is None:
+                tracker = term_tracker.load_tracker() or term_tracker.TermTracker()
+                tracker.sync(*get_hot_window())
+                term_tracker.save_tracker(tracker)
+                logger.info(f"Term tracker ready at position {tracker.position}")
+                _term_tracker = tracker
+    else:
+        # Catch up with entries written by other processes
+        _term_tracker.sync(*get_hot_window())
+    return _term_tracker
+
+def get_top_terms(window=term_tracker.ALL, sentiment=None, kind='unigram', limit=20):
+    """Most frequent terms in stored feedback
+
+    Args:
+        window (str): A configured window such as '24h', or 'all'
+        sentiment (str, optional): Only entries with this sentiment
+        kind (str): 'unigram' or 'bigram'
+        limit (int): Terms to return
+
+    Returns:
+        list: Dicts with term, count and error (count - error is a lower bound)
+    """
+    return get_term_tracker().top(window, sentiment, kind, limit)
+
+def _build_score_stats(feedback, offset):
+    """Build and save score sketches over the archive plus the hot list"""
+    stats = score_sketch.ScoreStats().sync(feedback_archive.load_range())
+    # Position counts every archived entry, including rolled-up ones
+    stats.position = offset
+    stats.sync(feedback, offset=offset)
+    score_sketch.save_stats(stats)
+    logger.info(f"Built score sketches over {stats.position} feedback entries")
+    return stats
+
+def get_score_stats():
+    """Return the persisted score sketches, building them from the store once if missing"""
+    stats = score_sketch.load_stats()
+    if stats is None:
+        stats = _build_score_stats(get_all_feedback(), feedback_archive.archived_count())
+    return stats
\ No newline at end of file
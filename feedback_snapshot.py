@@ -0,0 +1,167 @@
+import io
+import os
+import logging
+import threading
+
+# Optional columnar backend, imported on first use so API-only workers
+# never load it
+pa = None
+pq = None
+_missing = False
+
+from feedback_archive import parse_timestamp
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Arrow IPC file mirroring the hot window of feedback_data.json. It is
+# uncompressed so readers can memory-map it, and carries typed timestamps.
+# Its metadata names the store version it was built from, so readers can
+# tell whether it is current without comparing file times.
+SNAPSHOT_FILE = 'feedback_snapshot.arrow'
+MAX_CHUNKS = 32  # Appended record batches before they are merged into one
+
+EXPORT_FORMATS = {
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+    'arrow': ('application/vnd.apache.arrow.file', 'arrow'),
+}
+
+def available():
+    """True if pyarrow is installed; imports it on the first call"""
+    global pa, pq, _missing
+    if pa is None and not _missing:
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:  # pragma: no cover - depends on the environment
+            _missing = True
+            return False
+        pa, pq = pyarrow, pyarrow.parquet
+    return pa is not None
+
+def loaded():
+    """True if this process has already imported pyarrow"""
+    return pa is not None
+
+# -------------------------------
+# Tables
+# -------------------------------
+def _schema():
+    return pa.schema([
+        ('text', pa.string()),
+        ('sentiment', pa.string()),
+        ('source', pa.string()),
+        ('timestamp', pa.timestamp('us')),
+        ('score', pa.float64()),
+    ])
+
+def to_table(entries):
+    """Build an Arrow table from feedback entries, filling the same defaults as the store"""
+    score = [e.get('score') for e in entries]
+    return pa.Table.from_arrays([
+        pa.array([str(e.get('text', '')) for e in entries], pa.string()),
+        pa.array([str(e.get('sentiment', 'Neutral')) for e in entries], pa.string()),
+        pa.array([str(e.get('source', 'unknown')) for e in entries], pa.string()),
+        pa.array([parse_timestamp(e.get('timestamp')) for e in entries], pa.timestamp('us')),
+        pa.array([None if s is None else float(s) for s in score], pa.float64()),
+    ], schema=_schema())
+
+def read_table(path=SNAPSHOT_FILE):
+    """Memory-map the snapshot; the returned table references the file pages directly"""
+    return pa.ipc.open_file(pa.memory_map(path)).read_all()
+
+def _metadata(table):
+    metadata = table.schema.metadata or {}
+    return int(metadata.get(b'offset', -1)), int(metadata.get(b'rows', -1))
+
+def store_version(path=SNAPSHOT_FILE):
+    """Store version the snapshot was built from, or None if missing or unreadable
+
+    Only the file footer and schema are read.
+    """
+    try:
+        metadata = pa.ipc.open_file(pa.memory_map(path)).schema.metadata or {}
+    except (pa.ArrowInvalid, OSError):
+        return None
+    version = metadata.get(b'store')
+    return version.decode() if version else None
+
+def _write_table(path, table, offset, version):
+    table = table.replace_schema_metadata({'offset': str(offset), 'rows': str(table.num_rows), 'store': version or ''})
+    # Per-process temp name: processes may refresh the snapshot concurrently
+    temp_file = f"{path}.{os.getpid()}.tmp"
+    with pa.OSFile(temp_file, 'wb') as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(temp_file, path)
+
+# -------------------------------
+# Snapshot maintenance
+# -------------------------------
+_lock = threading.Lock()
+
+def sync_snapshot(feedback, offset=0, path=SNAPSHOT_FILE, version=None):
+    """Bring the snapshot in step with the hot feedback list
+
+    Only entries appended since the last sync are converted. The snapshot is
+    rebuilt when archival has shifted the list (a new offset) or it shrank.
+
+    Args:
+        feedback (list): The hot feedback list
+        offset (int): Entries archived out of the front of the list
+        version (str, optional): Store version the list was read at
+    """
+    with _lock:
+        table = None
+        if os.path.exists(path):
+            try:
+                table = read_table(path)
+            except (pa.ArrowInvalid, OSError) as e:
+                logger.error(f"Rebuilding unreadable feedback snapshot: {str(e)}")
+
+        if table is not None and table.schema.remove_metadata().equals(_schema()) \
+                and _metadata(table) == (offset, table.num_rows) and table.num_rows <= len(feedback):
+            if table.num_rows == len(feedback):
+                if store_version(path) == version:
+                    return
+            else:
+                table = pa.concat_tables([table, to_table(feedback[table.num_rows:])])
+            if table.column(0).num_chunks > MAX_CHUNKS:
+                table = table.combine_chunks()
+        else:
+            table = to_table(feedback)
+
+        _write_table(path, table, offset, version)
+
+_frame_cache = None
+_frame_cache_mtime = None
+
+def load_dataframe(path=SNAPSHOT_FILE):
+    """Return the snapshot as a pandas DataFrame, reused until the file changes
+
+    Callers get a shallow copy, so adding columns does not touch the cache.
+    """
+    global _frame_cache, _frame_cache_mtime
+    mtime = os.path.getmtime(path)
+    with _lock:
+        if _frame_cache is None or mtime != _frame_cache_mtime:
+            _frame_cache = read_table(path).to_pandas()
+            _frame_cache_mtime = mtime
+        return _frame_cache.copy(deep=False)
+
+# -------------------------------
+# Export
+# -------------------------------
+def export(table, fmt):
+    """Serialize a table for download as Parquet or an Arrow IPC file
+
+    Returns:
+        bytes: The encoded table
+    """
+    sink = io.BytesIO()
+    if fmt == 'parquet':
+        pq.write_table(table, sink, compression='zstd')
+    else:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    return sink.getvalue()
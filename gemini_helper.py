@@ -4,6 +4,11 @@ import os
 import logging
 from dotenv import load_dotenv
 import sys
+from feedback_aggregator import build_prompt_input
+from term_tracker import format_terms
+from rolling_summary import format_summaries, MAX_WORDS as SUMMARY_WORDS
+import llm_router
+import tracing
 
 # Load environment variables from .env
 load_dotenv()
@@ -29,27 +34,38 @@ try:
     genai.configure(api_key=api_key)
     
     logger.info("Initializing Gemini model")
-    model = genai.GenerativeModel('gemini-2.5-flash')
+    # Routed across the GEMINI_MODEL_TIERS with latency-based hedging (see llm_router.py)
+    model = llm_router.route('alert')
     logger.info("Successfully initialized Gemini model")
     
 except Exception as e:
     logger.error(f"Failed to initialize Gemini: {str(e)}", exc_info=True)
     raise
 
-def generate_alert(texts, sentiment_scores):
+# Token budget for example texts when top terms stand in for the raw feedback
+TERMS_EXAMPLE_BUDGET = int(os.getenv('ALERT_TERMS_EXAMPLE_BUDGET', '300'))
+
+def build_alert_prompt(texts, sentiment_scores, token_budget=None, top_terms=None, summaries=None):
     """
-    Generate a concise alert message using Gemini LLM.
+    Validate the inputs and build the Gemini prompt used for alert generation.
     
     Args:
         texts: List of text strings to analyze
         sentiment_scores: List of sentiment scores corresponding to the texts
+        token_budget: Optional token budget for the feedback section
+        top_terms: Optional heavy-hitter terms (dicts with term, count and
+            error, see term_tracker). When given, the prompt lists them and
+            only a few example texts; texts and scores may then be empty.
+        summaries: Optional rolling window summaries (see rolling_summary).
+            When given, texts and scores are only the feedback none of them
+            covers yet, and may be empty if the summaries cover everything.
         
     Returns:
-        str: Generated alert message
+        str: Prompt to send to the model
     """
-    logger.info(f"Starting generate_alert with {len(texts)} texts")
-    
-    try:
+    if (top_terms is not None or summaries) and not texts and not sentiment_scores:
+        texts, sentiment_scores = [], []
+    else:
         # Input validation
         if not texts or not isinstance(texts, list) or not all(isinstance(t, str) for t in texts):
             error_msg = f"texts must be a non-empty list of strings, got: {texts}"
@@ -65,66 +81,152 @@ def generate_alert(texts, sentiment_scores):
             error_msg = f"texts and sentiment_scores must have the same length. Got {len(texts)} texts and {len(sentiment_scores)} scores"
             logger.error(error_msg)
             raise ValueError(error_msg)
+    
+    # Check if model is initialized
+    if model is None:
+        error_msg = "Gemini model is not initialized. Check your API key and internet connection."
+        logger.error(error_msg)
+        raise RuntimeError(error_msg)
+    
+    if top_terms is not None:
+        if not top_terms and not texts:
+            raise ValueError("No top terms or texts to analyze")
+        examples = ""
+        if texts:
+            budget = TERMS_EXAMPLE_BUDGET if token_budget is None else token_budget
+            examples = f"""
+    A few representative texts with their sentiment scores:
+    
+    {build_prompt_input(texts, sentiment_scores, budget)}
+    """
+        return f"""
+    You are a helpful assistant that analyzes customer feedback and generates 
+    concise alert messages for the support team.
+    
+    Please analyze the most frequent terms and two-word phrases in recent 
+    customer feedback, with how many feedback entries mention each, then 
+    generate a brief alert message highlighting any critical issues:
+    
+    {format_terms(top_terms) or "(no frequent terms)"}
+    {examples}
+    Guidelines:
+    - Focus on the most critical issues first
+    - Be concise but specific
+    - Include any patterns or common themes
+    - If there are no critical issues, note that as well
+    """
+    
+    if summaries:
+        new_feedback = "(no new feedback)"
+        if texts:
+            new_feedback = f"""Similar feedback has been grouped: each group shows how many texts it 
+    covers, their average and minimum score, and representative examples:
+    
+    {build_prompt_input(texts, sentiment_scores, token_budget)}"""
+        return f"""
+    You are a helpful assistant that analyzes customer feedback and generates 
+    concise alert messages for the support team.
+    
+    Earlier customer feedback has been summarized per time window, oldest 
+    first, with how many texts each window covers and their scores:
+    
+    {format_summaries(summaries)}
+    
+    New customer feedback since those summaries. {new_feedback}
+    
+    Please generate a brief alert message highlighting any critical issues 
+    across the summarized and the new feedback.
+    
+    Guidelines:
+    - Focus on the most critical issues first
+    - Call out issues that are new or growing in the new feedback
+    - Be concise but specific
+    - Include any patterns or common themes
+    - If there are no critical issues, note that as well
+    """
+    
+    # Dedupe and cluster similar feedback so the prompt stays within budget
+    formatted_input = build_prompt_input(texts, sentiment_scores, token_budget)
+    
+    return f"""
+    You are a helpful assistant that analyzes customer feedback and generates 
+    concise alert messages for the support team.
+    
+    Please analyze the following customer feedback and their sentiment scores, 
+    then generate a brief alert message highlighting any critical issues.
+    Similar feedback has been grouped: each group shows how many texts it 
+    covers, their average and minimum score, and representative examples:
+    
+    {formatted_input}
+    
+    Guidelines:
+    - Focus on the most critical issues first
+    - Be concise but specific
+    - Include any patterns or common themes
+    - If there are no critical issues, note that as well
+    """
+
+def extract_response_text(response):
+    """
+    Extract the generated text from a Gemini response.
+    
+    Args:
+        response: Response returned by generate_content
         
-        # Check if model is initialized
-        if model is None:
-            error_msg = "Gemini model is not initialized. Check your API key and internet connection."
-            logger.error(error_msg)
-            raise RuntimeError(error_msg)
-        
-        # Format the input for better readability
-        formatted_input = "\n".join(
-            f"Text: {text[:200]}..." + ("" if len(text) <= 200 else "") + 
-            f"\nSentiment Score: {score:.2f}\n" 
-            for text, score in zip(texts, sentiment_scores)
-        )
-        
-        prompt = f"""
-        You are a helpful assistant that analyzes customer feedback and generates 
-        concise alert messages for the support team.
-        
-        Please analyze the following customer feedback and their sentiment scores, 
-        then generate a brief alert message highlighting any critical issues:
+    Returns:
+        str: Generated text
+    """
+    # Debug: Log basic response info
+    logger.debug(f"Response type: {type(response).__name__}")
+    
+    # Extract the response text based on the response structure
+    if hasattr(response, 'text') and response.text:
+        result = response.text.strip()
+        logger.info("Extracted response text")
+        return result
         
-        {formatted_input}
+    # Handle different response formats
+    if hasattr(response, 'candidates') and response.candidates:
+        candidate = response.candidates[0]
+        if hasattr(candidate, 'content') and hasattr(candidate.content, 'parts'):
+            if candidate.content.parts:
+                result = candidate.content.parts[0].text.strip()
+                logger.info("Extracted response from candidates")
+                return result
+    
+    # If we get here, we couldn't extract the response
+    error_msg = f"Unexpected response format from Gemini. Response: {response}"
+    logger.error(error_msg)
+    raise RuntimeError("Unable to process the response from the AI model.")
+
+def generate_alert(texts, sentiment_scores, top_terms=None, summaries=None):
+    """
+    Generate a concise alert message using Gemini LLM.
+    
+    Args:
+        texts: List of text strings to analyze
+        sentiment_scores: List of sentiment scores corresponding to the texts
+        top_terms: Optional heavy-hitter terms to send in place of most raw text
+        summaries: Optional rolling window summaries; texts are then only the new feedback
         
-        Guidelines:
-        - Focus on the most critical issues first
-        - Be concise but specific
-        - Include any patterns or common themes
-        - If there are no critical issues, note that as well
-        """
+    Returns:
+        str: Generated alert message
+    """
+    logger.info(f"Starting generate_alert with {len(texts)} texts")
+    
+    try:
+        prompt = build_alert_prompt(texts, sentiment_scores, top_terms=top_terms, summaries=summaries)
         
         logger.info("Sending request to Gemini API...")
         logger.debug(f"Prompt length: {len(prompt)} characters")
         
         try:
             # Generate the response using the model
-            response = model.generate_content(prompt)
+            with tracing.span('gemini_generate'):
+                response = model.generate_content(prompt)
             logger.info("Successfully received response from Gemini API")
             
-            # Debug: Log basic response info
-            logger.debug(f"Response type: {type(response).__name__}")
-            
-            # Extract the response text based on the response structure
-            if hasattr(response, 'text') and response.text:
-                result = response.text.strip()
-                logger.info("Extracted response text")
-                return result
-                
-            # Handle different response formats
-            if hasattr(response, 'candidates') and response.candidates:
-                candidate = response.candidates[0]
-                if hasattr(candidate, 'content') and hasattr(candidate.content, 'parts'):
-                    if candidate.content.parts:
-                        result = candidate.content.parts[0].text.strip()
-                        logger.info("Extracted response from candidates")
-                        return result
-            
-            # If we get here, we couldn't extract the response
-            error_msg = f"Unexpected response format from Gemini. Response: {response}"
-            logger.error(error_msg)
-            raise RuntimeError("Unable to process the response from the AI model.")
+            return extract_response_text(response)
             
         except Exception as api_error:
             logger.error(f"Gemini API Error: {str(api_error)}", exc_info=True)
@@ -135,3 +237,158 @@ def generate_alert(texts, sentiment_scores):
     except Exception as e:
         logger.error(f"Error in generate_alert: {str(e)}", exc_info=True)
         raise
+
+
+def build_summary_prompt(previous, texts, sentiment_scores):
+    """
+    Build the prompt that folds new feedback into a running window summary.
+    
+    Args:
+        previous: The window's summary so far ("" for a new window)
+        texts: New feedback texts
+        sentiment_scores: Their sentiment scores
+        
+    Returns:
+        str: Prompt to send to the model
+    """
+    current = previous or "(nothing summarized yet)"
+    return f"""
+    You maintain a running summary of customer feedback for a support team.
+    
+    Current summary:
+    {current}
+    
+    New feedback and sentiment scores to fold in. Similar feedback has been 
+    grouped: each group shows how many texts it covers, their average and 
+    minimum score, and representative examples:
+    
+    {build_prompt_input(texts, sentiment_scores)}
+    
+    Write the updated summary in at most {SUMMARY_WORDS} words. Keep the issues 
+    from the current summary unless the new feedback contradicts them, add new 
+    issues, and note how often each issue comes up. Reply with the summary only.
+    """
+
+def summarize_feedback(previous, texts, sentiment_scores):
+    """
+    Fold new feedback into a running window summary using Gemini.
+    
+    Args:
+        previous: The window's summary so far ("" for a new window)
+        texts: New feedback texts
+        sentiment_scores: Their sentiment scores
+        
+    Returns:
+        str: Updated summary
+    """
+    if model is None:
+        raise RuntimeError("Gemini model is not initialized. Check your API key and internet connection.")
+    prompt = build_summary_prompt(previous, texts, sentiment_scores)
+    logger.info(f"Folding {len(texts)} texts into a rolling summary")
+    with tracing.span('gemini_summarize'):
+        response = model.generate_content(prompt)
+    return extract_response_text(response)
+
+
+def generate_alert_stream(texts, sentiment_scores, top_terms=None, summaries=None):
+    """
+    Stream an alert message from Gemini chunk by chunk.
+    
+    Uses the SDK's streamed generation so callers can relay text to the
+    client as soon as the first tokens arrive.
+    
+    Args:
+        texts: List of text strings to analyze
+        sentiment_scores: List of sentiment scores corresponding to the texts
+        top_terms: Optional heavy-hitter terms to send in place of most raw text
+        summaries: Optional rolling window summaries; texts are then only the new feedback
+        
+    Returns:
+        iterator: Yields text chunks of the generated alert message
+    """
+    logger.info(f"Starting generate_alert_stream with {len(texts)} texts")
+    
+    # Validate before the first yield so callers get errors up front
+    prompt = build_alert_prompt(texts, sentiment_scores, top_terms=top_terms, summaries=summaries)
+    
+    def _stream():
+        try:
+            logger.info("Sending streaming request to Gemini API...")
+            response = model.generate_content(prompt, stream=True)
+            
+            for chunk in response:
+                try:
+                    text = chunk.text
+                except (ValueError, AttributeError):
+                    # Chunks without text parts (e.g. safety metadata) are skipped
+                    continue
+                if text:
+                    yield text
+            
+            logger.info("Finished streaming response from Gemini API")
+            
+        except Exception as api_error:
+            logger.error(f"Gemini API Error: {str(api_error)}", exc_info=True)
+            raise RuntimeError(f"Failed to generate content: {str(api_error)}")
+    
+    return _stream()
+
+
+async def generate_alert_async(texts, sentiment_scores, top_terms=None, summaries=None):
+    """
+    Generate a concise alert message using Gemini without blocking the event loop.
+    
+    Args:
+        texts: List of text strings to analyze
+        sentiment_scores: List of sentiment scores corresponding to the texts
+        top_terms: Optional heavy-hitter terms to send in place of most raw text
+        summaries: Optional rolling window summaries; texts are then only the new feedback
+        
+    Returns:
+        str: Generated alert message
+    """
+    logger.info(f"Starting generate_alert_async with {len(texts)} texts")
+    prompt = build_alert_prompt(texts, sentiment_scores, top_terms=top_terms, summaries=summaries)
+    
+    try:
+        with tracing.span('gemini_generate'):
+            response = await model.generate_content_async(prompt)
+        logger.info("Successfully received response from Gemini API")
+        return extract_response_text(response)
+    except Exception as api_error:
+        logger.error(f"Gemini API Error: {str(api_error)}", exc_info=True)
+        raise RuntimeError(f"Failed to generate content: {str(api_error)}")
+
+
+async def generate_alert_stream_async(texts, sentiment_scores, top_terms=None, summaries=None):
+    """
+    Async variant of generate_alert_stream.
+    
+    Args:
+        texts: List of text strings to analyze
+        sentiment_scores: List of sentiment scores corresponding to the texts
+        top_terms: Optional heavy-hitter terms to send in place of most raw text
+        summaries: Optional rolling window summaries; texts are then only the new feedback
+        
+    Returns:
+        async iterator: Yields text chunks of the generated alert message
+    """
+    logger.info(f"Starting generate_alert_stream_async with {len(texts)} texts")
+    prompt = build_alert_prompt(texts, sentiment_scores, top_terms=top_terms, summaries=summaries)
+    
+    async def _stream():
+        try:
+            response = await model.generate_content_async(prompt, stream=True)
+            async for chunk in response:
+                try:
+                    text = chunk.text
+                except (ValueError, AttributeError):
+                    # Chunks without text parts (e.g. safety metadata) are skipped
+                    continue
+                if text:
+                    yield text
+        except Exception as api_error:
+            logger.error(f"Gemini API Error: {str(api_error)}", exc_info=True)
+            raise RuntimeError(f"Failed to generate content: {str(api_error)}")
+    
+    return _stream()
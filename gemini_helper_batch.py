@@ -3,6 +3,10 @@ import os
 import logging
 from dotenv import load_dotenv
 import sys
+import asyncio
+from dedup_index import NearDuplicateIndex
+import llm_router
+import tracing
 
 # Load environment variables from .env
 load_dotenv()
@@ -25,13 +29,72 @@ try:
         raise ValueError("GOOGLE_API_KEY environment variable is not set")
     
     genai.configure(api_key=api_key)
-    model = genai.GenerativeModel('gemini-2.5-flash')
+    model = llm_router.route('suggestion')
     logger.info("Successfully initialized Gemini model")
     
 except Exception as e:
     logger.error(f"Failed to initialize Gemini: {str(e)}", exc_info=True)
     raise
 
+# Suggestions already generated, reused for near-duplicate complaints
+SUGGESTION_CACHE_SIZE = 10000
+suggestion_cache = NearDuplicateIndex()
+
+SUGGESTION_CONCURRENCY = int(os.getenv('SUGGESTION_CONCURRENCY', '8'))
+NO_SUGGESTION = "Unable to generate a suggestion at this time."
+
+def resolve_without_model(complaint):
+    """Return a result for invalid or previously seen complaints, else None"""
+    if not isinstance(complaint, str) or not complaint.strip():
+        logger.warning(f"Skipping invalid complaint: {complaint}")
+        return {
+            'complaint': complaint,
+            'suggestion': 'Invalid complaint format',
+            'error': 'Invalid input'
+        }
+        
+    # Reuse the suggestion of a near-duplicate complaint
+    cached = suggestion_cache.query(complaint)
+    if cached:
+        return {
+            'complaint': complaint,
+            'suggestion': cached[2]
+        }
+    return None
+
+def _build_prompt(complaint):
+    return f"""
+            You are a helpful customer support assistant. Please provide a professional and empathetic 
+            response to the following customer complaint. Keep the response concise and solution-oriented.
+            
+            Complaint: "{complaint}"
+            
+            Suggestion:
+            """
+
+def _suggestion_from_response(complaint, response):
+    """Extract the suggestion text and remember it for near-duplicates"""
+    if hasattr(response, 'text') and response.text:
+        suggestion = response.text.strip('"\n ')
+        if len(suggestion_cache) >= SUGGESTION_CACHE_SIZE:
+            suggestion_cache.clear()
+        suggestion_cache.add(len(suggestion_cache), complaint, suggestion)
+    else:
+        suggestion = NO_SUGGESTION
+        
+    return {
+        'complaint': complaint,
+        'suggestion': suggestion
+    }
+
+def _suggestion_error(complaint, error):
+    logger.error(f"Error generating suggestion for complaint: {complaint}", exc_info=True)
+    return {
+        'complaint': complaint,
+        'suggestion': 'Error generating suggestion',
+        'error': str(error)
+    }
+
 def generate_suggestions(complaints):
     """
     Generate AI suggestions for each complaint individually.
@@ -45,50 +108,57 @@ def generate_suggestions(complaints):
     if not complaints or not isinstance(complaints, list):
         raise ValueError("Input must be a non-empty list of complaint strings")
     
-    results = []
+    return [generate_suggestion(complaint) for complaint in complaints]
+
+def generate_suggestion(complaint):
+    """
+    Generate the AI suggestion for a single complaint.
     
-    for complaint in complaints:
-        if not isinstance(complaint, str) or not complaint.strip():
-            logger.warning(f"Skipping invalid complaint: {complaint}")
-            results.append({
-                'complaint': complaint,
-                'suggestion': 'Invalid complaint format',
-                'error': 'Invalid input'
-            })
-            continue
-            
+    Args:
+        complaint: Complaint string
+        
+    Returns:
+        dict: The complaint and its suggestion, with an 'error' key on failure
+    """
+    result = resolve_without_model(complaint)
+    if result is None:
         try:
-            prompt = f"""
-            You are a helpful customer support assistant. Please provide a professional and empathetic 
-            response to the following customer complaint. Keep the response concise and solution-oriented.
-            
-            Complaint: "{complaint}"
-            
-            Suggestion:
-            """
-            
-            response = model.generate_content(prompt)
-            
-            # Extract the suggestion text
-            if hasattr(response, 'text') and response.text:
-                suggestion = response.text.strip('"\n ')
-            else:
-                suggestion = "Unable to generate a suggestion at this time."
-                
-            results.append({
-                'complaint': complaint,
-                'suggestion': suggestion
-            })
-            
+            with tracing.span('gemini_generate'):
+                response = model.generate_content(_build_prompt(complaint))
+            result = _suggestion_from_response(complaint, response)
         except Exception as e:
-            logger.error(f"Error generating suggestion for complaint: {complaint}", exc_info=True)
-            results.append({
-                'complaint': complaint,
-                'suggestion': 'Error generating suggestion',
-                'error': str(e)
-            })
+            result = _suggestion_error(complaint, e)
+    return result
+
+async def generate_suggestions_async(complaints, concurrency=SUGGESTION_CONCURRENCY):
+    """
+    Generate AI suggestions for all complaints concurrently on the event loop.
+    
+    Args:
+        complaints: List of complaint strings
+        concurrency: Maximum number of in-flight Gemini requests
+        
+    Returns:
+        list: List of dictionaries containing original complaint and AI suggestion
+    """
+    if not complaints or not isinstance(complaints, list):
+        raise ValueError("Input must be a non-empty list of complaint strings")
+    
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    async def suggest(complaint):
+        result = resolve_without_model(complaint)
+        if result is not None:
+            return result
+        async with semaphore:
+            try:
+                with tracing.span('gemini_generate'):
+                    response = await model.generate_content_async(_build_prompt(complaint))
+                return _suggestion_from_response(complaint, response)
+            except Exception as e:
+                return _suggestion_error(complaint, e)
     
-    return results
+    return list(await asyncio.gather(*(suggest(c) for c in complaints)))
 
 def format_suggestions_html(suggestions):
     """
@@ -0,0 +1,33 @@
+"""gunicorn settings, read from the working directory at startup
+
+With --preload, app.py is imported once in the master and preload.warm()
+builds the shared read-mostly state there before the workers are forked,
+so they share it copy-on-write (see preload.py). Without --preload every
+worker imports app.py and builds that state itself, as before.
+"""
+import os
+import sys
+
+# Locks and queues created while app.py is imported are inherited by the
+# workers. gevent workers only patch the standard library after the fork,
+# so with --preload the master must patch before app.py is loaded, or
+# those would be OS locks that block a whole worker instead of one greenlet.
+_args = " ".join(sys.argv[1:] + [os.getenv("GUNICORN_CMD_ARGS", "")])
+if "--preload" in _args and "gevent" in _args:
+    from gevent import monkey
+    monkey.patch_all()
+
+def on_starting(server):
+    # memory:// keeps locks, leader leases and rate buckets inside each
+    # worker, so workers would not exclude each other from the store
+    import coordination
+    if server.cfg.workers > 1 and not coordination.is_shared():
+        server.log.warning(
+            "%d workers share no coordination backend: the feedback store lock, leader "
+            "election and rate limits only hold within each worker. Set COORDINATION_URL "
+            "to a redis:// URL, or run a single worker.", server.cfg.workers)
+
+def when_ready(server):
+    if server.cfg.preload_app:
+        import preload
+        preload.warm()
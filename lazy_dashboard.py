@@ -0,0 +1,45 @@
+import os
+import logging
+import threading
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# How app.py serves the Dash dashboard:
+#   lazy  - build it on the first /dashboard/ request (default); API-only
+#           workers never import dash, pandas or plotly
+#   eager - build it at startup
+#   off   - do not serve it; run `gunicorn "dashboard:create_server()"` as a
+#           separate process and route /dashboard/ there
+DASHBOARD_MOUNT = os.getenv('DASHBOARD_MOUNT', 'lazy').strip().lower()
+DASHBOARD_PREFIX = '/dashboard'
+
+class LazyDashboard:
+    """WSGI middleware that hands /dashboard/ requests to the Dash server, building it on first use"""
+
+    def __init__(self, wsgi_app, prefix=DASHBOARD_PREFIX, mode=DASHBOARD_MOUNT):
+        self.wsgi_app = wsgi_app
+        self.prefix = prefix
+        self.mode = mode
+        self._dashboard = None
+        self._lock = threading.Lock()
+        if mode == 'eager':
+            self.load()
+
+    def load(self):
+        """Import and build the Dash server (once per process)"""
+        if self._dashboard is None:
+            with self._lock:
+                if self._dashboard is None:
+                    from dashboard import create_server
+                    self._dashboard = create_server()
+                    logger.info("Mounted Dash dashboard")
+        return self._dashboard
+
+    def handles(self, path):
+        return self.mode != 'off' and (path == self.prefix or path.startswith(self.prefix + '/'))
+
+    def __call__(self, environ, start_response):
+        if self.handles(environ.get('PATH_INFO', '')):
+            return self.load()(environ, start_response)
+        return self.wsgi_app(environ, start_response)
@@ -0,0 +1,390 @@
+import os
+import time
+import asyncio
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import admission
+from feedback_aggregator import estimate_tokens
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Gemini tiers in order of preference, as "name[:max prompt tokens]". A tier
+# without a limit takes any prompt.
+MODEL_TIERS = os.getenv('GEMINI_MODEL_TIERS', 'gemini-2.5-flash,gemini-2.5-flash-lite:4000')
+
+# Latency objective per endpoint, in seconds. The most preferred tier whose
+# observed p95 meets it is used; otherwise the fastest tier that fits.
+ENDPOINT_SLOS = {
+    'alert': float(os.getenv('LLM_SLO_ALERT', '8')),
+    'suggestion': float(os.getenv('LLM_SLO_SUGGESTION', '4')),
+}
+DEFAULT_SLO = 10.0
+
+LLM_TIMEOUT = float(os.getenv('LLM_TIMEOUT', '30'))  # seconds, per call including any hedge
+HEDGE_ENABLED = os.getenv('LLM_HEDGE_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+HEDGE_PERCENTILE = 0.95  # A duplicate request is sent once the primary runs past this
+LATENCY_WINDOW = 200  # Recent calls per model used for percentiles
+MIN_SAMPLES = 20  # Below this, routing is optimistic and no hedge is sent
+MAX_WORKERS = int(os.getenv('LLM_MAX_WORKERS', '32'))  # Threads for sync calls and hedges
+MAX_HEDGES = int(os.getenv('LLM_MAX_HEDGES', '4'))  # Hedges running at once per process, losers included
+HISTOGRAM_BOUNDS = (0.25, 0.5, 1, 2, 4, 8, 16, 32)  # seconds
+
+def parse_tiers(spec):
+    """Parse "name[:max_tokens],..." into [(name, max_tokens or None)]"""
+    tiers = []
+    for item in spec.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        name, _, limit = item.partition(':')
+        tiers.append((name.strip(), int(limit) if limit.strip() else None))
+    if not tiers:
+        raise ValueError("At least one Gemini model tier is required")
+    return tiers
+
+# -------------------------------
+# Latency statistics
+# -------------------------------
+class LatencyStats:
+    """Recent-latency window and cumulative histogram for one model"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.window = deque(maxlen=LATENCY_WINDOW)
+        self.histogram = [0] * (len(HISTOGRAM_BOUNDS) + 1)
+        self.calls = 0
+        self.errors = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.hedges_skipped = 0
+
+    def record(self, seconds, ok=True):
+        with self._lock:
+            self.calls += 1
+            if not ok:
+                self.errors += 1
+                return
+            self.window.append(seconds)
+            bucket = next((i for i, bound in enumerate(HISTOGRAM_BOUNDS) if seconds <= bound), len(HISTOGRAM_BOUNDS))
+            self.histogram[bucket] += 1
+
+    def record_hedge(self, won=False, skipped=False):
+        with self._lock:
+            if won:
+                self.hedge_wins += 1
+            elif skipped:
+                self.hedges_skipped += 1
+            else:
+                self.hedges += 1
+
+    def percentile(self, q):
+        """Latency at quantile q over the recent window, or None with too few samples"""
+        with self._lock:
+            if len(self.window) < MIN_SAMPLES:
+                return None
+            ordered = sorted(self.window)
+        return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+    def to_dict(self):
+        p50, p95, p99 = (self.percentile(q) for q in (0.5, 0.95, 0.99))
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "errors": self.errors,
+                "hedges": self.hedges,
+                "hedge_wins": self.hedge_wins,
+                "hedges_skipped": self.hedges_skipped,
+                "p50_s": p50,
+                "p95_s": p95,
+                "p99_s": p99,
+                "histogram": {
+                    "bounds_s": list(HISTOGRAM_BOUNDS),
+                    "counts": list(self.histogram),
+                },
+            }
+
+# -------------------------------
+# Router
+# -------------------------------
+def _gemini_model(name):
+    import google.generativeai as genai
+    return genai.GenerativeModel(name)
+
+class Router:
+    """Routes Gemini calls to a model tier and hedges slow requests
+
+    A hedge is an extra Gemini call, so it takes its own admission slot in
+    the caller's lane and is only sent when one is free right away and
+    fewer than max_hedges hedges are running. Blocking calls cannot be
+    cancelled; a losing or timed-out primary keeps an admission slot until
+    it ends, and a hedge keeps its slot even after losing.
+
+    Args:
+        tiers (list): [(model name, max prompt tokens or None)] in order of preference
+        model_factory (callable): Builds a model object from a name; anything with
+                                  generate_content / generate_content_async works,
+                                  e.g. benchmarks.stubs.FakeGenerativeModel
+        slos (dict): Endpoint name -> latency objective in seconds
+        timeout (float): Seconds before a call (and its hedge) is abandoned
+        hedge (bool): Send a duplicate request once the primary passes its p95
+        max_hedges (int): Hedges allowed to run at once
+    """
+
+    def __init__(self, tiers=None, model_factory=_gemini_model, slos=None, timeout=LLM_TIMEOUT, hedge=HEDGE_ENABLED,
+                 max_hedges=MAX_HEDGES):
+        self.tiers = tiers or parse_tiers(MODEL_TIERS)
+        self.model_factory = model_factory
+        self.slos = dict(ENDPOINT_SLOS if slos is None else slos)
+        self.timeout = timeout
+        self.hedge = hedge
+        self.max_hedges = max_hedges
+        self.stats = {name: LatencyStats() for name, _ in self.tiers}
+        self._models = {}
+        self._lock = threading.Lock()
+        self._executor = None
+        self._hedges_running = 0
+        self._abandoned_running = 0  # Blocking calls still running after their caller left
+
+    def model(self, name):
+        with self._lock:
+            if name not in self._models:
+                self._models[name] = self.model_factory(name)
+            return self._models[name]
+
+    def _pool(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix='llm')
+            return self._executor
+
+    def choose(self, prompt, endpoint=None):
+        """Pick the tier for a prompt: fits its size, then meets the endpoint SLO"""
+        tokens = estimate_tokens(prompt if isinstance(prompt, str) else str(prompt))
+        fitting = [name for name, limit in self.tiers if limit is None or tokens <= limit]
+        if not fitting:
+            fitting = [max(self.tiers, key=lambda tier: tier[1])[0]]
+
+        slo = self.slos.get(endpoint, DEFAULT_SLO)
+        observed = {name: self.stats[name].percentile(HEDGE_PERCENTILE) for name in fitting}
+        for name in fitting:
+            if observed[name] is None or observed[name] <= slo:
+                return name
+        return min(fitting, key=lambda name: observed[name])
+
+    def hedge_delay(self, name):
+        return self.stats[name].percentile(HEDGE_PERCENTILE) if self.hedge and self.max_hedges > 0 else None
+
+    def _start_hedge(self, stats, lane):
+        """Reserve a hedge and its admission slot
+
+        Returns:
+            Ticket: Released through _end_hedge when the hedge ends, or None
+                if the hedge cap is reached or admission has no free slot
+        """
+        with self._lock:
+            reserved = self._hedges_running < self.max_hedges
+            if reserved:
+                self._hedges_running += 1
+        ticket = admission.try_acquire('gemini', lane) if reserved else None
+        if ticket is None:
+            if reserved:
+                with self._lock:
+                    self._hedges_running -= 1
+            stats.record_hedge(skipped=True)
+            return None
+        stats.record_hedge()
+        return ticket
+
+    def _end_hedge(self, ticket):
+        ticket.release()
+        with self._lock:
+            self._hedges_running -= 1
+
+    def _abandon(self, future, lane):
+        """Keep an admission slot for a blocking call until it ends"""
+        ticket = admission.occupy('gemini', lane)
+        with self._lock:
+            self._abandoned_running += 1
+
+        def done(_):
+            ticket.release()
+            with self._lock:
+                self._abandoned_running -= 1
+        future.add_done_callback(done)
+
+    def generate(self, prompt, endpoint=None, **kwargs):
+        """Blocking generate_content with routing, a timeout and hedging
+
+        Raises:
+            TimeoutError: If no request answered within the timeout
+        """
+        name = self.choose(prompt, endpoint)
+        model, stats = self.model(name), self.stats[name]
+        lane = admission.current_lane() or admission.BULK
+        deadline = time.monotonic() + self.timeout
+
+        def call():
+            started = time.perf_counter()
+            try:
+                response = model.generate_content(prompt, **kwargs)
+            except Exception:
+                stats.record(time.perf_counter() - started, ok=False)
+                raise
+            stats.record(time.perf_counter() - started)
+            return response
+
+        futures = [self._pool().submit(call)]
+        try:
+            delay = self.hedge_delay(name)
+            if delay is not None:
+                done, _ = wait(futures, timeout=min(delay, self.timeout))
+                if not done and time.monotonic() < deadline:
+                    ticket = self._start_hedge(stats, lane)
+                    if ticket is not None:
+                        hedge = self._pool().submit(call)
+                        hedge.add_done_callback(lambda _: self._end_hedge(ticket))
+                        futures.append(hedge)
+
+            pending, error = set(futures), None
+            while pending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future.exception() is None:
+                        if len(futures) > 1 and future is futures[1]:
+                            stats.record_hedge(won=True)
+                        return future.result()
+                    error = future.exception()
+
+            if error is not None and not pending:
+                raise error
+            raise TimeoutError(f"{name} did not answer within {self.timeout:g}s")
+        finally:
+            # The caller's slot covered the primary only while it waited
+            if not futures[0].done():
+                self._abandon(futures[0], lane)
+
+    async def generate_async(self, prompt, endpoint=None, **kwargs):
+        """generate_content_async with routing, a timeout and hedging; the losing request is cancelled"""
+        name = self.choose(prompt, endpoint)
+        model, stats = self.model(name), self.stats[name]
+        lane = admission.current_lane() or admission.BULK
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.timeout
+
+        async def call():
+            started = time.perf_counter()
+            try:
+                response = await model.generate_content_async(prompt, **kwargs)
+            except Exception:
+                stats.record(time.perf_counter() - started, ok=False)
+                raise
+            stats.record(time.perf_counter() - started)
+            return response
+
+        tasks = [asyncio.ensure_future(call())]
+        try:
+            delay = self.hedge_delay(name)
+            if delay is not None:
+                done, _ = await asyncio.wait(tasks, timeout=min(delay, self.timeout))
+                if not done and loop.time() < deadline:
+                    # The rate bucket may live in redis; reserve off the event loop
+                    ticket = await loop.run_in_executor(None, self._start_hedge, stats, lane)
+                    if ticket is not None:
+                        hedge = asyncio.ensure_future(call())
+                        hedge.add_done_callback(lambda _: self._end_hedge(ticket))
+                        tasks.append(hedge)
+
+            pending, error = set(tasks), None
+            while pending:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if len(tasks) > 1 and task is tasks[1]:
+                            stats.record_hedge(won=True)
+                        return task.result()
+                    error = task.exception()
+
+            if error is not None and not pending:
+                raise error
+            raise TimeoutError(f"{name} did not answer within {self.timeout:g}s")
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    def for_endpoint(self, endpoint):
+        return RoutedModel(self, endpoint)
+
+    def get_stats(self):
+        return {
+            "tiers": [{"model": name, "max_prompt_tokens": limit} for name, limit in self.tiers],
+            "slos_s": self.slos,
+            "timeout_s": self.timeout,
+            "hedging": self.hedge,
+            "max_hedges": self.max_hedges,
+            "hedges_running": self._hedges_running,
+            "abandoned_running": self._abandoned_running,
+            "models": {name: stats.to_dict() for name, stats in self.stats.items()},
+        }
+
+class RoutedModel:
+    """GenerativeModel-compatible view of the router for one endpoint
+
+    Streaming calls are routed but not hedged; the stream is consumed
+    incrementally, so there is no single answer to race.
+    """
+
+    def __init__(self, router, endpoint):
+        self.router = router
+        self.endpoint = endpoint
+
+    def generate_content(self, prompt, stream=False, **kwargs):
+        if stream:
+            name = self.router.choose(prompt, self.endpoint)
+            return self.router.model(name).generate_content(prompt, stream=True, **kwargs)
+        return self.router.generate(prompt, self.endpoint, **kwargs)
+
+    async def generate_content_async(self, prompt, stream=False, **kwargs):
+        if stream:
+            name = self.router.choose(prompt, self.endpoint)
+            return await self.router.model(name).generate_content_async(prompt, stream=True, **kwargs)
+        return await self.router.generate_async(prompt, self.endpoint, **kwargs)
+
+# Shared router for the Gemini helpers
+router = None
+_router_lock = threading.Lock()
+
+def get_router():
+    global router
+    if router is None:
+        with _router_lock:
+            if router is None:
+                router = Router()
+                logger.info(f"LLM router tiers: {', '.join(name for name, _ in router.tiers)}")
+    return router
+
+def route(endpoint):
+    """Model object for an endpoint, resolved through the shared router on each call"""
+    return _SharedRoute(endpoint)
+
+class _SharedRoute:
+    # Looks the router up per call so replacing llm_router.router (e.g. in the
+    # benchmarks) takes effect for modules that already hold this object
+    def __init__(self, endpoint):
+        self.endpoint = endpoint
+
+    def generate_content(self, prompt, stream=False, **kwargs):
+        return get_router().for_endpoint(self.endpoint).generate_content(prompt, stream=stream, **kwargs)
+
+    async def generate_content_async(self, prompt, stream=False, **kwargs):
+        return await get_router().for_endpoint(self.endpoint).generate_content_async(prompt, stream=stream, **kwargs)
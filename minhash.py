@@ -0,0 +1,81 @@
+import re
+import zlib
+import unicodedata
+import numpy as np
+
+# -------------------------------
+# MinHash configuration
+# -------------------------------
+NUM_PERM = 32          # Signature length
+SHINGLE_SIZE = 4       # Character n-gram size
+MERSENNE_PRIME = (1 << 31) - 1
+SEED = 1
+
+_rng = np.random.RandomState(SEED)
+_PERM_A = _rng.randint(1, MERSENNE_PRIME, size=NUM_PERM).astype(np.uint64)
+_PERM_B = _rng.randint(0, MERSENNE_PRIME, size=NUM_PERM).astype(np.uint64)
+
+_NON_WORD = re.compile(r"[^a-z0-9 ]+")
+_SPACES = re.compile(r"\s+")
+
+# -------------------------------
+# Text helpers
+# -------------------------------
+def _is_content(char):
+    # Letters, combining marks (e.g. Devanagari vowel signs), digits and emoji
+    category = unicodedata.category(char)
+    return category[0] in "LMN" or category == "So"
+
+def normalize_text(text):
+    """NFKC-normalize, casefold, strip punctuation and collapse whitespace
+
+    Non-Latin scripts and emoji are kept. Text with nothing but punctuation
+    normalizes to "", which callers must not treat as a match.
+    """
+    text = unicodedata.normalize("NFKC", str(text)).casefold()
+    if text.isascii():
+        text = _NON_WORD.sub(" ", text)
+    else:
+        text = "".join(char if _is_content(char) else " " for char in text)
+    return _SPACES.sub(" ", text).strip()
+
+def shingle_hashes(text, k=SHINGLE_SIZE):
+    """Return the stable 32-bit hashes of a normalized text's character shingles"""
+    if len(text) <= k:
+        shingles = {text}
+    else:
+        shingles = {text[i:i + k] for i in range(len(text) - k + 1)}
+    return np.fromiter(
+        (zlib.crc32(s.encode("utf-8")) for s in shingles),
+        dtype=np.uint64,
+        count=len(shingles),
+    )
+
+# -------------------------------
+# Signatures
+# -------------------------------
+def signature(text, normalized=False):
+    """Compute the MinHash signature of a text
+
+    Args:
+        text (str): Input text
+        normalized (bool): Skip normalization if the text is already normalized
+
+    Returns:
+        numpy.ndarray: Signature of NUM_PERM uint64 values
+    """
+    if not normalized:
+        text = normalize_text(text)
+    hashes = shingle_hashes(text) % MERSENNE_PRIME
+    # One vectorized pass over all permutations: (a * h + b) mod p, min per row
+    values = (_PERM_A[:, None] * hashes[None, :] + _PERM_B[:, None]) % MERSENNE_PRIME
+    return values.min(axis=1)
+
+def similarity(sig_a, sig_b):
+    """Estimate the Jaccard similarity of two signatures"""
+    return float(np.count_nonzero(sig_a == sig_b)) / len(sig_a)
+
+def band_keys(sig, bands=8):
+    """Split a signature into LSH band keys (band index, band bytes)"""
+    rows = len(sig) // bands
+    return [(i, sig[i * rows:(i + 1) * rows].tobytes()) for i in range(bands)]
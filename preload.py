@@ -0,0 +1,78 @@
+import gc
+import os
+import time
+import logging
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Under gunicorn --preload, app.py is imported once in the master and the
+# workers are forked from it. warm() builds the read-mostly state that every
+# worker would otherwise build for itself, then moves it out of the garbage
+# collector's reach, so the workers share those pages copy-on-write instead
+# of each holding a private copy. gunicorn.conf.py calls it before forking.
+# After a fork, coordination.py gives each worker its own backend, and the
+# hot window is refreshed by parsing only appended entries, so a write does
+# not replace the shared copy (see feedback_manager.get_all_feedback).
+#
+# PRELOAD_WARM lists the steps:
+#   feedback   - the parsed hot window
+#   search     - the full-text index
+#   terms      - the heavy-hitter term tracker
+#   duplicates - the near-duplicate index
+#   stats      - the score sketches file, built once if missing
+#   dashboard  - Dash, pandas and plotly, the dashboard layout and its DataFrame
+PRELOAD_WARM = tuple(step.strip() for step in os.getenv(
+    'PRELOAD_WARM', 'feedback,search,terms,duplicates,stats,dashboard').split(',') if step.strip())
+
+def _warm_dashboard():
+    import app
+    if app.app.wsgi_app.mode == 'off':
+        return
+    app.app.wsgi_app.load()
+    import dashboard
+    dashboard.get_feedback_df()
+
+def _steps():
+    import feedback_manager
+    return {
+        'feedback': feedback_manager.get_all_feedback,
+        'search': feedback_manager.get_search_index,
+        'terms': feedback_manager.get_term_tracker,
+        'duplicates': feedback_manager.get_dedup_index,
+        'stats': feedback_manager.get_score_stats,
+        'dashboard': _warm_dashboard,
+    }
+
+def warm(steps=PRELOAD_WARM):
+    """Build shared state in the gunicorn master before the workers are forked
+
+    A failing step is logged and skipped; workers then build that state on
+    first use as they would without preloading.
+
+    Args:
+        steps (tuple): Names from PRELOAD_WARM
+
+    Returns:
+        dict: Seconds spent per step that succeeded
+    """
+    available = _steps()
+    timings = {}
+    for step in steps:
+        if step not in available:
+            logger.warning(f"Unknown preload step '{step}'; expected one of: {', '.join(available)}")
+            continue
+        started = time.perf_counter()
+        try:
+            available[step]()
+        except Exception as e:
+            logger.error(f"Preload step '{step}' failed: {str(e)}", exc_info=True)
+            continue
+        timings[step] = round(time.perf_counter() - started, 3)
+    # Objects that survive a full collection are never scanned again, so the
+    # collector does not write to (and un-share) the pages holding them
+    gc.collect()
+    if hasattr(gc, 'freeze'):
+        gc.freeze()
+    logger.info(f"Preloaded {', '.join(f'{k} ({v}s)' for k, v in timings.items()) or 'nothing'}")
+    return timings
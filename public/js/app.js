@@ -0,0 +1,868 @@
+document.addEventListener('DOMContentLoaded', function() {
+    // Elements
+    const analyzeSingleBtn = document.getElementById('analyzeSingleBtn');
+    const analyzeBatchBtn = document.getElementById('analyzeBatchBtn');
+    const singleResult = document.getElementById('singleResult');
+    const batchResult = document.getElementById('batchResult');
+    const errorMessage = document.getElementById('errorMessage');
+    const errorText = document.getElementById('errorText');
+    const newAnalysisBtn = document.getElementById('newAnalysisBtn');
+    const newBatchBtn = document.getElementById('newBatchBtn');
+    const backToSingleBtn = document.getElementById('backToSingleBtn');
+    const loading = document.getElementById('loading');
+
+    // Event Listeners
+    analyzeSingleBtn.addEventListener('click', analyzeSingleText);
+    analyzeBatchBtn.addEventListener('click', analyzeBatchTexts);
+    if (newAnalysisBtn) newAnalysisBtn.addEventListener('click', resetSingleForm);
+    if (newBatchBtn) newBatchBtn.addEventListener('click', resetBatchForm);
+    if (backToSingleBtn) {
+        backToSingleBtn.addEventListener('click', () => {
+            const singleTab = new bootstrap.Tab(document.getElementById('single-tab'));
+            singleTab.show();
+            resetBatchForm();
+        });
+    }
+
+    // Functions
+    async function analyzeSingleText() {
+        const text = document.getElementById('singleText').value.trim();
+        if (!text) {
+            showError('Please enter some text to analyze');
+            return;
+        }
+
+        try {
+            showLoading(true);
+            const response = await fetch('/api/analyze', {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json',
+                },
+                body: JSON.stringify({ text: text })
+            });
+
+            if (!response.ok) {
+                const error = await response.json();
+                throw new Error(error.detail || 'Failed to analyze text');
+            }
+
+            const result = await response.json();
+            displaySingleResult(result);
+            showError(false);
+        } catch (error) {
+            showError(error.message || 'An error occurred while analyzing the text');
+            console.error('Error:', error);
+        } finally {
+            showLoading(false);
+        }
+    }
+
+    async function analyzeBatchTexts() {
+        const texts = document.getElementById('batchTexts').value
+            .split('\n')
+            .map(t => t.trim())
+            .filter(t => t);
+
+        if (texts.length === 0) {
+            showError('Please enter at least one text to analyze');
+            return;
+        }
+
+        try {
+            showLoading(true);
+            const response = await fetch('/api/analyze_batch', {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json',
+                },
+                body: JSON.stringify({ texts: texts })
+            });
+
+            if (!response.ok) {
+                const error = await response.json();
+                throw new Error(error.detail || 'Failed to analyze texts');
+            }
+
+            const result = await response.json();
+            displayBatchResults(result);
+            showError(false);
+        } catch (error) {
+            showError(error.message || 'An error occurred while analyzing the texts');
+            console.error('Error:', error);
+        } finally {
+            showLoading(false);
+        }
+    }
+
+    function displaySingleResult(result) {
+        const resultText = document.getElementById('resultText');
+        const sentimentResult = document.getElementById('sentimentResult');
+
+        resultText.textContent = result.text || 'No text provided';
+
+        const sentiment = result.sentiment || 'unknown';
+        const sentimentClass = getSentimentClass(sentiment);
+
+        sentimentResult.textContent = sentiment.charAt(0).toUpperCase() + sentiment.slice(1);
+        sentimentResult.className = `h4 mb-0 ${sentimentClass}`;
+
+        singleResult.style.display = 'block';
+    }
+
+    function displayBatchResults(results) {
+        const resultsTableBody = document.getElementById('resultsTableBody');
+        const resultCount = document.getElementById('resultCount');
+
+        // Clear previous results
+        resultsTableBody.innerHTML = '';
+
+        // Update count
+        const count = results.predictions ? results.predictions.length : 0;
+        resultCount.textContent = `${count} ${count === 1 ? 'result' : 'results'}`;
+
+        // Add results to table
+        if (results.predictions && results.predictions.length > 0) {
+            results.predictions.forEach((item, index) => {
+                const row = document.createElement('tr');
+                const sentimentClass = getSentimentClass(item.sentiment);
+
+                row.innerHTML = `
+                    <td>${index + 1}</td>
+                    <td>${item.text || 'No text'}</td>
+                    <td><span class="${sentimentClass}">${item.sentiment || 'unknown'}</span></td>
+                `;
+                resultsTableBody.appendChild(row);
+            });
+        }
+
+        batchResult.style.display = 'block';
+    }
+
+    function getSentimentClass(sentiment) {
+        if (!sentiment) return '';
+
+        const lowerSentiment = sentiment.toLowerCase();
+        if (lowerSentiment.includes('positive')) return 'sentiment-positive';
+        if (lowerSentiment.includes('negative')) return 'sentiment-negative';
+        if (lowerSentiment.includes('neutral')) return 'sentiment-neutral';
+        return '';
+    }
+
+    function resetSingleForm() {
+        document.getElementById('singleText').value = '';
+        singleResult.style.display = 'none';
+    }
+
+    function resetBatchForm() {
+        document.getElementById('batchTexts').value = '';
+        batchResult.style.display = 'none';
+    }
+
+    function showError(message) {
+        if (!message) {
+            errorMessage.style.display = 'none';
+            return;
+        }
+
+        errorText.textContent = message;
+        errorMessage.style.display = 'block';
+
+        // Auto-hide error after 5 seconds
+        setTimeout(() => {
+            errorMessage.style.display = 'none';
+        }, 5000);
+    }
+
+    function showLoading(show) {
+        loading.style.display = show ? 'block' : 'none';
+    }
+});
+
+document.addEventListener('DOMContentLoaded', function() {
+    // Elements
+    const analyzeSingleBtn = document.getElementById('analyzeSingleBtn');
+    const analyzeBatchBtn = document.getElementById('analyzeBatchBtn');
+    const singleResult = document.getElementById('singleResult');
+    const batchResult = document.getElementById('batchResult');
+    const errorMessage = document.getElementById('errorMessage');
+    const errorText = document.getElementById('errorText');
+    const newAnalysisBtn = document.getElementById('newAnalysisBtn');
+    const newBatchBtn = document.getElementById('newBatchBtn');
+    const backToSingleBtn = document.getElementById('backToSingleBtn');
+    const loading = document.getElementById('loading');
+
+    // Event Listeners
+    analyzeSingleBtn.addEventListener('click', analyzeSingleText);
+    analyzeBatchBtn.addEventListener('click', analyzeBatchTexts);
+    if (newAnalysisBtn) newAnalysisBtn.addEventListener('click', resetSingleForm);
+    if (newBatchBtn) newBatchBtn.addEventListener('click', resetBatchForm);
+    if (backToSingleBtn) {
+        backToSingleBtn.addEventListener('click', () => {
+            const singleTab = new bootstrap.Tab(document.getElementById('single-tab'));
+            singleTab.show();
+            resetBatchForm();
+        });
+    }
+
+    // API Base URL (change if deployed on Render or another server)
+    const API_BASE = "http://127.0.0.1:8000"; 
+
+    // Functions
+    async function analyzeSingleText() {
+        const text = document.getElementById('singleText').value.trim();
+        if (!text) {
+            showError('Please enter some text to analyze');
+            return;
+        }
+
+        try {
+            showLoading(true);
+            const response = await fetch(`${API_BASE}/predict`, {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json',
+                },
+                body: JSON.stringify({ text: text })
+            });
+
+            if (!response.ok) {
+                const error = await response.json();
+                throw new Error(error.detail || 'Failed to analyze text');
+            }
+
+            const result = await response.json();
+            // result should be like { "text": "...", "sentiment": "positive" }
+            displaySingleResult(result);
+            showError(false);
+        } catch (error) {
+            showError(error.message || 'An error occurred while analyzing the text');
+            console.error('Error:', error);
+        } finally {
+            showLoading(false);
+        }
+    }
+
+    async function analyzeBatchTexts() {
+        const texts = document.getElementById('batchTexts').value
+            .split('\n')
+            .map(t => t.trim())
+            .filter(t => t);
+
+        if (texts.length === 0) {
+            showError('Please enter at least one text to analyze');
+            return;
+        }
+
+        try {
+            showLoading(true);
+            const response = await fetch(`${API_BASE}/predict_batch`, {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json',
+                },
+                body: JSON.stringify({ texts: texts })
+            });
+
+            if (!response.ok) {
+                const error = await response.json();
+                throw new Error(error.detail || 'Failed to analyze texts');
+            }
+
+            const result = await response.json();
+            // result should be like { "predictions": [ { "text": "...", "sentiment": "negative" }, ... ] }
+            displayBatchResults(result);
+            showError(false);
+        } catch (error) {
+            showError(error.message || 'An error occurred while analyzing the texts');
+            console.error('Error:', error);
+        } finally {
+            showLoading(false);
+        }
+    }
+
+    function displaySingleResult(result) {
+        const resultText = document.getElementById('resultText');
+        const sentimentResult = document.getElementById('sentimentResult');
+
+        resultText.textContent = result.text || 'No text provided';
+
+        const sentiment = result.sentiment || 'unknown';
+        const sentimentClass = getSentimentClass(sentiment);
+
+        sentimentResult.textContent = sentiment.charAt(0).toUpperCase() + sentiment.slice(1);
+        sentimentResult.className = `h4 mb-0 ${sentimentClass}`;
+
+        singleResult.style.display = 'block';
+
+        lastSingleResult = result;
+        document.getElementById('sendSingleAlertBtn').disabled = false;
+
+    }
+
+    function displayBatchResults(results) {
+        const resultsTableBody = document.getElementById('resultsTableBody');
+        const resultCount = document.getElementById('resultCount');
+
+        // Clear previous results
+        resultsTableBody.innerHTML = '';
+
+        // Make sure we have a valid results object
+        if (!results) {
+            console.error('No results provided to displayBatchResults');
+            showAlertMessage('No results to display', true);
+            return;
+        }
+
+        // Handle both direct array and object with predictions property
+        const predictions = Array.isArray(results) ? results : 
+                         (results.predictions || []);
+
+        // Update count
+        const count = predictions.length;
+        resultCount.textContent = `${count} ${count === 1 ? 'result' : 'results'}`;
+
+        // Add results to table
+        if (count > 0) {
+            predictions.forEach((item, index) => {
+                try {
+                    const row = document.createElement('tr');
+                    // Ensure we have a valid item
+                    if (!item) return;
+
+                    const text = item.text || item.Text || 'No text';
+                    const sentiment = item.sentiment || item.Sentiment || 'unknown';
+                    const score = item.score || item.Score || 0;
+                    const sentimentClass = getSentimentClass(sentiment);
+
+                    row.innerHTML = `
+                        <td>${index + 1}</td>
+                        <td>${text}</td>
+                        <td><span class="${sentimentClass}">${sentiment} ${score ? `(${score.toFixed(2)})` : ''}</span></td>
+                    `;
+                    resultsTableBody.appendChild(row);
+                } catch (error) {
+                    console.error('Error processing result row:', error, item);
+                }
+            });
+        } else {
+            // Add a row indicating no results
+            const row = document.createElement('tr');
+            row.innerHTML = '<td colspan="3" class="text-center">No results to display</td>';
+            resultsTableBody.appendChild(row);
+        }
+
+        batchResult.style.display = 'block';
+
+        // Store the results for potential alert sending
+        lastBatchResults = { predictions };
+        const sendBatchBtn = document.getElementById('sendBatchAlertBtn');
+        if (sendBatchBtn) {
+            sendBatchBtn.disabled = count === 0;
+        }
+    }
+
+    function getSentimentClass(sentiment) {
+        if (!sentiment) return '';
+
+        const lowerSentiment = sentiment.toLowerCase();
+        if (lowerSentiment.includes('positive')) return 'sentiment-positive';
+        if (lowerSentiment.includes('negative')) return 'sentiment-negative';
+        if (lowerSentiment.includes('neutral')) return 'sentiment-neutral';
+        return '';
+    }
+
+    function resetSingleForm() {
+        document.getElementById('singleText').value = '';
+        singleResult.style.display = 'none';
+    }
+
+    function resetBatchForm() {
+        document.getElementById('batchTexts').value = '';
+        batchResult.style.display = 'none';
+    }
+
+    function showError(message) {
+        if (!message) {
+            errorMessage.style.display = 'none';
+            return;
+        }
+
+        errorText.textContent = message;
+        errorMessage.style.display = 'block';
+
+        // Auto-hide error after 5 seconds
+        setTimeout(() => {
+            errorMessage.style.display = 'none';
+        }, 5000);
+    }
+
+    function showLoading(show) {
+        loading.style.display = show ? 'block' : 'none';
+    }
+});
+
+
+// Global variables
+const API_BASE = ''; // Empty string to use relative URLs (same origin)
+
+// AI Suggestions functionality
+document.getElementById('ai-suggestions-btn').addEventListener('click', async function() {
+    const container = document.getElementById('aiSuggestionsContainer');
+    const content = document.getElementById('aiSuggestionsContent');
+
+    try {
+        // Show loading state
+        content.innerHTML = '<div class="text-center"><div class="spinner-border text-primary" role="status"><span class="visually-hidden">Loading...</span></div><p class="mt-2">Generating AI suggestions...</p></div>';
+        container.style.display = 'block';
+
+        // Get all complaint texts
+        let complaints = [];
+        const activeTab = document.querySelector('.tab-pane.active');
+
+        if (activeTab.id === 'single') {
+            const text = document.getElementById('singleText').value.trim();
+            if (text) complaints = [text];
+        } else {
+            const batchText = document.getElementById('batchTexts').value.trim();
+            if (batchText) {
+                complaints = batchText.split('\n').filter(t => t.trim());
+            }
+        }
+
+        if (complaints.length === 0) {
+            throw new Error('No valid text found to analyze');
+        }
+
+        // Call the API to get suggestions
+        const response = await fetch('/get_ai_suggestions', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify({ complaints: complaints })
+        });
+
+        if (!response.ok) {
+            const error = await response.json();
+            throw new Error(error.details || 'Failed to get suggestions');
+        }
+
+        const data = await response.json();
+        content.innerHTML = data.html;
+
+    } catch (error) {
+        console.error('Error getting AI suggestions:', error);
+        content.innerHTML = `
+            <div class="alert alert-danger">
+                <i class="bi bi-exclamation-triangle-fill me-2"></i>
+                Failed to load suggestions: ${error.message}
+            </div>
+        `;
+    }
+});
+let lastSingleResult = null;
+let lastBatchResults = [];
+
+// Show alert message function
+function showAlertMessage(message, isError = false) {
+    const alertDiv = document.createElement('div');
+    alertDiv.className = `alert ${isError ? 'alert-danger' : 'alert-success'} alert-dismissible fade show`;
+    alertDiv.role = 'alert';
+    alertDiv.innerHTML = `
+        ${isError ? '❌' : '✅'} ${message}
+        <button type="button" class="btn-close" data-bs-dismiss="alert" aria-label="Close"></button>
+    `;
+
+    const container = document.querySelector('.container');
+    container.insertBefore(alertDiv, container.firstChild);
+
+    // Auto-hide after 5 seconds
+    setTimeout(() => {
+        alertDiv.remove();
+    }, 5000);
+}
+
+// Show loading indicator
+function showLoading(show) {
+    const loading = document.getElementById('loading');
+    if (loading) {
+        loading.style.display = show ? 'flex' : 'none';
+    }
+}
+
+// Show a toast notification
+function showToast(message, isError = false) {
+    // Create toast container if it doesn't exist
+    let toastContainer = document.getElementById('toast-container');
+    if (!toastContainer) {
+        toastContainer = document.createElement('div');
+        toastContainer.id = 'toast-container';
+        toastContainer.style.position = 'fixed';
+        toastContainer.style.top = '20px';
+        toastContainer.style.right = '20px';
+        toastContainer.style.zIndex = '9999';
+        document.body.appendChild(toastContainer);
+
+        // Add some styles
+        const style = document.createElement('style');
+        style.textContent = `
+            .toast {
+                padding: 12px 20px;
+                margin-bottom: 10px;
+                border-radius: 4px;
+                color: white;
+                display: flex;
+                align-items: center;
+                justify-content: space-between;
+                min-width: 250px;
+                box-shadow: 0 4px 12px rgba(0,0,0,0.15);
+                animation: slideIn 0.3s ease-out;
+            }
+            .toast-success { background-color: #28a745; }
+            .toast-error { background-color: #dc3545; }
+            .toast-close {
+                background: none;
+                border: none;
+                color: white;
+                font-size: 1.2rem;
+                cursor: pointer;
+                margin-left: 15px;
+            }
+            @keyframes slideIn {
+                from { transform: translateX(100%); opacity: 0; }
+                to { transform: translateX(0); opacity: 1; }
+            }
+        `;
+        document.head.appendChild(style);
+    }
+
+    // Create toast element
+    const toast = document.createElement('div');
+    toast.className = `toast ${isError ? 'toast-error' : 'toast-success'}`;
+
+    // Add message
+    const messageEl = document.createElement('span');
+    messageEl.textContent = message;
+    toast.appendChild(messageEl);
+
+    // Add close button
+    const closeBtn = document.createElement('button');
+    closeBtn.className = 'toast-close';
+    closeBtn.innerHTML = '&times;';
+    closeBtn.onclick = () => toast.remove();
+    toast.appendChild(closeBtn);
+
+    // Add to container
+    toastContainer.appendChild(toast);
+
+    // Auto-remove after 5 seconds
+    setTimeout(() => {
+        toast.style.animation = 'fadeOut 0.5s ease-out';
+        setTimeout(() => toast.remove(), 500);
+    }, 5000);
+}
+
+// Send Alert for Single Analysis
+async function sendSingleAlert() {
+    if (!lastSingleResult) { 
+        showToast("❌ No analysis result to send", true);
+        return; 
+    }
+
+    showLoading(true);
+    try {
+        const response = await fetch('/send-alert', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({
+                text: lastSingleResult.text,
+                sentiment: lastSingleResult.sentiment,
+                score: lastSingleResult.score || 0.5,
+                urgency: lastSingleResult.sentiment === 'negative' ? 'High' : 'Medium',
+                recommendation: lastSingleResult.sentiment === 'negative' ? 'Immediate response recommended.' : 'Monitor sentiment.'
+            })
+        });
+
+        if (response.ok) {
+            showToast("✅ Alert sent successfully!");
+            showAlertMessage("Alert sent successfully!");
+        } else {
+            const error = await response.json().catch(() => ({}));
+            const errorMsg = error.error || 'Failed to send alert';
+            showToast(`❌ ${errorMsg}`, true);
+            showAlertMessage(errorMsg, true);
+        }
+    } catch (err) {
+        console.error('Error sending alert:', err);
+        const errorMsg = "Failed to connect to the server. Please try again.";
+        showToast(`❌ ${errorMsg}`, true);
+        showAlertMessage(errorMsg, true);
+    } finally { 
+        showLoading(false); 
+    }
+}
+
+// Send Alerts for Batch Analysis
+async function sendBatchAlert() {
+    const predictions = lastBatchResults.predictions || [];
+    if (!predictions.length) { 
+        showToast("❌ No batch results to send", true);
+        return; 
+    }
+
+    showLoading(true);
+    try {
+        let successCount = 0;
+        let failedCount = 0;
+
+        for (const item of predictions) {
+            try {
+                const response = await fetch('/send-alert', {
+                    method: 'POST',
+                    headers: { 'Content-Type': 'application/json' },
+                    body: JSON.stringify({
+                        text: item.text,
+                        sentiment: item.sentiment,
+                        score: item.score || 0.5,
+                        urgency: item.sentiment === 'negative' ? 'High' : 'Medium',
+                        recommendation: item.sentiment === 'negative' ? 'Immediate response recommended.' : 'Monitor sentiment.'
+                    })
+                });
+
+                if (response.ok) {
+                    successCount++;
+                } else {
+                    failedCount++;
+                }
+            } catch (err) {
+                console.error('Error sending batch alert:', err);
+                failedCount++;
+            }
+        }
+
+        // Show appropriate toast message based on results
+        if (failedCount === 0) {
+            const message = `✅ Successfully sent ${successCount} alert${successCount !== 1 ? 's' : ''}!`;
+            showToast(message);
+            showAlertMessage(message);
+        } else if (successCount === 0) {
+            const message = `❌ Failed to send ${failedCount} alert${failedCount !== 1 ? 's' : ''}. Please try again.`;
+            showToast(message, true);
+            showAlertMessage(message, true);
+        } else {
+            const message = `⚠️ Sent ${successCount} alert${successCount !== 1 ? 's' : ''}, failed to send ${failedCount}`;
+            showToast(message, true);
+            showAlertMessage(message, true);
+        }
+    } catch (err) {
+        console.error('Unexpected error in batch alert:', err);
+        const errorMsg = "An unexpected error occurred. Please try again.";
+        showToast(`❌ ${errorMsg}`, true);
+        showAlertMessage(errorMsg, true);
+    } finally { 
+        showLoading(false); 
+    }
+}
+
+// Function to show Gemini alert in the alert box
+function showGeminiAlert(message, isError = false) {
+    const alertBox = document.getElementById('geminiAlertBox');
+    const alertContent = document.getElementById('geminiAlertContent');
+    const suggestionsContainer = document.getElementById('aiSuggestionsContainer');
+
+    if (isError) {
+        alertContent.innerHTML = `<div class="alert alert-danger">${message}</div>`;
+    } else {
+        alertContent.innerHTML = `<div class="alert alert-info">${message}</div>`;
+    }
+
+    // Ensure Gemini Alert is always above AI Suggestions
+    if (suggestionsContainer.style.display === 'block') {
+        // Move the alert box before the suggestions container in the DOM
+        const parent = alertBox.parentNode;
+        const nextSibling = alertBox.nextSibling;
+        if (nextSibling !== suggestionsContainer) {
+            parent.insertBefore(alertBox, suggestionsContainer);
+        }
+
+        // Add some spacing
+        suggestionsContainer.style.marginTop = '20px';
+        alertBox.style.marginBottom = '20px';
+    } else {
+        alertBox.style.marginBottom = '0';
+    }
+
+    alertBox.style.display = 'block';
+
+    // Scroll to the Gemini Alert Box
+    setTimeout(() => {
+        alertBox.scrollIntoView({ behavior: 'smooth', block: 'nearest' });
+    }, 100);
+}
+
+// Add click event listener for Gemini Alert button
+document.getElementById("gemini-alert-btn").addEventListener("click", async () => {
+    try {
+        // Get the active tab (single or batch)
+        const activeTab = document.querySelector('.tab-pane.active');
+        let texts = [];
+        let scores = [];
+
+        if (activeTab.id === 'single') {
+            // For single text analysis
+            const text = document.getElementById('singleText').value.trim();
+            if (!text) {
+                showAlertMessage('Please enter some text first', true);
+                return;
+            }
+            texts = [text];
+            // For single text, we don't have scores yet, so we'll use a neutral score
+            scores = [0.5];
+        } else {
+            // For batch analysis
+            const resultRows = document.querySelectorAll('#resultsTableBody tr');
+            if (resultRows.length === 0) {
+                showAlertMessage('Please analyze some text first', true);
+                return;
+            }
+
+            resultRows.forEach(row => {
+                const text = row.cells[1].textContent.trim();
+                const sentiment = row.cells[2].textContent.trim().toLowerCase();
+                // Convert sentiment to a score (simplified)
+                const score = sentiment === 'positive' ? 0.9 : 
+                             sentiment === 'negative' ? 0.1 : 0.5;
+
+                texts.push(text);
+                scores.push(score);
+            });
+        }
+
+        showLoading(true);
+        const response = await fetch("/api/alerts/gemini?stream=1", {
+            method: "POST",
+            headers: {
+                "Content-Type": "application/json",
+                "Accept": "text/event-stream"
+            },
+            body: JSON.stringify({ texts, scores })
+        });
+
+        if (!response.ok) {
+            const error = await response.json().catch(() => ({}));
+            throw new Error(error.error || `HTTP error! status: ${response.status}`);
+        }
+
+        // Fall back to the JSON response if the server did not stream
+        if (!response.body || !(response.headers.get('Content-Type') || '').includes('text/event-stream')) {
+            const data = await response.json();
+            showGeminiAlert(data.alert);
+            return;
+        }
+
+        // Render chunks as they arrive so the UI is free at first token
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        let alertText = '';
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) break;
+            buffer += decoder.decode(value, { stream: true });
+
+            const events = buffer.split('\n\n');
+            buffer = events.pop();
+            for (const rawEvent of events) {
+                let eventName = 'message';
+                let payload = '';
+                rawEvent.split('\n').forEach(line => {
+                    if (line.startsWith('event:')) eventName = line.slice(6).trim();
+                    else if (line.startsWith('data:')) payload += line.slice(5).trim();
+                });
+                if (!payload) continue;
+                const data = JSON.parse(payload);
+
+                if (eventName === 'chunk') {
+                    alertText += data.text;
+                    showLoading(false);
+                    showGeminiAlert(alertText);
+                } else if (eventName === 'done') {
+                    showGeminiAlert(data.alert);
+                } else if (eventName === 'error') {
+                    throw new Error(data.error || 'Failed to generate alert');
+                }
+            }
+        }
+    } catch (error) {
+        console.error('Error generating Gemini alert:', error);
+        showGeminiAlert(`<div class="alert alert-danger">
+            <i class="bi bi-exclamation-triangle-fill me-2"></i>
+            <strong>Error:</strong> ${error.message}
+        </div>`, true);
+    } finally {
+        showLoading(false);
+    }
+});
+
+// Add a styled alert box for Gemini alerts
+const alertBox = document.createElement('div');
+alertBox.className = 'alert alert-info gemini-alert-box';
+alertBox.style.display = 'none';
+alertBox.innerHTML = `
+    <i class="bi bi-info-circle-fill me-2"></i>
+    <span class="gemini-alert-content"></span>
+`;
+document.body.appendChild(alertBox);
+
+
+
+// Save single feedback to dashboard
+async function saveToDashboard(text, sentiment) {
+    try {
+        const response = await fetch('/api/feedback', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify({
+                text: text,
+                sentiment: sentiment
+            })
+        });
+
+        if (response.ok) {
+            showAlert('Feedback saved to dashboard!', 'success');
+        } else {
+            throw new Error('Failed to save feedback');
+        }
+    } catch (error) {
+        console.error('Error saving to dashboard:', error);
+        showAlert('Failed to save to dashboard. Please try again.', 'danger');
+    }
+}
+
+// Save batch feedback to dashboard
+async function saveBatchToDashboard(predictions) {
+    try {
+        const response = await fetch('/api/feedback/batch', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify({
+                predictions: predictions
+            })
+        });
+
+        const data = await response.json();
+        if (response.ok) {
+            showAlert(`${data.message}`, 'success');
+        } else {
+            throw new Error(data.error || 'Failed to save batch feedback');
+        }
+    } catch (error) {
+        console.error('Error saving batch to dashboard:', error);
+        showAlert('Failed to save batch to dashboard. Please try again.', 'danger');
+    }
+}
@@ -0,0 +1,182 @@
+import os
+import re
+import time
+import hashlib
+import logging
+import threading
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+
+import admission
+import coordination
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Rolling summaries for Gemini alerts. Feedback sent to /api/alerts/gemini is
+# summarized per time window of WINDOW seconds, and each window keeps one
+# running LLM summary plus the fingerprints of the texts it covers. An alert
+# is built from the summaries of the last WINDOWS windows and only the texts
+# none of them covers yet (the delta), so the prompt grows with new feedback
+# instead of with everything the caller sends. After the alert, the delta is
+# folded into the current window's summary in the background, in the bulk
+# admission lane, under a lock so each text is folded once across workers.
+# Records live in the coordination backend and expire with their span.
+ENABLED = os.getenv('ALERT_SUMMARY_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+WINDOW = int(os.getenv('ALERT_SUMMARY_WINDOW', '3600'))   # Seconds per summary
+WINDOWS = int(os.getenv('ALERT_SUMMARY_WINDOWS', '24'))   # Windows an alert draws on
+MAX_WORDS = int(os.getenv('ALERT_SUMMARY_WORDS', '150'))  # Length asked of each summary
+DEFAULT_STREAM = 'default'
+FOLD_LOCK_TTL = 120  # Seconds; covers one Gemini call
+FOLD_WAIT = 60       # Seconds a fold waits for another worker's fold of the same window
+
+_WHITESPACE = re.compile(r"\s+")
+
+def fingerprint(text):
+    """Short digest of a text; case and whitespace are ignored"""
+    normalized = _WHITESPACE.sub(" ", text).strip().lower()
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()[:16]
+
+def _window_start(now=None):
+    now = time.time() if now is None else now
+    return int(now // WINDOW) * WINDOW
+
+def _key(stream, start):
+    return f"summary:{stream}:{start}"
+
+def _empty():
+    return {"version": 0, "summary": "", "fingerprints": [], "count": 0, "score_sum": 0.0, "min_score": None}
+
+_stats_lock = threading.Lock()
+_stats = {"alerts": 0, "covered": 0, "new": 0, "folds": 0, "folded": 0, "shed": 0, "failed": 0}
+
+def _count(name, amount=1):
+    with _stats_lock:
+        _stats[name] += amount
+
+# -------------------------------
+# Alert context
+# -------------------------------
+def prepare(stream, texts, scores, now=None):
+    """Split alert input into what the rolling summaries cover and the delta
+
+    Args:
+        stream (str): Summary stream; alerts for unrelated feedback use separate streams
+        texts (list): Texts sent with the alert request
+        scores (list): Their sentiment scores
+
+    Returns:
+        dict: stream, window, summaries (oldest first), and the delta's texts
+            and scores in input order, or None when rolling summaries are off
+    """
+    if not ENABLED:
+        return None
+    backend = coordination.get_backend()
+    current = _window_start(now)
+    summaries, seen = [], set()
+    for start in range(current - (WINDOWS - 1) * WINDOW, current + 1, WINDOW):
+        record = backend.get_value(_key(stream, start))
+        # A record without a summary covers nothing; its texts stay in the delta
+        if not record or not record["summary"]:
+            continue
+        seen.update(record["fingerprints"])
+        summaries.append({
+            "start": datetime.fromtimestamp(start, timezone.utc).isoformat(),
+            "summary": record["summary"],
+            "count": record["count"],
+            "average_score": record["score_sum"] / record["count"] if record["count"] else None,
+            "min_score": record["min_score"],
+            "version": record["version"],
+        })
+    delta_texts, delta_scores = [], []
+    for text, score in zip(texts, scores):
+        if fingerprint(text) not in seen:
+            delta_texts.append(text)
+            delta_scores.append(score)
+    covered = len(texts) - len(delta_texts)
+    _count("alerts")
+    _count("covered", covered)
+    _count("new", len(delta_texts))
+    return {
+        "stream": stream,
+        "window": current,
+        "summaries": summaries,
+        "texts": delta_texts,
+        "scores": delta_scores,
+        "covered": covered,
+    }
+
+def describe(context):
+    """What an alert was built from, for the response"""
+    return {
+        "stream": context["stream"],
+        "windows": len(context["summaries"]),
+        "covered": context["covered"],
+        "new": len(context["texts"]),
+    }
+
+def format_summaries(summaries):
+    """Render window summaries for the alert prompt, oldest first"""
+    blocks = []
+    for s in summaries:
+        stats = f"{s['count']} texts"
+        if s["average_score"] is not None:
+            stats += f", average score {s['average_score']:.2f}, minimum {s['min_score']:.2f}"
+        blocks.append(f"- Window from {s['start']} ({stats}):\n  {s['summary']}")
+    return "\n".join(blocks)
+
+# -------------------------------
+# Folding new feedback in
+# -------------------------------
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='summaries')
+
+def _fold(stream, start, texts, scores):
+    key = _key(stream, start)
+    backend = coordination.get_backend()
+    try:
+        # Deferred: gemini_helper imports this module for format_summaries
+        from gemini_helper import summarize_feedback
+        with backend.lock(key, ttl=FOLD_LOCK_TTL, timeout=FOLD_WAIT):
+            record = backend.get_value(key) or _empty()
+            seen = set(record["fingerprints"])
+            new_texts, new_scores = [], []
+            for text, score in zip(texts, scores):
+                digest = fingerprint(text)
+                if digest not in seen:
+                    seen.add(digest)
+                    record["fingerprints"].append(digest)
+                    new_texts.append(text)
+                    new_scores.append(float(score))
+            if not new_texts:
+                return
+            with admission.acquire('gemini', admission.BULK):
+                summary = summarize_feedback(record["summary"], new_texts, new_scores)
+            if not summary or not summary.strip():
+                raise ValueError("Gemini returned an empty summary")
+            record["summary"] = summary
+            record["version"] += 1
+            record["count"] += len(new_texts)
+            record["score_sum"] += sum(new_scores)
+            low = min(new_scores)
+            record["min_score"] = low if record["min_score"] is None else min(record["min_score"], low)
+            backend.set_value(key, record, WINDOW * WINDOWS)
+        _count("folds")
+        _count("folded", len(new_texts))
+    except admission.Overloaded:
+        # The texts stay in the delta and are folded in after a later alert
+        _count("shed")
+    except Exception as e:
+        _count("failed")
+        logger.error(f"Failed to fold feedback into the rolling summary: {str(e)}", exc_info=True)
+
+def fold(context):
+    """Fold an alert's delta into the current window's summary in the background"""
+    if context and context["texts"]:
+        _executor.submit(_fold, context["stream"], context["window"], list(context["texts"]), list(context["scores"]))
+
+def get_stats():
+    """Alert coverage and fold counts of this process"""
+    with _stats_lock:
+        stats = dict(_stats)
+    stats.update({"enabled": ENABLED, "window_seconds": WINDOW, "windows": WINDOWS})
+    return stats
@@ -0,0 +1,312 @@
+import os
+import math
+import random
+import logging
+import threading
+
+import serialization
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+STATS_FILE = 'feedback_stats.json'
+HISTOGRAM_BINS = 20   # Fixed bins over the [0, 1] score range
+KLL_K = 200           # KLL accuracy parameter (~1% rank error)
+
+# -------------------------------
+# Sketches
+# -------------------------------
+class Histogram:
+    """Fixed-bin histogram over [0, 1]"""
+
+    def __init__(self, bins=HISTOGRAM_BINS, counts=None):
+        self.bins = bins
+        self.counts = counts or [0] * bins
+
+    def update(self, value):
+        self.counts[min(max(int(value * self.bins), 0), self.bins - 1)] += 1
+
+    def merge(self, other):
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        return self
+
+    def edges(self):
+        return [round(i / self.bins, 4) for i in range(self.bins + 1)]
+
+    def to_dict(self):
+        return {"bins": self.bins, "counts": self.counts}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["bins"], list(data["counts"]))
+
+class KLLSketch:
+    """Mergeable KLL quantile sketch
+
+    Level h holds items of weight 2**h; a full level is sorted and every
+    other item (random offset) is promoted, so memory stays O(k) however
+    many values are added.
+    """
+
+    def __init__(self, k=KLL_K):
+        self.k = k
+        self.n = 0
+        self.compactors = [[]]
+
+    def _capacity(self, level):
+        depth = len(self.compactors) - level - 1
+        return int(math.ceil(self.k * (2.0 / 3.0) ** depth)) + 1
+
+    def _size(self):
+        return sum(len(c) for c in self.compactors)
+
+    def _max_size(self):
+        return sum(self._capacity(h) for h in range(len(self.compactors)))
+
+    def _compress(self):
+        while self._size() >= self._max_size():
+            for level, items in enumerate(self.compactors):
+                if len(items) >= self._capacity(level):
+                    if level + 1 == len(self.compactors):
+                        self.compactors.append([])
+                    items.sort()
+                    self.compactors[level + 1].extend(items[random.randint(0, 1)::2])
+                    self.compactors[level] = []
+                    break
+
+    def update(self, value):
+        self.compactors[0].append(float(value))
+        self.n += 1
+        if self._size() >= self._max_size():
+            self._compress()
+
+    def merge(self, other):
+        while len(self.compactors) < len(other.compactors):
+            self.compactors.append([])
+        for level, items in enumerate(other.compactors):
+            self.compactors[level].extend(items)
+        self.n += other.n
+        self._compress()
+        return self
+
+    def quantiles(self, qs):
+        """Return the estimated value at each quantile in qs"""
+        weighted = sorted(
+            (value, 1 << level)
+            for level, items in enumerate(self.compactors)
+            for value in items
+        )
+        if not weighted:
+            return [None] * len(qs)
+        total = sum(w for _, w in weighted)
+        results = []
+        for q in qs:
+            target, cumulative = q * total, 0
+            for value, weight in weighted:
+                cumulative += weight
+                if cumulative >= target:
+                    results.append(value)
+                    break
+            else:
+                results.append(weighted[-1][0])
+        return results
+
+    def to_dict(self):
+        return {"k": self.k, "n": self.n, "compactors": self.compactors}
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(data["k"])
+        sketch.n = data["n"]
+        sketch.compactors = [list(c) for c in data["compactors"]]
+        return sketch
+
+class ScoreSummary:
+    """Count, min/max/sum, histogram and quantile sketch for one group"""
+
+    def __init__(self):
+        self.count = 0        # Entries, scored or not
+        self.scored = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+        self.histogram = Histogram()
+        self.kll = KLLSketch()
+
+    def update(self, score):
+        self.count += 1
+        if score is None:
+            return
+        score = float(score)
+        self.scored += 1
+        self.total += score
+        self.min = score if self.min is None else min(self.min, score)
+        self.max = score if self.max is None else max(self.max, score)
+        self.histogram.update(score)
+        self.kll.update(score)
+
+    def merge(self, other):
+        self.count += other.count
+        self.scored += other.scored
+        self.total += other.total
+        if other.min is not None:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+            self.max = other.max if self.max is None else max(self.max, other.max)
+        self.histogram.merge(other.histogram)
+        self.kll.merge(other.kll)
+        return self
+
+    def report(self):
+        p50, p90, p99 = self.kll.quantiles((0.5, 0.9, 0.99))
+        return {
+            "count": self.count,
+            "scored": self.scored,
+            "mean": self.total / self.scored if self.scored else None,
+            "min": self.min,
+            "max": self.max,
+            "p50": p50,
+            "p90": p90,
+            "p99": p99,
+            "histogram": {"edges": self.histogram.edges(), "counts": self.histogram.counts},
+        }
+
+    def to_dict(self):
+        return {
+            "count": self.count, "scored": self.scored, "total": self.total,
+            "min": self.min, "max": self.max,
+            "histogram": self.histogram.to_dict(), "kll": self.kll.to_dict(),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        summary = cls()
+        summary.count = data["count"]
+        summary.scored = data["scored"]
+        summary.total = data["total"]
+        summary.min = data["min"]
+        summary.max = data["max"]
+        summary.histogram = Histogram.from_dict(data["histogram"])
+        summary.kll = KLLSketch.from_dict(data["kll"])
+        return summary
+
+# -------------------------------
+# Per source/sentiment statistics
+# -------------------------------
+class ScoreStats:
+    """Score sketches keyed by (source, sentiment), kept in step with the store
+
+    Entries are tracked by position like the near-duplicate index, so a
+    sync with the stored list only processes entries not yet seen.
+    """
+
+    def __init__(self):
+        self.position = 0
+        self.groups = {}
+
+    def update(self, entry):
+        key = (str(entry.get("source", "unknown")), str(entry.get("sentiment", "Neutral")).capitalize())
+        summary = self.groups.get(key)
+        if summary is None:
+            summary = self.groups[key] = ScoreSummary()
+        summary.update(entry.get("score"))
+        self.position += 1
+
+    def sync(self, feedback, offset=0):
+        """Fold in entries appended since the last sync
+
+        Args:
+            feedback (list): The stored feedback list
+            offset (int): Entries already archived out of the front of the list
+        """
+        if offset + len(feedback) < self.position:
+            self.position, self.groups = 0, {}
+        for entry in feedback[max(self.position - offset, 0):]:
+            self.update(entry)
+        return self
+
+    def summary(self, source=None, sentiment=None):
+        """Merge the matching groups into one summary"""
+        merged = ScoreSummary()
+        for (group_source, group_sentiment), summary in self.groups.items():
+            if source and group_source != source:
+                continue
+            if sentiment and group_sentiment.lower() != sentiment.lower():
+                continue
+            merged.merge(ScoreSummary.from_dict(summary.to_dict()))
+        return merged
+
+    def report(self, source=None, sentiment=None):
+        report = self.summary(source, sentiment).report()
+        report["groups"] = [
+            {"source": group_source, "sentiment": group_sentiment, "count": s.count,
+             **{k: v for k, v in zip(("p50", "p90", "p99"), s.kll.quantiles((0.5, 0.9, 0.99)))}}
+            for (group_source, group_sentiment), s in sorted(self.groups.items())
+            if (not source or group_source == source)
+            and (not sentiment or group_sentiment.lower() == sentiment.lower())
+        ]
+        return report
+
+    def to_dict(self):
+        return {
+            "position": self.position,
+            "groups": [
+                {"source": src, "sentiment": sent, "summary": s.to_dict()}
+                for (src, sent), s in self.groups.items()
+            ],
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        stats = cls()
+        stats.position = data.get("position", 0)
+        for group in data.get("groups", []):
+            stats.groups[(group["source"], group["sentiment"])] = ScoreSummary.from_dict(group["summary"])
+        return stats
+
+# -------------------------------
+# Persistence
+# -------------------------------
+_lock = threading.Lock()
+_cached = None
+_cached_mtime = None
+
+def load_stats(path=STATS_FILE):
+    """Return the persisted stats, reloading only when the file changed"""
+    global _cached, _cached_mtime
+    with _lock:
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            return _cached
+        if _cached is None or mtime != _cached_mtime:
+            try:
+                _cached = ScoreStats.from_dict(serialization.read_store(path))
+                _cached_mtime = mtime
+            except (serialization.DecodeError, KeyError, TypeError) as e:
+                logger.error(f"Ignoring unreadable stats file {path}: {str(e)}")
+                return None
+        return _cached
+
+def save_stats(stats, path=STATS_FILE):
+    global _cached, _cached_mtime
+    with _lock:
+        serialization.write_store(path, stats.to_dict())
+        _cached, _cached_mtime = stats, os.path.getmtime(path)
+    return stats
+
+def update_stats(feedback, path=STATS_FILE, offset=0):
+    """Fold new store entries into the persisted sketches and save them
+
+    Returns:
+        ScoreStats: The updated sketches, or None when there are none to
+            update (missing or unreadable file). Fresh sketches must start at
+            the archived count, so the caller rebuilds them from the archive
+            (see feedback_manager.get_score_stats) instead of counting the
+            hot window again from position 0.
+    """
+    stats = load_stats(path)
+    if stats is None:
+        return None
+    with _lock:
+        stats.sync(feedback, offset)
+    return save_stats(stats, path)
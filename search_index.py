@@ -0,0 +1,297 @@
+import os
+import re
+import math
+import pickle
+import logging
+import threading
+from array import array
+from bisect import bisect_left
+
+import numpy as np
+
+import serialization
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Positional inverted index over the text of the hot feedback window. Entries
+# are keyed by sequence number (archived count + position in the hot list),
+# as in get_feedback_since, so archival only trims the oldest postings. The
+# index is saved next to the store every SAVE_EVERY new entries; a process
+# loads the saved copy and indexes only what was written since.
+INDEX_FILE = os.getenv('FEEDBACK_SEARCH_INDEX', 'feedback_search.idx')
+SAVE_EVERY = int(os.getenv('FEEDBACK_SEARCH_SAVE_EVERY', '1000'))
+INDEX_FORMAT = 1
+BM25_K1 = 1.2
+BM25_B = 0.75
+MAX_LIMIT = 100
+MAX_POSITION = 0xFFFF  # Token positions are stored in 16 bits; later tokens share the last one
+
+_TOKEN = re.compile(r"\w+")
+_QUERY = re.compile(r'"([^"]*)"|(\S+)')
+
+def tokenize(text):
+    return _TOKEN.findall(str(text).lower())
+
+def parse_query(query):
+    """Split a query into phrases; quoted text is one phrase, other words are one-word phrases"""
+    phrases = []
+    for quoted, word in _QUERY.findall(query or ""):
+        terms = tokenize(quoted if quoted else word)
+        if terms:
+            phrases.append(terms)
+    return phrases
+
+class _Postings:
+    """Entries containing one term, in sequence order, with the term's positions in each"""
+    __slots__ = ("seqs", "tfs", "starts", "positions")
+
+    def __init__(self):
+        self.seqs = array('I')       # Entry sequence numbers
+        self.tfs = array('H')        # Occurrences in each entry
+        self.starts = array('I')     # Offset of each entry's positions in self.positions
+        self.positions = array('H')  # Token positions, concatenated
+
+    def __getstate__(self):
+        return (self.seqs, self.tfs, self.starts, self.positions)
+
+    def __setstate__(self, state):
+        self.seqs, self.tfs, self.starts, self.positions = state
+
+    def append(self, seq, where):
+        self.seqs.append(seq)
+        self.tfs.append(min(len(where), 0xFFFF))
+        self.starts.append(len(self.positions))
+        self.positions.extend(where)
+
+    def trim(self, base):
+        """Drop entries below base; returns False once nothing is left"""
+        cut = bisect_left(self.seqs, base)
+        if cut == len(self.seqs):
+            return False
+        if cut:
+            shift = self.starts[cut]
+            del self.seqs[:cut]
+            del self.tfs[:cut]
+            self.starts = array('I', (start - shift for start in self.starts[cut:]))
+            del self.positions[:shift]
+        return True
+
+    def positions_of(self, i):
+        end = self.starts[i + 1] if i + 1 < len(self.starts) else len(self.positions)
+        return self.positions[self.starts[i]:end]
+
+class SearchIndex:
+    """Incremental positional inverted index with BM25 ranking
+
+    Postings are appended to compact arrays as entries arrive and copied
+    into NumPy for each query, so intersection and scoring run vectorized.
+    All query words must match; quoted phrases must appear in order.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.clear()
+
+    def clear(self, base=0):
+        """Drop all indexed entries; the next entry indexed is sequence number base"""
+        with self._lock:
+            self._postings = {}            # term -> _Postings
+            self._lengths = array('I')     # Tokens per entry, from base
+            self._sentiments = array('B')  # Sentiment code per entry, from base
+            self._sentiment_codes = {}     # Sentiment -> code
+            self._total_length = 0
+            self.base = base               # Sequence number of the oldest indexed entry
+            self.position = base           # Sequence number of the next entry to index
+            self.unsaved = 0               # Entries indexed or dropped since the last save
+
+    def __len__(self):
+        return self.position - self.base
+
+    def _sentiment_code(self, sentiment):
+        code = self._sentiment_codes.get(sentiment)
+        if code is None and len(self._sentiment_codes) < 255:
+            code = self._sentiment_codes[sentiment] = len(self._sentiment_codes) + 1
+        return code or 0
+
+    def add(self, seq, entry):
+        """Index one entry; sequence numbers must be added in increasing order"""
+        tokens = tokenize(entry.get("text", ""))
+        positions = {}
+        for i, token in enumerate(tokens):
+            positions.setdefault(token, []).append(min(i, MAX_POSITION))
+        with self._lock:
+            for term, where in positions.items():
+                postings = self._postings.get(term)
+                if postings is None:
+                    postings = self._postings[term] = _Postings()
+                postings.append(seq, where)
+            self._lengths.append(len(tokens))
+            self._sentiments.append(self._sentiment_code(str(entry.get("sentiment", "")).capitalize()))
+            self._total_length += len(tokens)
+            self.position = seq + 1
+            self.unsaved += 1
+
+    def _trim(self, base):
+        """Forget entries below sequence number base (moved to the archive)"""
+        drop = min(base, self.position) - self.base
+        if drop > 0:
+            self._total_length -= sum(self._lengths[:drop])
+            del self._lengths[:drop]
+            del self._sentiments[:drop]
+            for term in list(self._postings):
+                if not self._postings[term].trim(base):
+                    del self._postings[term]
+            self.unsaved += drop
+        self.base = base
+        self.position = max(self.position, base)
+
+    def sync(self, feedback, offset=0):
+        """Index entries of the hot list not yet seen
+
+        Args:
+            feedback (list): The hot window
+            offset (int): Entries archived so far (sequence number of feedback[0])
+        """
+        with self._lock:
+            if offset < self.base or offset + len(feedback) < self.position:
+                # The store was reset or replaced
+                self.clear(offset)
+            elif offset > self.base:
+                self._trim(offset)
+            for seq in range(self.position, offset + len(feedback)):
+                self.add(seq, feedback[seq - offset])
+        return self
+
+    def _match(self, phrases, sentiment):
+        """Find entries containing every phrase
+
+        Returns:
+            tuple: (matching sequence numbers, {term: term frequency per match}),
+                   or (None, None) if nothing matches
+        """
+        terms = list(dict.fromkeys(term for phrase in phrases for term in phrase))
+        postings = {term: self._postings.get(term) for term in terms}
+        if any(p is None for p in postings.values()):
+            return None, None
+
+        # Start from the rarest term and probe the others by binary search
+        terms.sort(key=lambda term: len(postings[term].seqs))
+        seqs = {term: np.array(postings[term].seqs, dtype=np.int64) for term in terms}
+        matches = seqs[terms[0]]
+        if sentiment is not None:
+            codes = np.array(self._sentiments, dtype=np.uint8)
+            matches = matches[codes[matches - self.base] == self._sentiment_codes.get(sentiment, -1)]
+        for term in terms[1:]:
+            found = np.minimum(np.searchsorted(seqs[term], matches), len(seqs[term]) - 1)
+            matches = matches[seqs[term][found] == matches]
+        if not len(matches):
+            return None, None
+
+        # Row of each match in every term's postings
+        rows = {term: np.searchsorted(seqs[term], matches) for term in terms}
+        for phrase in phrases:
+            if len(phrase) > 1:
+                keep = np.fromiter(
+                    (_has_phrase([postings[term].positions_of(int(rows[term][i])) for term in phrase])
+                     for i in range(len(matches))),
+                    dtype=bool, count=len(matches))
+                matches = matches[keep]
+                rows = {term: row[keep] for term, row in rows.items()}
+        tfs = {term: np.array(postings[term].tfs, dtype=np.float64)[rows[term]] for term in terms}
+        return matches, tfs
+
+    def search(self, query, sentiment=None, limit=20, offset=0):
+        """Rank entries matching query by BM25, newest first on ties
+
+        Args:
+            query (str): Words and "quoted phrases", all of which must match
+            sentiment (str, optional): Only entries with this sentiment
+            limit (int): Page size, or None for every match
+            offset (int): Matches to skip
+
+        Returns:
+            tuple: (total matches, [(seq, score), ...] for the requested page)
+        """
+        phrases = parse_query(query)
+        if not phrases:
+            return 0, []
+        sentiment = sentiment.capitalize() if sentiment else None
+        with self._lock:
+            matches, tfs = self._match(phrases, sentiment)
+            if matches is None or not len(matches):
+                return 0, []
+            count = len(self)
+            average = self._total_length / count if count else 1.0
+            lengths = np.array(self._lengths, dtype=np.float64)[matches - self.base]
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths / average)
+            scores = np.zeros(len(matches))
+            for term, tf in tfs.items():
+                df = len(self._postings[term].seqs)
+                idf = math.log(1 + (count - df + 0.5) / (df + 0.5))
+                scores += idf * tf * (BM25_K1 + 1) / (tf + norm)
+
+        end = len(matches) if limit is None else min(offset + limit, len(matches))
+        if offset >= end:
+            return len(matches), []
+        if end < len(matches):
+            # Only the top `end` need ordering
+            top = np.argpartition(-scores, end - 1)[:end]
+        else:
+            top = np.arange(len(matches))
+        order = top[np.lexsort((-matches[top], -scores[top]))][offset:end]
+        return len(matches), [(int(matches[i]), float(scores[i])) for i in order]
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                "format": INDEX_FORMAT,
+                "base": self.base,
+                "position": self.position,
+                "total_length": self._total_length,
+                "lengths": self._lengths,
+                "sentiments": self._sentiments,
+                "sentiment_codes": self._sentiment_codes,
+                "postings": self._postings,
+            }
+
+    @classmethod
+    def from_dict(cls, data):
+        if data.get("format") != INDEX_FORMAT:
+            raise ValueError(f"Unsupported search index format: {data.get('format')}")
+        index = cls()
+        index.base, index.position = data["base"], data["position"]
+        index._total_length = data["total_length"]
+        index._lengths, index._sentiments = data["lengths"], data["sentiments"]
+        index._sentiment_codes = data["sentiment_codes"]
+        index._postings = data["postings"]
+        return index
+
+def _has_phrase(positions):
+    """True if some position p of the first term has p+1 in the second, p+2 in the third, ..."""
+    rest = [set(where) for where in positions[1:]]
+    return any(all(start + k + 1 in where for k, where in enumerate(rest)) for start in positions[0])
+
+# -------------------------------
+# Persistence
+# -------------------------------
+def load_index(path=INDEX_FILE):
+    """Load the saved index, or return None if there is no usable copy"""
+    try:
+        with open(path, 'rb') as f:
+            return SearchIndex.from_dict(pickle.load(f))
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.error(f"Ignoring unreadable search index {path}: {str(e)}")
+        return None
+
+def save_index(index, path=INDEX_FILE, force=False):
+    """Save the index once SAVE_EVERY entries have changed since the last save"""
+    if not force and index.unsaved < SAVE_EVERY:
+        return False
+    with index._lock:
+        payload = pickle.dumps(index.to_dict(), protocol=pickle.HIGHEST_PROTOCOL)
+        index.unsaved = 0
+    serialization._atomic_write(path, payload)
+    return True
@@ -0,0 +1,158 @@
+import os
+import gzip
+import json
+import zlib
+import logging
+
+# Optional fast JSON backend
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+BACKEND = "orjson" if orjson is not None else "json"
+
+# orjson.JSONDecodeError subclasses json.JSONDecodeError, so one type covers both
+DecodeError = json.JSONDecodeError
+
+# Compact store layout: {"feedback":[...]}. Files that start with this prefix
+# can have their list bytes streamed to clients without parsing.
+STORE_PREFIX = b'{"feedback":'
+STORE_SUFFIX = b'}'
+CHUNK_SIZE = 64 * 1024
+
+# -------------------------------
+# Encoding
+# -------------------------------
+def dumps(obj):
+    """Encode obj as compact UTF-8 JSON bytes"""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+def loads(data):
+    """Decode JSON from bytes or str"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+# -------------------------------
+# Store files
+# -------------------------------
+def read_store(path):
+    """Read a store file and return the decoded object"""
+    with open(path, "rb") as f:
+        return loads(f.read())
+
+def _atomic_write(path, payload):
+    temp_file = path + ".tmp"
+    with open(temp_file, "wb") as f:
+        f.write(payload)
+
+    if os.name == "nt":  # Windows
+        if os.path.exists(path):
+            os.remove(path)
+        os.rename(temp_file, path)
+    else:  # Unix/Linux
+        os.replace(temp_file, path)
+
+def write_store(path, data):
+    """Atomically write data to a store file in the compact encoding"""
+    _atomic_write(path, dumps(data))
+
+def read_compressed(path):
+    """Read a gzip-compressed store file and return the decoded object"""
+    with gzip.open(path, "rb") as f:
+        return loads(f.read())
+
+def write_compressed(path, data, level=9):
+    """Atomically write data gzip-compressed; used for archived partitions"""
+    _atomic_write(path, gzip.compress(dumps(data), compresslevel=level))
+
+def is_compact_store(path):
+    """True if the file uses the compact {"feedback":[...]} layout"""
+    try:
+        with open(path, "rb") as f:
+            return f.read(len(STORE_PREFIX)) == STORE_PREFIX
+    except OSError:
+        return False
+
+def list_tail(raw):
+    """Where the feedback list of a compact store ends
+
+    Returns:
+        tuple: (offset of the list's closing bracket, CRC32 of the bytes
+               before it), or None if raw is not in the compact layout
+    """
+    if not (raw.startswith(STORE_PREFIX) and raw.endswith(b"]" + STORE_SUFFIX)):
+        return None
+    end = len(raw) - len(STORE_SUFFIX) - 1
+    return end, zlib.crc32(memoryview(raw)[:end])
+
+def appended_entries(raw, tail):
+    """Entries appended to a compact store since list_tail() returned tail
+
+    Only the bytes after the old end of the list are decoded, so a reader
+    that already holds the earlier entries keeps them.
+
+    Returns:
+        tuple: (appended entries, tail of raw), or None if raw is not the
+               old store plus appended entries (archival, a rewrite, or a
+               list that was empty); the caller should parse all of raw
+    """
+    if tail is None:
+        return None
+    end, checksum = tail
+    if not (raw.startswith(STORE_PREFIX) and raw.endswith(b"]" + STORE_SUFFIX)):
+        return None
+    new_end = len(raw) - len(STORE_SUFFIX) - 1
+    if new_end < end or zlib.crc32(memoryview(raw)[:end]) != checksum:
+        return None
+    if new_end == end:
+        return [], tail
+    if raw[end:end + 1] != b",":
+        return None
+    entries = loads(b"[" + raw[end + 1:new_end + 1])
+    return entries, (new_end, zlib.crc32(memoryview(raw)[end:new_end], checksum))
+
+def iter_feedback_bytes(path, chunk_size=CHUNK_SIZE):
+    """Stream the raw bytes of the feedback list from a compact store
+
+    The file is opened up front, so a concurrent atomic rewrite does not
+    affect a stream already in progress.
+
+    Returns:
+        iterator: Byte chunks of the JSON list, or None if the file is not
+                  in the compact layout (callers should parse instead)
+    """
+    try:
+        f = open(path, "rb")
+    except OSError:
+        return None
+
+    size = os.fstat(f.fileno()).st_size
+    # An empty or truncated file is too short to seek to the suffix
+    if size <= len(STORE_PREFIX) + len(STORE_SUFFIX):
+        f.close()
+        return None
+    f.seek(size - len(STORE_SUFFIX))
+    suffix = f.read(len(STORE_SUFFIX))
+    f.seek(0)
+    if f.read(len(STORE_PREFIX)) != STORE_PREFIX or suffix != STORE_SUFFIX:
+        f.close()
+        return None
+
+    def stream():
+        with f:
+            remaining = size - len(STORE_PREFIX) - len(STORE_SUFFIX)
+            while remaining > 0:
+                chunk = f.read(min(chunk_size, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+
+    return stream()
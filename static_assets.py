@@ -0,0 +1,137 @@
+import os
+import gzip
+import hashlib
+import logging
+import mimetypes
+
+from flask import Response, request
+
+# Optional brotli support
+try:
+    import brotli
+except ImportError:  # pragma: no cover - depends on the environment
+    brotli = None
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Only files under public/ are served. Everything is read, hashed and
+# compressed once at startup; requests are answered from memory.
+PUBLIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'public')
+STATIC_URL_PATH = '/static'
+MIN_COMPRESS_SIZE = 1024  # Smaller files are not worth a compressed variant
+COMPRESSIBLE_TYPES = ('text/', 'application/javascript', 'application/json', 'image/svg+xml')
+HTML_TYPES = ('text/html',)
+
+IMMUTABLE_CACHE = 'public, max-age=31536000, immutable'  # Fingerprinted URLs never change content
+REVALIDATE_CACHE = 'no-cache'  # Stable URLs are revalidated against the ETag (304 if unchanged)
+
+class Asset:
+    """One public file with its precompressed variants"""
+
+    def __init__(self, name, body, mimetype):
+        self.name = name
+        self.mimetype = mimetype
+        self.digest = hashlib.sha256(body).hexdigest()[:16]
+        self.variants = {'identity': body}
+        if mimetype.startswith(COMPRESSIBLE_TYPES) and len(body) >= MIN_COMPRESS_SIZE:
+            self._add_variant('gzip', gzip.compress(body, compresslevel=9, mtime=0))
+            if brotli is not None:
+                self._add_variant('br', brotli.compress(body, quality=11))
+
+    def _add_variant(self, encoding, body):
+        if len(body) < len(self.variants['identity']):
+            self.variants[encoding] = body
+
+    @property
+    def fingerprinted_name(self):
+        """e.g. js/app.js -> js/app.3f9a1c2e4b5d6a7f.js"""
+        root, ext = os.path.splitext(self.name)
+        return f"{root}.{self.digest}{ext}"
+
+    def etag(self, encoding):
+        return self.digest if encoding == 'identity' else f"{self.digest}-{encoding}"
+
+class AssetCatalog:
+    """In-memory catalog of public/, addressable by name or fingerprinted name
+
+    HTML files are rewritten so references to /static/<name> point at the
+    fingerprinted URL of that asset, which lets browsers cache assets forever
+    and only revalidate the page itself.
+    """
+
+    def __init__(self, root=PUBLIC_DIR):
+        self.root = root
+        self.assets = {}
+        self.fingerprinted = {}
+        self._load()
+
+    def _load(self):
+        pages = []
+        for directory, _, files in os.walk(self.root):
+            for filename in sorted(files):
+                path = os.path.join(directory, filename)
+                name = os.path.relpath(path, self.root).replace(os.sep, '/')
+                mimetype = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+                if mimetype.startswith(HTML_TYPES):
+                    pages.append((name, path, mimetype))
+                    continue
+                with open(path, 'rb') as f:
+                    self._register(Asset(name, f.read(), mimetype))
+
+        # Pages last, once every asset they can reference has a fingerprint
+        for name, path, mimetype in pages:
+            with open(path, 'rb') as f:
+                body = f.read()
+            for asset in list(self.fingerprinted.values()):
+                body = body.replace(f'{STATIC_URL_PATH}/{asset.name}"'.encode('utf-8'),
+                                    f'{self.url_for(asset.name)}"'.encode('utf-8'))
+            self._register(Asset(name, body, mimetype))
+
+        logger.info(f"Loaded {len(self.assets)} public assets from {self.root}")
+
+    def _register(self, asset):
+        self.assets[asset.name] = asset
+        self.fingerprinted[asset.fingerprinted_name] = asset
+
+    def url_for(self, name):
+        """Fingerprinted URL of a public asset"""
+        return f"{STATIC_URL_PATH}/{self.assets[name].fingerprinted_name}"
+
+    def lookup(self, name):
+        """Return (asset, immutable) for a requested name, or (None, False)"""
+        if name in self.fingerprinted:
+            return self.fingerprinted[name], True
+        return self.assets.get(name), False
+
+    def response(self, name):
+        """Build the response for a public asset, honouring If-None-Match and Accept-Encoding
+
+        Returns:
+            Response: The asset, a 304, or None if there is no such asset
+        """
+        asset, immutable = self.lookup(name)
+        if asset is None:
+            return None
+
+        encoding = 'identity'
+        for candidate in ('br', 'gzip'):
+            if candidate in asset.variants and request.accept_encodings[candidate]:
+                encoding = candidate
+                break
+
+        headers = {
+            'Cache-Control': IMMUTABLE_CACHE if immutable else REVALIDATE_CACHE,
+            'Vary': 'Accept-Encoding',
+        }
+        if encoding != 'identity':
+            headers['Content-Encoding'] = encoding
+
+        response = Response(status=200, headers=headers, mimetype=asset.mimetype)
+        response.set_etag(asset.etag(encoding))
+        if request.if_none_match.contains(asset.etag(encoding)):
+            response.status_code = 304
+            return response
+
+        response.set_data(asset.variants[encoding])
+        return response
@@ -0,0 +1,170 @@
+import os
+import re
+import hashlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import admission
+import coordination
+from gemini_helper_batch import generate_suggestion, resolve_without_model
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Speculative AI suggestions for newly stored negative feedback, so
+# /get_ai_suggestions can answer from stored results instead of waiting on
+# Gemini. New entries arrive as store-change events and are handled by the
+# elected leader only. Generation runs on CONCURRENCY background threads in
+# the bulk admission lane, within a cluster-wide token bucket of BUDGET
+# Gemini calls per hour, and is dropped rather than queued past QUEUE_SIZE.
+# Results live in the coordination backend for RESULT_TTL seconds.
+ENABLED = os.getenv('SUGGESTION_PRECOMPUTE_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+BUDGET = float(os.getenv('SUGGESTION_PRECOMPUTE_BUDGET', '120'))  # Gemini calls per hour; 0 disables generation
+CONCURRENCY = int(os.getenv('SUGGESTION_PRECOMPUTE_CONCURRENCY', '2'))
+QUEUE_SIZE = int(os.getenv('SUGGESTION_PRECOMPUTE_QUEUE', '256'))
+RESULT_TTL = float(os.getenv('SUGGESTION_PRECOMPUTE_TTL', str(7 * 86400)))
+BUDGET_BURST = 12  # The bucket holds a twelfth of the hourly budget (5 minutes' worth)
+
+_WHITESPACE = re.compile(r"\s+")
+
+def suggestion_key(complaint):
+    """Backend key of a complaint's suggestion; case and whitespace are ignored"""
+    normalized = _WHITESPACE.sub(" ", complaint).strip().lower()
+    return "suggestion:" + hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+
+# -------------------------------
+# Stored results
+# -------------------------------
+_stats_lock = threading.Lock()
+_stats = {
+    "queued": 0, "generated": 0, "reused": 0, "failed": 0,
+    "skipped_budget": 0, "skipped_queue": 0, "shed": 0, "hits": 0, "misses": 0,
+}
+_pending = set()   # Keys queued or being generated in this process
+
+def _count(name, amount=1):
+    with _stats_lock:
+        _stats[name] += amount
+
+def lookup(complaints):
+    """Stored suggestions for a list of complaints
+
+    Returns:
+        list: A result dict per complaint, or None where nothing is stored
+    """
+    backend = coordination.get_backend()
+    results = []
+    for complaint in complaints:
+        suggestion = None
+        if isinstance(complaint, str) and complaint.strip():
+            suggestion = backend.get_value(suggestion_key(complaint))
+        results.append({'complaint': complaint, 'suggestion': suggestion} if suggestion else None)
+    hits = sum(1 for r in results if r is not None)
+    _count("hits", hits)
+    _count("misses", len(results) - hits)
+    return results
+
+def remember(result):
+    """Store a generated suggestion; errors and empty responses are not stored"""
+    from gemini_helper_batch import NO_SUGGESTION
+    complaint, suggestion = result.get('complaint'), result.get('suggestion')
+    if 'error' in result or not isinstance(complaint, str) or not suggestion or suggestion == NO_SUGGESTION:
+        return False
+    coordination.get_backend().set_value(suggestion_key(complaint), suggestion, RESULT_TTL)
+    return True
+
+def merge(stored, generated):
+    """Fill the misses of lookup() with generated results, in order, storing them"""
+    generated = iter(generated)
+    results = []
+    for result in stored:
+        if result is None:
+            result = next(generated)
+            remember(result)
+        results.append(result)
+    return results
+
+# -------------------------------
+# Background generation
+# -------------------------------
+_executor = ThreadPoolExecutor(max_workers=max(CONCURRENCY, 1), thread_name_prefix='suggestions')
+
+def _generate(complaint, key):
+    try:
+        # A near-duplicate of an answered complaint costs no Gemini call
+        result = resolve_without_model(complaint)
+        if result is not None:
+            if remember(result):
+                _count("reused")
+            return
+        if not coordination.get_backend().take('suggestions:budget', BUDGET / 3600, max(BUDGET / BUDGET_BURST, 1)):
+            _count("skipped_budget")
+            return
+        with admission.acquire('gemini', admission.BULK):
+            result = generate_suggestion(complaint)
+        _count("generated" if remember(result) else "failed")
+    except admission.Overloaded:
+        _count("shed")
+    except Exception as e:
+        _count("failed")
+        logger.error(f"Failed to precompute suggestion: {str(e)}", exc_info=True)
+    finally:
+        with _stats_lock:
+            _pending.discard(key)
+
+def submit(entries):
+    """Queue suggestion generation for the negative entries among newly stored ones
+
+    Returns:
+        int: Entries queued
+    """
+    if not ENABLED or BUDGET <= 0:
+        return 0
+    backend = coordination.get_backend()
+    queued = 0
+    for entry in entries:
+        text = entry.get("text")
+        if str(entry.get("sentiment", "")).lower() != "negative" or not isinstance(text, str) or not text.strip():
+            continue
+        key = suggestion_key(text)
+        with _stats_lock:
+            if key in _pending:
+                continue
+            if len(_pending) >= QUEUE_SIZE:
+                _stats["skipped_queue"] += 1
+                continue
+            _pending.add(key)
+        if backend.get_value(key) is not None:
+            with _stats_lock:
+                _pending.discard(key)
+            continue
+        _count("queued")
+        _executor.submit(_generate, text, key)
+        queued += 1
+    return queued
+
+def _on_store_change(message):
+    entries = message.get("entries")
+    if entries and coordination.election('suggestions').is_leader():
+        submit(entries)
+
+_subscription = None
+
+def start():
+    """Precompute suggestions for entries stored by any process, on the elected leader"""
+    global _subscription
+    if ENABLED and BUDGET > 0 and _subscription is None:
+        _subscription = coordination.subscribe(coordination.STORE_CHANNEL, _on_store_change)
+
+def get_stats():
+    """Precomputation and lookup counts of this process"""
+    with _stats_lock:
+        stats = dict(_stats, pending=len(_pending))
+    stats.update({
+        "enabled": ENABLED and BUDGET > 0,
+        "leader": coordination.is_leading('suggestions'),
+        "budget_per_hour": BUDGET,
+        "concurrency": CONCURRENCY,
+    })
+    return stats
@@ -0,0 +1,319 @@
+import os
+import re
+import time
+import heapq
+import logging
+import threading
+from datetime import timezone
+
+import serialization
+import feedback_archive
+from search_index import tokenize
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Heavy-hitter terms (unigrams and bigrams) per sentiment, kept with
+# SpaceSaving summaries of TOP_TERMS_CAPACITY counters each. Every window in
+# TOP_TERMS_WINDOWS is split into BUCKETS_PER_WINDOW tumbling buckets keyed
+# by the entry's timestamp; a query merges the buckets still inside the
+# window, so its cost depends on the capacity, not on how much feedback was
+# stored. Window 'all' covers everything tracked since the tracker was built.
+TERMS_FILE = os.getenv('TOP_TERMS_FILE', 'feedback_terms.json')
+CAPACITY = int(os.getenv('TOP_TERMS_CAPACITY', '512'))
+WINDOWS = tuple(w.strip() for w in os.getenv('TOP_TERMS_WINDOWS', '1h,24h,7d').split(',') if w.strip())
+SAVE_EVERY = int(os.getenv('TOP_TERMS_SAVE_EVERY', '1000'))
+BUCKETS_PER_WINDOW = 12
+ALL = 'all'
+KINDS = ('unigram', 'bigram')
+MAX_LIMIT = 100
+TRACKER_FORMAT = 1
+
+STOPWORDS = frozenset("""
+a about above after again all also am an and any are as at be because been before being below between
+both but by can could did do does doing down during each few for from further get got had has have
+having he her here hers him his how i if in into is it its itself just me more most my no nor not now
+of off on once only or other our ours out over own same she should so some such than that the their
+theirs them then there these they this those through to too under until up very was we were what when
+where which while who whom why will with would you your yours really still even much one like im ive
+dont didnt doesnt cant wont isnt wasnt
+""".split())
+
+_DURATION = re.compile(r"^(\d+)([smhd])$")
+_UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+def window_seconds(window):
+    """Length of a window such as '15m', '24h' or '7d' in seconds"""
+    match = _DURATION.match(window.strip().lower())
+    if not match:
+        raise ValueError(f"Invalid window: {window}")
+    return int(match.group(1)) * _UNITS[match.group(2)]
+
+def extract_terms(text):
+    """Distinct unigrams and bigrams of an entry, stopwords removed
+
+    Returns:
+        tuple: (set of unigrams, set of bigrams); bigrams are adjacent
+               content words joined by a space
+    """
+    words = [t for t in tokenize(text) if len(t) > 1 and not t.isdigit() and t not in STOPWORDS]
+    return set(words), {f"{a} {b}" for a, b in zip(words, words[1:]) if a != b}
+
+class SpaceSaving:
+    """SpaceSaving top-k summary
+
+    Keeps at most capacity counters. An unseen term replaces the smallest
+    counter and inherits its count as error, so every reported count is
+    an overestimate by at most its error, and any term with true count
+    above n / capacity is guaranteed to be tracked.
+    """
+
+    def __init__(self, capacity=CAPACITY):
+        self.capacity = capacity
+        self.n = 0
+        self.counts = {}   # term -> [count, error]
+        self._heap = []    # (count, term), one per tracked term; counts only grow, so each is a lower bound
+
+    def update(self, term, weight=1):
+        self.n += weight
+        entry = self.counts.get(term)
+        if entry is not None:
+            entry[0] += weight
+            return
+        if len(self.counts) < self.capacity:
+            self.counts[term] = [weight, 0]
+            heapq.heappush(self._heap, (weight, term))
+            return
+        # Find the smallest counter, refreshing stale heap entries on the way
+        while True:
+            count, victim = self._heap[0]
+            current = self.counts[victim][0]
+            if current == count:
+                break
+            heapq.heapreplace(self._heap, (current, victim))
+        del self.counts[victim]
+        self.counts[term] = [count + weight, count]
+        heapq.heapreplace(self._heap, (count + weight, term))
+
+    def floor(self):
+        """Upper bound on the count of any untracked term"""
+        if len(self.counts) < self.capacity:
+            return 0
+        return min(count for count, _ in self.counts.values())
+
+    @classmethod
+    def merged(cls, sketches, capacity=CAPACITY):
+        """Combine summaries of disjoint streams into one with the same guarantees"""
+        sketches = [s for s in sketches if s.n]
+        result = cls(capacity)
+        if not sketches:
+            return result
+        floors = [s.floor() for s in sketches]
+        base = sum(floors)
+        combined = {}
+        for sketch, floor in zip(sketches, floors):
+            # A term missing from a summary may have had up to its floor there
+            for term, (count, error) in sketch.counts.items():
+                entry = combined.get(term)
+                if entry is None:
+                    entry = combined[term] = [base, base]
+                entry[0] += count - floor
+                entry[1] += error - floor
+        top = heapq.nlargest(capacity, combined.items(), key=lambda item: item[1][0])
+        result.counts = {term: entry for term, entry in top}
+        result._heap = [(entry[0], term) for term, entry in top]
+        heapq.heapify(result._heap)
+        result.n = sum(s.n for s in sketches)
+        return result
+
+    def top(self, limit):
+        """The limit highest counts as dicts with term, count and error"""
+        best = heapq.nlargest(limit, self.counts.items(), key=lambda item: (item[1][0], -item[1][1]))
+        return [{"term": term, "count": count, "error": error} for term, (count, error) in best]
+
+    def to_dict(self):
+        return {"capacity": self.capacity, "n": self.n, "counts": self.counts}
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(data["capacity"])
+        sketch.n = data["n"]
+        sketch.counts = {term: list(entry) for term, entry in data["counts"].items()}
+        sketch._heap = [(entry[0], term) for term, entry in sketch.counts.items()]
+        heapq.heapify(sketch._heap)
+        return sketch
+
+class TermTracker:
+    """SpaceSaving summaries keyed by window, term kind, sentiment and bucket
+
+    Entries are tracked by sequence number like the search index, so a
+    sync with the hot list only processes entries not yet seen.
+    """
+
+    def __init__(self, windows=WINDOWS, capacity=CAPACITY):
+        self._lock = threading.RLock()
+        self.capacity = capacity
+        self.windows = {window: window_seconds(window) / BUCKETS_PER_WINDOW for window in windows}
+        self.clear()
+
+    def clear(self, position=0):
+        with self._lock:
+            self._sketches = {}   # (window, kind, sentiment, bucket) -> SpaceSaving
+            self._merged = {}     # (window, kind, sentiment) -> (version, oldest bucket, SpaceSaving)
+            self.position = position
+            self.version = 0
+            self.unsaved = 0
+
+    def _sketch(self, key):
+        sketch = self._sketches.get(key)
+        if sketch is None:
+            sketch = self._sketches[key] = SpaceSaving(self.capacity)
+            if key[0] != ALL:
+                self._expire(key[0])
+        return sketch
+
+    def _expire(self, window, now=None):
+        """Drop buckets that fell out of the window"""
+        oldest = self._oldest_bucket(window, now)
+        for key in [key for key in self._sketches if key[0] == window and key[3] < oldest]:
+            del self._sketches[key]
+
+    def _oldest_bucket(self, window, now=None):
+        bucket = self.windows[window]
+        return int(((time.time() if now is None else now) - bucket * BUCKETS_PER_WINDOW) // bucket) + 1
+
+    def add(self, entry, now=None):
+        """Count the terms of one stored entry"""
+        unigrams, bigrams = extract_terms(entry.get("text", ""))
+        sentiment = str(entry.get("sentiment", "Neutral")).capitalize()
+        # Stored timestamps are naive UTC; fromisoformat alone would read them as local time
+        parsed = feedback_archive.parse_timestamp(entry.get("timestamp"))
+        if parsed is not None:
+            stamp = parsed.replace(tzinfo=timezone.utc).timestamp()
+        else:
+            stamp = time.time() if now is None else now
+        with self._lock:
+            targets = [(ALL, 0)]
+            for window, bucket in self.windows.items():
+                index = int(stamp // bucket)
+                if index >= self._oldest_bucket(window, now):
+                    targets.append((window, index))
+            for kind, terms in zip(KINDS, (unigrams, bigrams)):
+                for window, index in targets:
+                    sketch = self._sketch((window, kind, sentiment, index))
+                    for term in terms:
+                        sketch.update(term)
+            self.position += 1
+            self.version += 1
+            self.unsaved += 1
+
+    def sync(self, feedback, offset=0):
+        """Count entries of the hot list not yet seen
+
+        Args:
+            feedback (list): The hot window
+            offset (int): Entries archived so far (sequence number of feedback[0])
+        """
+        with self._lock:
+            if offset + len(feedback) < self.position:
+                # The store was reset or replaced
+                self.clear(offset)
+            # Entries archived before they were seen are skipped
+            self.position = max(self.position, offset)
+            for entry in feedback[self.position - offset:]:
+                self.add(entry)
+        return self
+
+    def window_version(self, window=ALL, now=None):
+        """Tag that changes whenever top() for window may return different terms
+
+        Covers entries counted since the tracker was built or loaded and, for
+        a time window, its oldest bucket, which moves as time passes.
+        """
+        with self._lock:
+            oldest = 0 if window == ALL else self._oldest_bucket(window, now)
+            return f"{self.position:x}-{self.version:x}-{oldest:x}"
+
+    def top(self, window=ALL, sentiment=None, kind='unigram', limit=20, now=None):
+        """Most frequent terms in a window
+
+        Args:
+            window (str): One of the configured windows, or 'all'
+            sentiment (str, optional): Only entries with this sentiment
+            kind (str): 'unigram' or 'bigram'
+            limit (int): Terms to return
+            now (float, optional): Reference time in epoch seconds
+
+        Returns:
+            list: Dicts with term, count (an overestimate) and error
+                  (count - error is a guaranteed lower bound)
+        """
+        if window != ALL and window not in self.windows:
+            raise ValueError(f"Unknown window '{window}'; expected one of: {', '.join((ALL,) + tuple(self.windows))}")
+        if kind not in KINDS:
+            raise ValueError(f"Unknown kind '{kind}'; expected one of: {', '.join(KINDS)}")
+        sentiment = sentiment.capitalize() if sentiment else None
+        with self._lock:
+            oldest = 0 if window == ALL else self._oldest_bucket(window, now)
+            key = (window, kind, sentiment)
+            cached = self._merged.get(key)
+            if cached is None or cached[:2] != (self.version, oldest):
+                sketches = [s for (w, k, sent, index), s in self._sketches.items()
+                            if w == window and k == kind and index >= oldest
+                            and (sentiment is None or sent == sentiment)]
+                cached = self._merged[key] = (self.version, oldest, SpaceSaving.merged(sketches, self.capacity))
+            return cached[2].top(limit)
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                "format": TRACKER_FORMAT,
+                "position": self.position,
+                "windows": list(self.windows),
+                "sketches": [
+                    {"window": w, "kind": k, "sentiment": s, "bucket": b, "summary": sketch.to_dict()}
+                    for (w, k, s, b), sketch in self._sketches.items()
+                ],
+            }
+
+    @classmethod
+    def from_dict(cls, data):
+        if data.get("format") != TRACKER_FORMAT:
+            raise ValueError(f"Unsupported term tracker format: {data.get('format')}")
+        tracker = cls()
+        tracker.position = data["position"]
+        for item in data["sketches"]:
+            if item["window"] == ALL or item["window"] in tracker.windows:
+                key = (item["window"], item["kind"], item["sentiment"], item["bucket"])
+                tracker._sketches[key] = SpaceSaving.from_dict(item["summary"])
+        for window in tracker.windows:
+            tracker._expire(window)
+        return tracker
+
+# -------------------------------
+# Persistence
+# -------------------------------
+def load_tracker(path=TERMS_FILE):
+    """Load the saved tracker, or return None if there is no usable copy"""
+    try:
+        return TermTracker.from_dict(serialization.read_store(path))
+    except FileNotFoundError:
+        return None
+    except (serialization.DecodeError, KeyError, TypeError, ValueError) as e:
+        logger.error(f"Ignoring unreadable term tracker {path}: {str(e)}")
+        return None
+
+def save_tracker(tracker, path=TERMS_FILE, force=False):
+    """Save the tracker once SAVE_EVERY entries were counted since the last save"""
+    if not force and tracker.unsaved < SAVE_EVERY:
+        return False
+    with tracker._lock:
+        data = tracker.to_dict()
+        tracker.unsaved = 0
+    serialization.write_store(path, data)
+    return True
+
+def format_terms(terms):
+    """Render top terms as prompt lines, e.g. '- "battery died": 42 mentions'"""
+    return "\n".join(f'- "{t["term"]}": {t["count"] - t["error"]}-{t["count"]} mentions'
+                     if t["error"] else f'- "{t["term"]}": {t["count"]} mentions' for t in terms)
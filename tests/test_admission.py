@@ -0,0 +1,205 @@
+"""Admission control: lanes, shedding and slot accounting per upstream
+
+Run with:
+
+    python -m pytest tests
+"""
+import asyncio
+import threading
+import time
+
+import pytest
+
+import admission
+import coordination
+
+def held(limiter):
+    return {lane: limiter.get_stats()["lanes"][lane]["active"] for lane in admission.LANES}
+
+def queued(limiter, lane, count, timeout=2):
+    """Wait until count callers are queued in lane"""
+    deadline = time.monotonic() + timeout
+    while limiter.get_stats()["lanes"][lane]["queue_depth"] < count:
+        assert time.monotonic() < deadline, f"{count} waiters never queued in {lane}"
+        time.sleep(0.005)
+
+# -------------------------------
+# Lanes
+# -------------------------------
+def test_bulk_cannot_take_the_interactive_share():
+    limiter = admission.Limiter("model", 4, queue_size=2, max_wait=0.05, bulk_share=0.5)
+    bulk = [limiter.try_acquire(admission.BULK) for _ in range(2)]
+    assert all(bulk)
+    # Two slots are free, but they are reserved for interactive calls
+    assert limiter.try_acquire(admission.BULK) is None
+    with pytest.raises(admission.Overloaded) as shed:
+        limiter.acquire(admission.BULK)
+    assert shed.value.status == 503
+    interactive = [limiter.try_acquire(admission.INTERACTIVE) for _ in range(2)]
+    assert all(interactive)
+    assert held(limiter) == {admission.INTERACTIVE: 2, admission.BULK: 2}
+    for ticket in bulk + interactive:
+        ticket.release()
+    assert held(limiter) == {admission.INTERACTIVE: 0, admission.BULK: 0}
+
+def test_interactive_waiter_is_served_before_bulk():
+    limiter = admission.Limiter("model", 1, queue_size=2, max_wait=2)
+    first = limiter.acquire(admission.INTERACTIVE)
+    order = []
+
+    def wait(lane):
+        with limiter.acquire(lane):
+            order.append(lane)
+
+    bulk = threading.Thread(target=wait, args=(admission.BULK,))
+    bulk.start()
+    queued(limiter, admission.BULK, 1)
+    interactive = threading.Thread(target=wait, args=(admission.INTERACTIVE,))
+    interactive.start()
+    queued(limiter, admission.INTERACTIVE, 1)
+    first.release()
+    bulk.join()
+    interactive.join()
+    assert order == [admission.INTERACTIVE, admission.BULK]
+
+def test_unknown_lane():
+    with pytest.raises(ValueError):
+        admission.Limiter("model", 1).acquire("batch")
+
+# -------------------------------
+# Shedding
+# -------------------------------
+def test_full_queue_is_shed_with_retry_after():
+    limiter = admission.Limiter("model", 1, queue_size=1, max_wait=2)
+    ticket = limiter.acquire()
+    waiter = threading.Thread(target=lambda: limiter.acquire().release())
+    waiter.start()
+    queued(limiter, admission.INTERACTIVE, 1)
+    with pytest.raises(admission.Overloaded) as shed:
+        limiter.acquire()
+    assert shed.value.status == 429
+    assert shed.value.upstream == "model"
+    assert shed.value.lane == admission.INTERACTIVE
+    assert shed.value.retry_after >= 1
+    ticket.release()
+    waiter.join()
+    stats = limiter.get_stats()["lanes"][admission.INTERACTIVE]
+    assert stats["shed_full"] == 1
+    assert stats["admitted"] == 2
+
+def test_wait_timeout_is_shed_with_503():
+    limiter = admission.Limiter("model", 1, queue_size=4, max_wait=0.05)
+    ticket = limiter.acquire()
+    with pytest.raises(admission.Overloaded) as shed:
+        limiter.acquire()
+    assert shed.value.status == 503
+    assert shed.value.retry_after >= 1
+    # The timed-out waiter left the queue and never took the slot
+    stats = limiter.get_stats()["lanes"][admission.INTERACTIVE]
+    assert stats["queue_depth"] == 0
+    assert stats["shed_timeout"] == 1
+    ticket.release()
+    assert limiter.try_acquire() is not None
+
+def test_async_wait_timeout_is_shed_with_503():
+    limiter = admission.Limiter("model", 1, queue_size=4, max_wait=0.05)
+
+    async def main():
+        ticket = await limiter.acquire_async()
+        with pytest.raises(admission.Overloaded) as shed:
+            await limiter.acquire_async()
+        ticket.release()
+        return shed.value
+
+    assert asyncio.run(main()).status == 503
+    assert held(limiter)[admission.INTERACTIVE] == 0
+
+def test_rate_limit_sheds_with_429(monkeypatch):
+    monkeypatch.setattr(coordination, "_backend", coordination.MemoryBackend())
+    monkeypatch.setitem(admission.UPSTREAM_RATES, "model", 6)  # Bursts of one call
+    monkeypatch.setitem(admission.limiters, "model", admission.Limiter("model", 4))
+    admission.acquire("model").release()
+    with pytest.raises(admission.Overloaded) as shed:
+        admission.acquire("model")
+    assert shed.value.status == 429
+    assert shed.value.retry_after == 10
+    assert admission.try_acquire("model") is None
+    assert admission.limiters["model"].get_stats()["lanes"][admission.INTERACTIVE]["shed_rate"] == 2
+
+# -------------------------------
+# Releasing slots
+# -------------------------------
+def test_slot_is_released_on_exception():
+    limiter = admission.Limiter("model", 1, max_wait=0.05)
+    with pytest.raises(RuntimeError):
+        with limiter.acquire():
+            assert admission.current_lane() == admission.INTERACTIVE
+            raise RuntimeError("upstream failed")
+    assert admission.current_lane() is None
+    assert held(limiter)[admission.INTERACTIVE] == 0
+    # The slot is free again, so the next caller does not wait
+    limiter.acquire(admission.INTERACTIVE).release()
+
+def test_release_is_idempotent():
+    limiter = admission.Limiter("model", 2)
+    ticket = limiter.acquire()
+    other = limiter.acquire()
+    ticket.release()
+    ticket.release()
+    assert held(limiter)[admission.INTERACTIVE] == 1
+    other.release()
+
+def test_release_hands_the_slot_to_a_waiter():
+    limiter = admission.Limiter("model", 1, max_wait=2)
+    ticket = limiter.acquire()
+    admitted = threading.Event()
+
+    def wait():
+        with limiter.acquire():
+            admitted.set()
+
+    waiter = threading.Thread(target=wait)
+    waiter.start()
+    queued(limiter, admission.INTERACTIVE, 1)
+    assert not admitted.is_set()
+    ticket.release()
+    waiter.join()
+    assert admitted.is_set()
+    assert held(limiter)[admission.INTERACTIVE] == 0
+
+# -------------------------------
+# Occupying slots
+# -------------------------------
+def test_occupy_counts_over_the_limit():
+    limiter = admission.Limiter("gemini", 1, max_wait=0.05)
+    ticket = limiter.acquire()
+    # An abandoned call keeps running even though every slot is taken
+    abandoned = limiter.occupy()
+    assert held(limiter)[admission.INTERACTIVE] == 2
+    assert limiter.get_stats()["lanes"][admission.INTERACTIVE]["abandoned"] == 1
+    ticket.release()
+    # The limit is still reached until the abandoned call ends
+    assert limiter.try_acquire() is None
+    abandoned.release()
+    assert held(limiter)[admission.INTERACTIVE] == 0
+    assert limiter.try_acquire() is not None
+
+def test_occupy_holds_back_queued_callers():
+    limiter = admission.Limiter("gemini", 1, max_wait=2)
+    ticket = limiter.acquire()
+    abandoned = limiter.occupy()
+    admitted = threading.Event()
+
+    def wait():
+        with limiter.acquire():
+            admitted.set()
+
+    waiter = threading.Thread(target=wait)
+    waiter.start()
+    queued(limiter, admission.INTERACTIVE, 1)
+    ticket.release()
+    time.sleep(0.05)
+    assert not admitted.is_set()
+    abandoned.release()
+    waiter.join()
+    assert admitted.is_set()
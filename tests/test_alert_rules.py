@@ -0,0 +1,188 @@
+"""Alert rules: entry matching, sliding windows and when each rule type fires
+
+Time is passed in explicitly, so nothing here waits. Run with:
+
+    python -m pytest tests
+"""
+import pytest
+
+import alert_rules
+import coordination
+
+def negative(score=0.5, source="analysis", text="app keeps crashing"):
+    return {"text": text, "sentiment": "Negative", "score": score, "source": source}
+
+def positive(score=0.9):
+    return {"text": "works well", "sentiment": "Positive", "score": score, "source": "analysis"}
+
+def engine(*specs):
+    """An engine that collects alerts instead of sending them"""
+    sent = []
+    return alert_rules.RuleEngine(list(specs), notify=sent.append), sent
+
+# -------------------------------
+# Match
+# -------------------------------
+def test_match_fields():
+    match = alert_rules.Match({"sentiment": "NEGATIVE", "source": "batch", "min_score": 0.5, "max_score": 0.9})
+    assert match(negative(0.7, source="batch"))
+    assert not match(negative(0.7, source="analysis"))
+    assert not match(dict(positive(0.7), source="batch"))
+    assert not match(negative(0.4, source="batch"))
+    assert not match(negative(0.95, source="batch"))
+    # Score bounds need a score
+    assert not match({"sentiment": "negative", "source": "batch"})
+
+def test_empty_match_accepts_everything():
+    match = alert_rules.Match()
+    assert match(negative()) and match(positive()) and match({})
+
+def test_match_rejects_unknown_fields():
+    with pytest.raises(ValueError, match="Unknown match fields: urgency"):
+        alert_rules.Match({"sentiment": "negative", "urgency": "High"})
+
+# -------------------------------
+# SlidingWindow
+# -------------------------------
+def test_window_counts_within_its_span():
+    window = alert_rules.SlidingWindow(60, buckets=6)
+    for t in (0, 5, 15, 30):
+        window.add(t, matched=t >= 15)
+    assert (window.total, window.matched) == (4, 2)
+    # Buckets of [0, 10) expire once 60 seconds have passed
+    window.advance(65)
+    assert (window.total, window.matched) == (2, 2)
+    window.advance(85)
+    assert (window.total, window.matched) == (1, 1)
+
+@pytest.mark.parametrize("gap", [60, 61, 600, 10 ** 6])
+def test_window_empties_after_a_gap_longer_than_itself(gap):
+    window = alert_rules.SlidingWindow(60, buckets=6)
+    for t in range(0, 60, 5):
+        window.add(t, matched=True)
+    assert window.total == 12
+    window.add(55 + gap, matched=False)
+    assert (window.total, window.matched) == (1, 0)
+    assert sum(window.events) == 1 and sum(window.hits) == 0
+
+def test_late_events_count_in_the_newest_bucket():
+    window = alert_rules.SlidingWindow(60, buckets=6)
+    window.add(50, matched=True)
+    window.add(10, matched=True)
+    assert window.total == 2
+    window.advance(115)
+    assert window.total == 0
+
+# -------------------------------
+# Event rules and cooldown
+# -------------------------------
+def test_event_rule_fires_and_respects_the_cooldown():
+    rules, sent = engine({"name": "very-negative", "type": "event",
+                          "match": {"sentiment": "negative", "min_score": 0.95}, "cooldown": 60})
+    assert rules.observe([negative(0.5), positive()], now=0) == []
+    fired = rules.observe([negative(0.97, text="refund was refused")], now=10)
+    assert fired == sent
+    assert fired[0]["text"] == "[very-negative] refund was refused"
+    assert fired[0]["score"] == 0.97
+    assert fired[0]["sentiment"] == "negative"
+
+    assert rules.observe([negative(0.99)], now=69) == []
+    assert rules.observe([negative(0.99)], now=70) != []
+    state = rules.get_stats()["rules"][0]
+    assert (state["fired"], state["suppressed"], state["last_fired"]) == (2, 1, 70)
+
+def test_disabled_rules_are_skipped():
+    rules, _ = engine({"name": "off", "type": "event", "enabled": False},
+                      {"name": "on", "type": "event", "match": {"sentiment": "negative"}})
+    assert [rule.name for rule in rules.rules] == ["on"]
+
+def test_unknown_rule_type():
+    with pytest.raises(ValueError, match="unknown type 'threshold'"):
+        alert_rules.build_rule({"name": "x", "type": "threshold"})
+
+# -------------------------------
+# Ratio rules
+# -------------------------------
+RATIO = {"name": "negative-ratio", "type": "ratio", "match": {"sentiment": "negative"},
+         "window": "10m", "above": 0.5, "min_events": 6, "cooldown": 0}
+
+def test_ratio_waits_for_min_events():
+    rules, _ = engine(RATIO)
+    # Every entry is negative, but there are too few to judge
+    assert rules.observe([negative() for _ in range(5)], now=0) == []
+    fired = rules.observe([negative()], now=1)
+    assert len(fired) == 1
+    assert "100% of feedback in the last 10m is negative (6 of 6 entries)" in fired[0]["text"]
+    assert fired[0]["score"] == 1.0
+
+def test_ratio_must_exceed_the_threshold():
+    rules, _ = engine(RATIO)
+    assert rules.observe([positive(), negative(), positive(), negative(), positive(), negative()], now=0) == []
+    fired = rules.observe([negative()], now=1)
+    assert len(fired) == 1 and fired[0]["score"] == pytest.approx(4 / 7)
+    # A positive entry never fires, even above the ratio
+    assert rules.observe([positive()], now=2) == []
+
+def test_ratio_forgets_entries_outside_the_window():
+    rules, _ = engine(RATIO)
+    assert rules.observe([negative() for _ in range(5)], now=0) == []
+    # The earlier entries have left the 10 minute window
+    assert rules.observe([negative()], now=601) == []
+    assert rules.get_stats()["rules"][0]["events"] == 1
+
+# -------------------------------
+# Spike rules
+# -------------------------------
+SPIKE = {"name": "negative-spike", "type": "spike", "match": {"sentiment": "negative"},
+         "window": "5m", "baseline": "1h", "factor": 3, "min_events": 4, "cooldown": 0}
+
+def steady(rules, until, every=300):
+    """One negative entry every `every` seconds: a baseline of 12 per hour"""
+    for t in range(0, until, every):
+        assert rules.observe([negative()], now=t) == []
+
+def test_spike_waits_for_a_full_baseline():
+    rules, _ = engine(SPIKE)
+    # A burst before an hour of history is not compared with anything
+    assert rules.observe([negative() for _ in range(10)], now=60) == []
+
+def test_spike_fires_above_factor_times_baseline():
+    rules, _ = engine(SPIKE)
+    steady(rules, 3600)
+    # Three entries in 5 minutes is under min_events
+    assert rules.observe([negative() for _ in range(3)], now=3650) == []
+    fired = rules.observe([negative()], now=3660)
+    assert len(fired) == 1
+    assert fired[0]["text"].startswith("[negative-spike] 4 negative entries in the last 5m")
+    assert fired[0]["score"] > 3
+
+def test_spike_ignores_a_steady_rate():
+    rules, _ = engine(dict(SPIKE, min_events=1))
+    steady(rules, 3 * 3600, every=60)
+
+def test_spike_needs_a_longer_baseline():
+    with pytest.raises(ValueError, match="baseline must be longer"):
+        alert_rules.build_rule(dict(SPIKE, window="1h", baseline="1h"))
+
+# -------------------------------
+# Engine
+# -------------------------------
+def test_default_rules_build():
+    rules, _ = engine(*alert_rules.DEFAULT_RULES)
+    assert [rule.name for rule in rules.rules] == ["very-negative", "negative-ratio", "negative-spike"]
+
+def test_load_rules(tmp_path):
+    assert alert_rules.load_rules(str(tmp_path / "missing.json")) is alert_rules.DEFAULT_RULES
+    path = tmp_path / "rules.json"
+    path.write_text('{"name": "not a list"}')
+    with pytest.raises(ValueError, match="JSON list"):
+        alert_rules.load_rules(str(path))
+
+def test_stats_do_not_take_leadership(monkeypatch):
+    backend = coordination.MemoryBackend()
+    monkeypatch.setattr(coordination, "_backend", backend)
+    monkeypatch.setattr(coordination, "_elections", {})
+    monkeypatch.setattr(alert_rules, "_engine", alert_rules.RuleEngine([]))
+    assert alert_rules.get_stats()["leader"] is False
+    # A process that does evaluate the rules can still become the leader
+    assert backend.election("alert-rules").is_leader()
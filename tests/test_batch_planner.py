@@ -0,0 +1,127 @@
+"""Batch planning: every text of /analyze/batch gets its own result back, in
+input order, however the texts were deduplicated and split
+
+Run with:
+
+    python -m pytest tests
+"""
+import random
+
+import pytest
+
+import batch_planner
+from feedback_aggregator import estimate_tokens
+
+def score(texts):
+    """Stand-in for /predict_batch: a result that names the text it scored"""
+    return [{"text": text, "sentiment": "positive"} for text in texts]
+
+def plan_and_score(texts):
+    """The /analyze/batch path: dedupe, score each sub-batch, map back"""
+    unique, positions = batch_planner.dedupe(texts)
+    results = [None] * len(unique)
+    batches = batch_planner.sub_batches(unique)
+    for indices in batches:
+        for i, result in zip(indices, score([unique[i] for i in indices])):
+            results[i] = result
+    return batch_planner.expand(results, positions), unique, batches
+
+def mixed_texts(count, seed=3):
+    """Short, medium and long texts with exact and whitespace-variant repeats"""
+    rng = random.Random(seed)
+    texts = []
+    for i in range(count):
+        if texts and rng.random() < 0.3:
+            text = rng.choice(texts)
+            texts.append(f"  {text}  " if rng.random() < 0.5 else text)
+            continue
+        words = rng.choice((3, 40, 300, 1500))
+        texts.append(" ".join(f"w{i}x{j}" for j in range(words)))
+    return texts
+
+def assert_in_order(texts, results):
+    assert len(results) == len(texts)
+    for text, result in zip(texts, results):
+        assert result["text"] == batch_planner.normalize(text)
+
+def assert_partition(batches, count):
+    indices = [i for batch in batches for i in batch]
+    assert sorted(indices) == list(range(count))
+
+# -------------------------------
+# Order
+# -------------------------------
+def test_results_follow_input_order_with_duplicates_and_mixed_lengths():
+    texts = mixed_texts(200)
+    results, unique, batches = plan_and_score(texts)
+    assert len(unique) < len(texts)
+    assert len({batch_planner._bucket(estimate_tokens(unique[batch[0]])) for batch in batches}) > 1
+    assert_partition(batches, len(unique))
+    assert_in_order(texts, results)
+
+def test_whitespace_and_unicode_variants_share_a_result():
+    texts = ["Café  is great", "Café is great", "café is great", "Café is great\n"]
+    unique, positions = batch_planner.dedupe(texts)
+    assert unique == ["Café is great", "café is great"]
+    assert positions == [0, 0, 1, 0]
+    results, _, _ = plan_and_score(texts)
+    assert_in_order(texts, results)
+
+def test_empty_batch():
+    assert batch_planner.dedupe([]) == ([], [])
+    assert batch_planner.sub_batches([]) == []
+    assert batch_planner.expand([], []) == []
+
+# -------------------------------
+# Splits
+# -------------------------------
+def test_max_items_split(monkeypatch):
+    monkeypatch.setattr(batch_planner, "MAX_BATCH_ITEMS", 7)
+    texts = [f"review number {i}" for i in range(50)] * 2
+    results, unique, batches = plan_and_score(texts)
+    assert len(unique) == 50
+    assert len(batches) == 8
+    assert all(len(batch) <= 7 for batch in batches)
+    assert_partition(batches, len(unique))
+    assert_in_order(texts, results)
+
+def test_max_tokens_split(monkeypatch):
+    monkeypatch.setattr(batch_planner, "MAX_BATCH_TOKENS", 500)
+    texts = mixed_texts(120, seed=11)
+    results, unique, batches = plan_and_score(texts)
+    for batch in batches:
+        lengths = [estimate_tokens(unique[i]) for i in batch]
+        # A single text longer than the budget still goes out on its own
+        assert len(batch) == 1 or len(batch) * max(lengths) <= 500
+    assert_partition(batches, len(unique))
+    assert_in_order(texts, results)
+
+def test_sub_batches_stay_within_one_length_bucket(monkeypatch):
+    monkeypatch.setattr(batch_planner, "LENGTH_BUCKETS", (10, 100))
+    texts = ["x" * n for n in (8, 600, 30, 44, 5, 2000, 396, 12)]
+    batches = batch_planner.sub_batches(texts)
+    assert_partition(batches, len(texts))
+    for batch in batches:
+        assert len({batch_planner._bucket(estimate_tokens(texts[i])) for i in batch}) == 1
+    assert len(batches) == 3
+
+# -------------------------------
+# Disabled
+# -------------------------------
+def test_disabled_sends_every_text_as_is_in_one_batch(monkeypatch):
+    monkeypatch.setattr(batch_planner, "ENABLED", False)
+    texts = mixed_texts(80, seed=5)
+    unique, positions = batch_planner.dedupe(texts)
+    assert unique == texts
+    assert positions == list(range(len(texts)))
+    assert batch_planner.sub_batches(unique) == [list(range(len(texts)))]
+    results, _, _ = plan_and_score(texts)
+    assert [result["text"] for result in results] == texts
+
+@pytest.mark.parametrize("enabled", [True, False])
+def test_missing_results_stay_with_their_text(monkeypatch, enabled):
+    monkeypatch.setattr(batch_planner, "ENABLED", enabled)
+    texts = ["good", "bad", "good", "meh"]
+    unique, positions = batch_planner.dedupe(texts)
+    results = [None if text == "bad" else text.upper() for text in unique]
+    assert batch_planner.expand(results, positions) == ["GOOD", None, "GOOD", "MEH"]
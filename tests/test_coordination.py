@@ -0,0 +1,185 @@
+"""Coordination backends: memory:// and Redis, the latter against fakeredis
+
+Two RedisBackend instances on one fake server stand in for two workers or
+hosts. Run with:
+
+    pip install -r requirements-dev.txt
+    python -m pytest tests
+"""
+import threading
+import time
+
+import pytest
+
+import coordination
+
+@pytest.fixture
+def redis_pair(monkeypatch):
+    """Two Redis backends sharing one fake server
+
+    Skipped without the test dependencies, so the memory:// cases still run.
+    """
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")  # fakeredis runs the Lua scripts with it
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(coordination.redis.Redis, "from_url",
+                        lambda url, **kwargs: fakeredis.FakeRedis(server=server))
+    backends = [coordination.RedisBackend("redis://fake/0", prefix="test:") for _ in range(2)]
+    yield backends
+    for backend in backends:
+        backend.close()
+
+@pytest.fixture(params=["memory", "redis"])
+def backend(request):
+    if request.param == "memory":
+        yield coordination.MemoryBackend()
+    else:
+        yield request.getfixturevalue("redis_pair")[0]
+
+# -------------------------------
+# Either backend
+# -------------------------------
+def test_lock_excludes_other_holders(backend):
+    first = backend.lock("store", ttl=5)
+    second = backend.lock("store", ttl=5)
+    assert first.acquire(blocking=False)
+    assert not second.acquire(blocking=False)
+    assert not second.acquire(timeout=0.05)
+    first.release()
+    assert second.acquire(blocking=False)
+    second.release()
+
+def test_unlock_ignores_other_tokens(backend):
+    holder = backend.lock("store", ttl=5)
+    other = backend.lock("store", ttl=5)
+    assert holder.acquire(blocking=False)
+    backend._unlock("store", other.token)
+    assert not other.acquire(blocking=False)
+    holder.release()
+
+def test_lock_expires_and_extend_reports_loss(backend):
+    holder = backend.lock("store", ttl=0.1)
+    assert holder.acquire(blocking=False)
+    time.sleep(0.15)
+    taker = backend.lock("store", ttl=5)
+    assert taker.acquire(blocking=False)
+    assert not holder.extend()
+    taker.release()
+
+def test_lock_timeout_raises(backend):
+    holder = backend.lock("store", ttl=5)
+    holder.acquire()
+    with pytest.raises(coordination.LockTimeout):
+        with backend.lock("store", ttl=5, timeout=0.05):
+            pass
+    holder.release()
+
+def test_waiter_gets_lock_after_release(backend):
+    holder = backend.lock("store", ttl=5)
+    holder.acquire()
+    acquired = []
+    waiter = threading.Thread(target=lambda: acquired.append(backend.lock("store", ttl=5).acquire(timeout=2)))
+    waiter.start()
+    time.sleep(0.05)
+    holder.release()
+    waiter.join()
+    assert acquired == [True]
+
+def test_counters_and_values(backend):
+    assert backend.incr("written", 2) == 2
+    assert backend.incr("written", 3) == 5
+    assert backend.counter("written") == 5
+    assert backend.counter("missing") == 0
+    backend.set_value("health", {"ok": True, "n": [1, 2]})
+    assert backend.get_value("health") == {"ok": True, "n": [1, 2]}
+    assert backend.get_value("missing", "default") == "default"
+
+def test_values_expire(backend):
+    backend.set_value("health", True, ttl=0.1)
+    backend.incr("burst", ttl=0.1)
+    time.sleep(0.15)
+    assert backend.get_value("health") is None
+    assert backend.counter("burst") == 0
+
+def test_token_bucket(backend):
+    assert [backend.take("rate:gemini", rate=0.001, capacity=3) for _ in range(4)] == [True, True, True, False]
+
+def test_election_has_one_leader(backend):
+    first = backend.election("rules", ttl=5)
+    second = backend.election("rules", ttl=5)
+    assert first.is_leader()
+    assert not second.is_leader()
+    first.resign()
+    second._next_check = 0.0
+    assert second.is_leader()
+    second.resign()
+
+# -------------------------------
+# Shared between Redis backends
+# -------------------------------
+def test_redis_backends_share_state(redis_pair):
+    worker_a, worker_b = redis_pair
+    lock = worker_a.lock("feedback-store", ttl=5)
+    assert lock.acquire(blocking=False)
+    assert not worker_b.lock("feedback-store", ttl=5).acquire(blocking=False)
+    lock.release()
+
+    worker_a.incr("feedback.entries_written", 4)
+    assert worker_b.counter("feedback.entries_written") == 4
+    worker_a.set_value("health:model", False, ttl=5)
+    assert worker_b.get_value("health:model") is False
+    assert worker_a.take("rate:model", rate=0.001, capacity=1)
+    assert not worker_b.take("rate:model", rate=0.001, capacity=1)
+
+def test_redis_elects_one_leader_across_backends(redis_pair):
+    worker_a, worker_b = redis_pair
+    a, b = worker_a.election("rules", ttl=0.2), worker_b.election("rules", ttl=0.2)
+    assert a.is_leader()
+    assert not b.is_leader()
+    # The leader stops renewing; its lease lapses and the other worker takes over
+    time.sleep(0.25)
+    b._next_check = 0.0
+    assert b.is_leader()
+    a._next_check = 0.0
+    assert not a.is_leader()
+
+def test_redis_pubsub_reaches_other_backend(redis_pair):
+    worker_a, worker_b = redis_pair
+    received = []
+    delivered = threading.Event()
+
+    def on_message(message):
+        received.append(message)
+        delivered.set()
+
+    subscription = worker_b.subscribe(coordination.STORE_CHANNEL, on_message)
+    try:
+        # The listener thread subscribes asynchronously; publish until it hears
+        deadline = time.monotonic() + 5
+        while not delivered.is_set() and time.monotonic() < deadline:
+            worker_a.publish(coordination.STORE_CHANNEL, {"position": 3, "entries": [{"text": "hi"}]})
+            delivered.wait(0.1)
+    finally:
+        subscription.close()
+    assert received and received[0] == {"position": 3, "entries": [{"text": "hi"}]}
+
+def test_is_shared():
+    assert not coordination.is_shared("memory://")
+    assert coordination.is_shared("redis://localhost:6379/0")
+
+def test_is_leading_never_takes_the_lease(monkeypatch):
+    backend = coordination.MemoryBackend()
+    monkeypatch.setattr(coordination, "_backend", backend)
+    monkeypatch.setattr(coordination, "_elections", {})
+    assert not coordination.is_leading("rules")
+    assert coordination._elections == {}
+
+    # Another process leads; polling stats here must not take over
+    other = backend.election("rules", ttl=5)
+    assert other.is_leader()
+    assert not coordination.is_leading("rules")
+    other.resign()
+    assert not coordination.is_leading("rules")
+
+    assert coordination.election("rules").is_leader()
+    assert coordination.is_leading("rules")
@@ -0,0 +1,143 @@
+"""Feedback archive: hot window cutoff, monthly partitions, retention rollups
+and range queries
+
+Run with:
+
+    python -m pytest tests
+"""
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+import feedback_archive
+
+NOW = datetime(2025, 3, 15, 12, 0)
+
+@pytest.fixture
+def archive(tmp_path, monkeypatch):
+    """An empty archive directory"""
+    monkeypatch.setattr(feedback_archive, "ARCHIVE_DIR", str(tmp_path / "archive"))
+    monkeypatch.setattr(feedback_archive, "_manifest", None)
+    monkeypatch.setattr(feedback_archive, "_manifest_mtime", None)
+    monkeypatch.setattr(feedback_archive, "HOT_WINDOW_DAYS", 30)
+    monkeypatch.setattr(feedback_archive, "RETENTION_DAYS", 0)
+    return tmp_path / "archive"
+
+def entry(when, text="feedback", sentiment="Negative", source="analysis", score=0.5):
+    return {"text": text, "sentiment": sentiment, "source": source, "score": score,
+            "timestamp": when.isoformat() if isinstance(when, datetime) else when}
+
+# -------------------------------
+# Timestamps and partitions
+# -------------------------------
+def test_parse_timestamp():
+    assert feedback_archive.parse_timestamp("2025-03-15T12:00:00") == NOW
+    # Aware times are converted to naive UTC
+    assert feedback_archive.parse_timestamp("2025-03-15T17:30:00+05:30") == NOW
+    assert feedback_archive.parse_timestamp("2025-03-15T12:00:00Z") == NOW
+    for value in (None, "", "yesterday"):
+        assert feedback_archive.parse_timestamp(value) is None
+
+def test_partition_bounds():
+    assert feedback_archive.partition_key(NOW) == "2025-03"
+    assert feedback_archive.partition_bounds("2025-03") == (datetime(2025, 3, 1), datetime(2025, 4, 1))
+    assert feedback_archive.partition_bounds("2024-12") == (datetime(2024, 12, 1), datetime(2025, 1, 1))
+    assert feedback_archive.partition_bounds("2024-02")[1] == datetime(2024, 3, 1)
+
+# -------------------------------
+# Hot window
+# -------------------------------
+def test_split_hot_at_the_cutoff(archive):
+    cutoff = NOW - timedelta(days=30)
+    old, edge, recent = entry(cutoff - timedelta(seconds=1)), entry(cutoff), entry(NOW)
+    undated = entry("not a date")
+    hot, cold = feedback_archive.split_hot([old, undated, edge, recent], now=NOW)
+    assert cold == [old]
+    assert hot == [undated, edge, recent]
+
+def test_archival_waits_for_the_slack(archive):
+    just_past = [entry(NOW - timedelta(days=30, hours=12)), entry(NOW)]
+    well_past = [entry(NOW - timedelta(days=31, hours=1)), entry(NOW)]
+    assert not feedback_archive.needs_archival(just_past, now=NOW)
+    assert feedback_archive.needs_archival(well_past, now=NOW)
+    # Only the first dated entry is checked
+    assert feedback_archive.needs_archival([entry(None)] + well_past, now=NOW)
+    assert not feedback_archive.needs_archival([entry(None)], now=NOW)
+
+# -------------------------------
+# Archiving
+# -------------------------------
+def test_archive_entries_by_month(archive):
+    assert feedback_archive.archived_count() == 0
+    first = [entry(datetime(2025, 1, 30), "january"), entry(datetime(2025, 2, 2), "february")]
+    assert feedback_archive.archive_entries(first) == 2
+    assert feedback_archive.archive_entries([entry(datetime(2025, 1, 31, 23, 59), "late january")]) == 1
+    assert feedback_archive.archive_entries([]) == 0
+
+    manifest = feedback_archive.load_manifest()
+    assert manifest["archived"] == feedback_archive.archived_count() == 3
+    assert manifest["partitions"]["2025-01"] == {
+        "count": 2, "first": "2025-01-30T00:00:00", "last": "2025-01-31T23:59:00"}
+    assert manifest["partitions"]["2025-02"]["count"] == 1
+    # Appended to the existing partition, in order
+    assert [e["text"] for e in feedback_archive.read_partition("2025-01")] == ["january", "late january"]
+    assert sorted(os.listdir(archive)) == ["feedback-2025-01.json.gz", "feedback-2025-02.json.gz", "manifest.json"]
+
+def test_archive_version_changes_with_the_archive(archive):
+    assert feedback_archive.archive_version() == 0
+    feedback_archive.archive_entries([entry(datetime(2025, 1, 30))])
+    assert feedback_archive.archive_version() != 0
+
+# -------------------------------
+# Retention
+# -------------------------------
+def test_retention_rolls_up_whole_partitions(archive, monkeypatch):
+    feedback_archive.archive_entries([
+        entry(datetime(2024, 11, 3), sentiment="Negative", score=0.8),
+        entry(datetime(2024, 11, 9), sentiment="Negative", score=0.6),
+        entry(datetime(2024, 11, 20), sentiment="Positive", score=None),
+        entry(datetime(2024, 12, 30), sentiment="Positive"),
+    ])
+    assert feedback_archive.apply_retention(now=NOW) == 0  # Retention off
+
+    # December ends after the cutoff, so it is kept
+    monkeypatch.setattr(feedback_archive, "RETENTION_DAYS", 100)
+    assert NOW - timedelta(days=100) < datetime(2025, 1, 1)
+    assert feedback_archive.apply_retention(now=NOW) == 3
+    manifest = feedback_archive.load_manifest()
+    assert sorted(manifest["partitions"]) == ["2024-12"]
+    assert not os.path.exists(feedback_archive.partition_path("2024-11"))
+    assert manifest["rollups"]["2024-11"] == [
+        {"source": "analysis", "sentiment": "Negative", "count": 2, "scored": 2, "score_total": pytest.approx(1.4)},
+        {"source": "analysis", "sentiment": "Positive", "count": 1, "scored": 0, "score_total": 0.0},
+    ]
+    # Rolled-up entries still count as archived, so sequence numbers do not move
+    assert manifest["archived"] == 4
+    assert feedback_archive.apply_retention(now=NOW) == 0
+
+# -------------------------------
+# Range queries
+# -------------------------------
+def test_load_range_opens_only_matching_partitions(archive, monkeypatch):
+    feedback_archive.archive_entries([entry(datetime(2025, month, day), f"{month}-{day}")
+                                      for month in (1, 2, 3) for day in (5, 25)])
+    opened = []
+    read = feedback_archive.read_partition
+    monkeypatch.setattr(feedback_archive, "read_partition", lambda key: opened.append(key) or read(key))
+
+    entries = feedback_archive.load_range(datetime(2025, 1, 20), datetime(2025, 2, 10))
+    assert [e["text"] for e in entries] == ["1-25", "2-5"]
+    assert opened == ["2025-01", "2025-02"]
+
+    assert feedback_archive.partitions_in_range(start=datetime(2025, 2, 26)) == ["2025-03"]
+    assert feedback_archive.partitions_in_range(end=datetime(2025, 1, 5)) == []
+    assert len(feedback_archive.load_range()) == 6
+
+def test_in_range():
+    stamped = entry(NOW)
+    assert feedback_archive.in_range(stamped)
+    assert feedback_archive.in_range(stamped, start=NOW)
+    assert not feedback_archive.in_range(stamped, end=NOW)
+    assert not feedback_archive.in_range(entry(None), start=NOW)
+    assert feedback_archive.in_range(entry(None))
@@ -0,0 +1,167 @@
+"""Reads of the hot window that must stay consistent with archival
+
+Run with:
+
+    python -m pytest tests
+"""
+import os
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+
+import coordination
+import feedback_archive
+import feedback_manager
+import feedback_snapshot
+import score_sketch
+import serialization
+
+OLD, NEW = 5, 3
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    """A store in tmp_path with OLD entries past the hot window and NEW recent ones"""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(coordination, "_backend", coordination.MemoryBackend())
+    for name in ("_hot_cache", "_hot_cache_key", "_hot_cache_tail", "_dedup_index", "_search_index",
+                 "_term_tracker"):
+        monkeypatch.setattr(feedback_manager, name, None)
+    monkeypatch.setattr(feedback_manager, "_dedup_offset", 0)
+    monkeypatch.setattr(feedback_archive, "_manifest", None)
+    monkeypatch.setattr(score_sketch, "_cached", None)
+    monkeypatch.setattr(feedback_manager, "PERSIST_DELAY", 60)
+    now = datetime.utcnow()
+    entries = [{"text": f"old complaint {i}", "sentiment": "Negative", "source": "test",
+                "timestamp": (now - timedelta(days=90, minutes=i)).isoformat()} for i in range(OLD)]
+    entries += [{"text": f"new praise {i}", "sentiment": "Positive", "source": "test",
+                 "timestamp": (now - timedelta(minutes=i)).isoformat()} for i in range(NEW)]
+    serialization.write_store(feedback_manager.FEEDBACK_FILE, {"feedback": entries})
+    return entries
+
+def compact_during_read(monkeypatch):
+    """Start compact_store right after each hot list read and give it time to finish"""
+    read = feedback_manager.get_all_feedback
+    compactions = []
+
+    def read_then_compact():
+        feedback = read()
+        if not compactions:
+            compaction = threading.Thread(target=feedback_manager.compact_store)
+            compactions.append(compaction)
+            compaction.start()
+            compaction.join(0.2)
+        return feedback
+
+    monkeypatch.setattr(feedback_manager, "get_all_feedback", read_then_compact)
+    return compactions
+
+def test_hot_window_is_read_as_one_pair(store, monkeypatch):
+    compactions = compact_during_read(monkeypatch)
+    feedback, offset = feedback_manager.get_hot_window()
+    # Archival waited for the read, so the list still starts at position 0
+    assert (len(feedback), offset) == (OLD + NEW, 0)
+    compactions[0].join()
+    feedback, offset = feedback_manager.get_hot_window()
+    assert (len(feedback), offset) == (NEW, OLD)
+
+def test_indexes_keep_positions_across_archival(store, monkeypatch):
+    compactions = compact_during_read(monkeypatch)
+    feedback_manager.get_search_index()
+    compactions[0].join()
+
+    total, results = feedback_manager.search_feedback("praise")
+    assert total == NEW
+    assert sorted(r["text"] for r in results) == [f"new praise {i}" for i in range(NEW)]
+    assert sorted(r["seq"] for r in results) == list(range(OLD, OLD + NEW))
+    assert feedback_manager.search_feedback("complaint") == (0, [])
+
+    feedback = feedback_manager.get_all_feedback()
+    positions = feedback_manager.search_positions("praise")
+    assert sorted(feedback[i]["text"] for i in positions) == [f"new praise {i}" for i in range(NEW)]
+
+    assert feedback_manager.find_exact_duplicate("new praise 1")["text"] == "new praise 1"
+    assert feedback_manager.find_exact_duplicate("old complaint 1") is None
+
+def test_feedback_since_is_read_as_one_pair(store, monkeypatch):
+    compactions = compact_during_read(monkeypatch)
+    entries, version, reset = feedback_manager.get_feedback_since(OLD + 1)
+    compactions[0].join()
+    # Read before archival: the cursor is inside the hot list, which had every entry
+    assert (version, reset) == (OLD + NEW, False)
+    assert [e["text"] for e in entries] == [f"new praise {i}" for i in range(1, NEW)]
+
+    entries, version, reset = feedback_manager.get_feedback_since(OLD + 1)
+    assert (version, reset) == (OLD + NEW, False)
+    assert [e["text"] for e in entries] == [f"new praise {i}" for i in range(1, NEW)]
+
+def test_snapshot_is_built_from_one_pair(store, monkeypatch):
+    pytest.importorskip("pyarrow")
+    compactions = compact_during_read(monkeypatch)
+    path = feedback_manager.get_feedback_snapshot()
+    compactions[0].join()
+    table = feedback_snapshot.read_table(path)
+    # Rows and offset agree: every entry, starting at sequence number 0
+    assert feedback_snapshot._metadata(table) == (0, OLD + NEW)
+    assert table.column("text").to_pylist()[0] == "old complaint 0"
+
+    path = feedback_manager.get_feedback_snapshot()
+    table = feedback_snapshot.read_table(path)
+    assert feedback_snapshot._metadata(table) == (OLD, NEW)
+    assert table.column("text").to_pylist() == [f"new praise {i}" for i in range(NEW)]
+
+def test_published_position_is_read_under_the_write_lock(store, monkeypatch):
+    # Past the hot window but within the slack, so only a forced compaction archives them
+    recent_enough = (datetime.utcnow() - timedelta(days=feedback_archive.HOT_WINDOW_DAYS, hours=12)).isoformat()
+    for entry in store[:OLD]:
+        entry["timestamp"] = recent_enough
+    serialization.write_store(feedback_manager.FEEDBACK_FILE, {"feedback": store})
+    backend = coordination.get_backend()
+    messages = []
+    backend.subscribe(coordination.STORE_CHANNEL, messages.append)
+
+    # Another writer archives as soon as this write releases the lock
+    store_lock = feedback_manager._store_lock
+    pending = [True]
+
+    class ArchiveAfterRelease:
+        def __enter__(self):
+            self.lock = store_lock()
+            return self.lock.__enter__()
+
+        def __exit__(self, *exc):
+            self.lock.__exit__(*exc)
+            if pending:
+                pending.clear()
+                feedback_manager.compact_store()
+
+    monkeypatch.setattr(feedback_manager, "_store_lock", ArchiveAfterRelease)
+    assert feedback_manager.add_feedback("newest praise", "Positive") is not None
+    # The write's own message comes after the compaction's, with the position it wrote
+    assert [m["position"] for m in messages] == [OLD + NEW + 1, OLD + NEW + 1]
+    assert feedback_manager.get_hot_window()[1] == OLD
+    assert messages[1]["entries"][0]["text"] == "newest praise"
+
+def test_index_failure_does_not_fail_the_write(store, monkeypatch):
+    feedback_manager.get_dedup_index()
+
+    def broken(feedback, offset):
+        raise RuntimeError("index is broken")
+
+    monkeypatch.setattr(feedback_manager, "_sync_dedup_index", broken)
+    assert feedback_manager.add_feedback("newest praise", "Positive")["text"] == "newest praise"
+    assert feedback_manager.add_batch_feedback([{"text": "batch praise", "sentiment": "Positive"}]) == 1
+    assert [e["text"] for e in feedback_manager.get_all_feedback()[-2:]] == ["newest praise", "batch praise"]
+
+def test_missing_score_sketches_are_rebuilt_from_the_archive(store):
+    feedback_manager.compact_store()
+    os.remove(score_sketch.STATS_FILE)
+    score_sketch._cached = None
+
+    stats = feedback_manager.get_score_stats()
+    assert stats.position == OLD + NEW
+    assert stats.report(sentiment="negative")["count"] == OLD
+    # The next write folds in just the new entry
+    feedback_manager.add_feedback("newest praise", "Positive", score=0.9)
+    stats = score_sketch.load_stats()
+    assert (stats.position, stats.report()["count"]) == (OLD + NEW + 1, OLD + NEW + 1)
@@ -0,0 +1,219 @@
+"""LLM router hedging: when a hedge fires, which answer wins, and how
+abandoned calls are counted against Gemini admission
+
+Run with:
+
+    python -m pytest tests
+"""
+import threading
+import time
+
+import pytest
+
+import admission
+import llm_router
+
+P95 = 0.1  # Seeded latency of every past call, so the hedge delay
+
+class ScriptedModel:
+    """Each call runs the next scripted step: (answer, seconds or threading.Event to wait for)"""
+
+    def __init__(self, *steps):
+        self.steps = list(steps)
+        self.started = []
+        self.finished = []
+        self._lock = threading.Lock()
+
+    def generate_content(self, prompt, **kwargs):
+        with self._lock:
+            index = len(self.started)
+            self.started.append(time.monotonic())
+            answer, wait = self.steps[index]
+        if isinstance(wait, threading.Event):
+            wait.wait(5)
+        else:
+            time.sleep(wait)
+        with self._lock:
+            self.finished.append(index)
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+
+@pytest.fixture
+def gemini(monkeypatch):
+    """A fresh Gemini limiter with room for a hedge"""
+    limiter = admission.Limiter("gemini", 4, max_wait=0.05)
+    monkeypatch.setitem(admission.limiters, "gemini", limiter)
+    monkeypatch.setitem(admission.UPSTREAM_RATES, "gemini", 0)
+    return limiter
+
+def make_router(model, timeout=2, **kwargs):
+    router = llm_router.Router(tiers=[("fake", None)], model_factory=lambda name: model, timeout=timeout,
+                               **kwargs)
+    for _ in range(llm_router.MIN_SAMPLES):
+        router.stats["fake"].record(P95)
+    return router
+
+def active(limiter):
+    return limiter.get_stats()["lanes"][admission.INTERACTIVE]["active"]
+
+def wait_for(condition, timeout=2):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition never held"
+        time.sleep(0.005)
+
+# -------------------------------
+# When a hedge fires
+# -------------------------------
+def test_no_hedge_before_p95(gemini):
+    model = ScriptedModel(("primary", P95 / 4))
+    router = make_router(model)
+    with admission.acquire("gemini"):
+        assert router.generate("prompt") == "primary"
+    assert len(model.started) == 1
+    assert router.stats["fake"].hedges == 0
+
+def test_no_hedge_without_latency_history(gemini):
+    model = ScriptedModel(("primary", P95 * 2))
+    router = llm_router.Router(tiers=[("fake", None)], model_factory=lambda name: model, timeout=2)
+    with admission.acquire("gemini"):
+        assert router.generate("prompt") == "primary"
+    assert len(model.started) == 1
+
+def test_hedge_fires_after_p95(gemini):
+    release = threading.Event()
+    model = ScriptedModel(("primary", release), ("hedge", 0))
+    router = make_router(model)
+    try:
+        with admission.acquire("gemini"):
+            assert router.generate("prompt") == "hedge"
+    finally:
+        release.set()
+    assert len(model.started) == 2
+    assert model.started[1] - model.started[0] >= P95 * 0.9
+    stats = router.stats["fake"]
+    assert (stats.hedges, stats.hedge_wins) == (1, 1)
+
+def test_hedge_disabled(gemini):
+    model = ScriptedModel(("primary", P95 * 2))
+    router = make_router(model, hedge=False)
+    with admission.acquire("gemini"):
+        assert router.generate("prompt") == "primary"
+    assert len(model.started) == 1
+
+def test_hedge_skipped_without_a_free_slot(gemini):
+    model = ScriptedModel(("primary", P95 * 2))
+    router = make_router(model)
+    with admission.acquire("gemini"):
+        others = [gemini.acquire() for _ in range(gemini.limit - 1)]
+        assert router.generate("prompt") == "primary"
+        for ticket in others:
+            ticket.release()
+    assert len(model.started) == 1
+    assert router.stats["fake"].hedges_skipped == 1
+
+def test_hedge_skipped_over_the_hedge_cap(gemini):
+    model = ScriptedModel(("primary", P95 * 2))
+    router = make_router(model, max_hedges=1)
+    router._hedges_running = 1
+    with admission.acquire("gemini"):
+        assert router.generate("prompt") == "primary"
+    assert len(model.started) == 1
+    assert router.stats["fake"].hedges_skipped == 1
+
+# -------------------------------
+# Which answer wins
+# -------------------------------
+def test_primary_wins_when_it_answers_first(gemini):
+    release_hedge = threading.Event()
+    model = ScriptedModel(("primary", P95 * 2), ("hedge", release_hedge))
+    router = make_router(model)
+    try:
+        with admission.acquire("gemini"):
+            assert router.generate("prompt") == "primary"
+    finally:
+        release_hedge.set()
+    assert len(model.started) == 2
+    stats = router.stats["fake"]
+    assert (stats.hedges, stats.hedge_wins) == (1, 0)
+
+def test_failed_primary_falls_back_to_the_hedge(gemini):
+    fail = threading.Event()
+    model = ScriptedModel((RuntimeError("primary failed"), fail), ("hedge", P95))
+    router = make_router(model)
+    with admission.acquire("gemini"):
+        threading.Timer(P95 * 1.5, fail.set).start()
+        assert router.generate("prompt") == "hedge"
+
+def test_error_is_raised_when_every_call_fails(gemini):
+    model = ScriptedModel((RuntimeError("primary failed"), 0))
+    router = make_router(model)
+    with admission.acquire("gemini"):
+        with pytest.raises(RuntimeError, match="primary failed"):
+            router.generate("prompt")
+
+# -------------------------------
+# Admission accounting
+# -------------------------------
+def test_losing_calls_keep_their_slots_until_they_finish(gemini):
+    release = threading.Event()
+    model = ScriptedModel(("primary", release), ("hedge", 0))
+    router = make_router(model)
+    with admission.acquire("gemini"):
+        assert router.generate("prompt") == "hedge"
+        wait_for(lambda: router.get_stats()["hedges_running"] == 0)
+        # The caller's slot and the abandoned primary
+        assert active(gemini) == 2
+    assert active(gemini) == 1
+    assert router.get_stats()["abandoned_running"] == 1
+    assert gemini.get_stats()["lanes"][admission.INTERACTIVE]["abandoned"] == 1
+
+    release.set()
+    wait_for(lambda: active(gemini) == 0)
+    assert router.get_stats()["abandoned_running"] == 0
+
+def test_losing_hedge_keeps_its_slot_until_it_finishes(gemini):
+    release_hedge = threading.Event()
+    model = ScriptedModel(("primary", P95 * 2), ("hedge", release_hedge))
+    router = make_router(model)
+    with admission.acquire("gemini"):
+        assert router.generate("prompt") == "primary"
+    assert active(gemini) == 1
+    assert router.get_stats()["hedges_running"] == 1
+
+    release_hedge.set()
+    wait_for(lambda: active(gemini) == 0)
+    assert router.get_stats()["hedges_running"] == 0
+
+def test_timed_out_primary_keeps_its_slot(gemini):
+    release = threading.Event()
+    model = ScriptedModel(("primary", release))
+    router = make_router(model, timeout=0.05, hedge=False)
+    with admission.acquire("gemini"):
+        with pytest.raises(TimeoutError):
+            router.generate("prompt")
+    assert active(gemini) == 1
+    assert router.get_stats()["abandoned_running"] == 1
+
+    release.set()
+    wait_for(lambda: active(gemini) == 0)
+    assert router.get_stats()["abandoned_running"] == 0
+
+def test_abandoned_call_holds_back_new_callers(gemini):
+    release = threading.Event()
+    model = ScriptedModel(("primary", release))
+    router = make_router(model, timeout=0.05, hedge=False)
+    with admission.acquire("gemini"):
+        others = [gemini.acquire() for _ in range(gemini.limit - 1)]
+        with pytest.raises(TimeoutError):
+            router.generate("prompt")
+    for ticket in others:
+        ticket.release()
+    # Three slots are free again; the fourth is still the abandoned primary
+    tickets = [gemini.try_acquire() for _ in range(gemini.limit - 1)]
+    assert all(tickets)
+    assert gemini.try_acquire() is None
+    release.set()
+    wait_for(lambda: active(gemini) == len(tickets))
+    assert gemini.try_acquire() is not None
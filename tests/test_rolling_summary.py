@@ -0,0 +1,190 @@
+"""Rolling alert summaries: which texts an alert still has to send, and what
+gets folded into each window's summary
+
+The Gemini call is replaced by a recorder. Run with:
+
+    python -m pytest tests
+"""
+import sys
+import types
+
+import pytest
+
+import admission
+import coordination
+import rolling_summary
+
+WINDOW = rolling_summary.WINDOW
+NOW = 1_700_000_000 // WINDOW * WINDOW + 60  # A minute into a window
+
+@pytest.fixture
+def summarizer(monkeypatch):
+    """Fresh memory backend and Gemini limiter, and a recorded summarize_feedback"""
+    monkeypatch.setattr(coordination, "_backend", coordination.MemoryBackend())
+    monkeypatch.setitem(admission.limiters, "gemini", admission.Limiter("gemini", 4, max_wait=0.05))
+    monkeypatch.setattr(rolling_summary, "ENABLED", True)
+    calls = []
+
+    def summarize_feedback(previous, texts, scores):
+        calls.append((previous, list(texts), list(scores)))
+        return f"summary v{len(calls)} of {len(texts)} texts"
+
+    monkeypatch.setitem(sys.modules, "gemini_helper", types.SimpleNamespace(summarize_feedback=summarize_feedback))
+    return calls
+
+def alert(texts, scores=None, now=NOW, stream="default"):
+    """prepare() and the fold an alert schedules, run in this thread"""
+    scores = scores or [0.2] * len(texts)
+    context = rolling_summary.prepare(stream, texts, scores, now=now)
+    if context["texts"]:
+        rolling_summary._fold(context["stream"], context["window"], context["texts"], context["scores"])
+    return context
+
+def record(start=NOW, stream="default"):
+    return coordination.get_backend().get_value(rolling_summary._key(stream, start // WINDOW * WINDOW))
+
+# -------------------------------
+# prepare
+# -------------------------------
+def test_first_alert_sends_every_text(summarizer):
+    context = rolling_summary.prepare("default", ["late", "rude"], [0.1, 0.3], now=NOW)
+    assert context["summaries"] == []
+    assert (context["texts"], context["scores"], context["covered"]) == (["late", "rude"], [0.1, 0.3], 0)
+    assert context["window"] == NOW // WINDOW * WINDOW
+    assert rolling_summary.describe(context) == {"stream": "default", "windows": 0, "covered": 0, "new": 2}
+
+def test_disabled(summarizer, monkeypatch):
+    monkeypatch.setattr(rolling_summary, "ENABLED", False)
+    assert rolling_summary.prepare("default", ["late"], [0.1], now=NOW) is None
+
+def test_summarized_texts_leave_the_delta(summarizer):
+    alert(["Delivery was late", "Support was rude"], [0.1, 0.3])
+    # Case and whitespace do not make a text new
+    context = rolling_summary.prepare("default", ["delivery  was LATE", "App crashes", "Support was rude"],
+                                      [0.1, 0.2, 0.3], now=NOW + 10)
+    assert (context["texts"], context["scores"], context["covered"]) == (["App crashes"], [0.2], 2)
+    assert [s["summary"] for s in context["summaries"]] == ["summary v1 of 2 texts"]
+    summary = context["summaries"][0]
+    assert (summary["count"], summary["version"], summary["min_score"]) == (2, 1, 0.1)
+    assert summary["average_score"] == pytest.approx(0.2)
+
+def test_streams_are_separate(summarizer):
+    alert(["Delivery was late"])
+    context = rolling_summary.prepare("billing", ["Delivery was late"], [0.1], now=NOW)
+    assert (context["texts"], context["summaries"]) == (["Delivery was late"], [])
+
+# -------------------------------
+# fold
+# -------------------------------
+def test_fold_sends_only_the_delta(summarizer):
+    alert(["late", "rude"], [0.1, 0.3])
+    alert(["late", "rude", "crash"], [0.1, 0.3, 0.05], now=NOW + 10)
+    # The second fold summarized the previous summary plus the one new text
+    assert summarizer == [("", ["late", "rude"], [0.1, 0.3]),
+                          ("summary v1 of 2 texts", ["crash"], [0.05])]
+    saved = record()
+    assert (saved["version"], saved["count"], saved["min_score"]) == (2, 3, 0.05)
+    assert saved["score_sum"] == pytest.approx(0.45)
+    assert len(saved["fingerprints"]) == 3
+
+def test_fold_skips_texts_already_folded(summarizer):
+    # Two alerts raced and both saw "late" as new; only one fold summarizes it
+    first = rolling_summary.prepare("default", ["late"], [0.1], now=NOW)
+    second = rolling_summary.prepare("default", ["late", "rude"], [0.1, 0.3], now=NOW)
+    rolling_summary._fold(first["stream"], first["window"], first["texts"], first["scores"])
+    rolling_summary._fold(second["stream"], second["window"], second["texts"], second["scores"])
+    assert [texts for _, texts, _ in summarizer] == [["late"], ["rude"]]
+    rolling_summary._fold(second["stream"], second["window"], second["texts"], second["scores"])
+    assert len(summarizer) == 2
+    assert record()["version"] == 2
+
+def test_fold_runs_in_the_background(summarizer):
+    context = rolling_summary.prepare("default", ["late"], [0.1], now=NOW)
+    rolling_summary.fold(context)
+    rolling_summary._executor.submit(lambda: None).result(timeout=5)
+    assert record()["summary"] == "summary v1 of 1 texts"
+    # Nothing new, nothing to fold
+    rolling_summary.fold(rolling_summary.prepare("default", ["late"], [0.1], now=NOW))
+    rolling_summary.fold(None)
+    rolling_summary._executor.submit(lambda: None).result(timeout=5)
+    assert len(summarizer) == 1
+
+# -------------------------------
+# Windows
+# -------------------------------
+def test_new_window_gets_its_own_summary(summarizer):
+    alert(["late"])
+    context = alert(["late", "rude"], now=NOW + WINDOW)
+    # The earlier window still covers "late"; only "rude" starts the new one
+    assert context["texts"] == ["rude"]
+    assert record(NOW)["fingerprints"] != record(NOW + WINDOW)["fingerprints"]
+    assert record(NOW + WINDOW)["version"] == 1
+    context = rolling_summary.prepare("default", ["late", "rude"], [0.2, 0.2], now=NOW + WINDOW + 1)
+    assert context["texts"] == []
+    assert [s["summary"] for s in context["summaries"]] == ["summary v1 of 1 texts", "summary v2 of 1 texts"]
+    assert context["summaries"][0]["start"] < context["summaries"][1]["start"]
+
+def test_windows_older_than_the_span_no_longer_cover(summarizer):
+    alert(["late"])
+    last = NOW + (rolling_summary.WINDOWS - 1) * WINDOW
+    assert rolling_summary.prepare("default", ["late"], [0.2], now=last)["texts"] == []
+    # One window later the summary is out of range, so the text is sent again
+    stale = rolling_summary.prepare("default", ["late"], [0.2], now=last + WINDOW)
+    assert (stale["texts"], stale["summaries"]) == (["late"], [])
+
+# -------------------------------
+# Fallbacks
+# -------------------------------
+def test_missing_summary_keeps_texts_in_the_delta(summarizer):
+    backend = coordination.get_backend()
+    key = rolling_summary._key("default", NOW // WINDOW * WINDOW)
+    backend.set_value(key, dict(rolling_summary._empty(), fingerprints=[rolling_summary.fingerprint("late")]))
+    context = rolling_summary.prepare("default", ["late"], [0.2], now=NOW)
+    assert (context["texts"], context["summaries"]) == (["late"], [])
+
+def test_expired_record_keeps_texts_in_the_delta(summarizer):
+    alert(["late"])
+    coordination.get_backend().set_value(rolling_summary._key("default", NOW // WINDOW * WINDOW), None)
+    assert rolling_summary.prepare("default", ["late"], [0.2], now=NOW)["texts"] == ["late"]
+
+def test_failed_fold_leaves_texts_new(summarizer, monkeypatch):
+    def broken(previous, texts, scores):
+        raise RuntimeError("Gemini is down")
+
+    monkeypatch.setitem(sys.modules, "gemini_helper", types.SimpleNamespace(summarize_feedback=broken))
+    failed = rolling_summary.get_stats()["failed"]
+    alert(["late"])
+    assert rolling_summary.get_stats()["failed"] == failed + 1
+    assert record() is None
+    assert rolling_summary.prepare("default", ["late"], [0.2], now=NOW)["texts"] == ["late"]
+
+def test_empty_summary_is_not_saved(summarizer, monkeypatch):
+    monkeypatch.setitem(sys.modules, "gemini_helper",
+                        types.SimpleNamespace(summarize_feedback=lambda previous, texts, scores: "  "))
+    alert(["late"])
+    assert record() is None
+
+def test_shed_fold_leaves_texts_new(summarizer):
+    limiter = admission.limiters["gemini"]
+    tickets = [limiter.acquire() for _ in range(limiter.limit)]
+    try:
+        shed = rolling_summary.get_stats()["shed"]
+        alert(["late"])
+        assert rolling_summary.get_stats()["shed"] == shed + 1
+    finally:
+        for ticket in tickets:
+            ticket.release()
+    assert summarizer == []
+    assert rolling_summary.prepare("default", ["late"], [0.2], now=NOW)["texts"] == ["late"]
+    alert(["late"])
+    assert record()["version"] == 1
+
+# -------------------------------
+# Prompt
+# -------------------------------
+def test_format_summaries(summarizer):
+    alert(["late", "rude"], [0.1, 0.3])
+    context = rolling_summary.prepare("default", [], [], now=NOW)
+    text = rolling_summary.format_summaries(context["summaries"])
+    assert text.startswith("- Window from ")
+    assert "(2 texts, average score 0.20, minimum 0.10):\n  summary v1 of 2 texts" in text
@@ -0,0 +1,153 @@
+"""Score sketches: histograms, KLL quantiles and their merges, and keeping
+the persisted sketches in step with the store
+
+Run with:
+
+    python -m pytest tests
+"""
+import random
+
+import pytest
+
+import score_sketch
+
+@pytest.fixture(autouse=True)
+def seeded():
+    """KLL compaction picks a random half; fix it so failures reproduce"""
+    random.seed(1234)
+
+@pytest.fixture
+def stats_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(score_sketch, "_cached", None)
+    monkeypatch.setattr(score_sketch, "_cached_mtime", None)
+    return str(tmp_path / "feedback_stats.json")
+
+def rank_error(values, estimate, q):
+    """How far estimate's rank is from q, as a fraction of len(values)"""
+    below = sum(v <= estimate for v in values) / len(values)
+    return abs(below - q)
+
+# -------------------------------
+# Histogram
+# -------------------------------
+def test_histogram_bins_and_bounds():
+    histogram = score_sketch.Histogram(bins=4)
+    for value in (0.0, 0.1, 0.25, 0.5, 0.99, 1.0, -0.2, 1.7):
+        histogram.update(value)
+    # 1.0 and out-of-range values land in the edge bins
+    assert histogram.counts == [3, 1, 1, 3]
+    assert histogram.edges() == [0.0, 0.25, 0.5, 0.75, 1.0]
+
+def test_histogram_merge_and_round_trip():
+    a, b = score_sketch.Histogram(bins=4), score_sketch.Histogram(bins=4)
+    a.update(0.1)
+    b.update(0.1)
+    b.update(0.9)
+    merged = score_sketch.Histogram.from_dict(a.merge(b).to_dict())
+    assert merged.counts == [2, 0, 0, 1]
+
+# -------------------------------
+# KLL quantiles
+# -------------------------------
+def test_kll_is_exact_while_small():
+    sketch = score_sketch.KLLSketch(k=200)
+    for value in range(1, 101):
+        sketch.update(value / 100)
+    assert sketch.quantiles((0.0, 0.5, 0.9, 1.0)) == [0.01, 0.5, 0.9, 1.0]
+
+def test_kll_empty():
+    assert score_sketch.KLLSketch().quantiles((0.5, 0.9)) == [None, None]
+
+def test_kll_quantiles_within_rank_error():
+    values = [random.betavariate(2, 5) for _ in range(50000)]
+    sketch = score_sketch.KLLSketch()
+    for value in values:
+        sketch.update(value)
+    assert sketch.n == len(values)
+    # Memory stays O(k) however many values were added
+    assert sketch._size() < 3 * sketch.k
+    for q, estimate in zip((0.1, 0.5, 0.9, 0.99), sketch.quantiles((0.1, 0.5, 0.9, 0.99))):
+        assert rank_error(values, estimate, q) < 0.02
+
+def test_kll_merge_matches_one_sketch_over_all_values():
+    parts = [[random.random() ** 2 for _ in range(8000)] for _ in range(5)]
+    merged = score_sketch.KLLSketch()
+    for part in parts:
+        sketch = score_sketch.KLLSketch()
+        for value in part:
+            sketch.update(value)
+        merged.merge(score_sketch.KLLSketch.from_dict(sketch.to_dict()))
+    values = [v for part in parts for v in part]
+    assert merged.n == len(values)
+    assert merged._size() < 3 * merged.k
+    for q, estimate in zip((0.25, 0.5, 0.75, 0.95), merged.quantiles((0.25, 0.5, 0.75, 0.95))):
+        assert rank_error(values, estimate, q) < 0.02
+
+# -------------------------------
+# Summaries and groups
+# -------------------------------
+def test_summary_report_and_merge():
+    a, b = score_sketch.ScoreSummary(), score_sketch.ScoreSummary()
+    for score in (0.2, 0.4, None):
+        a.update(score)
+    b.update(0.9)
+    report = a.merge(b).report()
+    assert (report["count"], report["scored"], report["min"], report["max"]) == (4, 3, 0.2, 0.9)
+    assert report["mean"] == pytest.approx(0.5)
+    assert report["p50"] == 0.4
+    assert sum(report["histogram"]["counts"]) == 3
+
+def test_unscored_summary():
+    summary = score_sketch.ScoreSummary()
+    summary.update(None)
+    report = summary.report()
+    assert (report["count"], report["scored"], report["mean"], report["p50"]) == (1, 0, None, None)
+
+def test_stats_group_by_source_and_sentiment():
+    stats = score_sketch.ScoreStats().sync([
+        {"source": "analysis", "sentiment": "negative", "score": 0.9},
+        {"source": "analysis", "sentiment": "Negative", "score": 0.7},
+        {"source": "batch", "sentiment": "Positive", "score": 0.8},
+        {"sentiment": "Neutral"},
+    ])
+    assert stats.position == 4
+    assert stats.report(sentiment="negative")["count"] == 2
+    assert stats.report(source="batch")["max"] == 0.8
+    assert stats.report()["count"] == 4
+    assert [g["source"] for g in stats.report(sentiment="neutral")["groups"]] == ["unknown"]
+
+def test_sync_counts_only_new_entries_across_archival():
+    feedback = [{"source": "a", "sentiment": "Positive", "score": 0.1 * i} for i in range(6)]
+    stats = score_sketch.ScoreStats().sync(feedback)
+    # Four entries were archived and two appended: only the two new ones count
+    stats.sync(feedback[4:] + [{"source": "a", "sentiment": "Positive", "score": 0.9}] * 2, offset=4)
+    assert (stats.position, stats.report()["count"]) == (8, 8)
+    # The store shrank below what was counted: start over
+    stats.sync(feedback[:2])
+    assert (stats.position, stats.report()["count"]) == (2, 2)
+
+# -------------------------------
+# Persistence
+# -------------------------------
+def test_update_stats_needs_a_saved_file(stats_file):
+    # Fresh sketches are rebuilt from the archive by the caller, not from position 0
+    assert score_sketch.update_stats([{"score": 0.5}], stats_file, offset=10) is None
+
+def test_update_stats_folds_into_the_saved_sketches(stats_file):
+    archived = score_sketch.ScoreStats().sync([{"source": "a", "sentiment": "Negative", "score": 0.2}] * 3)
+    score_sketch.save_stats(archived, stats_file)
+    hot = [{"source": "a", "sentiment": "Negative", "score": 0.8}]
+    updated = score_sketch.update_stats(hot, stats_file, offset=3)
+    assert (updated.position, updated.report()["count"]) == (4, 4)
+    # Syncing the same list again adds nothing
+    assert score_sketch.update_stats(hot, stats_file, offset=3).report()["count"] == 4
+
+    score_sketch._cached = None
+    loaded = score_sketch.load_stats(stats_file)
+    assert (loaded.position, loaded.report()["max"]) == (4, 0.8)
+
+def test_unreadable_stats_file(stats_file):
+    with open(stats_file, "w") as f:
+        f.write("{not json")
+    assert score_sketch.load_stats(stats_file) is None
+    assert score_sketch.update_stats([{"score": 0.5}], stats_file) is None
@@ -0,0 +1,94 @@
+"""Compact store helpers the feedback hot cache and GET /api/feedback rely on
+
+Run with:
+
+    python -m pytest tests
+"""
+import pytest
+
+import serialization
+
+def store_bytes(entries):
+    return serialization.dumps({"feedback": entries})
+
+def append(raw, entries):
+    """raw with entries appended the way add_feedback writes them"""
+    return store_bytes(serialization.loads(raw)["feedback"] + entries)
+
+# -------------------------------
+# list_tail / appended_entries
+# -------------------------------
+def test_appended_entries_returns_only_new_entries():
+    raw = store_bytes([{"text": "first"}])
+    tail = serialization.list_tail(raw)
+    grown = append(raw, [{"text": "second"}, {"text": "third"}])
+    entries, new_tail = serialization.appended_entries(grown, tail)
+    assert entries == [{"text": "second"}, {"text": "third"}]
+    assert new_tail == serialization.list_tail(grown)
+
+    # The returned tail chains into the next append
+    again = append(grown, [{"text": "fourth"}])
+    assert serialization.appended_entries(again, new_tail)[0] == [{"text": "fourth"}]
+
+def test_appended_entries_unchanged_store():
+    raw = store_bytes([{"text": "first"}])
+    tail = serialization.list_tail(raw)
+    assert serialization.appended_entries(raw, tail) == ([], tail)
+
+def test_appended_entries_non_ascii():
+    raw = store_bytes([{"text": "très bien 👍"}])
+    tail = serialization.list_tail(raw)
+    grown = append(raw, [{"text": "ужасно", "sentiment": "negative"}, {"text": "很好"}])
+    entries, new_tail = serialization.appended_entries(grown, tail)
+    assert entries == [{"text": "ужасно", "sentiment": "negative"}, {"text": "很好"}]
+    assert new_tail == serialization.list_tail(grown)
+
+def test_appended_entries_rejects_rewritten_prefix():
+    raw = store_bytes([{"text": "first"}, {"text": "second"}])
+    tail = serialization.list_tail(raw)
+    # Earlier bytes changed: archival or an edit, not an append
+    rewritten = store_bytes([{"text": "FIRST"}, {"text": "second"}, {"text": "third"}])
+    assert serialization.appended_entries(rewritten, tail) is None
+
+def test_appended_entries_rejects_shorter_store():
+    raw = store_bytes([{"text": "first"}, {"text": "second"}])
+    tail = serialization.list_tail(raw)
+    assert serialization.appended_entries(store_bytes([{"text": "first"}]), tail) is None
+
+def test_appended_entries_rejects_partial_append():
+    raw = store_bytes([{"text": "first"}])
+    tail = serialization.list_tail(raw)
+    grown = append(raw, [{"text": "second"}])
+    # A reader that catches a write half way sees a file without the closing bytes
+    for cut in (len(raw) + 3, len(grown) - 1):
+        assert serialization.appended_entries(grown[:cut], tail) is None
+
+def test_appended_entries_after_empty_list():
+    raw = store_bytes([])
+    tail = serialization.list_tail(raw)
+    assert serialization.appended_entries(store_bytes([{"text": "first"}]), tail) is None
+    assert serialization.appended_entries(store_bytes([]), None) is None
+
+def test_list_tail_rejects_other_layouts():
+    assert serialization.list_tail(b"") is None
+    assert serialization.list_tail(b'{ "feedback": []}') is None
+    assert serialization.list_tail(b'[{"text": "first"}]') is None
+
+# -------------------------------
+# iter_feedback_bytes
+# -------------------------------
+def test_iter_feedback_bytes_streams_the_list(tmp_path):
+    path = tmp_path / "feedback_data.json"
+    entries = [{"text": "é" * 50, "n": i} for i in range(100)]
+    serialization.write_store(str(path), {"feedback": entries})
+    chunks = serialization.iter_feedback_bytes(str(path), chunk_size=256)
+    assert serialization.loads(b"".join(chunks)) == entries
+
+@pytest.mark.parametrize("content", [b"", b"}", b'{"feedback":', b'{"feedback":}', b'{ "feedback": []}'])
+def test_iter_feedback_bytes_falls_back_on_short_or_other_files(tmp_path, content):
+    path = tmp_path / "feedback_data.json"
+    path.write_bytes(content)
+    assert serialization.iter_feedback_bytes(str(path)) is None
+
+def test_iter_feedback_bytes_missing_file(tmp_path):
+    assert serialization.iter_feedback_bytes(str(tmp_path / "missing.json")) is None
@@ -0,0 +1,65 @@
+"""Term tracker windows and the versions the dashboard uses to skip unchanged updates
+
+Run with:
+
+    python -m pytest tests
+"""
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+import term_tracker
+
+def entry(text, stamp):
+    """An entry stamped the way the store writes them: naive UTC"""
+    return {"text": text, "sentiment": "Negative", "timestamp": stamp.isoformat()}
+
+@pytest.fixture(params=["Asia/Kolkata", "America/Los_Angeles"])
+def local_timezone(request, monkeypatch):
+    """Run under a local time zone east or west of UTC"""
+    if not hasattr(time, "tzset"):
+        pytest.skip("time.tzset is not available")
+    monkeypatch.setenv("TZ", request.param)
+    time.tzset()
+    yield request.param
+    monkeypatch.undo()
+    time.tzset()
+
+def test_window_version_moves_with_new_entries_and_time():
+    tracker = term_tracker.TermTracker(windows=("1h",))
+    before = tracker.window_version("1h")
+    assert tracker.window_version("1h") == before
+
+    tracker.sync([entry("delivery was late", datetime.utcnow())])
+    counted = tracker.window_version("1h")
+    assert counted != before
+    assert tracker.top("1h", "negative")[0]["count"] == 1
+
+    # No new entries, but a bucket of the window expired
+    later = time.time() + 3600 / term_tracker.BUCKETS_PER_WINDOW
+    assert tracker.window_version("1h", now=later) != counted
+    assert tracker.window_version(term_tracker.ALL, now=later) == tracker.window_version(term_tracker.ALL)
+
+def test_windows_read_stored_timestamps_as_utc(local_timezone):
+    now = datetime.utcnow()
+    tracker = term_tracker.TermTracker(windows=("1h", "24h"))
+    tracker.sync([
+        entry("delivery was late", now),
+        entry("refund never arrived", now - timedelta(hours=2)),
+    ])
+    # East of UTC the recent entry fell out of the hour; west, the old one stayed in it
+    assert sorted(t["term"] for t in tracker.top("1h", "negative", limit=10)) == ["delivery", "late"]
+    assert sorted(t["term"] for t in tracker.top("24h", "negative", limit=10)) == \
+        ["arrived", "delivery", "late", "never", "refund"]
+
+def test_timezone_aware_and_missing_timestamps():
+    tracker = term_tracker.TermTracker(windows=("1h",))
+    tracker.sync([
+        {"text": "slow checkout", "sentiment": "Negative", "timestamp": datetime.utcnow().isoformat() + "Z"},
+        {"text": "broken login", "sentiment": "Negative"},
+        {"text": "ancient outage", "sentiment": "Negative", "timestamp": "2001-01-01T00:00:00+00:00"},
+    ])
+    assert sorted(t["term"] for t in tracker.top("1h", "negative", limit=10)) == \
+        ["broken", "checkout", "login", "slow"]
+    assert len(tracker.top(term_tracker.ALL, "negative", limit=10)) == 6
@@ -0,0 +1,211 @@
+import io
+import os
+import hmac
+import time
+import inspect
+import pstats
+import logging
+import threading
+import cProfile
+import functools
+import contextvars
+from contextlib import contextmanager
+from datetime import datetime
+
+import serialization
+
+# Optional sampling profiler
+try:
+    from pyinstrument import Profiler
+except ImportError:  # pragma: no cover - depends on the environment
+    Profiler = None
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Spans are collected per request and reported in a Server-Timing header.
+# TRACE_LOG additionally appends one JSON line per request (or only those
+# slower than TRACE_LOG_MIN_MS). A request carrying X-Profile set to
+# PROFILE_TOKEN is profiled and the report written under PROFILE_DIR.
+TRACE_LOG = os.getenv('TRACE_LOG', '')
+TRACE_LOG_MIN_MS = float(os.getenv('TRACE_LOG_MIN_MS', '0'))
+PROFILE_TOKEN = os.getenv('PROFILE_TOKEN', '')  # Profiling is disabled while unset
+PROFILE_DIR = os.getenv('PROFILE_DIR', 'profiles')
+PROFILE_HEADER = 'X-Profile'
+
+class Trace:
+    """Spans recorded while handling one request"""
+
+    def __init__(self, name):
+        self.name = name
+        self.started = time.perf_counter()
+        self.spans = []  # (name, duration in ms)
+
+    def add(self, name, duration_ms):
+        self.spans.append((name, duration_ms))
+
+    def total_ms(self):
+        return (time.perf_counter() - self.started) * 1000
+
+    def summary(self):
+        """Total duration and call count per span name, in first-seen order"""
+        totals = {}
+        for name, duration in self.spans:
+            total, count = totals.get(name, (0.0, 0))
+            totals[name] = (total + duration, count + 1)
+        return totals
+
+    def server_timing(self):
+        """Value for the Server-Timing header"""
+        parts = []
+        for name, (total, count) in self.summary().items():
+            desc = f';desc="{count} calls"' if count > 1 else ''
+            parts.append(f"{name};dur={total:.1f}{desc}")
+        parts.append(f"total;dur={self.total_ms():.1f}")
+        return ", ".join(parts)
+
+_current = contextvars.ContextVar('trace', default=None)
+
+# -------------------------------
+# Spans
+# -------------------------------
+@contextmanager
+def span(name):
+    """Time a block into the current request's trace (no-op outside a request)"""
+    trace = _current.get()
+    if trace is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.add(name, (time.perf_counter() - started) * 1000)
+
+def traced(name):
+    """Decorator form of span for plain and async functions"""
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def start_trace(name):
+    """Begin collecting spans for the current request or task"""
+    trace = Trace(name)
+    return trace, _current.set(trace)
+
+def end_trace(token):
+    _current.reset(token)
+
+def current_trace():
+    return _current.get()
+
+# -------------------------------
+# Export
+# -------------------------------
+_log_lock = threading.Lock()
+
+def export_trace(trace, status):
+    """Append the trace to TRACE_LOG as one JSON line, if enabled"""
+    if not TRACE_LOG:
+        return
+    total = trace.total_ms()
+    if total < TRACE_LOG_MIN_MS:
+        return
+    record = {
+        "time": datetime.utcnow().isoformat(),
+        "request": trace.name,
+        "status": status,
+        "total_ms": round(total, 2),
+        "spans": [{"name": name, "ms": round(duration, 2)} for name, duration in trace.spans],
+    }
+    try:
+        with _log_lock, open(TRACE_LOG, 'ab') as f:
+            f.write(serialization.dumps(record) + b"\n")
+    except OSError as e:
+        logger.error(f"Failed to write trace log: {str(e)}")
+
+# -------------------------------
+# Profiling
+# -------------------------------
+def profiling_requested(token):
+    return bool(PROFILE_TOKEN) and hmac.compare_digest(token.encode('utf-8'), PROFILE_TOKEN.encode('utf-8'))
+
+class RequestProfiler:
+    """Profile one request with pyinstrument (sampling) or cProfile as a fallback"""
+
+    def __init__(self, name):
+        self.name = name
+        self.profiler = Profiler() if Profiler is not None else cProfile.Profile()
+
+    def start(self):
+        if Profiler is not None:
+            self.profiler.start()
+        else:
+            self.profiler.enable()
+
+    def stop(self):
+        """Stop profiling and write the report
+
+        Returns:
+            str: Path of the report
+        """
+        if Profiler is not None:
+            self.profiler.stop()
+            report = self.profiler.output_text(unicode=True, color=False)
+        else:
+            self.profiler.disable()
+            out = io.StringIO()
+            pstats.Stats(self.profiler, stream=out).sort_stats('cumulative').print_stats(40)
+            report = out.getvalue()
+
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        safe_name = "".join(c if c.isalnum() else "_" for c in self.name).strip("_") or "root"
+        path = os.path.join(PROFILE_DIR, f"{datetime.utcnow().strftime('%Y%m%dT%H%M%S%f')}-{safe_name}.txt")
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(report)
+        logger.info(f"Wrote request profile to {path}")
+        return path
+
+# -------------------------------
+# Flask integration
+# -------------------------------
+def init_app(app):
+    """Trace every request and add a Server-Timing header to the response"""
+    from flask import g, request
+
+    @app.before_request
+    def _start_request_trace():
+        g.trace, g.trace_token = start_trace(f"{request.method} {request.path}")
+        g.profiler = None
+        if profiling_requested(request.headers.get(PROFILE_HEADER, '')):
+            g.profiler = RequestProfiler(request.path)
+            g.profiler.start()
+
+    @app.after_request
+    def _finish_request_trace(response):
+        trace = g.pop('trace', None)
+        if trace is None:
+            return response
+        profiler = g.pop('profiler', None)
+        if profiler is not None:
+            response.headers['X-Profile-Report'] = os.path.basename(profiler.stop())
+        response.headers['Server-Timing'] = trace.server_timing()
+        export_trace(trace, response.status_code)
+        return response
+
+    @app.teardown_request
+    def _reset_request_trace(exc):
+        token = g.pop('trace_token', None)
+        if token is not None:
+            end_trace(token)